@@ -0,0 +1,55 @@
+"""add llm interpretations table and prompt reuse ttl
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 创建LLM解读表
+    op.create_table(
+        'llm_interpretations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('hexagram_number', sa.Integer(), nullable=False),
+        sa.Column('changing_mask', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('prompt_type', sa.String(length=50), nullable=False),
+        sa.Column('question_type', sa.String(length=50), nullable=False, server_default=''),
+        sa.Column('sub_type', sa.String(length=50), nullable=False, server_default=''),
+        sa.Column('fingerprint', sa.BigInteger(), nullable=False),
+        sa.Column('question', sa.Text(), nullable=False),
+        sa.Column('prompt_config_id', sa.Integer(), nullable=True),
+        sa.Column('prompt_version', sa.String(length=32), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('hit_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    
+    op.create_index('ix_llm_interpretations_id', 'llm_interpretations', ['id'])
+    op.create_index('ix_llm_interpretations_prompt_config_id', 'llm_interpretations', ['prompt_config_id'])
+    op.create_index(
+        'ix_llm_interpretations_lookup', 'llm_interpretations',
+        ['hexagram_number', 'changing_mask', 'prompt_type', 'question_type', 'sub_type', 'prompt_version']
+    )
+    
+    # Prompt配置：解读复用新鲜期
+    op.add_column('prompt_configs', sa.Column('reuse_ttl_hours', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('prompt_configs', 'reuse_ttl_hours')
+    op.drop_index('ix_llm_interpretations_lookup', table_name='llm_interpretations')
+    op.drop_index('ix_llm_interpretations_prompt_config_id', table_name='llm_interpretations')
+    op.drop_index('ix_llm_interpretations_id', table_name='llm_interpretations')
+    op.drop_table('llm_interpretations')
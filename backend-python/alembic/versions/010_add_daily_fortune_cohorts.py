@@ -0,0 +1,92 @@
+"""add daily fortune cohorts
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+# 按群组生成时用户行不再单独存储的字段
+COHORT_COLUMNS = [
+    ('summary', sa.Text()),
+    ('wealth', sa.Text()),
+    ('career', sa.Text()),
+    ('love', sa.Text()),
+    ('health', sa.Text()),
+    ('lucky_color', sa.String(length=50)),
+    ('lucky_direction', sa.String(length=50)),
+    ('lucky_time', sa.String(length=50)),
+    ('yi', postgresql.JSON(astext_type=sa.Text())),
+    ('ji', postgresql.JSON(astext_type=sa.Text())),
+    ('solar_term', sa.String(length=50)),
+    ('festival', sa.String(length=100)),
+]
+
+
+def upgrade() -> None:
+    # 创建每日运势群组表（每天每个 生肖×星座 一条）
+    op.create_table(
+        'daily_fortune_cohorts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('cohort_key', sa.String(length=64), nullable=False),
+        sa.Column('animal', sa.String(length=10), server_default='', nullable=False),
+        sa.Column('zodiac_sign', sa.String(length=20), server_default='', nullable=False),
+        sa.Column('score', sa.Integer(), nullable=False),
+        sa.Column('summary', sa.Text(), nullable=False),
+        sa.Column('wealth', sa.Text(), nullable=False),
+        sa.Column('career', sa.Text(), nullable=False),
+        sa.Column('love', sa.Text(), nullable=False),
+        sa.Column('health', sa.Text(), nullable=False),
+        sa.Column('lucky_color', sa.String(length=50), nullable=False),
+        sa.Column('lucky_direction', sa.String(length=50), nullable=False),
+        sa.Column('lucky_time', sa.String(length=50), nullable=False),
+        sa.Column('yi', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+        sa.Column('ji', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+        sa.Column('solar_term', sa.String(length=50), server_default='', nullable=True),
+        sa.Column('festival', sa.String(length=100), server_default='', nullable=True),
+        sa.Column('created_at', sa.Date(), server_default=sa.text('CURRENT_DATE'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('date', 'cohort_key', name='uq_daily_fortune_cohorts_date_key')
+    )
+    
+    op.create_index('ix_daily_fortune_cohorts_id', 'daily_fortune_cohorts', ['id'])
+    op.create_index('ix_daily_fortune_cohorts_date', 'daily_fortune_cohorts', ['date'])
+    
+    # 用户运势引用群组，群组内容不再逐行存储
+    op.add_column('daily_fortunes', sa.Column('cohort_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_daily_fortunes_cohort_id', 'daily_fortunes', 'daily_fortune_cohorts',
+        ['cohort_id'], ['id'], ondelete='CASCADE'
+    )
+    op.create_index('ix_daily_fortunes_cohort_id', 'daily_fortunes', ['cohort_id'])
+    for name, column_type in COHORT_COLUMNS:
+        op.alter_column('daily_fortunes', name, existing_type=column_type, nullable=True, server_default=None)
+
+
+def downgrade() -> None:
+    # 回退前把群组内容写回用户行
+    op.execute(
+        "UPDATE daily_fortunes AS f SET "
+        + ", ".join(f"{name} = COALESCE(f.{name}, c.{name})" for name, _ in COHORT_COLUMNS)
+        + " FROM daily_fortune_cohorts AS c WHERE f.cohort_id = c.id"
+    )
+    for name, column_type in COHORT_COLUMNS:
+        server_default = '' if name in ('solar_term', 'festival') else None
+        op.alter_column('daily_fortunes', name, existing_type=column_type, nullable=False,
+                        server_default=server_default)
+    op.drop_index('ix_daily_fortunes_cohort_id', table_name='daily_fortunes')
+    op.drop_constraint('fk_daily_fortunes_cohort_id', 'daily_fortunes', type_='foreignkey')
+    op.drop_column('daily_fortunes', 'cohort_id')
+    op.drop_index('ix_daily_fortune_cohorts_date', table_name='daily_fortune_cohorts')
+    op.drop_index('ix_daily_fortune_cohorts_id', table_name='daily_fortune_cohorts')
+    op.drop_table('daily_fortune_cohorts')
@@ -0,0 +1,39 @@
+"""ensure unique daily fortune per user and date
+
+003 在新建库时已创建 ix_daily_fortunes_user_date，但早期部署缺少该索引，
+并发生成留下了重复行。先按 (user_id, date) 去重（保留最早一条），再补建唯一索引。
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 删除重复运势，保留每个用户每天 id 最小的一条
+    op.execute(
+        """
+        DELETE FROM daily_fortunes AS f
+        USING daily_fortunes AS keep
+        WHERE f.user_id = keep.user_id
+          AND f.date = keep.date
+          AND f.id > keep.id
+        """
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_daily_fortunes_user_date "
+        "ON daily_fortunes (user_id, date)"
+    )
+
+
+def downgrade() -> None:
+    # 唯一索引在 003 中已定义，回退时保留
+    pass
@@ -0,0 +1,26 @@
+"""add pre-serialized result json to divination sessions
+
+已完成的占卜结果不再变化，完成时序列化一次存入 result_json，
+GET /divinations/{session_id} 直接返回这段字节。旧会话在首次读取时补写。
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('divination_sessions', sa.Column('result_json', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('divination_sessions', 'result_json')
@@ -0,0 +1,41 @@
+"""add day pillar to llm interpretation reuse key
+
+解读提示词含纳甲排盘（日柱定六神与旬空），复用键加入日柱。
+已有解读不知道生成时的日柱，升级时清空，之后按新键重新积累。
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute('DELETE FROM llm_interpretations')
+    op.add_column(
+        'llm_interpretations',
+        sa.Column('day_pillar', sa.String(length=8), nullable=False, server_default='')
+    )
+    op.drop_index('ix_llm_interpretations_lookup', table_name='llm_interpretations')
+    op.create_index(
+        'ix_llm_interpretations_lookup', 'llm_interpretations',
+        ['hexagram_number', 'changing_mask', 'day_pillar', 'prompt_type', 'question_type', 'sub_type',
+         'prompt_version']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_llm_interpretations_lookup', table_name='llm_interpretations')
+    op.create_index(
+        'ix_llm_interpretations_lookup', 'llm_interpretations',
+        ['hexagram_number', 'changing_mask', 'prompt_type', 'question_type', 'sub_type', 'prompt_version']
+    )
+    op.drop_column('llm_interpretations', 'day_pillar')
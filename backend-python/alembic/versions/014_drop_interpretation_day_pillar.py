@@ -0,0 +1,43 @@
+"""drop day pillar from llm interpretation reuse key
+
+按日柱分组后同卦同类问题只能在同一天复用。改为可复用解读的提示词不含
+由占卜日决定的排盘部分（日柱、旬空、六神），复用键不再需要日柱。
+已有解读的提示词含这些内容，升级时清空。
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '014'
+down_revision = '013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute('DELETE FROM llm_interpretations')
+    op.drop_index('ix_llm_interpretations_lookup', table_name='llm_interpretations')
+    op.create_index(
+        'ix_llm_interpretations_lookup', 'llm_interpretations',
+        ['hexagram_number', 'changing_mask', 'prompt_type', 'question_type', 'sub_type', 'prompt_version']
+    )
+    op.drop_column('llm_interpretations', 'day_pillar')
+
+
+def downgrade() -> None:
+    op.execute('DELETE FROM llm_interpretations')
+    op.add_column(
+        'llm_interpretations',
+        sa.Column('day_pillar', sa.String(length=8), nullable=False, server_default='')
+    )
+    op.drop_index('ix_llm_interpretations_lookup', table_name='llm_interpretations')
+    op.create_index(
+        'ix_llm_interpretations_lookup', 'llm_interpretations',
+        ['hexagram_number', 'changing_mask', 'day_pillar', 'prompt_type', 'question_type', 'sub_type',
+         'prompt_version']
+    )
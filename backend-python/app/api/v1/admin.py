@@ -1,19 +1,29 @@
 """配置管理路由"""
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 from sqlalchemy.orm.attributes import flag_modified
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 import json
+import asyncio
 import httpx
 from pathlib import Path
+from datetime import date, datetime
 from app.core.database import get_db
+from app.core.cache import get_cache_manager
+from app.core.config import settings
 from app.dependencies import get_current_user
 from app.models.user import User, UserRole
 from app.models.llm_config import LLMConfig
 from app.models.prompt_config import PromptConfig
+from app.services.casting_audit_service import CastingAuditService
+from app.services.daily_fortune_pregen import create_pregenerator, pregen_window
+from app.services.guest_fortune_cache import get_guest_fortune_cache
+from app.services.iching_service import CAST_MODE_MD5
+from app.services.interpretation_store import InterpretationStore
+from app.services.question_analyzer import ANALYSIS_CACHE, QuestionAnalyzer, load_question_model
 
 router = APIRouter()
 
@@ -65,6 +75,10 @@ class LLMTestRequest(BaseModel):
     mode: str = "block"
 
 
+# 影响解读内容的配置字段（修改后删除该配置生成的可复用解读）
+PROMPT_VERSION_FIELDS = {"template", "llm_config_id", "temperature", "max_tokens"}
+
+
 class AssistantConfigCreate(BaseModel):
     name: str
     scene: str
@@ -78,6 +92,7 @@ class AssistantConfigCreate(BaseModel):
     timeout_seconds: Optional[int] = 30
     is_enabled: Optional[bool] = True
     description: Optional[str] = None
+    reuse_ttl_hours: Optional[int] = None  # 解读复用新鲜期（小时），为空取全局配置，0 不复用
 
 
 class AssistantConfigUpdate(BaseModel):
@@ -93,6 +108,7 @@ class AssistantConfigUpdate(BaseModel):
     timeout_seconds: Optional[int] = None
     is_enabled: Optional[bool] = None
     description: Optional[str] = None
+    reuse_ttl_hours: Optional[int] = None
 
 
 # ==================== LLM 配置 ====================
@@ -338,6 +354,7 @@ async def get_assistant_configs(
                 "max_tokens": config.max_tokens,
                 "timeout_seconds": config.timeout_seconds,
                 "variables": config.variables,
+                "reuse_ttl_hours": config.reuse_ttl_hours,
                 "created_at": config.created_at.isoformat() if config.created_at else None,
                 "updated_at": config.updated_at.isoformat() if config.updated_at else None,
             }
@@ -384,10 +401,18 @@ async def update_assistant_config(
     for key, value in update_data.items():
         setattr(config, key, value)
     
+    # 模板、模型或生成参数变化后，该配置生成的解读不再复用
+    invalidated = 0
+    if update_data.keys() & PROMPT_VERSION_FIELDS:
+        invalidated = await InterpretationStore(db).invalidate_prompt(config.id)
+    
     await db.commit()
     await db.refresh(config)
     
-    return {"message": "更新成功", "data": {"id": config.id, "name": config.name}}
+    return {
+        "message": "更新成功",
+        "data": {"id": config.id, "name": config.name, "invalidated_interpretations": invalidated},
+    }
 
 
 @router.delete("/assistant/{config_id}", tags=["Assistant配置"])
@@ -403,6 +428,7 @@ async def delete_assistant_config(
     if not config:
         raise HTTPException(status_code=404, detail="配置不存在")
     
+    await InterpretationStore(db).invalidate_prompt(config.id)
     await db.delete(config)
     await db.commit()
     
@@ -589,3 +615,107 @@ async def test_assistant_config(
             },
             "rendered_prompt": rendered_prompt
         }
+
+
+# ==================== 系统监控 ====================
+
+@router.get("/cache/metrics", tags=["系统监控"])
+async def get_cache_metrics(
+    admin: User = Depends(require_admin),
+):
+    """获取缓存指标（命中、过期值返回、后台刷新失败等）"""
+    cache_manager = await get_cache_manager()
+    return {"data": cache_manager.get_metrics()}
+
+
+@router.get("/iching/casting-audit", tags=["系统监控"])
+async def get_casting_audit(
+    samples: int = Query(1_000_000, ge=1, le=settings.ICHING_AUDIT_MAX_SAMPLES, description="模拟卦数"),
+    mode: str = Query("model", description="模拟方式：model/digest/md5"),
+    seed: Optional[int] = Query(None, description="随机种子，便于复现"),
+    admin: User = Depends(require_admin),
+):
+    """起卦分布审计：蒙特卡洛模拟起卦，返回爻值、变爻数、六十四卦频率及卡方检验"""
+    if mode not in CastingAuditService.MODES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"不支持的模拟方式: {mode}")
+    if mode == CAST_MODE_MD5 and samples > CastingAuditService.MAX_MD5_SAMPLES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"md5 兼容模式最多模拟 {CastingAuditService.MAX_MD5_SAMPLES} 卦",
+        )
+
+    # CPU 密集，放到线程池执行，不阻塞事件循环
+    report = await asyncio.to_thread(CastingAuditService.run, samples, mode, seed)
+    return {"data": report}
+
+
+@router.get("/question-model", tags=["系统监控"])
+async def get_question_model_stats(admin: User = Depends(require_admin)):
+    """本地问题分析模型：训练信息、阈值，以及本进程中各来源的分析次数（local 即省下的 LLM 调用）"""
+    model = load_question_model()
+    return {
+        "data": {
+            "loaded": model is not None,
+            "threshold": settings.QUESTION_MODEL_THRESHOLD,
+            "meta": model.meta if model else None,
+            "stats": QuestionAnalyzer.source_stats(),
+        }
+    }
+
+
+@router.get("/analysis-cache", tags=["系统监控"])
+async def get_analysis_cache_stats(admin: User = Depends(require_admin)):
+    """问题分析近似重复缓存：命中率（精确/近似）与抽样审计的误匹配率、最近误匹配样本"""
+    return {"data": ANALYSIS_CACHE.stats() if ANALYSIS_CACHE else None}
+
+
+@router.delete("/analysis-cache", tags=["系统监控"])
+async def clear_analysis_cache(admin: User = Depends(require_admin)):
+    """清空问题分析缓存（调整归一化规则或提示词后使用）"""
+    if ANALYSIS_CACHE:
+        ANALYSIS_CACHE.clear()
+    return {"message": "问题分析缓存已清空"}
+
+
+@router.get("/interpretations/stats", tags=["系统监控"])
+async def get_interpretation_stats(admin: User = Depends(require_admin)):
+    """LLM解读跨用户复用：按天统计查找、命中（省去的LLM调用）与新存入条数"""
+    return {
+        "data": {
+            "enabled": settings.INTERPRETATION_REUSE_ENABLED,
+            "similarity": settings.INTERPRETATION_SIMILARITY,
+            "default_ttl_hours": settings.INTERPRETATION_REUSE_TTL_HOURS,
+            "daily": InterpretationStore.daily_stats(),
+        }
+    }
+
+
+@router.get("/daily-fortune/pregen", tags=["系统监控"])
+async def get_daily_fortune_pregen_status(
+    fortune_date: Optional[date] = Query(None, description="运势日期，默认为当前或下一个预生成窗口对应的日期"),
+    admin: User = Depends(require_admin),
+):
+    """每日运势夜间预生成：窗口配置与某天的断点（已处理到的用户、新生成/已存在/失败数、是否完成）"""
+    start, end, window_date = pregen_window(datetime.now())
+    fortune_date = fortune_date or window_date
+    checkpoint = await (await create_pregenerator()).checkpoint(fortune_date)
+    return {
+        "data": {
+            "enabled": settings.DAILY_FORTUNE_PREGEN_ENABLED,
+            "window": {"start": start.isoformat(), "end": end.isoformat(), "fortune_date": window_date.isoformat()},
+            "fortune_date": fortune_date.isoformat(),
+            "checkpoint": checkpoint,
+        }
+    }
+
+
+@router.get("/daily-fortune/guest-cache", tags=["系统监控"])
+async def get_guest_fortune_cache_stats(admin: User = Depends(require_admin)):
+    """访客运势缓存：进程内命中、Redis命中与实际生成次数（当前进程）"""
+    guest_cache = await get_guest_fortune_cache()
+    return {
+        "data": {
+            "enabled": settings.GUEST_FORTUNE_CACHE_ENABLED,
+            **guest_cache.stats(),
+        }
+    }
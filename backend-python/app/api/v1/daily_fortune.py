@@ -1,26 +1,44 @@
 """每日运势路由"""
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
 from typing import Optional
+from app.core.cache import get_redis_cache
+from app.core.config import settings
+from app.core.responses import ORJSONResponse
 from app.core.database import get_db
 from app.schemas.divination import DailyFortuneInfo
 from app.services.daily_fortune_service import DailyFortuneService
+from app.services.guest_fortune_cache import etag_matches, get_guest_fortune_cache, seconds_until_midnight
+from app.utils.bazi import BaziCalculator
 from app.dependencies import get_current_user_optional
 from app.models.user import User
 
 router = APIRouter()
 
 
-def get_daily_fortune_service(db: AsyncSession = Depends(get_db)) -> DailyFortuneService:
+async def get_daily_fortune_service(db: AsyncSession = Depends(get_db)) -> DailyFortuneService:
     """获取每日运势服务"""
-    return DailyFortuneService(db)
+    return DailyFortuneService(db, cache=await get_redis_cache() if settings.REDIS_ENABLED else None)
 
 
-@router.post("/daily_fortune", response_model=DailyFortuneInfo, tags=["运势"])
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    """解析 YYYY-MM-DD，格式错误返回None"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+@router.api_route("/daily_fortune", methods=["GET", "POST"], response_model=DailyFortuneInfo, tags=["运势"])
 async def generate_daily_fortune(
+    request: Request,
+    response: Response,
     target_date: Optional[str] = Query(None, description="目标日期 YYYY-MM-DD，默认为今天"),
+    birth_date: Optional[str] = Query(None, description="访客生日 YYYY-MM-DD，用于按生肖×星座取运势"),
     current_user: Optional[User] = Depends(get_current_user_optional),
     service: DailyFortuneService = Depends(get_daily_fortune_service)
 ):
@@ -28,36 +46,49 @@ async def generate_daily_fortune(
     生成每日运势
     
     - 如果已登录，为当前用户生成
-    - 如果未登录，使用访客ID
+    - 如果未登录，按日期（及生日对应的群组）返回共享的访客运势，
+      带 Cache-Control（本地午夜过期）与 ETag，可由 CDN/客户端缓存
     - 同一天只生成一次，重复请求返回缓存结果
     """
-    user_id = str(current_user.id) if current_user else "guest"
+    parsed_date = _parse_date(target_date) or date.today()
     
-    # 解析日期
-    if target_date:
-        try:
-            parsed_date = date.fromisoformat(target_date)
-        except ValueError:
-            parsed_date = date.today()
-    else:
-        parsed_date = date.today()
+    if current_user is None and settings.GUEST_FORTUNE_CACHE_ENABLED:
+        animal, zodiac_sign = "", ""
+        birthday = _parse_date(birth_date)
+        if birthday:
+            try:
+                info = BaziCalculator.destiny_info(birthday)
+                animal, zodiac_sign = info["animal"], info["zodiac_sign"]
+            except ValueError:
+                pass  # 超出历法表范围按未提供生日处理
+        
+        guest_cache = await get_guest_fortune_cache()
+        guest = await guest_cache.get_or_load(
+            parsed_date,
+            service.cohort_key(animal, zodiac_sign),
+            lambda: service.guest_fortune(parsed_date, animal, zodiac_sign)
+        )
+        if guest is None:
+            # 生成失败：返回默认运势，不让 CDN/客户端缓存，下次请求重新生成
+            return ORJSONResponse(
+                service.guest_fallback(parsed_date, animal, zodiac_sign),
+                headers={"Cache-Control": "no-store", "Vary": "Authorization"}
+            )
+        headers = {
+            "Cache-Control": f"public, max-age={seconds_until_midnight()}",
+            "ETag": guest.etag,
+            "Vary": "Authorization",
+        }
+        if etag_matches(request.headers.get("if-none-match"), guest.etag):
+            return Response(status_code=304, headers=headers)
+        return ORJSONResponse(guest.payload, headers=headers)
     
-    # 生成运势
-    fortune = await service.generate_daily_fortune(user_id, parsed_date)
+    # 按用户生成的运势不能被共享缓存
+    response.headers["Cache-Control"] = "private, no-store"
+    response.headers["Vary"] = "Authorization"
+    
+    # 已生成则直接返回，否则生成（并发请求只生成一次）
+    user_id = str(current_user.id) if current_user else "guest"
+    fortune = await service.get_daily_fortune(user_id, parsed_date)
     
-    return DailyFortuneInfo(
-        score=fortune.score,
-        summary=fortune.summary,
-        wealth=fortune.wealth,
-        career=fortune.career,
-        love=fortune.love,
-        health=fortune.health,
-        lucky_color=fortune.lucky_color,
-        lucky_number=fortune.lucky_number,
-        lucky_direction=fortune.lucky_direction,
-        lucky_time=fortune.lucky_time,
-        yi=fortune.yi,
-        ji=fortune.ji,
-        solar_term=fortune.solar_term,
-        festival=fortune.festival,
-    )
+    return DailyFortuneInfo(**service.to_info(fortune))
@@ -4,18 +4,25 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from app.core.database import get_db
+from app.core.cache import get_cache_manager
+from app.core.config import settings
+from app.core.responses import RawJSONResponse
+from app.core.logger import get_logger
 from app.dependencies import get_current_user
 from app.models.user import User
 from app.models.divination import DivinationSession
 from app.schemas.divination import CreateDivinationRequest, DivinationResult
 from app.services.enhanced_divination_service import EnhancedDivinationService
+from app.services.repeat_question_guard import create_repeat_guard
 from app.services.llm_service import create_llm_service
 from app.repositories.llm_repository import LLMRepository
 from app.repositories.divination_repository import DivinationRepository
+from app.services.cached_divination_service import CachedDivinationService
 from datetime import datetime
 from typing import Optional
 
 router = APIRouter()
+logger = get_logger(__name__)
 
 
 @router.post("/start", response_model=DivinationResult)
@@ -37,15 +44,15 @@ async def start_divination(
         if llm_config and llm_config.is_enabled:
             try:
                 llm_service = create_llm_service(llm_config)
-                print(f"[INFO] 使用 LLM: {llm_config.name}")
+                logger.info("使用 LLM", extra={"llm_config": llm_config.name})
             except Exception as e:
-                print(f"[WARN] 创建 LLM 服务失败: {e}")
+                logger.warning("创建 LLM 服务失败: %s", e)
                 # 降级：不使用 LLM
         else:
-            print(f"[WARN] 未配置可用的 LLM，将使用基础占卜服务")
+            logger.warning("未配置可用的 LLM，将使用基础占卜服务")
         
         # 使用增强占卜服务
-        service = EnhancedDivinationService(db, llm_service)
+        service = EnhancedDivinationService(db, llm_service, repeat_guard=await create_repeat_guard())
         result = await service.start_divination_with_enhancement(request)
         await db.commit()
         
@@ -54,11 +61,12 @@ async def start_divination(
             await llm_service.close()
         
         return result
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
         await db.rollback()
-        print(f"[ERROR] 占卜失败: {type(e).__name__}: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("占卜失败: %s: %s", type(e).__name__, e)
         raise HTTPException(status_code=500, detail=f"占卜失败: {str(e)}")
 
 
@@ -108,8 +116,10 @@ async def list_divination_history(
             except ValueError:
                 raise HTTPException(status_code=400, detail="Invalid end_date format, use YYYY-MM-DD")
         
-        # 获取历史记录
-        sessions = await repo.get_user_sessions_with_filters(
+        # 获取历史记录：先分页查询ID，再批量读取会话（缓存命中不回源，未命中一次IN查询）
+        cache_manager = await get_cache_manager() if settings.REDIS_ENABLED else None
+        cached_service = CachedDivinationService(repo, cache_manager)
+        session_ids = await repo.get_user_session_ids_with_filters(
             user_id=str(current_user.id),
             limit=limit,
             offset=offset,
@@ -121,6 +131,7 @@ async def list_divination_history(
             order_by=order_by,
             order_direction=order_direction
         )
+        sessions = await cached_service.get_sessions_cached(session_ids)
         
         # 获取总数
         total_count = await repo.count_user_sessions_with_filters(
@@ -219,30 +230,15 @@ async def get_divination_stats(
 
 
 # 通配路由必须放在最后，否则会拦截所有请求
-@router.get("/{session_id}", response_model=DivinationResult)
+@router.get("/{session_id}", response_model=DivinationResult, response_class=RawJSONResponse)
 async def get_divination_result(
     session_id: str,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """获取占卜结果"""
-    llm_repo = LLMRepository(db)
-    llm_config = await llm_repo.get_default()
-    
-    llm_service = None
-    if llm_config and llm_config.is_enabled:
-        try:
-            llm_service = create_llm_service(llm_config)
-        except:
-            pass
-    
-    service = EnhancedDivinationService(db, llm_service)
+    """获取占卜结果（返回完成时序列化好的结果，读取不需要LLM）"""
+    service = EnhancedDivinationService(db)
     try:
-        result = await service.get_result(session_id)
-        
-        if llm_service and hasattr(llm_service, 'close'):
-            await llm_service.close()
-        
-        return result
+        return RawJSONResponse(await service.get_result_json(session_id))
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"未找到占卜结果: {str(e)}")
@@ -1,7 +1,13 @@
 """时间转换路由"""
 
-from fastapi import APIRouter, Depends
-from app.schemas.time_convert import Solar2LunarRequest, Lunar2SolarRequest, ConversionResult
+from fastapi import APIRouter, Depends, Query
+from app.core.cache import get_cache_manager
+from app.core.config import settings
+from app.core.exceptions import BadRequestError
+from app.schemas.time_convert import (
+    Solar2LunarRequest, Lunar2SolarRequest, ConversionResult,
+    DateRangeRequest, DateRangeResult, MonthGridResult
+)
 from app.services.time_convert_service import TimeConvertService
 
 router = APIRouter()
@@ -12,13 +18,22 @@ def get_time_convert_service() -> TimeConvertService:
     return TimeConvertService()
 
 
+async def get_cached_time_convert_service() -> TimeConvertService:
+    """获取带缓存的时间转换服务"""
+    cache_manager = await get_cache_manager() if settings.REDIS_ENABLED else None
+    return TimeConvertService(cache_manager)
+
+
 @router.post("/solar2lunar", response_model=ConversionResult)
 async def solar_to_lunar(
     request: Solar2LunarRequest,
     service: TimeConvertService = Depends(get_time_convert_service)
 ):
     """公历转农历"""
-    result = service.solar_to_lunar(request.year, request.month, request.day)
+    try:
+        result = service.solar_to_lunar(request.year, request.month, request.day)
+    except ValueError as e:
+        raise BadRequestError(str(e))
     return ConversionResult(**result)
 
 
@@ -28,10 +43,37 @@ async def lunar_to_solar(
     service: TimeConvertService = Depends(get_time_convert_service)
 ):
     """农历转公历"""
-    result = service.lunar_to_solar(
-        request.year,
-        request.month,
-        request.day,
-        request.is_leap_month
-    )
+    try:
+        result = service.lunar_to_solar(
+            request.year,
+            request.month,
+            request.day,
+            request.is_leap_month
+        )
+    except ValueError as e:
+        raise BadRequestError(str(e))
     return ConversionResult(**result)
+
+
+@router.post("/range", response_model=DateRangeResult)
+async def convert_range(
+    request: DateRangeRequest,
+    service: TimeConvertService = Depends(get_time_convert_service)
+):
+    """日期范围批量公历转农历（最多366天）"""
+    try:
+        days = service.convert_range(request.start_date, request.end_date)
+    except ValueError as e:
+        raise BadRequestError(str(e))
+    return {"start_date": request.start_date, "end_date": request.end_date, "days": days}
+
+
+@router.get("/month", response_model=MonthGridResult)
+async def get_month_grid(
+    year: int = Query(..., ge=1900, le=2100, description="公历年份"),
+    month: int = Query(..., ge=1, le=12, description="公历月份"),
+    week_start: int = Query(0, ge=0, le=6, description="每周第一天（0=周一 ... 6=周日）"),
+    service: TimeConvertService = Depends(get_cached_time_convert_service)
+):
+    """月视图（6周42天，一次请求返回整月日历，按年月缓存）"""
+    return await service.get_month_grid_cached(year, month, week_start)
@@ -1,15 +1,41 @@
 """Redis缓存服务"""
 
 import json
+import math
+import time
+import uuid
+import random
+import asyncio
+import inspect
 import hashlib
-from typing import Optional, Any
+from contextlib import asynccontextmanager, suppress
+from typing import Optional, Any, AsyncIterator, Dict, List, Iterable, Callable
 from datetime import timedelta
 import redis.asyncio as redis
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class RedisCache:
     """Redis缓存服务"""
     
+    # 校验持有者后删除锁，避免误删其他节点的锁
+    RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+    
+    # 校验持有者后续期锁（长任务的主节点租约）
+    EXTEND_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+    
     def __init__(self, redis_url: str = "redis://localhost:6379/0"):
         """
         初始化Redis连接
@@ -54,7 +80,7 @@ class RedisCache:
                 return json.loads(value)
             return None
         except Exception as e:
-            print(f"[Redis] 获取缓存失败: {e}")
+            logger.warning("获取缓存失败: %s", e)
             return None
     
     async def set(
@@ -85,7 +111,7 @@ class RedisCache:
                 await self.client.set(key, json_value)
             return True
         except Exception as e:
-            print(f"[Redis] 设置缓存失败: {e}")
+            logger.warning("设置缓存失败: %s", e)
             return False
     
     async def delete(self, key: str) -> bool:
@@ -105,7 +131,7 @@ class RedisCache:
             await self.client.delete(key)
             return True
         except Exception as e:
-            print(f"[Redis] 删除缓存失败: {e}")
+            logger.warning("删除缓存失败: %s", e)
             return False
     
     async def exists(self, key: str) -> bool:
@@ -124,9 +150,98 @@ class RedisCache:
         try:
             return await self.client.exists(key) > 0
         except Exception as e:
-            print(f"[Redis] 检查缓存失败: {e}")
+            logger.warning("检查缓存失败: %s", e)
             return False
     
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        批量获取缓存（单次MGET）
+        
+        Args:
+            keys: 缓存键列表
+        
+        Returns:
+            命中的键值映射，未命中的键不包含在结果中
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        
+        if not self.client:
+            await self.connect()
+        
+        try:
+            values = await self.client.mget(keys)
+            result = {}
+            for key, value in zip(keys, values):
+                if value:
+                    result[key] = json.loads(value)
+            return result
+        except Exception as e:
+            logger.warning("批量获取缓存失败: %s", e)
+            return {}
+    
+    async def set_many(
+        self,
+        mapping: Dict[str, Any],
+        expire: Optional[int] = None,
+        ttls: Optional[Dict[str, int]] = None
+    ) -> bool:
+        """
+        批量设置缓存（pipeline，一次往返）
+        
+        Args:
+            mapping: 键值映射
+            expire: 默认过期时间（秒），None表示永不过期
+            ttls: 按键指定的过期时间（秒），优先于expire
+        
+        Returns:
+            是否设置成功
+        """
+        if not mapping:
+            return True
+        
+        if not self.client:
+            await self.connect()
+        
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value in mapping.items():
+                    json_value = json.dumps(value, ensure_ascii=False)
+                    key_expire = ttls.get(key, expire) if ttls else expire
+                    if key_expire:
+                        pipe.setex(key, key_expire, json_value)
+                    else:
+                        pipe.set(key, json_value)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning("批量设置缓存失败: %s", e)
+            return False
+    
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """
+        批量删除缓存（单次DEL）
+        
+        Args:
+            keys: 缓存键列表
+        
+        Returns:
+            删除的键数量
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return 0
+        
+        if not self.client:
+            await self.connect()
+        
+        try:
+            return await self.client.delete(*keys)
+        except Exception as e:
+            logger.warning("批量删除缓存失败: %s", e)
+            return 0
+    
     async def expire(self, key: str, seconds: int) -> bool:
         """
         设置缓存过期时间
@@ -145,7 +260,7 @@ class RedisCache:
             await self.client.expire(key, seconds)
             return True
         except Exception as e:
-            print(f"[Redis] 设置过期时间失败: {e}")
+            logger.warning("设置过期时间失败: %s", e)
             return False
     
     async def ttl(self, key: str) -> int:
@@ -164,7 +279,7 @@ class RedisCache:
         try:
             return await self.client.ttl(key)
         except Exception as e:
-            print(f"[Redis] 获取TTL失败: {e}")
+            logger.warning("获取TTL失败: %s", e)
             return -2
     
     async def clear_pattern(self, pattern: str) -> int:
@@ -190,9 +305,102 @@ class RedisCache:
             
             return len(keys)
         except Exception as e:
-            print(f"[Redis] 清除缓存失败: {e}")
+            logger.warning("清除缓存失败: %s", e)
             return 0
     
+    async def acquire_lock(self, key: str, token: str, ttl_ms: int) -> bool:
+        """
+        获取分布式锁（SET NX PX）
+        
+        Args:
+            key: 锁键
+            token: 持有者标识，释放时校验
+            ttl_ms: 锁自动过期时间（毫秒）
+        
+        Returns:
+            是否获取成功；Redis不可用时返回True，退化为仅进程内保护
+        """
+        if not self.client:
+            await self.connect()
+        
+        try:
+            return bool(await self.client.set(key, token, nx=True, px=ttl_ms))
+        except Exception as e:
+            logger.warning("获取锁失败: %s", e)
+            return True
+    
+    async def release_lock(self, key: str, token: str) -> bool:
+        """
+        释放分布式锁（仅当仍由token持有时删除）
+        
+        Args:
+            key: 锁键
+            token: 获取锁时使用的持有者标识
+        
+        Returns:
+            是否释放成功
+        """
+        if not self.client:
+            await self.connect()
+        
+        try:
+            return bool(await self.client.eval(self.RELEASE_LOCK_SCRIPT, 1, key, token))
+        except Exception as e:
+            logger.warning("释放锁失败: %s", e)
+            return False
+    
+    async def extend_lock(self, key: str, token: str, ttl_ms: int) -> bool:
+        """
+        续期分布式锁（仅当仍由token持有时重置过期时间）
+        
+        Args:
+            key: 锁键
+            token: 获取锁时使用的持有者标识
+            ttl_ms: 新的过期时间（毫秒）
+        
+        Returns:
+            是否仍持有锁；Redis不可用时返回True，与acquire_lock的降级一致
+        """
+        if not self.client:
+            await self.connect()
+        
+        try:
+            return bool(await self.client.eval(self.EXTEND_LOCK_SCRIPT, 1, key, token, ttl_ms))
+        except Exception as e:
+            logger.warning("续期锁失败: %s", e)
+            return True
+    
+    @asynccontextmanager
+    async def hold_lock(self, key: str, token: str, ttl_ms: int) -> AsyncIterator[asyncio.Event]:
+        """
+        持有期间每 ttl/3 续期一次分布式锁，退出时停止续期（不释放锁）
+        
+        Args:
+            key: 锁键
+            token: 获取锁时使用的持有者标识
+            ttl_ms: 每次续期的过期时间（毫秒）
+        
+        Yields:
+            asyncio.Event：续期失败（锁已被他人持有或已过期）时被置位，持有方应停止开始新的工作
+        """
+        lost = asyncio.Event()
+        
+        async def renew():
+            while True:
+                await asyncio.sleep(ttl_ms / 3000)
+                if not await self.extend_lock(key, token, ttl_ms):
+                    logger.warning("锁已丢失", extra={"key": key})
+                    lost.set()
+                    return
+        
+        task = asyncio.create_task(renew())
+        try:
+            yield lost
+        finally:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    
     @staticmethod
     def generate_key(*args, prefix: str = "") -> str:
         """
@@ -220,55 +428,296 @@ class RedisCache:
         return key_string
 
 
+class CacheMetrics:
+    """缓存指标计数"""
+    
+    FIELDS = (
+        "hits", "misses", "stale_serves", "early_refreshes",
+        "refreshes", "refresh_failures", "lock_waits", "coalesced",
+    )
+    
+    def __init__(self):
+        self.reset()
+    
+    def incr(self, name: str, amount: int = 1):
+        """计数加一"""
+        self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def reset(self):
+        """清零"""
+        self.counters: Dict[str, int] = {name: 0 for name in self.FIELDS}
+    
+    def as_dict(self) -> Dict[str, int]:
+        """导出快照"""
+        return dict(self.counters)
+
+
 class CacheManager:
-    """缓存管理器 - 统一的缓存接口"""
+    """缓存管理器 - 统一的缓存接口
+    
+    get_or_set 使用软过期（stale-while-revalidate）：
+    - 缓存值包装为信封，记录软过期时间和上次加载耗时
+    - 软过期前按 XFetch 算法概率性提前刷新，分散过期时间点
+    - 软过期后的 stale_ttl 窗口内直接返回旧值，后台单飞刷新
+    - 完全未命中时，进程内合并并发请求，跨节点用 Redis SET NX PX 锁防击穿
+    """
     
-    def __init__(self, redis_cache: RedisCache):
+    ENVELOPE_MARK = "__swr__"
+    LOCK_PREFIX = "lock"
+    
+    def __init__(
+        self,
+        redis_cache: RedisCache,
+        stale_ttl: int = 300,
+        lock_timeout_ms: int = 5000,
+        early_expiration_beta: float = 1.0
+    ):
         """
         初始化缓存管理器
         
         Args:
             redis_cache: Redis缓存实例
+            stale_ttl: 软过期后仍可返回旧值的时间窗口（秒）
+            lock_timeout_ms: 分布式刷新锁的过期时间（毫秒）
+            early_expiration_beta: 概率提前过期系数，越大越倾向提前刷新，0表示关闭
         """
         self.redis = redis_cache
+        self.stale_ttl = stale_ttl
+        self.lock_timeout_ms = lock_timeout_ms
+        self.early_expiration_beta = early_expiration_beta
+        self.metrics = CacheMetrics()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
     
     async def get_or_set(
         self,
         key: str,
         fetch_func,
-        expire: int = 3600
+        expire: int = 3600,
+        stale_ttl: Optional[int] = None
     ) -> Any:
         """
         获取缓存，如果不存在则调用函数获取并缓存
         
         Args:
             key: 缓存键
-            fetch_func: 获取数据的函数（可以是async函数）
-            expire: 过期时间（秒）
+            fetch_func: 获取数据的函数（可以是async函数）。软过期或提前刷新时会在后台任务中再次调用，
+                此时发起请求的 AsyncSession 等请求级资源可能已关闭，因此不能捕获它们，需要时自行打开
+                （如 async with async_session_maker() as db）
+            expire: 软过期时间（秒），过期后触发后台刷新
+            stale_ttl: 软过期后仍返回旧值的窗口（秒），None使用默认值
         
         Returns:
             缓存值或函数返回值
         """
+        if stale_ttl is None:
+            stale_ttl = self.stale_ttl
+        
         # 尝试从缓存获取
-        cached_value = await self.redis.get(key)
-        if cached_value is not None:
-            print(f"[Cache] 命中缓存: {key}")
-            return cached_value
+        entry = await self.redis.get(key)
+        if entry is not None:
+            if not self._is_envelope(entry):
+                # 旧格式或批量接口写入的值，按新鲜值处理
+                self.metrics.incr("hits")
+                return entry
+            
+            now = time.time()
+            if now < entry["soft_expire"]:
+                self.metrics.incr("hits")
+                if self._should_refresh_early(entry, now):
+                    self.metrics.incr("early_refreshes")
+                    self._schedule_refresh(key, fetch_func, expire, stale_ttl)
+                return entry["value"]
+            
+            # 软过期：返回旧值，后台刷新
+            self.metrics.incr("stale_serves")
+            logger.debug("返回过期值并后台刷新", extra={"cache_key": key})
+            self._schedule_refresh(key, fetch_func, expire, stale_ttl)
+            return entry["value"]
+        
+        # 缓存未命中：同一进程内的并发请求合并为一次加载
+        self.metrics.incr("misses")
+        logger.debug("未命中缓存", extra={"cache_key": key})
+        
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.metrics.incr("coalesced")
+            return await asyncio.shield(inflight)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._load_with_lock(key, fetch_func, expire, stale_ttl)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 避免无人等待时出现 "exception was never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+    
+    async def _load_with_lock(self, key: str, fetch_func, expire: int, stale_ttl: int) -> Any:
+        """未命中时加载数据：抢到分布式锁的节点回源，其余节点等待结果"""
+        lock_key = self._lock_key(key)
+        token = uuid.uuid4().hex
+        
+        if await self.redis.acquire_lock(lock_key, token, self.lock_timeout_ms):
+            try:
+                return await self._fetch_and_store(key, fetch_func, expire, stale_ttl)
+            finally:
+                await self.redis.release_lock(lock_key, token)
+        
+        # 其他节点正在回源，轮询等待其写入结果
+        self.metrics.incr("lock_waits")
+        deadline = time.monotonic() + self.lock_timeout_ms / 1000
+        delay = 0.02
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            entry = await self.redis.get(key)
+            if entry is not None:
+                return self._unwrap(entry)
+            delay = min(delay * 2, 0.2)
+        
+        # 等待超时（持锁节点可能已失败），自行回源
+        return await self._fetch_and_store(key, fetch_func, expire, stale_ttl)
+    
+    async def _fetch_and_store(self, key: str, fetch_func, expire: int, stale_ttl: int) -> Any:
+        """调用加载函数并写入带软过期信息的信封"""
+        started = time.monotonic()
+        value = await self._call(fetch_func)
+        delta = time.monotonic() - started
+        
+        if value is not None:
+            envelope = {
+                self.ENVELOPE_MARK: 1,
+                "value": value,
+                "soft_expire": time.time() + expire,
+                "delta": delta,
+            }
+            await self.redis.set(key, envelope, expire + max(stale_ttl, 0))
         
-        # 缓存未命中，调用函数获取数据
-        print(f"[Cache] 未命中缓存: {key}")
+        return value
+    
+    def _schedule_refresh(self, key: str, fetch_func, expire: int, stale_ttl: int):
+        """后台刷新（进程内每个键同时只有一个刷新任务）"""
+        if key in self._refreshing:
+            return
+        
+        task = asyncio.get_running_loop().create_task(
+            self._refresh(key, fetch_func, expire, stale_ttl)
+        )
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+    
+    async def _refresh(self, key: str, fetch_func, expire: int, stale_ttl: int):
+        """后台刷新任务：只有抢到分布式锁的节点执行回源"""
+        lock_key = self._lock_key(key)
+        token = uuid.uuid4().hex
+        if not await self.redis.acquire_lock(lock_key, token, self.lock_timeout_ms):
+            return
         
-        # 判断是否为async函数
-        import asyncio
-        if asyncio.iscoroutinefunction(fetch_func):
-            value = await fetch_func()
-        else:
-            value = fetch_func()
+        try:
+            await self._fetch_and_store(key, fetch_func, expire, stale_ttl)
+            self.metrics.incr("refreshes")
+        except Exception as e:
+            self.metrics.incr("refresh_failures")
+            logger.warning("后台刷新失败: %s: %s", type(e).__name__, e, extra={"cache_key": key})
+        finally:
+            await self.redis.release_lock(lock_key, token)
+    
+    def _should_refresh_early(self, entry: Dict[str, Any], now: float) -> bool:
+        """XFetch概率提前过期：越接近软过期、加载越慢，越可能提前刷新"""
+        if self.early_expiration_beta <= 0:
+            return False
+        delta = entry.get("delta") or 0.0
+        if delta <= 0:
+            return False
+        gap = -delta * self.early_expiration_beta * math.log(1.0 - random.random())
+        return now + gap >= entry["soft_expire"]
+    
+    @classmethod
+    def _is_envelope(cls, entry: Any) -> bool:
+        """判断是否为软过期信封"""
+        return isinstance(entry, dict) and entry.get(cls.ENVELOPE_MARK) == 1
+    
+    @classmethod
+    def _unwrap(cls, entry: Any) -> Any:
+        """取出信封中的值（兼容未包装的旧值）"""
+        if cls._is_envelope(entry):
+            return entry["value"]
+        return entry
+    
+    @classmethod
+    def _lock_key(cls, key: str) -> str:
+        """刷新锁的键"""
+        return f"{cls.LOCK_PREFIX}:{key}"
+    
+    @staticmethod
+    async def _call(func, *args) -> Any:
+        """调用同步/异步函数（兼容返回协程的lambda）"""
+        result = func(*args)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+    
+    def get_metrics(self) -> Dict[str, int]:
+        """获取缓存指标快照"""
+        return self.metrics.as_dict()
+    
+    async def get_or_set_many(
+        self,
+        keys: List[str],
+        fetch_many_func: Callable,
+        expire: int = 3600
+    ) -> Dict[str, Any]:
+        """
+        批量获取缓存，仅对未命中的键调用一次批量加载函数并回填
         
-        # 缓存数据
-        await self.redis.set(key, value, expire)
+        Args:
+            keys: 缓存键列表
+            fetch_many_func: 批量加载函数（可以是async函数），
+                接收未命中的键列表，返回 {键: 值} 映射；未返回的键视为不存在
+            expire: 过期时间（秒）
         
-        return value
+        Returns:
+            按keys顺序排列的 {键: 值} 映射（不存在的键不包含在结果中）
+        """
+        cached = {key: self._unwrap(entry) for key, entry in (await self.redis.get_many(keys)).items()}
+        missing = [key for key in dict.fromkeys(keys) if key not in cached]
+        logger.debug("批量读取", extra={"hit": len(cached), "miss": len(missing)})
+        self.metrics.incr("hits", len(cached))
+        self.metrics.incr("misses", len(missing))
+        
+        loaded: Dict[str, Any] = {}
+        if missing:
+            loaded = await self._call(fetch_many_func, missing)
+            loaded = {key: value for key, value in (loaded or {}).items() if value is not None}
+            
+            if loaded:
+                await self.redis.set_many(loaded, expire)
+        
+        result = {}
+        for key in keys:
+            if key in cached:
+                result[key] = cached[key]
+            elif key in loaded:
+                result[key] = loaded[key]
+        return result
+    
+    async def invalidate_many(self, keys: List[str]):
+        """
+        批量使缓存失效
+        
+        Args:
+            keys: 缓存键列表
+        """
+        count = await self.redis.delete_many(keys)
+        logger.info("批量缓存失效", extra={"deleted": count})
     
     async def invalidate(self, key: str):
         """
@@ -278,7 +727,7 @@ class CacheManager:
             key: 缓存键
         """
         await self.redis.delete(key)
-        print(f"[Cache] 缓存失效: {key}")
+        logger.info("缓存失效", extra={"cache_key": key})
     
     async def invalidate_pattern(self, pattern: str):
         """
@@ -288,7 +737,7 @@ class CacheManager:
             pattern: 匹配模式
         """
         count = await self.redis.clear_pattern(pattern)
-        print(f"[Cache] 批量缓存失效: {pattern}, 删除{count}个键")
+        logger.info("批量缓存失效", extra={"pattern": pattern, "deleted": count})
 
 
 # 全局缓存实例
@@ -311,8 +760,14 @@ async def get_cache_manager() -> CacheManager:
     """获取缓存管理器实例"""
     global _cache_manager
     if _cache_manager is None:
+        from app.core.config import settings
         redis_cache = await get_redis_cache()
-        _cache_manager = CacheManager(redis_cache)
+        _cache_manager = CacheManager(
+            redis_cache,
+            stale_ttl=settings.CACHE_STALE_TTL,
+            lock_timeout_ms=settings.CACHE_LOCK_TIMEOUT_MS,
+            early_expiration_beta=settings.CACHE_EARLY_EXPIRATION_BETA,
+        )
     return _cache_manager
 
 
@@ -31,6 +31,63 @@ class Settings(BaseSettings):
     CACHE_TTL_DEFAULT: int = int(os.getenv("CACHE_TTL_DEFAULT", "3600"))  # 1小时
     CACHE_TTL_SHORT: int = int(os.getenv("CACHE_TTL_SHORT", "300"))  # 5分钟
     CACHE_TTL_LONG: int = int(os.getenv("CACHE_TTL_LONG", "86400"))  # 24小时
+    CACHE_STALE_TTL: int = int(os.getenv("CACHE_STALE_TTL", "300"))  # 软过期后可返回旧值的窗口
+    CACHE_LOCK_TIMEOUT_MS: int = int(os.getenv("CACHE_LOCK_TIMEOUT_MS", "5000"))  # 刷新锁超时
+    CACHE_EARLY_EXPIRATION_BETA: float = float(os.getenv("CACHE_EARLY_EXPIRATION_BETA", "1.0"))  # 概率提前过期系数
+    ALMANAC_CACHE_SIZE: int = int(os.getenv("ALMANAC_CACHE_SIZE", "4096"))  # 进程内黄历LRU容量（天）
+    
+    # 周易起卦配置
+    ICHING_CAST_MODE: str = os.getenv("ICHING_CAST_MODE", "digest")  # digest=单次带密钥摘要；md5=兼容旧会话
+    ICHING_CAST_KEY: str = os.getenv("ICHING_CAST_KEY", "divinedaily-iching")  # 摘要密钥（最长64字节）
+    ICHING_AUDIT_MAX_SAMPLES: int = int(os.getenv("ICHING_AUDIT_MAX_SAMPLES", "5000000"))  # 起卦审计最大模拟次数
+    ICHING_DETAIL_CACHE_SIZE: int = int(os.getenv("ICHING_DETAIL_CACHE_SIZE", "4096"))  # 卦象解释LRU容量（最多64×64种）
+    ICHING_DETAIL_PRERENDER: bool = os.getenv("ICHING_DETAIL_PRERENDER", "false").lower() == "true"  # 启动时预渲染全部卦象解释
+    TAROT_RENDER_CACHE_SIZE: int = int(os.getenv("TAROT_RENDER_CACHE_SIZE", "4096"))  # 塔罗牌面渲染LRU容量（牌×正逆位×牌阵位置）
+    
+    # 本地问题分析模型（置信度达到阈值时不再调用LLM分析问题）
+    QUESTION_MODEL_ENABLED: bool = os.getenv("QUESTION_MODEL_ENABLED", "true").lower() == "true"
+    QUESTION_MODEL_PATH: str = os.getenv("QUESTION_MODEL_PATH", "")  # 为空时使用 app/utils/data/question_model.npz
+    QUESTION_MODEL_THRESHOLD: float = float(os.getenv("QUESTION_MODEL_THRESHOLD", "0.85"))  # 四个标签概率的最小值
+    
+    # 问题分析近似重复缓存（归一化 + SimHash）
+    ANALYSIS_CACHE_ENABLED: bool = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+    ANALYSIS_CACHE_SIZE: int = int(os.getenv("ANALYSIS_CACHE_SIZE", "10000"))  # 进程内LRU容量（问题数）
+    ANALYSIS_CACHE_MAX_DISTANCE: int = int(os.getenv("ANALYSIS_CACHE_MAX_DISTANCE", "3"))  # 近似命中的最大汉明距离（64位指纹）
+    ANALYSIS_CACHE_AUDIT_RATE: float = float(os.getenv("ANALYSIS_CACHE_AUDIT_RATE", "0.02"))  # 命中后抽样重新分析、统计误匹配的比例
+    
+    # LLM解读跨用户复用（同一卦象 + 变爻 + 问题类别 + 相近问题）
+    INTERPRETATION_REUSE_ENABLED: bool = os.getenv("INTERPRETATION_REUSE_ENABLED", "true").lower() == "true"
+    INTERPRETATION_REUSE_TTL_HOURS: int = int(os.getenv("INTERPRETATION_REUSE_TTL_HOURS", "168"))  # Prompt配置未指定时的新鲜期
+    INTERPRETATION_SIMILARITY: float = float(os.getenv("INTERPRETATION_SIMILARITY", "0.9"))  # 问题指纹相似度阈值（1 - 汉明距离/64）
+    INTERPRETATION_CANDIDATES: int = int(os.getenv("INTERPRETATION_CANDIDATES", "50"))  # 每次比对的最近解读条数
+    INTERPRETATION_PERSONALIZE: bool = os.getenv("INTERPRETATION_PERSONALIZE", "true").lower() == "true"  # 复用时把原问题替换为当前问题
+    
+    # 同一用户重复提问检测（窗口内返回上次结果，不重新起卦）
+    REPEAT_QUESTION_ENABLED: bool = os.getenv("REPEAT_QUESTION_ENABLED", "true").lower() == "true"
+    REPEAT_QUESTION_WINDOW_SECONDS: int = int(os.getenv("REPEAT_QUESTION_WINDOW_SECONDS", "86400"))  # 重复提问窗口
+    REPEAT_QUESTION_CLAIM_SECONDS: int = int(os.getenv("REPEAT_QUESTION_CLAIM_SECONDS", "60"))  # 起卦中占位的过期时间（起卦期间持续续期）
+    REPEAT_QUESTION_WAIT_SECONDS: float = float(os.getenv("REPEAT_QUESTION_WAIT_SECONDS", "100"))  # 并发相同请求的最长等待（起卦最多3次LLM调用，每次超时30秒）
+    
+    # 每日运势夜间预生成（低峰窗口内为活跃用户生成次日运势）
+    DAILY_FORTUNE_PREGEN_ENABLED: bool = os.getenv("DAILY_FORTUNE_PREGEN_ENABLED", "false").lower() == "true"
+    DAILY_FORTUNE_PREGEN_START: str = os.getenv("DAILY_FORTUNE_PREGEN_START", "22:00")  # 窗口开始时间（本地时间）
+    DAILY_FORTUNE_PREGEN_WINDOW_HOURS: float = float(os.getenv("DAILY_FORTUNE_PREGEN_WINDOW_HOURS", "8"))  # 窗口长度，需在推送时间前结束
+    DAILY_FORTUNE_PREGEN_CONCURRENCY: int = int(os.getenv("DAILY_FORTUNE_PREGEN_CONCURRENCY", "8"))  # 同时生成的用户数
+    DAILY_FORTUNE_PREGEN_RATE: float = float(os.getenv("DAILY_FORTUNE_PREGEN_RATE", "5"))  # LLM调用速率上限（次/秒）
+    DAILY_FORTUNE_PREGEN_BATCH_SIZE: int = int(os.getenv("DAILY_FORTUNE_PREGEN_BATCH_SIZE", "200"))  # 每批用户数（批间记录断点）
+    DAILY_FORTUNE_PREGEN_ACTIVE_DAYS: int = int(os.getenv("DAILY_FORTUNE_PREGEN_ACTIVE_DAYS", "30"))  # 最近登录天数内的用户算活跃
+    DAILY_FORTUNE_PREGEN_RETRY_SECONDS: int = int(os.getenv("DAILY_FORTUNE_PREGEN_RETRY_SECONDS", "300"))  # 窗口内未完成时的重试间隔
+    DAILY_FORTUNE_COHORT_ENABLED: bool = os.getenv("DAILY_FORTUNE_COHORT_ENABLED", "true").lower() == "true"  # 按 生肖×星座 群组生成，每群组每天一次LLM调用
+    DAILY_FORTUNE_SCORE_SPREAD: int = int(os.getenv("DAILY_FORTUNE_SCORE_SPREAD", "5"))  # 用户分数相对群组基准分的浮动范围
+    DAILY_FORTUNE_LOCK_SECONDS: int = int(os.getenv("DAILY_FORTUNE_LOCK_SECONDS", "30"))  # 同一用户同一天生成锁的过期时间（生成期间持续续期）
+    DAILY_FORTUNE_LOCK_WAIT_SECONDS: float = float(os.getenv("DAILY_FORTUNE_LOCK_WAIT_SECONDS", "45"))  # 其他请求等待生成结果的最长时间（LLM超时30秒加限流等待）
+    GUEST_FORTUNE_CACHE_ENABLED: bool = os.getenv("GUEST_FORTUNE_CACHE_ENABLED", "true").lower() == "true"  # 访客运势按 日期×群组 缓存并返回 Cache-Control/ETag
+    GUEST_FORTUNE_CACHE_SIZE: int = int(os.getenv("GUEST_FORTUNE_CACHE_SIZE", "512"))  # 进程内访客运势缓存容量（日期×群组）
+    
+    # 日志配置
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_JSON: bool = os.getenv("LOG_JSON", "true").lower() == "true"
+    LOG_DEBUG_SAMPLE_RATE: float = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))  # DEBUG日志采样率
     
     # JWT 配置
     JWT_SECRET: str = os.getenv("JWT_SECRET", "dev-secret-key-please-change-in-production")
@@ -0,0 +1,151 @@
+"""结构化日志
+
+请求路径上的日志只做一件事：把 LogRecord 放进内存队列。
+格式化（JSON序列化）和写 stdout 由后台线程 QueueListener 完成，不阻塞事件循环。
+
+- 日志级别：DEBUG 关闭时 logger.debug(...) 在 isEnabledFor 处直接返回，
+  消息使用 %s 惰性格式化，参数不会被拼接
+- 结构化字段：通过 extra={...} 传入，输出为 JSON 顶层字段
+- 请求ID：RequestIdMiddleware 写入 contextvar，入队前附加到每条记录
+- 采样：高频 DEBUG 日志按 LOG_DEBUG_SAMPLE_RATE（或记录上的 sample_rate 字段）随机丢弃
+"""
+
+import json
+import queue
+import random
+import sys
+import logging
+import logging.handlers
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional, Any, Dict
+
+# 当前请求ID（由中间件设置）
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# LogRecord 的标准属性，其余属性视为 extra 结构化字段
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "request_id", "sample_rate",
+}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """获取模块logger（统一挂在 divinedaily 命名空间下）"""
+    return logging.getLogger(f"divinedaily.{name}")
+
+
+class JsonFormatter(logging.Formatter):
+    """JSON格式化器（在后台线程中执行）"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """文本格式化器（本地开发使用）"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "request_id"):
+            record.request_id = "-"
+        return super().format(record)
+
+
+class ContextFilter(logging.Filter):
+    """入队前附加请求ID，并对DEBUG日志采样（在调用线程中执行，须保持廉价）"""
+
+    def __init__(self, debug_sample_rate: float = 1.0):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.DEBUG:
+            rate = getattr(record, "sample_rate", self.debug_sample_rate)
+            if rate < 1.0 and random.random() >= rate:
+                return False
+        record.request_id = request_id_var.get()
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """只入队不格式化的QueueHandler
+
+    标准 QueueHandler.prepare 会在调用线程中完成消息格式化；
+    监听线程与调用方在同一进程内，直接传递 LogRecord 即可，格式化留给后台线程。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(
+    level: str = "INFO",
+    json_format: bool = True,
+    debug_sample_rate: float = 1.0,
+    stream=None
+) -> logging.Logger:
+    """
+    初始化日志系统（可重复调用，后一次调用覆盖前一次）
+
+    Args:
+        level: 日志级别
+        json_format: 是否输出JSON
+        debug_sample_rate: DEBUG日志采样率（0-1）
+        stream: 输出流，默认stdout
+
+    Returns:
+        根logger（divinedaily）
+    """
+    global _listener, _queue_handler
+    shutdown_logging()
+
+    # 输出中不包含进程名，省去每条记录创建时的查询
+    logging.logMultiprocessing = False
+    logging.logProcesses = False
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if json_format else TextFormatter())
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(ContextFilter(debug_sample_rate))
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+
+    root = logging.getLogger("divinedaily")
+    root.handlers = [_queue_handler]
+    root.setLevel(level.upper())
+    root.propagate = False
+    return root
+
+
+def shutdown_logging():
+    """停止后台写日志线程（会先写完队列中剩余的记录）"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger("divinedaily").removeHandler(_queue_handler)
+        _queue_handler = None
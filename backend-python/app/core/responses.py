@@ -0,0 +1,22 @@
+"""JSON 响应（orjson）
+
+应用默认响应类为 ORJSONResponse；不再变化的结果（如已完成的占卜）可用 dump_model
+序列化一次后保存字节，之后用 RawJSONResponse 原样返回，跳过模型构建与序列化。
+"""
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from starlette.responses import Response
+
+__all__ = ["ORJSONResponse", "RawJSONResponse", "dump_model"]
+
+
+def dump_model(model: BaseModel) -> bytes:
+    """按 FastAPI 响应模型的规则（mode="json"、别名）序列化为 JSON 字节"""
+    return orjson.dumps(model.model_dump(mode="json", by_alias=True))
+
+
+class RawJSONResponse(Response):
+    """内容已是序列化好的 JSON 字节"""
+    media_type = "application/json"
@@ -1,9 +1,22 @@
 """FastAPI 应用入口"""
 
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1 import router as api_v1_router
 from app.core.config import settings
+from app.core.logger import setup_logging, shutdown_logging
+from app.core.responses import ORJSONResponse
+from app.middleware.request_id import RequestIdMiddleware
+from app.services.daily_fortune_pregen import run_pregen_scheduler
+from app.services.iching_service import IChingService
+from app.services.question_analyzer import load_question_model
+
+setup_logging(
+    level=settings.LOG_LEVEL,
+    json_format=settings.LOG_JSON,
+    debug_sample_rate=settings.LOG_DEBUG_SAMPLE_RATE,
+)
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -11,6 +24,7 @@ app = FastAPI(
     description="DivineDaily - 占卜应用后端 API",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
 )
 
 # CORS 配置
@@ -22,10 +36,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 请求ID（日志关联）
+app.add_middleware(RequestIdMiddleware)
+
 # 注册路由
 app.include_router(api_v1_router, prefix="/api/v1")
 
 
+@app.on_event("startup")
+async def on_startup():
+    """加载本地问题分析模型，按配置预渲染卦象解释、启动每日运势预生成调度"""
+    load_question_model()
+    if settings.ICHING_DETAIL_PRERENDER:
+        IChingService.warm_detail_cache()
+    app.state.fortune_pregen_task = (
+        asyncio.create_task(run_pregen_scheduler()) if settings.DAILY_FORTUNE_PREGEN_ENABLED else None
+    )
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """停止预生成调度（断点已按批保存，由下次或其他节点继续），写完剩余日志"""
+    task = getattr(app.state, "fortune_pregen_task", None)
+    if task:
+        task.cancel()
+    shutdown_logging()
+
+
 @app.get("/")
 async def root():
     """根路径"""
@@ -0,0 +1,45 @@
+"""请求ID中间件"""
+
+import uuid
+from app.core.logger import request_id_var
+
+
+class RequestIdMiddleware:
+    """为每个请求分配请求ID（纯ASGI实现，避免BaseHTTPMiddleware的额外开销）
+
+    - 优先使用上游传入的 X-Request-ID
+    - 写入 contextvar，供日志附加到每条记录
+    - 在响应头中返回 X-Request-ID
+    """
+
+    HEADER = b"x-request-id"
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = ""
+        for name, value in scope.get("headers", []):
+            if name == self.HEADER:
+                request_id = value.decode("latin-1")[:64]
+                break
+        if not request_id:
+            request_id = uuid.uuid4().hex
+
+        token = request_id_var.set(request_id)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((self.HEADER, request_id.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
@@ -1,44 +1,121 @@
 """每日运势模型"""
 
-from sqlalchemy import Column, Integer, String, Date, Text, JSON
+from sqlalchemy import Column, Integer, String, Date, Text, JSON, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
 from app.core.database import Base
 
+# 按群组生成时用户行不单独存储、读取时取所属群组内容的字段
+COHORT_FIELDS = (
+    'summary', 'wealth', 'career', 'love', 'health',
+    'lucky_color', 'lucky_direction', 'lucky_time', 'yi', 'ji', 'solar_term', 'festival',
+)
+
+
+class DailyFortuneCohort(Base):
+    """每日运势群组表（同一天、同生肖、同星座的用户共用一份LLM生成的运势）"""
+    __tablename__ = "daily_fortune_cohorts"
+    __table_args__ = (
+        UniqueConstraint('date', 'cohort_key', name='uq_daily_fortune_cohorts_date_key'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    date = Column(Date, nullable=False, index=True)
+    cohort_key = Column(String(64), nullable=False)  # 生肖:星座（资料缺失的部分为空）
+    animal = Column(String(10), nullable=False, default='')
+    zodiac_sign = Column(String(20), nullable=False, default='')
+    
+    score = Column(Integer, nullable=False)  # 群组基准分，用户分数在此基础上浮动
+    summary = Column(Text, nullable=False)
+    wealth = Column(Text, nullable=False)
+    career = Column(Text, nullable=False)
+    love = Column(Text, nullable=False)
+    health = Column(Text, nullable=False)
+    lucky_color = Column(String(50), nullable=False)
+    lucky_direction = Column(String(50), nullable=False)
+    lucky_time = Column(String(50), nullable=False)
+    yi = Column(JSON, nullable=False)  # List[str]
+    ji = Column(JSON, nullable=False)  # List[str]
+    solar_term = Column(String(50), default='')
+    festival = Column(String(100), default='')
+    
+    created_at = Column(Date, server_default=func.current_date(), nullable=False)
+    
+    def __repr__(self):
+        return f"<DailyFortuneCohort(date={self.date}, cohort_key={self.cohort_key})>"
+
+
+def _cohort_field(name: str) -> property:
+    """用户行为空时读取所属群组的同名字段"""
+    column = f"_{name}"
+    
+    def getter(self):
+        value = getattr(self, column)
+        if value is None and self.cohort is not None:
+            return getattr(self.cohort, name)
+        return value
+    
+    def setter(self, value):
+        setattr(self, column, value)
+    
+    return property(getter, setter)
+
 
 class DailyFortune(Base):
     """每日运势表"""
     __tablename__ = "daily_fortunes"
+    __table_args__ = (
+        # 每个用户每天只有一条运势（并发生成时靠它去重）
+        Index('ix_daily_fortunes_user_date', 'user_id', 'date', unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String(50), nullable=False, index=True)
     date = Column(Date, nullable=False, index=True)
+    cohort_id = Column(Integer, ForeignKey('daily_fortune_cohorts.id', ondelete='CASCADE'), nullable=True, index=True)
     
     # 基础运势
     score = Column(Integer, nullable=False)  # 0-100
-    summary = Column(Text, nullable=False)
+    _summary = Column('summary', Text, nullable=True)
     
     # 详细建议
-    wealth = Column(Text, nullable=False)
-    career = Column(Text, nullable=False)
-    love = Column(Text, nullable=False)
-    health = Column(Text, nullable=False)
+    _wealth = Column('wealth', Text, nullable=True)
+    _career = Column('career', Text, nullable=True)
+    _love = Column('love', Text, nullable=True)
+    _health = Column('health', Text, nullable=True)
     
     # 幸运指南
-    lucky_color = Column(String(50), nullable=False)
+    _lucky_color = Column('lucky_color', String(50), nullable=True)
     lucky_number = Column(String(50), nullable=False)
-    lucky_direction = Column(String(50), nullable=False)
-    lucky_time = Column(String(50), nullable=False)
+    _lucky_direction = Column('lucky_direction', String(50), nullable=True)
+    _lucky_time = Column('lucky_time', String(50), nullable=True)
     
     # 宜忌
-    yi = Column(JSON, nullable=False)  # List[str]
-    ji = Column(JSON, nullable=False)  # List[str]
+    _yi = Column('yi', JSON, nullable=True)  # List[str]
+    _ji = Column('ji', JSON, nullable=True)  # List[str]
     
     # 节气/节日
-    solar_term = Column(String(50), default='')
-    festival = Column(String(100), default='')
+    _solar_term = Column('solar_term', String(50), nullable=True)
+    _festival = Column('festival', String(100), nullable=True)
     
     created_at = Column(Date, server_default=func.current_date(), nullable=False)
     
+    # 群组运势随用户行一起加载（异步会话中不能延迟加载）
+    cohort = relationship("DailyFortuneCohort", lazy="joined")
+    
+    summary = _cohort_field('summary')
+    wealth = _cohort_field('wealth')
+    career = _cohort_field('career')
+    love = _cohort_field('love')
+    health = _cohort_field('health')
+    lucky_color = _cohort_field('lucky_color')
+    lucky_direction = _cohort_field('lucky_direction')
+    lucky_time = _cohort_field('lucky_time')
+    yi = _cohort_field('yi')
+    ji = _cohort_field('ji')
+    solar_term = _cohort_field('solar_term')
+    festival = _cohort_field('festival')
+    
     def __repr__(self):
         return f"<DailyFortune(user_id={self.user_id}, date={self.date}, score={self.score})>"
@@ -1,6 +1,6 @@
 """占卜会话模型"""
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, JSON, LargeBinary
 from sqlalchemy.sql import func
 from datetime import datetime
 from app.core.database import Base
@@ -24,6 +24,7 @@ class DivinationSession(Base):
     result_summary = Column(Text, nullable=True)
     result_detail = Column(Text, nullable=True)
     result_data = Column(JSON, nullable=True)  # 存储结构化结果
+    result_json = Column(LargeBinary, nullable=True)  # 完成后序列化一次的 DivinationResult（orjson），读取时直接返回
     
     follow_up_count = Column(Integer, default=0)
     follow_up_answers = Column(JSON, nullable=True)
@@ -0,0 +1,43 @@
+"""LLM 解读复用模型"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, BigInteger, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class LLMInterpretation(Base):
+    """LLM 解读表（同一卦象、同类问题的解读跨用户复用）"""
+    __tablename__ = "llm_interpretations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # 卦象：卦序号 + 变爻掩码（bit i 为第 i+1 爻）
+    hexagram_number = Column(Integer, nullable=False)
+    changing_mask = Column(Integer, nullable=False, default=0)
+    
+    # 问题类别与问题簇（归一化问题文本的 SimHash，按有符号 64 位存储）
+    prompt_type = Column(String(50), nullable=False)  # answer/detail
+    question_type = Column(String(50), nullable=False, default='')
+    sub_type = Column(String(50), nullable=False, default='')
+    fingerprint = Column(BigInteger, nullable=False)
+    question = Column(Text, nullable=False)  # 生成时的原问题（个性化替换用）
+    
+    # 生成时使用的Prompt配置及其版本（配置修改后版本变化，旧解读不再使用）
+    prompt_config_id = Column(Integer, nullable=True, index=True)
+    prompt_version = Column(String(32), nullable=False)
+    
+    content = Column(Text, nullable=False)
+    hit_count = Column(Integer, nullable=False, default=0)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_used_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        Index(
+            'ix_llm_interpretations_lookup',
+            'hexagram_number', 'changing_mask', 'prompt_type', 'question_type', 'sub_type', 'prompt_version',
+        ),
+    )
+    
+    def __repr__(self):
+        return f"<LLMInterpretation(id={self.id}, hexagram={self.hexagram_number}, prompt_type={self.prompt_type})>"
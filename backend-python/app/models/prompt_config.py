@@ -32,6 +32,9 @@ class PromptConfig(Base):
     is_enabled = Column(Boolean, default=True, nullable=False)  # 是否启用
     description = Column(Text, default='')  # 描述
     
+    # 解读复用的新鲜期（小时）：为空时使用全局配置，0 表示不复用
+    reuse_ttl_hours = Column(Integer, nullable=True)
+    
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
@@ -1,11 +1,13 @@
 """每日运势数据访问层"""
 
-from typing import Optional, List
+from typing import Optional, List, Any
 from datetime import date
 from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.daily_fortune import DailyFortune
+from app.models.daily_fortune import DailyFortune, DailyFortuneCohort
 
 
 class DailyFortuneRepository:
@@ -16,52 +18,91 @@ class DailyFortuneRepository:
     
     async def get_by_user_and_date(
         self,
-        user_id: int,
+        user_id: str,
         fortune_date: date
     ) -> Optional[DailyFortune]:
         """根据用户ID和日期获取运势"""
         result = await self.db.execute(
             select(DailyFortune).where(
                 DailyFortune.user_id == user_id,
-                DailyFortune.fortune_date == fortune_date
+                DailyFortune.date == fortune_date
             )
         )
         return result.scalar_one_or_none()
     
     async def create(
         self,
-        user_id: int,
+        user_id: str,
         fortune_date: date,
-        overall_score: int,
-        love_score: int,
-        career_score: int,
-        wealth_score: int,
-        health_score: int,
-        lucky_color: str,
-        lucky_number: int,
-        content: str
+        **fields: Any
     ) -> DailyFortune:
-        """创建运势记录"""
-        fortune = DailyFortune(
-            user_id=user_id,
-            fortune_date=fortune_date,
-            overall_score=overall_score,
-            love_score=love_score,
-            career_score=career_score,
-            wealth_score=wealth_score,
-            health_score=health_score,
-            lucky_color=lucky_color,
-            lucky_number=lucky_number,
-            content=content
+        """
+        创建运势记录（fields 为 DailyFortune 的其余列，cohort 为所属群组）
+        
+        INSERT ... ON CONFLICT (user_id, date) DO NOTHING RETURNING id：
+        并发请求已写入同一用户同一天的运势时不报错，返回先写入的那条
+        """
+        cohort = fields.pop("cohort", None)
+        if cohort is not None:
+            fields["cohort_id"] = cohort.id
+        
+        insert = sqlite.insert if self.db.get_bind().dialect.name == "sqlite" else postgresql.insert
+        statement = (
+            insert(DailyFortune.__table__)
+            .values(user_id=user_id, date=fortune_date, **fields)
+            .on_conflict_do_nothing(index_elements=["user_id", "date"])
+            .returning(DailyFortune.__table__.c.id)
         )
-        self.db.add(fortune)
+        fortune_id = (await self.db.execute(statement)).scalar_one_or_none()
         await self.db.commit()
-        await self.db.refresh(fortune)
-        return fortune
+        
+        if fortune_id is None:
+            return await self.get_by_user_and_date(user_id, fortune_date)
+        result = await self.db.execute(select(DailyFortune).where(DailyFortune.id == fortune_id))
+        return result.scalar_one()
+    
+    async def get_cohort(
+        self,
+        fortune_date: date,
+        cohort_key: str
+    ) -> Optional[DailyFortuneCohort]:
+        """根据日期和群组键获取群组运势"""
+        result = await self.db.execute(
+            select(DailyFortuneCohort).where(
+                DailyFortuneCohort.date == fortune_date,
+                DailyFortuneCohort.cohort_key == cohort_key
+            )
+        )
+        return result.scalar_one_or_none()
+    
+    async def create_cohort(
+        self,
+        fortune_date: date,
+        cohort_key: str,
+        **fields: Any
+    ) -> DailyFortuneCohort:
+        """
+        创建群组运势（fields 为 DailyFortuneCohort 的其余列）
+        
+        其他节点已抢先写入同一群组时返回已有记录
+        """
+        cohort = DailyFortuneCohort(
+            date=fortune_date,
+            cohort_key=cohort_key,
+            **fields
+        )
+        self.db.add(cohort)
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            return await self.get_cohort(fortune_date, cohort_key)
+        await self.db.refresh(cohort)
+        return cohort
     
     async def list_by_user(
         self,
-        user_id: int,
+        user_id: str,
         skip: int = 0,
         limit: int = 30
     ) -> List[DailyFortune]:
@@ -69,7 +110,7 @@ class DailyFortuneRepository:
         result = await self.db.execute(
             select(DailyFortune)
             .where(DailyFortune.user_id == user_id)
-            .order_by(DailyFortune.fortune_date.desc())
+            .order_by(DailyFortune.date.desc())
             .offset(skip)
             .limit(limit)
         )
@@ -27,6 +27,25 @@ class DivinationRepository:
         )
         return result.scalar_one_or_none()
     
+    async def get_sessions_by_ids(self, session_ids: List[str]) -> List[DivinationSession]:
+        """
+        批量获取占卜会话（单次IN查询）
+        
+        Args:
+            session_ids: 会话ID列表
+        
+        Returns:
+            List[DivinationSession]: 按session_ids顺序排列的会话列表（不存在的ID被忽略）
+        """
+        if not session_ids:
+            return []
+        
+        result = await self.db.execute(
+            select(DivinationSession).where(DivinationSession.id.in_(session_ids))
+        )
+        sessions_by_id = {session.id: session for session in result.scalars().all()}
+        return [sessions_by_id[sid] for sid in session_ids if sid in sessions_by_id]
+    
     async def get_user_sessions(
         self, 
         user_id: str, 
@@ -85,8 +104,54 @@ class DivinationRepository:
             List[DivinationSession]: 占卜会话列表
         """
         query = select(DivinationSession).where(DivinationSession.user_id == user_id)
+        query = self._apply_filters(query, event_type, version, status, start_date, end_date)
+        query = self._apply_order(query, order_by, order_direction)
+        
+        # 应用分页
+        query = query.limit(limit).offset(offset)
+        
+        result = await self.db.execute(query)
+        return list(result.scalars().all())
+    
+    async def get_user_session_ids_with_filters(
+        self,
+        user_id: str,
+        limit: int = 50,
+        offset: int = 0,
+        event_type: Optional[str] = None,
+        version: Optional[str] = None,
+        status: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        order_by: str = "created_at",
+        order_direction: str = "desc"
+    ) -> List[str]:
+        """
+        获取用户占卜会话ID分页（只查询主键，会话内容走批量缓存）
+        
+        参数与 get_user_sessions_with_filters 一致
+        
+        Returns:
+            List[str]: 排好序的会话ID列表
+        """
+        query = select(DivinationSession.id).where(DivinationSession.user_id == user_id)
+        query = self._apply_filters(query, event_type, version, status, start_date, end_date)
+        query = self._apply_order(query, order_by, order_direction)
+        query = query.limit(limit).offset(offset)
         
-        # 应用过滤条件
+        result = await self.db.execute(query)
+        return list(result.scalars().all())
+    
+    @staticmethod
+    def _apply_filters(
+        query,
+        event_type: Optional[str] = None,
+        version: Optional[str] = None,
+        status: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ):
+        """应用历史记录过滤条件"""
         if event_type:
             query = query.where(DivinationSession.event_type == event_type)
         
@@ -102,18 +167,15 @@ class DivinationRepository:
         if end_date:
             query = query.where(DivinationSession.created_at <= end_date)
         
-        # 应用排序
+        return query
+    
+    @staticmethod
+    def _apply_order(query, order_by: str = "created_at", order_direction: str = "desc"):
+        """应用排序"""
         order_column = getattr(DivinationSession, order_by, DivinationSession.created_at)
         if order_direction.lower() == "asc":
-            query = query.order_by(order_column.asc())
-        else:
-            query = query.order_by(order_column.desc())
-        
-        # 应用分页
-        query = query.limit(limit).offset(offset)
-        
-        result = await self.db.execute(query)
-        return list(result.scalars().all())
+            return query.order_by(order_column.asc())
+        return query.order_by(order_column.desc())
     
     async def count_user_sessions(self, user_id: str) -> int:
         """
@@ -157,22 +219,7 @@ class DivinationRepository:
         query = select(func.count(DivinationSession.id)).where(
             DivinationSession.user_id == user_id
         )
-        
-        # 应用过滤条件
-        if event_type:
-            query = query.where(DivinationSession.event_type == event_type)
-        
-        if version:
-            query = query.where(DivinationSession.version == version)
-        
-        if status:
-            query = query.where(DivinationSession.status == status)
-        
-        if start_date:
-            query = query.where(DivinationSession.created_at >= start_date)
-        
-        if end_date:
-            query = query.where(DivinationSession.created_at <= end_date)
+        query = self._apply_filters(query, event_type, version, status, start_date, end_date)
         
         result = await self.db.execute(query)
         return result.scalar() or 0
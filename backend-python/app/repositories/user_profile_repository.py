@@ -1,7 +1,8 @@
 """用户资料数据访问层"""
 
-from typing import Optional
-from sqlalchemy import select
+from typing import Optional, List, Dict, Any, AsyncIterator
+from sqlalchemy import select, update
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user_profile import UserProfile
@@ -36,3 +37,42 @@ class UserProfileRepository:
         await self.db.commit()
         await self.db.refresh(profile)
         return profile
+    
+    async def iter_birth_chunks(self, chunk_size: int = 1000) -> AsyncIterator[List[Row]]:
+        """
+        分块遍历有出生日期的档案（按主键keyset分页，只取计算所需的列）
+        
+        Args:
+            chunk_size: 每块行数
+        
+        Yields:
+            List[Row]: (id, birth_date, birth_time)
+        """
+        last_id = 0
+        while True:
+            result = await self.db.execute(
+                select(UserProfile.id, UserProfile.birth_date, UserProfile.birth_time)
+                .where(UserProfile.birth_date.isnot(None), UserProfile.id > last_id)
+                .order_by(UserProfile.id)
+                .limit(chunk_size)
+            )
+            rows = list(result.all())
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1].id
+    
+    async def bulk_update(self, values: List[Dict[str, Any]]) -> int:
+        """
+        按主键批量更新（一次executemany，不加载ORM对象）
+        
+        Args:
+            values: 每项包含 id 及要更新的列
+        
+        Returns:
+            int: 更新行数
+        """
+        if not values:
+            return 0
+        await self.db.execute(update(UserProfile), values)
+        return len(values)
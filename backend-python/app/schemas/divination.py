@@ -5,6 +5,40 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 
+class NajiaChangedLine(BaseModel):
+    """变出爻"""
+    stem: str = Field(..., description="纳甲天干")
+    branch: str = Field(..., description="纳甲地支")
+    wuxing: str = Field(..., description="地支五行")
+    relative: str = Field(..., description="六亲（按本卦所属宫）")
+
+
+class NajiaLine(BaseModel):
+    """纳甲装卦中的一爻"""
+    position: int = Field(..., ge=1, le=6, description="爻位（自下而上）")
+    yang: bool = Field(..., description="是否阳爻")
+    changing: bool = Field(..., description="是否变爻")
+    stem: str = Field(..., description="纳甲天干")
+    branch: str = Field(..., description="纳甲地支")
+    wuxing: str = Field(..., description="地支五行")
+    relative: str = Field(..., description="六亲")
+    spirit: str = Field(..., description="六神")
+    marker: str = Field("", description="世/应")
+    changed: Optional[NajiaChangedLine] = Field(None, description="变出爻（仅变爻）")
+
+
+class NajiaInfo(BaseModel):
+    """纳甲六爻排盘"""
+    palace: str = Field(..., description="所属八宫")
+    palace_wuxing: str = Field(..., description="本宫五行")
+    generation: str = Field(..., description="世代（本宫卦/一世卦……游魂卦/归魂卦）")
+    shi: int = Field(..., description="世爻爻位")
+    ying: int = Field(..., description="应爻爻位")
+    day: str = Field(..., description="占卜日干支")
+    void: List[str] = Field(default_factory=list, description="旬空")
+    lines: List[NajiaLine] = Field(..., description="六爻（自初爻起）")
+
+
 class HexagramInfo(BaseModel):
     """卦象信息"""
     number: int = Field(..., description="卦序号（1-64）")
@@ -15,6 +49,7 @@ class HexagramInfo(BaseModel):
     summary: str = Field(..., description="卦辞摘要")
     wuxing: str = Field(..., description="五行")
     changing_lines: Optional[List[int]] = Field(None, description="变爻位置")
+    najia: Optional[NajiaInfo] = Field(None, description="纳甲六爻排盘")
 
 
 class TarotCard(BaseModel):
@@ -68,6 +103,7 @@ class DivinationResult(BaseModel):
     daily_fortune: Optional[DailyFortuneInfo] = None
     
     needs_follow_up: bool = False
+    is_repeat: bool = Field(False, description="是否为重复提问（返回的是上一次的占卜结果）")
     created_at: datetime
     
     class Config:
@@ -100,7 +136,7 @@ class CreateDivinationRequest(BaseModel):
     event_type: Optional[str] = Field(None, description="事件类型")
     version: str = Field("CN", description="版本（CN/TAROT）")
     orientation: Optional[str] = Field(None, description="方位")
-    spread: Optional[str] = Field(None, description="牌阵类型")
+    spread: Optional[str] = Field(None, description="牌阵类型（single/three/cross/horseshoe/relationship）")
     intent: Optional[str] = Field(None, description="意图类型")
     context: Optional[Dict[str, Any]] = Field(None, description="上下文信息")
 
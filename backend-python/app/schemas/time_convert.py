@@ -1,7 +1,8 @@
 """时间转换相关的 Pydantic 模式"""
 
-from pydantic import BaseModel, Field
-from typing import Optional
+from datetime import date
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List
 
 
 class Solar2LunarRequest(BaseModel):
@@ -19,6 +20,21 @@ class Lunar2SolarRequest(BaseModel):
     is_leap_month: bool = Field(False, description="是否闰月")
 
 
+class DateRangeRequest(BaseModel):
+    """日期范围批量转换请求"""
+    start_date: date = Field(..., description="开始日期")
+    end_date: date = Field(..., description="结束日期（包含）")
+    
+    @model_validator(mode="after")
+    def check_range(self):
+        days = (self.end_date - self.start_date).days + 1
+        if days < 1:
+            raise ValueError("结束日期不能早于开始日期")
+        if days > 366:
+            raise ValueError("单次最多转换366天")
+        return self
+
+
 class ConversionResult(BaseModel):
     """转换结果"""
     # 公历信息
@@ -76,3 +92,20 @@ class ConversionResult(BaseModel):
                 "is_today": True
             }
         }
+
+
+class DateRangeResult(BaseModel):
+    """日期范围批量转换结果"""
+    start_date: date
+    end_date: date
+    days: List[ConversionResult]
+
+
+class MonthGridResult(BaseModel):
+    """月视图结果（6周42天）"""
+    year: int
+    month: int
+    week_start: int = Field(..., description="每周第一天（0=周一 ... 6=周日）")
+    start_date: date
+    end_date: date
+    days: List[ConversionResult]
@@ -0,0 +1,137 @@
+"""黄历服务
+
+按日期计算一次全部历法信息（农历、干支、节气、节日、星座），
+结果为不可变对象，进程内按日期LRU缓存；is_today 与当天相关，只在输出时计算。
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+from typing import Optional, Dict, Any, List
+from app.core.config import settings
+from app.utils.calendar import CalendarConverter
+
+
+@dataclass(frozen=True, slots=True)
+class AlmanacDay:
+    """某一天的历法信息（不含 is_today）"""
+    solar_date: date
+    lunar_year: int
+    lunar_month: int
+    lunar_day: int
+    is_leap: bool
+    lunar_month_cn: str
+    lunar_day_cn: str
+    ganzhi_year: str
+    ganzhi_month: str
+    ganzhi_day: str
+    animal: str
+    weekday: int
+    weekday_cn: str
+    astro: str
+    term: str
+    festival: str
+    lunar_festival: str
+
+    @property
+    def is_term(self) -> bool:
+        return bool(self.term)
+
+    @property
+    def festivals(self) -> List[str]:
+        """公历与农历节日"""
+        return [title for title in (self.festival, self.lunar_festival) if title]
+
+    def is_today(self, today: Optional[date] = None) -> bool:
+        return self.solar_date == (today or date.today())
+
+    def to_dict(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        转为转换结果字典（字段同 ConversionResult）
+
+        Args:
+            today: 当天日期，默认取系统日期
+
+        Returns:
+            Dict
+        """
+        return {
+            "solar_year": self.solar_date.year,
+            "solar_month": self.solar_date.month,
+            "solar_day": self.solar_date.day,
+            "lunar_year": self.lunar_year,
+            "lunar_month": self.lunar_month,
+            "lunar_day": self.lunar_day,
+            "is_leap": self.is_leap,
+            "lunar_month_cn": self.lunar_month_cn,
+            "lunar_day_cn": self.lunar_day_cn,
+            "ganzhi_year": self.ganzhi_year,
+            "ganzhi_month": self.ganzhi_month,
+            "ganzhi_day": self.ganzhi_day,
+            "animal": self.animal,
+            "weekday": self.weekday,
+            "weekday_cn": self.weekday_cn,
+            "astro": self.astro,
+            "term": self.term,
+            "is_term": self.is_term,
+            "festival": self.festival,
+            "lunar_festival": self.lunar_festival,
+            "is_today": self.is_today(today),
+        }
+
+
+class AlmanacService:
+    """黄历服务（进程内按日期缓存）"""
+
+    @staticmethod
+    def get_day(day: date) -> AlmanacDay:
+        """
+        获取某天的历法信息
+
+        Args:
+            day: 公历日期
+
+        Returns:
+            AlmanacDay
+
+        Raises:
+            ValueError: 超出历法表范围
+        """
+        return _get_day_cached(day)
+
+    @staticmethod
+    def build(day: date) -> AlmanacDay:
+        """计算某天的历法信息（不经过缓存）"""
+        info = CalendarConverter.solar_to_lunar(day.year, day.month, day.day)
+        return AlmanacDay(
+            solar_date=day,
+            lunar_year=info["lunar_year"],
+            lunar_month=info["lunar_month"],
+            lunar_day=info["lunar_day"],
+            is_leap=info["is_leap"],
+            lunar_month_cn=info["lunar_month_cn"],
+            lunar_day_cn=info["lunar_day_cn"],
+            ganzhi_year=info["ganzhi_year"],
+            ganzhi_month=info["ganzhi_month"],
+            ganzhi_day=info["ganzhi_day"],
+            animal=info["animal"],
+            weekday=info["weekday"],
+            weekday_cn=info["weekday_cn"],
+            astro=info["astro"],
+            term=info["term"],
+            festival=info["festival"],
+            lunar_festival=info["lunar_festival"],
+        )
+
+    @staticmethod
+    def cache_info():
+        """LRU命中统计"""
+        return _get_day_cached.cache_info()
+
+    @staticmethod
+    def cache_clear():
+        """清空LRU"""
+        _get_day_cached.cache_clear()
+
+
+_get_day_cached = lru_cache(maxsize=settings.ALMANAC_CACHE_SIZE)(AlmanacService.build)
@@ -0,0 +1,176 @@
+"""问题分析近似重复缓存
+
+同一问题换个标点、全角半角或加个"我应该"，归一化后文本相同或 SimHash 距离很小，
+可以复用之前的分析结果，省去一次问题分析（LLM 调用）。
+
+- 归一化文本相同：精确命中
+- 指纹汉明距离在 max_distance 以内：近似命中
+- 按 audit_rate 抽样一部分命中不直接返回，而是照常分析后与缓存结果比对，
+  统计误匹配率（四个分类标签有任一不同即算误匹配），并保留最近的误匹配样本
+
+缓存为进程内 LRU，键为归一化文本，值为分析结果的字段快照。
+"""
+
+import copy
+import random
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, NamedTuple, Optional, Sequence
+
+from app.core.config import settings
+from app.utils.text_fingerprint import BandedIndex, normalize_question, simhash
+
+
+class CacheHit(NamedTuple):
+    """一次命中"""
+    snapshot: Dict[str, Any]    # 缓存的分析结果字段（副本）
+    distance: int               # 指纹汉明距离（0 且 exact 为真时表示归一化文本相同）
+    exact: bool
+    cached_question: str        # 缓存条目对应的原问题
+    audit: bool                 # 是否被抽中做误匹配审计
+
+
+class _Entry(NamedTuple):
+    key: str                    # 归一化文本
+    question: str
+    fingerprint: int
+    snapshot: Dict[str, Any]
+
+
+class AnalysisCache:
+    """问题分析近似重复缓存"""
+
+    MAX_AUDIT_SAMPLES = 20
+
+    def __init__(self, capacity: int = 10000, max_distance: int = 3, audit_rate: float = 0.0,
+                 labels: Sequence[str] = (), rng: Optional[random.Random] = None):
+        """
+        Args:
+            capacity: 最多缓存的问题数
+            max_distance: 近似命中允许的最大汉明距离（0 表示只做精确命中）
+            audit_rate: 命中后抽样审计的比例
+            labels: 审计时比对的字段
+            rng: 抽样用的随机数发生器
+        """
+        self.capacity = capacity
+        self.audit_rate = audit_rate
+        self.labels = tuple(labels)
+        self._rng = rng or random.Random()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._index: BandedIndex[str] = BandedIndex(max_distance)
+        self._lock = threading.Lock()
+        self._counts = {"lookups": 0, "exact_hits": 0, "near_hits": 0, "misses": 0,
+                        "stores": 0, "audits": 0, "audit_mismatches": 0}
+        self._mismatches: deque = deque(maxlen=self.MAX_AUDIT_SAMPLES)
+
+    def lookup(self, question: str) -> Optional[CacheHit]:
+        """
+        查找相同或相近问题的分析结果
+
+        Args:
+            question: 问题文本
+
+        Returns:
+            CacheHit，未命中返回 None
+        """
+        normalized = normalize_question(question)
+        with self._lock:
+            self._counts["lookups"] += 1
+            entry = self._entries.get(normalized) if normalized else None
+            distance, exact = 0, entry is not None
+            if entry is None and normalized and self._index.max_distance:
+                nearest = self._index.nearest(simhash(normalized))
+                if nearest is not None:
+                    key, distance = nearest
+                    entry = self._entries[key]
+            if entry is None:
+                self._counts["misses"] += 1
+                return None
+
+            self._counts["exact_hits" if exact else "near_hits"] += 1
+            self._entries.move_to_end(entry.key)
+            audit = self.audit_rate > 0 and self._rng.random() < self.audit_rate
+            return CacheHit(copy.deepcopy(entry.snapshot), distance, exact, entry.question, audit)
+
+    def store(self, question: str, snapshot: Dict[str, Any]):
+        """
+        缓存一个问题的分析结果
+
+        Args:
+            question: 问题文本
+            snapshot: 分析结果字段
+        """
+        normalized = normalize_question(question)
+        if not normalized:
+            return
+        fingerprint = simhash(normalized)
+        with self._lock:
+            self._entries[normalized] = _Entry(normalized, question, fingerprint, copy.deepcopy(snapshot))
+            self._entries.move_to_end(normalized)
+            self._index.add(normalized, fingerprint)
+            self._counts["stores"] += 1
+            while len(self._entries) > self.capacity:
+                evicted, _ = self._entries.popitem(last=False)
+                self._index.remove(evicted)
+
+    def record_audit(self, question: str, hit: CacheHit, snapshot: Dict[str, Any]) -> bool:
+        """
+        记录一次审计：比对缓存结果与重新分析的结果
+
+        Args:
+            question: 本次问题
+            hit: lookup 返回的命中
+            snapshot: 重新分析得到的字段
+
+        Returns:
+            bool: 是否误匹配
+        """
+        mismatched = any(hit.snapshot.get(label) != snapshot.get(label) for label in self.labels)
+        with self._lock:
+            self._counts["audits"] += 1
+            if mismatched:
+                self._counts["audit_mismatches"] += 1
+                self._mismatches.append({
+                    "question": question,
+                    "cached_question": hit.cached_question,
+                    "distance": hit.distance,
+                    "exact": hit.exact,
+                    "cached": {label: hit.snapshot.get(label) for label in self.labels},
+                    "fresh": {label: snapshot.get(label) for label in self.labels},
+                })
+        return mismatched
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率与误匹配审计统计"""
+        with self._lock:
+            counts = dict(self._counts)
+            samples = list(self._mismatches)
+            size = len(self._entries)
+        hits = counts["exact_hits"] + counts["near_hits"]
+        return {
+            **counts,
+            "size": size,
+            "capacity": self.capacity,
+            "max_distance": self._index.max_distance,
+            "audit_rate": self.audit_rate,
+            "hit_rate": round(hits / counts["lookups"], 4) if counts["lookups"] else 0.0,
+            "false_match_rate": round(counts["audit_mismatches"] / counts["audits"], 4) if counts["audits"] else 0.0,
+            "recent_mismatches": samples,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._index = BandedIndex(self._index.max_distance)
+
+
+def create_analysis_cache(labels: Sequence[str]) -> Optional[AnalysisCache]:
+    """按配置创建缓存（未启用时返回 None）"""
+    if not settings.ANALYSIS_CACHE_ENABLED:
+        return None
+    return AnalysisCache(
+        capacity=settings.ANALYSIS_CACHE_SIZE,
+        max_distance=settings.ANALYSIS_CACHE_MAX_DISTANCE,
+        audit_rate=settings.ANALYSIS_CACHE_AUDIT_RATE,
+        labels=labels,
+    )
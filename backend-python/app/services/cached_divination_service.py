@@ -1,8 +1,9 @@
 """带缓存的占卜服务"""
 
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from app.core.cache import get_cache_manager, RedisCache
 from app.core.config import settings
+from app.core.database import async_session_maker
 from app.models.divination import DivinationSession
 from app.repositories.divination_repository import DivinationRepository
 
@@ -10,17 +11,24 @@ from app.repositories.divination_repository import DivinationRepository
 class CachedDivinationService:
     """带缓存的占卜服务"""
     
-    def __init__(self, repository: DivinationRepository, cache_manager=None):
+    def __init__(self, repository: DivinationRepository, cache_manager=None, session_factory=async_session_maker):
         """
         初始化服务
         
         Args:
-            repository: 占卜Repository
+            repository: 占卜Repository（使用请求的会话）
             cache_manager: 缓存管理器（可选）
+            session_factory: 缓存回源使用的会话工厂（后台刷新时请求的会话可能已关闭）
         """
         self.repository = repository
         self.cache_manager = cache_manager
         self.cache_enabled = settings.REDIS_ENABLED
+        self.session_factory = session_factory
+    
+    async def _load(self, load):
+        """在独立会话中回源（get_or_set 的加载函数可能在请求结束后由后台刷新调用）"""
+        async with self.session_factory() as db:
+            return await load(type(self.repository)(db))
     
     async def get_session_cached(self, session_id: str) -> Optional[DivinationSession]:
         """
@@ -41,10 +49,61 @@ class CachedDivinationService:
         # 使用缓存
         return await self.cache_manager.get_or_set(
             key=cache_key,
-            fetch_func=lambda: self.repository.get_session(session_id),
+            fetch_func=lambda: self._load(lambda repository: repository.get_session(session_id)),
             expire=settings.CACHE_TTL_DEFAULT
         )
     
+    async def get_sessions_cached(self, session_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        批量获取占卜会话（带缓存，一次MGET + 一次IN查询 + 一次pipeline回填）
+        
+        Args:
+            session_ids: 会话ID列表
+        
+        Returns:
+            List[Dict]: 按session_ids顺序排列的会话数据
+        """
+        if not self.cache_enabled or not self.cache_manager:
+            sessions = await self.repository.get_sessions_by_ids(session_ids)
+            return [self.serialize_session(session) for session in sessions]
+        
+        key_to_id = {CacheStrategy.get_session_key(sid): sid for sid in session_ids}
+        
+        async def fetch_missing(keys: List[str]) -> Dict[str, Dict[str, Any]]:
+            sessions = await self.repository.get_sessions_by_ids([key_to_id[key] for key in keys])
+            return {
+                CacheStrategy.get_session_key(session.id): self.serialize_session(session)
+                for session in sessions
+            }
+        
+        cached = await self.cache_manager.get_or_set_many(
+            keys=list(key_to_id),
+            fetch_many_func=fetch_missing,
+            expire=CacheStrategy.TTL_SESSION
+        )
+        return list(cached.values())
+    
+    @staticmethod
+    def serialize_session(session: DivinationSession) -> Dict[str, Any]:
+        """将会话ORM对象转换为可缓存的字典"""
+        return {
+            "id": session.id,
+            "user_id": session.user_id,
+            "version": session.version,
+            "question": session.question,
+            "event_type": session.event_type,
+            "orientation": session.orientation,
+            "spread": session.spread,
+            "intent": session.intent,
+            "status": session.status,
+            "result_summary": session.result_summary,
+            "result_detail": session.result_detail,
+            "result_data": session.result_data,
+            "follow_up_count": session.follow_up_count,
+            "created_at": session.created_at.isoformat() if session.created_at else None,
+            "updated_at": session.updated_at.isoformat() if session.updated_at else None,
+        }
+    
     async def get_user_sessions_cached(
         self,
         user_id: str,
@@ -74,7 +133,7 @@ class CachedDivinationService:
         # 使用缓存（短期缓存，因为列表可能经常变化）
         return await self.cache_manager.get_or_set(
             key=cache_key,
-            fetch_func=lambda: self.repository.get_user_sessions(user_id, limit, offset),
+            fetch_func=lambda: self._load(lambda repository: repository.get_user_sessions(user_id, limit, offset)),
             expire=settings.CACHE_TTL_SHORT
         )
     
@@ -97,7 +156,7 @@ class CachedDivinationService:
         # 使用缓存（中期缓存）
         return await self.cache_manager.get_or_set(
             key=cache_key,
-            fetch_func=lambda: self.repository.get_user_stats(user_id),
+            fetch_func=lambda: self._load(lambda repository: repository.get_user_stats(user_id)),
             expire=settings.CACHE_TTL_DEFAULT
         )
     
@@ -137,6 +196,7 @@ class CacheStrategy:
     PREFIX_USER = "user"
     PREFIX_CONFIG = "config"
     PREFIX_LLM = "llm"
+    PREFIX_CALENDAR = "calendar"
     
     # 缓存过期时间（秒）
     TTL_SESSION = 3600  # 会话缓存：1小时
@@ -144,6 +204,7 @@ class CacheStrategy:
     TTL_USER_STATS = 3600  # 用户统计：1小时
     TTL_CONFIG = 86400  # 配置缓存：24小时
     TTL_LLM_RESPONSE = 7200  # LLM响应：2小时
+    TTL_CALENDAR_MONTH = 30 * 86400  # 历法月视图：30天（数据不变）
     
     @staticmethod
     def get_session_key(session_id: str) -> str:
@@ -184,4 +245,11 @@ class CacheStrategy:
             "response", prompt, model,
             prefix=CacheStrategy.PREFIX_LLM
         )
-
+    
+    @staticmethod
+    def get_calendar_month_key(year: int, month: int, week_start: int) -> str:
+        """获取历法月视图缓存键"""
+        return RedisCache.generate_key(
+            "month", year, month, week_start,
+            prefix=CacheStrategy.PREFIX_CALENDAR
+        )
@@ -0,0 +1,183 @@
+"""起卦分布审计（蒙特卡洛模拟）
+
+三枚硬币法下每爻：老阴 1/8、少阳 3/8、少阴 3/8、老阳 1/8；
+每爻阴阳各半，故六十四卦等概率（各 1/64），变爻数服从二项分布 B(6, 1/4)。
+
+模拟分两步：
+1. 生成18位硬币字（与 IChingService 的起卦字格式相同）
+   - model：NumPy 随机数，检验硬币到爻值、卦序的映射表
+   - digest：对合成会话ID逐个计算带密钥摘要，检验线上起卦方式
+   - md5：兼容模式（每卦18次MD5，较慢）
+2. 向量化统计：按块把硬币字展开为 (n, 6) 爻值矩阵，bincount 汇总
+"""
+
+import math
+import time
+from functools import partial
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.core.config import settings
+from app.services.iching_service import (
+    IChingService, LINE_VALUE_BY_COINS, CAST_MODE_DIGEST, CAST_MODE_MD5
+)
+from app.utils.hexagram_data import KING_WEN_BY_BITS, HEXAGRAM_NAMES
+
+MODE_MODEL = "model"
+
+_LINE_VALUES = np.frombuffer(LINE_VALUE_BY_COINS, dtype=np.uint8)
+_KING_WEN = np.frombuffer(KING_WEN_BY_BITS, dtype=np.uint8)
+_COIN_SHIFTS = np.arange(0, 18, 3, dtype=np.uint32)
+_LINE_WEIGHTS = (1 << np.arange(6)).astype(np.uint8)
+
+# 理论分布
+_LINE_PROBS = [1 / 8, 3 / 8, 3 / 8, 1 / 8]
+_CHANGING_PROBS = [math.comb(6, k) * 0.25 ** k * 0.75 ** (6 - k) for k in range(7)]
+_HEXAGRAM_PROBS = [1 / 64] * 64
+
+
+def _chi_square(observed: np.ndarray, probs: List[float]) -> Dict[str, float]:
+    """
+    卡方拟合优度检验
+
+    p 值用 Wilson-Hilferty 立方根近似（自由度≥2时误差很小），不依赖 SciPy。
+    """
+    total = observed.sum()
+    expected = np.asarray(probs) * total
+    chi2 = float(((observed - expected) ** 2 / expected).sum())
+    dof = len(probs) - 1
+    z = ((chi2 / dof) ** (1 / 3) - (1 - 2 / (9 * dof))) / math.sqrt(2 / (9 * dof))
+    return {"chi2": round(chi2, 3), "dof": dof, "p_value": round(0.5 * math.erfc(z / math.sqrt(2)), 6)}
+
+
+class CastingAuditService:
+    """起卦分布审计"""
+
+    MODES = (MODE_MODEL, CAST_MODE_DIGEST, CAST_MODE_MD5)
+    CHUNK_SIZE = 1 << 20
+    # md5 兼容模式每卦需18次摘要，单独限制模拟次数
+    MAX_MD5_SAMPLES = 200_000
+
+    @staticmethod
+    def cast_words(samples: int, mode: str, seed: Optional[int] = None) -> np.ndarray:
+        """
+        生成硬币字
+
+        Args:
+            samples: 卦数
+            mode: model/digest/md5
+            seed: 随机种子（model）或合成会话ID前缀（digest/md5）
+
+        Returns:
+            uint32 数组，低18位为硬币
+        """
+        if mode == MODE_MODEL:
+            rng = np.random.default_rng(seed)
+            return rng.integers(0, 1 << 18, size=samples, dtype=np.uint32)
+
+        prefix = f"audit-{seed if seed is not None else time.time_ns()}-"
+        if mode == CAST_MODE_MD5:
+            cast = IChingService.legacy_cast_word
+        else:
+            cast = partial(IChingService.cast_word, key=settings.ICHING_CAST_KEY.encode()[:64])
+        return np.fromiter((cast(f"{prefix}{i}") for i in range(samples)), dtype=np.uint32, count=samples)
+
+    @staticmethod
+    def tally(words: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        向量化统计
+
+        Returns:
+            line_values: 各爻位 6/7/8/9 计数，形状 (6, 4)
+            hexagrams: 卦序 1-64 计数
+            changing: 变爻数 0-6 计数
+        """
+        line_values = np.zeros((6, 4), dtype=np.int64)
+        hexagrams = np.zeros(64, dtype=np.int64)
+        changing = np.zeros(7, dtype=np.int64)
+        positions = np.arange(6) * 4
+
+        for start in range(0, len(words), CastingAuditService.CHUNK_SIZE):
+            chunk = words[start:start + CastingAuditService.CHUNK_SIZE]
+            values = _LINE_VALUES[(chunk[:, None] >> _COIN_SHIFTS) & 7]  # (n, 6)，取值 6-9
+
+            line_values += np.bincount(
+                (values - 6 + positions).ravel(), minlength=24
+            ).reshape(6, 4)
+
+            bits = ((values & 1) * _LINE_WEIGHTS).sum(axis=1)
+            hexagrams += np.bincount(_KING_WEN[bits] - 1, minlength=64)
+
+            changing_count = ((values == 6) | (values == 9)).sum(axis=1)
+            changing += np.bincount(changing_count, minlength=7)
+
+        return {"line_values": line_values, "hexagrams": hexagrams, "changing": changing}
+
+    @staticmethod
+    def run(samples: int, mode: str = MODE_MODEL, seed: Optional[int] = None) -> Dict[str, Any]:
+        """
+        执行模拟并生成分布报告
+
+        Args:
+            samples: 卦数
+            mode: model/digest/md5
+            seed: 随机种子
+
+        Returns:
+            Dict: 爻值分布、各爻位分布、变爻数分布、六十四卦频率及卡方检验
+        """
+        if mode not in CastingAuditService.MODES:
+            raise ValueError(f"不支持的模拟方式: {mode}")
+
+        started = time.perf_counter()
+        words = CastingAuditService.cast_words(samples, mode, seed)
+        cast_ms = (time.perf_counter() - started) * 1000
+        counts = CastingAuditService.tally(words)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        line_totals = counts["line_values"].sum(axis=0)
+        line_rows = counts["line_values"].tolist()
+        changing = counts["changing"].tolist()
+        hexagrams = counts["hexagrams"].tolist()
+        return {
+            "mode": mode,
+            "samples": samples,
+            "cast_ms": round(cast_ms, 1),
+            "elapsed_ms": round(elapsed_ms, 1),
+            "line_values": {
+                str(value): {
+                    "count": count,
+                    "freq": round(count / (samples * 6), 6),
+                    "expected": prob,
+                }
+                for value, count, prob in zip(range(6, 10), line_totals.tolist(), _LINE_PROBS)
+            },
+            "line_values_test": _chi_square(line_totals, _LINE_PROBS),
+            "positions": [
+                {
+                    "line": i + 1,
+                    "freq": {str(value): round(count / samples, 6) for value, count in zip(range(6, 10), row)},
+                    "test": _chi_square(np.asarray(row), _LINE_PROBS),
+                }
+                for i, row in enumerate(line_rows)
+            ],
+            "changing_lines": {
+                str(k): {
+                    "count": count,
+                    "freq": round(count / samples, 6),
+                    "expected": round(prob, 6),
+                }
+                for k, (count, prob) in enumerate(zip(changing, _CHANGING_PROBS))
+            },
+            "changing_lines_test": _chi_square(counts["changing"], _CHANGING_PROBS),
+            "hexagrams": [
+                {
+                    "number": number,
+                    "name": HEXAGRAM_NAMES[number - 1],
+                    "count": count,
+                    "freq": round(count / samples, 6),
+                }
+                for number, count in enumerate(hexagrams, start=1)
+            ],
+            "hexagrams_expected": round(1 / 64, 6),
+            "hexagrams_test": _chi_square(counts["hexagrams"], _HEXAGRAM_PROBS),
+        }
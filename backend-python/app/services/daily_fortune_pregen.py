@@ -0,0 +1,240 @@
+"""每日运势夜间预生成
+
+每日运势默认在用户当天第一次请求时生成，LLM 延迟正好落在早上推送（notification_time，
+默认 08:00）后的访问高峰。预生成在夜间低峰窗口内为活跃用户提前生成次日运势，
+白天的请求只剩一次按 (user_id, date) 的查询。
+
+- 主节点选举：多个节点都运行调度循环，只有抢到 Redis 锁的节点执行，执行中每 lock_seconds/3 续期；
+  续期失败（锁已被其他节点抢走）后不再开始新的生成，本批不记录断点
+- 并发与限流：同时生成的用户数不超过 concurrency，LLM 调用按 rate_per_second 匀速发出
+- 断点续跑：按用户ID顺序分批处理，每批完成后把进度写入 Redis；
+  节点中断或窗口结束后，下一次（任一节点）从断点继续，已存在的运势直接跳过
+"""
+
+import asyncio
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.cache import RedisCache, get_redis_cache
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.logger import get_logger
+from app.models.user import User
+from app.services.daily_fortune_service import DailyFortuneService
+from app.utils.rate_limiter import AsyncTokenBucket
+
+logger = get_logger(__name__)
+
+LEADER_KEY = "daily_fortune:pregen:leader"
+CHECKPOINT_PREFIX = "daily_fortune:pregen:checkpoint"
+CHECKPOINT_TTL = 3 * 86400
+
+
+def checkpoint_key(fortune_date: date) -> str:
+    return f"{CHECKPOINT_PREFIX}:{fortune_date.isoformat()}"
+
+
+class DailyFortunePregenerator:
+    """每日运势预生成"""
+
+    def __init__(
+        self,
+        session_factory: Callable = async_session_maker,
+        cache: Optional[RedisCache] = None,
+        concurrency: int = 8,
+        rate_per_second: float = 5.0,
+        batch_size: int = 200,
+        active_days: int = 30,
+        lock_seconds: int = 120,
+    ):
+        """
+        Args:
+            session_factory: 数据库会话工厂（每个并发生成任务使用独立会话）
+            cache: Redis缓存，用于主节点选举与断点；为空时单节点运行且不记录断点
+            concurrency: 最多同时生成的用户数
+            rate_per_second: LLM 调用速率上限（次/秒，<=0 不限）
+            batch_size: 每批用户数（每批完成后记录断点、确认仍持有主节点锁）
+            active_days: 最近多少天内登录过的用户算活跃用户
+            lock_seconds: 主节点锁的过期时间（秒），执行中每 lock_seconds/3 续期
+        """
+        self.session_factory = session_factory
+        self.cache = cache
+        self.concurrency = max(1, concurrency)
+        self.limiter = AsyncTokenBucket(rate_per_second, burst=self.concurrency)
+        self.batch_size = batch_size
+        self.active_days = active_days
+        self.lock_seconds = lock_seconds
+
+    async def run(self, fortune_date: date, deadline: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        预生成某天的运势（从断点继续）
+
+        Args:
+            fortune_date: 运势日期
+            deadline: 截止时间（本地时间），到时记录断点后退出
+
+        Returns:
+            断点状态：last_user_id、generated、existing、failed、done，
+            未抢到主节点时返回 {"leader": False}
+        """
+        if not self.cache:
+            return await self._run(fortune_date, deadline, None, asyncio.Event())
+
+        token = uuid.uuid4().hex
+        lock_ms = int(self.lock_seconds * 1000)
+        if not await self.cache.acquire_lock(LEADER_KEY, token, lock_ms):
+            logger.info("每日运势预生成已由其他节点执行", extra={"date": fortune_date.isoformat()})
+            return {"leader": False}
+
+        try:
+            # 一批可能远长于锁的过期时间，后台持续续期
+            async with self.cache.hold_lock(LEADER_KEY, token, lock_ms) as lost:
+                return await self._run(fortune_date, deadline, token, lost)
+        finally:
+            await self.cache.release_lock(LEADER_KEY, token)
+
+    async def _run(self, fortune_date: date, deadline: Optional[datetime], token: Optional[str],
+                   lost: asyncio.Event) -> Dict[str, Any]:
+        state = await self.checkpoint(fortune_date) or {
+            "last_user_id": 0, "generated": 0, "existing": 0, "failed": 0, "done": False,
+        }
+        if state["done"]:
+            return state
+        logger.info("开始预生成每日运势", extra={"date": fortune_date.isoformat(), "resume_from": state["last_user_id"]})
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def generate(user_id: int) -> Optional[str]:
+            async with semaphore:
+                if lost.is_set():
+                    return None  # 已不是主节点，不再开始新的生成
+                return await self._generate(str(user_id), fortune_date)
+
+        while True:
+            if deadline and datetime.now() >= deadline:
+                logger.warning("预生成窗口结束，已记录断点", extra={"date": fortune_date.isoformat(), **state})
+                return state
+
+            user_ids = await self._active_user_ids(state["last_user_id"])
+            if not user_ids:
+                state["done"] = True
+                await self._save_checkpoint(fortune_date, state)
+                logger.info("每日运势预生成完成", extra={"date": fortune_date.isoformat(), **state})
+                return state
+
+            outcomes = await asyncio.gather(*[generate(user_id) for user_id in user_ids])
+            if lost.is_set():
+                # 本批未完成，断点留给新的主节点（已生成的用户届时按已存在跳过）
+                logger.warning("主节点锁已丢失，停止预生成", extra={"date": fortune_date.isoformat(), **state})
+                return state
+            for outcome in outcomes:
+                state[outcome] += 1
+            state["last_user_id"] = user_ids[-1]
+            await self._save_checkpoint(fortune_date, state)
+
+            if token and not await self.cache.extend_lock(LEADER_KEY, token, int(self.lock_seconds * 1000)):
+                logger.warning("主节点锁已丢失，停止预生成", extra={"date": fortune_date.isoformat()})
+                return state
+
+    async def _active_user_ids(self, after_id: int) -> List[int]:
+        """按ID顺序取下一批活跃用户"""
+        since = datetime.now(timezone.utc) - timedelta(days=self.active_days)
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(User.id)
+                .where(User.id > after_id, User.status == 1, User.last_login_at >= since)
+                .order_by(User.id)
+                .limit(self.batch_size)
+            )
+            return list(result.scalars().all())
+
+    async def _generate(self, user_id: str, fortune_date: date) -> str:
+        """
+        生成单个用户的运势
+
+        Returns:
+            generated / existing / failed
+        """
+        try:
+            async with self.session_factory() as db:
+                service = DailyFortuneService(db, limiter=self.limiter, cache=self.cache)
+                if await service.repository.get_by_user_and_date(user_id, fortune_date):
+                    return "existing"
+                fortune = await service.generate_daily_fortune(user_id, fortune_date)
+                if fortune.id is None:
+                    # 群组运势生成失败，返回的是未保存的默认运势
+                    return "failed"
+                return "generated"
+        except Exception as e:
+            # 单个用户失败不影响整批，白天请求时再按需生成
+            logger.warning("预生成每日运势失败: %s", e, extra={"user_id": user_id})
+            return "failed"
+
+    async def checkpoint(self, fortune_date: date) -> Optional[Dict[str, Any]]:
+        """读取某天的预生成断点"""
+        if not self.cache:
+            return None
+        return await self.cache.get(checkpoint_key(fortune_date))
+
+    async def _save_checkpoint(self, fortune_date: date, state: Dict[str, Any]):
+        if self.cache:
+            await self.cache.set(checkpoint_key(fortune_date), state, expire=CHECKPOINT_TTL)
+
+
+def pregen_window(now: datetime) -> Tuple[datetime, datetime, date]:
+    """
+    当前或下一个预生成窗口
+
+    窗口从每天 DAILY_FORTUNE_PREGEN_START（本地时间）开始，持续
+    DAILY_FORTUNE_PREGEN_WINDOW_HOURS 小时，生成窗口开始次日的运势。
+
+    Returns:
+        (窗口开始时间, 窗口结束时间, 运势日期)
+    """
+    hour, minute = (int(part) for part in settings.DAILY_FORTUNE_PREGEN_START.split(":"))
+    length = timedelta(hours=settings.DAILY_FORTUNE_PREGEN_WINDOW_HOURS)
+    start = datetime.combine(now.date(), time(hour, minute))
+    if now < start - timedelta(days=1) + length:
+        start -= timedelta(days=1)  # 仍在昨天开始的窗口内
+    elif now >= start + length:
+        start += timedelta(days=1)  # 今天的窗口已结束
+    return start, start + length, start.date() + timedelta(days=1)
+
+
+async def create_pregenerator() -> DailyFortunePregenerator:
+    """按配置创建预生成器"""
+    return DailyFortunePregenerator(
+        cache=await get_redis_cache() if settings.REDIS_ENABLED else None,
+        concurrency=settings.DAILY_FORTUNE_PREGEN_CONCURRENCY,
+        rate_per_second=settings.DAILY_FORTUNE_PREGEN_RATE,
+        batch_size=settings.DAILY_FORTUNE_PREGEN_BATCH_SIZE,
+        active_days=settings.DAILY_FORTUNE_PREGEN_ACTIVE_DAYS,
+    )
+
+
+async def run_pregen_scheduler():
+    """
+    预生成调度循环（每个节点启动时运行）
+
+    窗口外休眠到窗口开始；窗口内尝试执行，未完成（非主节点、主节点中断或锁丢失）
+    则每隔 DAILY_FORTUNE_PREGEN_RETRY_SECONDS 重试，由任一节点从断点继续。
+    """
+    pregenerator = await create_pregenerator()
+    while True:
+        now = datetime.now()
+        start, end, fortune_date = pregen_window(now)
+        if now < start:
+            await asyncio.sleep((start - now).total_seconds())
+            continue
+        try:
+            state = await pregenerator.run(fortune_date, deadline=end)
+        except Exception as e:
+            logger.exception("每日运势预生成异常: %s", e)
+            state = {}
+        if state.get("done"):
+            await asyncio.sleep(max((end - datetime.now()).total_seconds(), 0) + 1)
+        else:
+            await asyncio.sleep(settings.DAILY_FORTUNE_PREGEN_RETRY_SECONDS)
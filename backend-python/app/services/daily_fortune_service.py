@@ -1,102 +1,443 @@
-"""每日运势服务"""
+"""每日运势服务
 
-from typing import Optional, Dict, Any
+运势主要由 (日期, 生肖, 星座) 决定，默认按群组生成：每天每个群组只调用一次 LLM 生成运势，
+存为一条群组记录；用户行只保存按 (user_id, date) 确定性生成的个性化字段（分数浮动、幸运数字）
+并引用群组记录，其余内容读取时取自群组。关闭 DAILY_FORTUNE_COHORT_ENABLED 时逐用户生成。
+群组运势生成失败时不写群组记录与用户行，本次返回默认运势，之后的请求或预生成会重新生成。
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+from typing import Optional, Dict, Any, Tuple
 from datetime import date
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.daily_fortune import DailyFortune
+from app.core.cache import RedisCache
+from app.core.config import settings
+from app.core.exceptions import ConflictError
+from app.core.logger import get_logger
+from app.models.daily_fortune import COHORT_FIELDS, DailyFortune, DailyFortuneCohort
 from app.repositories.daily_fortune_repository import DailyFortuneRepository
+from app.repositories.user_profile_repository import UserProfileRepository
 from app.services.llm_service import get_llm_service
+from app.services.almanac_service import AlmanacService
+from app.utils.rate_limiter import AsyncTokenBucket
+
+logger = get_logger(__name__)
+
+# 进程内同一群组只由一个协程生成（跨进程由唯一约束兜底）
+_COHORT_LOCKS: Dict[Tuple[date, str], asyncio.Lock] = {}
+_MAX_COHORT_LOCKS = 1024
+
+# LLM 返回的文本字段及最大长度（幸运字段入库列为 String(50)）
+_TEXT_FIELDS = {
+    "summary": 500, "wealth": 500, "career": 500, "love": 500, "health": 500,
+    "lucky_color": 50, "lucky_number": 50, "lucky_direction": 50, "lucky_time": 50,
+}
+_MAX_YI_JI = 6
+
+
+def _cohort_lock(fortune_date: date, cohort_key: str) -> asyncio.Lock:
+    key = (fortune_date, cohort_key)
+    lock = _COHORT_LOCKS.get(key)
+    if lock is None:
+        if len(_COHORT_LOCKS) >= _MAX_COHORT_LOCKS:
+            _COHORT_LOCKS.clear()
+        lock = _COHORT_LOCKS[key] = asyncio.Lock()
+    return lock
 
 
 class DailyFortuneService:
     """每日运势服务"""
     
-    def __init__(self, db: AsyncSession):
+    limiter: Optional[AsyncTokenBucket] = None
+    cache: Optional[RedisCache] = None
+    
+    LOCK_PREFIX = "daily_fortune:lock"
+    POLL_INTERVAL = 0.1
+    
+    def __init__(self, db: AsyncSession, limiter: Optional[AsyncTokenBucket] = None,
+                 cache: Optional[RedisCache] = None):
+        """
+        Args:
+            db: 数据库会话
+            limiter: LLM 调用限流（批量预生成时传入）
+            cache: Redis缓存，用于集群内同一用户同一天只由一个请求生成；为空时仅靠唯一约束去重
+        """
         self.db = db
         self.repository = DailyFortuneRepository(db)
+        self.profiles = UserProfileRepository(db)
         self.llm_service = get_llm_service()
+        self.limiter = limiter
+        self.cache = cache
     
     async def get_daily_fortune(
         self,
-        user_id: int,
+        user_id: str,
         fortune_date: Optional[date] = None
     ) -> Optional[DailyFortune]:
         """获取每日运势"""
         if fortune_date is None:
             fortune_date = date.today()
         
-        # 先从数据库查询
-        fortune = await self.repository.get_by_user_and_date(user_id, fortune_date)
-        
-        if fortune:
-            return fortune
-        
-        # 如果不存在，生成新的运势
+        # 已存在直接返回，不存在时生成
         return await self.generate_daily_fortune(user_id, fortune_date)
     
     async def generate_daily_fortune(
         self,
-        user_id: int,
+        user_id: str,
         fortune_date: date
     ) -> DailyFortune:
-        """生成每日运势"""
+        """
+        生成每日运势（已存在时直接返回）
+        
+        同一用户同一天的并发请求只有抢到 Redis 锁的一个调用 LLM，其余等待它写入后读取；
+        持锁方生成期间持续续期，锁只在持锁方退出后才会消失。持锁方失败退出（锁已释放或过期）且未写入时
+        由重新抢到锁的一个等待方接手生成；没有 Redis 时各自生成，写入冲突由唯一约束兜底
+        
+        Raises:
+            ConflictError: 持锁方仍在生成且等待超过 DAILY_FORTUNE_LOCK_WAIT_SECONDS
+        """
+        fortune = await self.repository.get_by_user_and_date(user_id, fortune_date)
+        if fortune:
+            return fortune
+        
+        if not self.cache:
+            return await self._create_fortune(user_id, fortune_date)
+        
+        lock_key = f"{self.LOCK_PREFIX}:{user_id}:{fortune_date.isoformat()}"
+        lock_ms = settings.DAILY_FORTUNE_LOCK_SECONDS * 1000
+        token = uuid.uuid4().hex
+        while not await self.cache.acquire_lock(lock_key, token, lock_ms):
+            fortune = await self._wait_for_generation(user_id, fortune_date, lock_key)
+            if fortune:
+                return fortune
+            # 持锁方已退出且未写入，重新抢锁接手生成（只有一个等待方抢到）
         
-        # 使用 LLM 生成运势内容
-        prompt = f"""请为用户生成 {fortune_date} 的每日运势。
-
-请包含以下方面：
-1. 整体运势（1-5星）
-2. 爱情运势（1-5星）
-3. 事业运势（1-5星）
-4. 财运（1-5星）
-5. 健康运势（1-5星）
-6. 幸运颜色
-7. 幸运数字
-8. 运势详情（100-200字）
-
-请以JSON格式返回。"""
-
         try:
-            response = await self.llm_service.generate(prompt)
-            
-            # 解析响应（简化版本，实际应该更健壮）
-            fortune_data = {
-                "overall_score": 4,
-                "love_score": 4,
-                "career_score": 4,
-                "wealth_score": 4,
-                "health_score": 4,
-                "lucky_color": "蓝色",
-                "lucky_number": 7,
-                "content": response[:500] if response else "今日运势良好，诸事顺利。"
-            }
-            
-        except Exception:
-            # 如果 LLM 失败，使用默认值
-            fortune_data = {
-                "overall_score": 3,
-                "love_score": 3,
-                "career_score": 3,
-                "wealth_score": 3,
-                "health_score": 3,
-                "lucky_color": "白色",
-                "lucky_number": 8,
-                "content": "今日运势平稳，保持平常心。"
-            }
+            # 生成期间续期，LLM 调用较慢时锁不会中途过期
+            async with self.cache.hold_lock(lock_key, token, lock_ms):
+                return await self._create_fortune(user_id, fortune_date)
+        finally:
+            await self.cache.release_lock(lock_key, token)
+    
+    async def _wait_for_generation(self, user_id: str, fortune_date: date, lock_key: str) -> Optional[DailyFortune]:
+        """
+        等待持锁的请求写入运势
+        
+        Returns:
+            DailyFortune，持锁方已退出（锁已释放或过期）仍未写入时返回 None
+        
+        Raises:
+            ConflictError: 持锁方仍在生成且等待超时（不再另外调用 LLM）
+        """
+        deadline = time.monotonic() + settings.DAILY_FORTUNE_LOCK_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.POLL_INTERVAL)
+            fortune = await self.repository.get_by_user_and_date(user_id, fortune_date)
+            if fortune:
+                return fortune
+            if not await self.cache.exists(lock_key):
+                # 持锁方失败退出，最后再查一次（可能恰好在释放前写入）
+                return await self.repository.get_by_user_and_date(user_id, fortune_date)
+        logger.warning("等待每日运势生成超时", extra={"user_id": user_id, "date": fortune_date.isoformat()})
+        raise ConflictError(detail="今日运势正在生成中，请稍后再试")
+    
+    async def _create_fortune(self, user_id: str, fortune_date: date) -> DailyFortune:
+        """调用 LLM（或取群组运势）并写入"""
+        if settings.DAILY_FORTUNE_COHORT_ENABLED:
+            animal, zodiac_sign = await self.cohort_traits(user_id)
+            cohort = await self.cohort_fortune(fortune_date, animal, zodiac_sign)
+            if cohort is None:
+                return self.fallback_fortune(user_id, fortune_date, animal, zodiac_sign)
+            return await self.repository.create(
+                user_id=user_id,
+                fortune_date=fortune_date,
+                cohort=cohort,
+                **self.personalize(cohort, user_id, fortune_date)
+            )
+        
+        almanac = AlmanacService.get_day(fortune_date)
+        fortune_data = await self._generate_content(self._build_prompt(fortune_date, almanac))
         
         # 保存到数据库
         fortune = await self.repository.create(
             user_id=user_id,
             fortune_date=fortune_date,
+            solar_term=almanac.term,
+            festival="、".join(almanac.festivals),
             **fortune_data
         )
         
         return fortune
     
+    @staticmethod
+    def cohort_key(animal: str, zodiac_sign: str) -> str:
+        """群组键：生肖:星座（资料不全的用户归入缺省群组）"""
+        return f"{animal}:{zodiac_sign}"
+    
+    async def cohort_traits(self, user_id: str) -> Tuple[str, str]:
+        """
+        用户所属群组的特征
+        
+        Returns:
+            (生肖, 星座)，访客或未填生日的用户为空串
+        """
+        if not user_id.isdigit():
+            return "", ""
+        profile = await self.profiles.get_by_user_id(int(user_id))
+        if profile is None:
+            return "", ""
+        return profile.animal or "", profile.zodiac_sign or ""
+    
+    async def cohort_fortune(self, fortune_date: date, animal: str = "",
+                             zodiac_sign: str = "") -> Optional[DailyFortuneCohort]:
+        """
+        获取指定群组当天的运势，不存在时生成
+        
+        Args:
+            fortune_date: 运势日期
+            animal: 生肖（为空表示未知）
+            zodiac_sign: 星座（为空表示未知）
+        
+        Returns:
+            DailyFortuneCohort，生成失败时返回 None（不写群组记录，否则当天整个群组都是默认内容）
+        """
+        key = self.cohort_key(animal, zodiac_sign)
+        cohort = await self.repository.get_cohort(fortune_date, key)
+        if cohort:
+            return cohort
+        
+        async with _cohort_lock(fortune_date, key):
+            cohort = await self.repository.get_cohort(fortune_date, key)
+            if cohort:
+                return cohort
+            
+            almanac = AlmanacService.get_day(fortune_date)
+            fortune_data = await self._generate_content(
+                self._build_prompt(fortune_date, almanac, animal, zodiac_sign), fallback=False
+            )
+            if fortune_data is None:
+                return None
+            fortune_data.pop("lucky_number")  # 幸运数字按用户生成
+            return await self.repository.create_cohort(
+                fortune_date,
+                key,
+                animal=animal,
+                zodiac_sign=zodiac_sign,
+                solar_term=almanac.term,
+                festival="、".join(almanac.festivals),
+                **fortune_data
+            )
+    
+    async def guest_fortune(self, fortune_date: date, animal: str = "",
+                            zodiac_sign: str = "") -> Optional[Dict[str, Any]]:
+        """
+        访客运势（不写用户行，同一天同一群组的访客看到同一份内容）
+        
+        Args:
+            fortune_date: 运势日期
+            animal: 访客提供生日时的生肖
+            zodiac_sign: 访客提供生日时的星座
+        
+        Returns:
+            DailyFortuneInfo 字段，群组运势生成失败时返回 None（调用方改用 guest_fallback，且不缓存）
+        """
+        if not settings.DAILY_FORTUNE_COHORT_ENABLED:
+            # 逐用户生成时所有访客共用 "guest" 这一行
+            return self.to_info(await self.generate_daily_fortune("guest", fortune_date))
+        
+        cohort = await self.cohort_fortune(fortune_date, animal, zodiac_sign)
+        if cohort is None:
+            return None
+        personal = self.personalize(cohort, f"guest:{cohort.cohort_key}", fortune_date)
+        return {**self.to_info(cohort), **personal}
+    
+    def guest_fallback(self, fortune_date: date, animal: str = "", zodiac_sign: str = "") -> Dict[str, Any]:
+        """访客群组运势生成失败时的默认运势（DailyFortuneInfo 字段）"""
+        user_id = f"guest:{self.cohort_key(animal, zodiac_sign)}"
+        return self.to_info(self.fallback_fortune(user_id, fortune_date, animal, zodiac_sign))
+    
+    def fallback_fortune(self, user_id: str, fortune_date: date, animal: str = "",
+                         zodiac_sign: str = "") -> DailyFortune:
+        """
+        群组运势生成失败时的默认运势（未保存，之后的请求或预生成会重新生成）
+        
+        Args:
+            user_id: 用户ID
+            fortune_date: 运势日期
+            animal: 生肖
+            zodiac_sign: 星座
+        
+        Returns:
+            DailyFortune（id 为空）
+        """
+        almanac = AlmanacService.get_day(fortune_date)
+        content = self._default_content()
+        content.pop("lucky_number")
+        cohort = DailyFortuneCohort(
+            date=fortune_date,
+            cohort_key=self.cohort_key(animal, zodiac_sign),
+            animal=animal,
+            zodiac_sign=zodiac_sign,
+            solar_term=almanac.term,
+            festival="、".join(almanac.festivals),
+            **content
+        )
+        return DailyFortune(
+            user_id=user_id,
+            date=fortune_date,
+            **{name: getattr(cohort, name) for name in COHORT_FIELDS},
+            **self.personalize(cohort, user_id, fortune_date)
+        )
+    
+    @staticmethod
+    def to_info(fortune) -> Dict[str, Any]:
+        """用户运势或群组运势转为 DailyFortuneInfo 字段（群组运势没有幸运数字）"""
+        return {
+            "score": fortune.score,
+            "summary": fortune.summary,
+            "wealth": fortune.wealth,
+            "career": fortune.career,
+            "love": fortune.love,
+            "health": fortune.health,
+            "lucky_color": fortune.lucky_color,
+            "lucky_number": getattr(fortune, "lucky_number", ""),
+            "lucky_direction": fortune.lucky_direction,
+            "lucky_time": fortune.lucky_time,
+            "yi": list(fortune.yi or []),
+            "ji": list(fortune.ji or []),
+            "solar_term": fortune.solar_term or "",
+            "festival": fortune.festival or "",
+        }
+    
+    @staticmethod
+    def personalize(cohort: DailyFortuneCohort, user_id: str, fortune_date: date) -> Dict[str, Any]:
+        """
+        按 (user_id, date) 确定性生成用户的个性化字段
+        
+        Returns:
+            score（群组基准分上下浮动 DAILY_FORTUNE_SCORE_SPREAD）与 lucky_number
+        """
+        seed = hashlib.blake2b(f"{user_id}:{fortune_date.isoformat()}".encode("utf-8"), digest_size=8).digest()
+        rng = random.Random(int.from_bytes(seed, "big"))
+        spread = settings.DAILY_FORTUNE_SCORE_SPREAD
+        return {
+            "score": min(100, max(0, cohort.score + rng.randint(-spread, spread))),
+            "lucky_number": str(rng.randint(1, 9)),
+        }
+    
+    @staticmethod
+    def _build_prompt(fortune_date: date, almanac, animal: str = "", zodiac_sign: str = "") -> str:
+        """运势生成提示词（指定生肖/星座时为群组运势）"""
+        traits = "、".join(part for part in (f"生肖{animal}" if animal else "", zodiac_sign) if part)
+        audience = f"{traits}的用户" if traits else "用户"
+        return f"""请为{audience}生成 {fortune_date} 的每日运势。
+
+当日历法：农历{almanac.lunar_month_cn}{almanac.lunar_day_cn}，{almanac.ganzhi_year}年 {almanac.ganzhi_month}月 {almanac.ganzhi_day}日{f"，{almanac.term}" if almanac.term else ""}{f"，{'、'.join(almanac.festivals)}" if almanac.festivals else ""}
+
+请只返回如下JSON（不要其他文字）：
+{{
+  "score": 整体运势分数（0-100的整数）,
+  "summary": "运势总述（100-200字）",
+  "wealth": "财运",
+  "career": "事业运",
+  "love": "感情运",
+  "health": "健康运",
+  "lucky_color": "幸运颜色",
+  "lucky_number": "幸运数字（1-9）",
+  "lucky_direction": "幸运方位",
+  "lucky_time": "幸运时辰",
+  "yi": ["宜做的事"],
+  "ji": ["忌做的事"]
+}}"""
+    
+    async def _generate_content(self, prompt: str, fallback: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        调用 LLM 生成运势内容
+        
+        Args:
+            prompt: 提示词
+            fallback: 失败时是否使用默认值（为否时返回 None）
+        
+        Returns:
+            运势内容（LLM 调用失败或返回内容无法解析时为默认值或 None）
+        """
+        try:
+            if self.limiter:
+                await self.limiter.acquire()
+            response = await self.llm_service.generate(prompt)
+            return self._parse_content(response)
+            
+        except Exception as e:
+            logger.warning("生成每日运势失败: %s", e)
+            # 如果 LLM 失败，使用默认值
+            return self._default_content() if fallback else None
+    
+    @staticmethod
+    def _parse_content(response: str) -> Dict[str, Any]:
+        """
+        解析 LLM 返回的运势 JSON 并校验各字段
+        
+        Args:
+            response: LLM 返回文本（JSON 前后可以有其他文字）
+        
+        Returns:
+            与运势表字段对应的内容
+        
+        Raises:
+            ValueError: 找不到 JSON 或字段缺失、类型不符
+        """
+        start, end = response.find("{"), response.rfind("}")
+        if start == -1 or end <= start:
+            raise ValueError("响应中没有JSON")
+        data = json.loads(response[start:end + 1])
+        if not isinstance(data, dict):
+            raise ValueError("响应不是JSON对象")
+        
+        score = data.get("score")
+        if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 100:
+            raise ValueError(f"score 无效: {score!r}")
+        content: Dict[str, Any] = {"score": int(score)}
+        for name, max_length in _TEXT_FIELDS.items():
+            value = data.get(name)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = str(value)  # 幸运数字常以数字返回
+            if not isinstance(value, str) or not value.strip():
+                raise ValueError(f"{name} 无效: {value!r}")
+            content[name] = value.strip()[:max_length]
+        for name in ("yi", "ji"):
+            value = data.get(name)
+            if not isinstance(value, list) or not all(isinstance(item, str) and item.strip() for item in value):
+                raise ValueError(f"{name} 无效: {value!r}")
+            content[name] = [item.strip() for item in value][:_MAX_YI_JI]
+        return content
+    
+    @staticmethod
+    def _default_content() -> Dict[str, Any]:
+        """LLM 失败时的默认运势内容"""
+        return {
+            "score": 60,
+            "summary": "今日运势平稳，保持平常心。",
+            "wealth": "财运平平，不宜冒进。",
+            "career": "稳中求进。",
+            "love": "顺其自然。",
+            "health": "注意休息。",
+            "lucky_color": "白色",
+            "lucky_number": "8",
+            "lucky_direction": "南方",
+            "lucky_time": "午时",
+            "yi": ["静心"],
+            "ji": ["冲动"],
+        }
+    
     async def list_user_fortunes(
         self,
-        user_id: int,
+        user_id: str,
         skip: int = 0,
         limit: int = 30
     ) -> list[DailyFortune]:
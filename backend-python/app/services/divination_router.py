@@ -4,6 +4,9 @@ from typing import Dict, Any, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.services.question_analyzer import QuestionAnalysis
 from app.schemas.divination import DivinationResult
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class DivinationRouter:
@@ -35,7 +38,14 @@ class DivinationRouter:
         Returns:
             DivinationResult: 占卜结果
         """
-        print(f"[路由] 问题类型: {analysis.question_type}, 子类型: {analysis.sub_type}, 复杂度: {analysis.complexity}")
+        logger.debug(
+            "开始路由",
+            extra={
+                "question_type": analysis.question_type,
+                "sub_type": analysis.sub_type,
+                "complexity": analysis.complexity,
+            },
+        )
         
         # 构建上下文
         question_context = {
@@ -51,7 +61,7 @@ class DivinationRouter:
         # 根据问题类型路由
         if analysis.question_type == "fortune":
             # 运势类问题 → 每日运势服务
-            print(f"[路由] 路由到: 每日运势服务")
+            logger.info("路由到每日运势服务", extra={"route": "fortune"})
             return await self._process_fortune(
                 session_id, 
                 user_id, 
@@ -61,7 +71,7 @@ class DivinationRouter:
         
         elif analysis.question_type == "knowledge":
             # 知识类问题 → 知识解读（卦象+知识传授）
-            print(f"[路由] 路由到: 知识解读服务")
+            logger.info("路由到知识解读服务", extra={"route": "knowledge"})
             return await self._process_knowledge(
                 session_id,
                 question,
@@ -73,7 +83,7 @@ class DivinationRouter:
         
         else:
             # 决策类/感情类/事业类 → 周易卦象占卜
-            print(f"[路由] 路由到: 决策占卜服务（周易卦象）")
+            logger.info("路由到决策占卜服务（周易卦象）", extra={"route": "decision"})
             return await self._process_decision(
                 session_id,
                 question,
@@ -126,7 +136,7 @@ class DivinationRouter:
                 result.question_intent = "fortune_inquiry"
                 return result
             except Exception as e:
-                print(f"[路由] 每日运势服务失败，降级到推荐服务: {e}")
+                logger.warning("每日运势服务失败，降级到推荐服务: %s", e)
         
         # 降级：使用推荐服务
         return await self._process_recommendation(session_id, user_id, divination_service)
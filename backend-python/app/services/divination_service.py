@@ -15,6 +15,7 @@ from app.schemas.divination import CreateDivinationRequest, DivinationResult
 from app.services.iching_service import IChingService
 from app.services.tarot_service import TarotService
 from app.core.exceptions import BadRequestError, NotFoundError
+from app.core.responses import dump_model
 
 
 class DivinationService:
@@ -89,6 +90,68 @@ class DivinationService:
     
     async def get_result(self, session_id: str) -> Optional[DivinationResult]:
         """获取占卜结果"""
+        session = await self._get_completed_session(session_id)
+        return self._to_result(session)
+    
+    async def get_result_json(self, session_id: str) -> bytes:
+        """
+        获取序列化好的占卜结果
+        
+        已完成的结果不再变化，完成时序列化一次存入会话（freeze_result），此后直接返回；
+        早于该字段的旧会话在首次读取时补写。
+        
+        Args:
+            session_id: 会话ID
+        
+        Returns:
+            DivinationResult 的 JSON 字节
+        """
+        from sqlalchemy import select
+        
+        # 只取序列化好的字节，不加载整条会话（免去 result_data 的 JSON 解析与对象构建）
+        result = await self.db.execute(
+            select(DivinationSessionModel.result_json).where(
+                DivinationSessionModel.id == session_id,
+                DivinationSessionModel.status == "completed"
+            )
+        )
+        result_json = result.scalar_one_or_none()
+        if result_json is not None:
+            return result_json
+        
+        session = await self._get_completed_session(session_id)
+        if session.result_json is None:
+            session.result_json = dump_model(self._to_result(session))
+            await self.db.flush()
+        return session.result_json
+    
+    async def freeze_result(self, session_id: str) -> Optional[bytes]:
+        """
+        占卜完成后序列化结果并存入会话（会话不存在或未完成时返回None）
+        
+        Args:
+            session_id: 会话ID
+        
+        Returns:
+            DivinationResult 的 JSON 字节
+        """
+        from sqlalchemy import select
+        
+        result = await self.db.execute(
+            select(DivinationSessionModel).where(DivinationSessionModel.id == session_id)
+        )
+        session = result.scalar_one_or_none()
+        if not session or session.status != "completed":
+            return None
+        
+        # created_at 由数据库生成，刷新后才能读取
+        await self.db.refresh(session)
+        session.result_json = dump_model(self._to_result(session))
+        await self.db.flush()
+        return session.result_json
+    
+    async def _get_completed_session(self, session_id: str) -> DivinationSessionModel:
+        """读取已完成的会话"""
         from sqlalchemy import select
         
         result = await self.db.execute(
@@ -102,6 +165,11 @@ class DivinationService:
         if session.status != "completed":
             raise BadRequestError(detail="占卜尚未完成")
         
+        return session
+    
+    @staticmethod
+    def _to_result(session: DivinationSessionModel) -> DivinationResult:
+        """会话记录转为占卜结果"""
         result_data = session.result_data or {}
         
         return DivinationResult(
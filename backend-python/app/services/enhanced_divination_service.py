@@ -6,19 +6,26 @@ from sqlalchemy import select
 from app.services.divination_service import DivinationService
 from app.services.intent_service import IntentRecognitionService
 from app.services.question_analyzer import QuestionAnalyzer
+from app.utils.question_model import LABEL_FIELDS
 from app.services.divination_router import DivinationRouter
+from app.services.interpretation_store import InterpretationStore
+from app.services.repeat_question_guard import RepeatClaim, RepeatQuestionGuard
 from app.services.prompt_builder import PromptBuilder
 from app.services.llm_service import LLMService, create_llm_service
 from app.repositories.llm_repository import LLMRepository
 from app.repositories.config_repository import PromptConfigRepository
 from app.models.divination import DivinationSession as DivinationSessionModel
-import traceback
+from app.core.exceptions import BadRequestError, NotFoundError
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class EnhancedDivinationService(DivinationService):
     """增强占卜服务（支持智能预处理、路由和LLM）"""
     
-    def __init__(self, db: AsyncSession, llm_service: Optional[LLMService] = None):
+    def __init__(self, db: AsyncSession, llm_service: Optional[LLMService] = None,
+                 repeat_guard: Optional[RepeatQuestionGuard] = None):
         super().__init__(db)
         self.llm_service = llm_service
         self.intent_service = IntentRecognitionService(db, llm_service)
@@ -26,36 +33,113 @@ class EnhancedDivinationService(DivinationService):
         self.router = DivinationRouter(db)  # 新增：智能路由器
         self.llm_repo = LLMRepository(db)
         self.prompt_repo = PromptConfigRepository(db)
+        self.interpretations = InterpretationStore(db)  # 跨用户复用的LLM解读
+        self.repeat_guard = repeat_guard  # 同一用户重复提问检测，为空时不检测
         self.daily_fortune_service = None  # 将在外部注入
-        print(f"[DEBUG] EnhancedDivinationService初始化，llm_service={'有' if llm_service else '无'}")
+        logger.debug("EnhancedDivinationService初始化", extra={"has_llm": llm_service is not None})
     
     def set_daily_fortune_service(self, service):
         """注入每日运势服务"""
         self.daily_fortune_service = service
     
     async def start_divination_with_enhancement(self, request) -> Dict[str, Any]:
+        """
+        开始增强占卜
+        
+        窗口内重复提问时直接返回上一次的结果（is_repeat=True），不重新起卦；
+        相同问题并发提交时只有一个请求起卦，其余等待并返回它的结果。
+        """
+        claim = None
+        if self.repeat_guard:
+            claim, previous = await self._claim_question(request)
+            if previous:
+                return previous
+        
+        if not (claim and claim.token):
+            return await self._start_enhanced(request)
+        
+        try:
+            # 起卦期间续期占位，LLM调用较慢时相同请求仍在等待而不会重复起卦
+            async with self.repeat_guard.hold(claim):
+                divination_result = await self._start_enhanced(request)
+            # 先提交会话，等待中的相同请求才能读到结果
+            await self.db.commit()
+        except BaseException:
+            await self.repeat_guard.release(claim)
+            raise
+        
+        await self.repeat_guard.complete(claim, divination_result.session_id)
+        return divination_result
+    
+    async def _claim_question(self, request):
+        """
+        检测重复提问
+        
+        Returns:
+            (RepeatClaim, 上一次的占卜结果)：结果非空时为重复提问
+        """
+        claim = await self.repeat_guard.claim(request.user_id, request.question)
+        if claim is None or not claim.session_id:
+            return claim, None
+        previous = await self._previous_result(claim)
+        if previous:
+            return claim, previous
+        
+        # 记录的会话已不存在，重新抢占
+        await self.repeat_guard.forget(claim)
+        claim = await self.repeat_guard.claim(request.user_id, request.question)
+        if claim and claim.session_id:
+            return claim, await self._previous_result(claim)
+        return claim, None
+    
+    async def _previous_result(self, claim: RepeatClaim):
+        """读取窗口内上一次的占卜结果（会话不存在或未完成时返回None）"""
+        try:
+            previous = await self.get_result(claim.session_id)
+        except (NotFoundError, BadRequestError):
+            return None
+        previous.is_repeat = True
+        logger.info("重复提问，返回上次结果", extra={"session_id": claim.session_id})
+        return previous
+    
+    async def _start_enhanced(self, request) -> Dict[str, Any]:
         """开始增强占卜（集成智能预处理和路由）"""
         
-        print(f"[DEBUG] 开始增强占卜，问题: {request.question}")
+        logger.info("开始增强占卜", extra={"user_id": request.user_id, "question_len": len(request.question)})
         
         # 步骤1：问题分析（使用增强的QuestionAnalyzer）
         analysis = None
         if self.llm_service:
             try:
                 analysis = await self.question_analyzer.analyze_question(request.question)
-                print(f"[DEBUG] 问题分析完成 - 类型: {analysis.question_type}, 子类型: {analysis.sub_type}, 复杂度: {analysis.complexity}")
-                print(f"[DEBUG] 提取的要素: {analysis.elements}")
+                logger.debug(
+                    "问题分析完成",
+                    extra={
+                        "question_type": analysis.question_type,
+                        "sub_type": analysis.sub_type,
+                        "complexity": analysis.complexity,
+                        "elements": analysis.elements,
+                    },
+                )
             except Exception as e:
-                print(f"[WARN] 问题分析失败: {e}")
+                logger.warning("问题分析失败: %s", e)
                 pass  # 降级到规则引擎
         
         if not analysis:
             # 使用规则引擎降级
             analysis = self.question_analyzer._fallback_analysis(request.question)
-            print(f"[DEBUG] 使用规则引擎分析 - 类型: {analysis.question_type}")
+            logger.debug("使用规则引擎分析", extra={"question_type": analysis.question_type})
         
         # 步骤2：意图识别（保留原有逻辑）
         intent_result = self.intent_service.analyze_intent(request.question, request.user_id)
+        # 问题分析标签随意图记录保存，LLM 给出的标签用于训练本地问题分析模型
+        intent_result["context"] = {
+            **intent_result.get("context", {}),
+            "analysis": {
+                **{field: getattr(analysis, field) for field in LABEL_FIELDS},
+                "source": analysis.source,
+            },
+        }
         
         # 步骤3：保存意图记录
         try:
@@ -65,7 +149,6 @@ class EnhancedDivinationService(DivinationService):
             pass  # 保存失败不影响占卜
         
         # 步骤4：智能路由 - 根据问题类型选择处理策略
-        print(f"[DEBUG] 开始智能路由...")
         try:
             # 生成session_id
             import uuid
@@ -79,37 +162,40 @@ class EnhancedDivinationService(DivinationService):
                 divination_service=self,
                 daily_fortune_service=self.daily_fortune_service
             )
-            print(f"[DEBUG] 路由处理完成")
         except Exception as e:
-            print(f"[ERROR] 路由处理失败，使用基础占卜: {e}")
-            traceback.print_exc()
+            logger.exception("路由处理失败，使用基础占卜: %s", e)
             # 降级到基础占卜
             divination_result = await self.start_divination(request)
         
-        print(f"[DEBUG] 占卜完成，hexagram_info={'有' if divination_result.hexagram_info else '无'}")
+        logger.debug(
+            "占卜完成",
+            extra={
+                "session_id": divination_result.session_id,
+                "has_hexagram": divination_result.hexagram_info is not None,
+                "has_llm": self.llm_service is not None,
+            },
+        )
         
         # 步骤5：如果有LLM且有卦象信息，增强解读
-        print(f"[DEBUG] 检查LLM增强条件: llm_service={'有' if self.llm_service else '无'}, hexagram_info={'有' if divination_result.hexagram_info else '无'}")
         if self.llm_service and divination_result.hexagram_info:
             try:
-                print(f"[DEBUG] 开始LLM增强解读...")
                 enhanced_summary = await self._enhance_summary(
                     request.question,
                     divination_result.hexagram_info,
                     analysis
                 )
-                print(f"[DEBUG] LLM增强摘要完成，长度: {len(enhanced_summary)}")
+                logger.debug("LLM增强摘要完成", extra={"length": len(enhanced_summary)})
                 divination_result.summary = enhanced_summary
                 
                 enhanced_detail = await self._enhance_detail(
                     request.question,
-                    divination_result.hexagram_info
+                    divination_result.hexagram_info,
+                    analysis
                 )
-                print(f"[DEBUG] LLM增强详情完成，长度: {len(enhanced_detail)}")
+                logger.debug("LLM增强详情完成", extra={"length": len(enhanced_detail)})
                 divination_result.detail = enhanced_detail
                 
                 # 关键修复：更新数据库中的记录
-                print(f"[DEBUG] 更新数据库中的LLM增强结果...")
                 result = await self.db.execute(
                     select(DivinationSessionModel).where(
                         DivinationSessionModel.id == divination_result.session_id
@@ -124,33 +210,57 @@ class EnhancedDivinationService(DivinationService):
                         session.result_data['summary'] = enhanced_summary
                         session.result_data['detail'] = enhanced_detail
                     await self.db.flush()
-                    print(f"[DEBUG] 数据库更新完成")
                 else:
-                    print(f"[WARN] 未找到session记录: {divination_result.session_id}")
+                    logger.warning("未找到session记录", extra={"session_id": divination_result.session_id})
                     
             except Exception as e:
                 # LLM增强失败，使用原始结果
-                print(f"[ERROR] LLM增强失败: {type(e).__name__}: {e}")
-                traceback.print_exc()
+                logger.exception("LLM增强失败: %s: %s", type(e).__name__, e)
         else:
-            print(f"[WARN] 跳过LLM增强")
+            logger.info("跳过LLM增强")
+        
+        # 步骤6：结果已定，序列化一次供之后的读取直接返回
+        try:
+            await self.freeze_result(divination_result.session_id)
+        except Exception as e:
+            # 失败时首次读取再补写
+            logger.warning("序列化占卜结果失败: %s", e, extra={"session_id": divination_result.session_id})
         
         return divination_result
     
     async def _enhance_summary(self, question: str, hexagram_info: Dict[str, Any],
                                analysis: Optional[Any] = None) -> str:
-        """使用LLM增强摘要"""
-        
-        print(f"[DEBUG] _enhance_summary开始")
+        """使用LLM增强摘要（同卦象、同类相近问题的解读跨用户复用）"""
         
         # 获取Prompt配置
         prompt_config = await self.prompt_repo.get_by_scene_and_type("divination", "answer")
-        print(f"[DEBUG] Prompt配置: {prompt_config.name if prompt_config else 'None'}")
         
+        key = InterpretationStore.make_key(question, hexagram_info, analysis, "answer", prompt_config)
+        reused = await self.interpretations.find(key)
+        if reused is not None:
+            return reused
+        
+        # 会被其他日期复用的解读，提示词不含由占卜日决定的排盘部分
+        with_day = not InterpretationStore.reusable(key)
+        enhanced = await self._generate_summary(question, hexagram_info, analysis, prompt_config, with_day)
+        if enhanced is None:
+            return hexagram_info.get('summary', '')
+        await self.interpretations.save(key, enhanced)
+        return enhanced
+    
+    async def _generate_summary(self, question: str, hexagram_info: Dict[str, Any],
+                                analysis: Optional[Any], prompt_config, with_day: bool = True) -> Optional[str]:
+        """调用LLM生成摘要（没有可用LLM时返回None）"""
         if prompt_config and prompt_config.llm_config_id:
             # 使用配置的LLM
             llm_config = await self.llm_repo.get_by_id(prompt_config.llm_config_id)
-            print(f"[DEBUG] 使用配置的LLM: {llm_config.name if llm_config else 'None'}")
+            logger.debug(
+                "使用配置的LLM",
+                extra={
+                    "prompt_config": prompt_config.name,
+                    "llm_config": llm_config.name if llm_config else None,
+                },
+            )
             if llm_config:
                 llm = create_llm_service(
                     llm_config,
@@ -160,35 +270,50 @@ class EnhancedDivinationService(DivinationService):
                 )
                 
                 # 构建Prompt
-                prompt = PromptBuilder.build_answer_prompt(question, hexagram_info, None, analysis)
-                print(f"[DEBUG] Prompt构建完成，长度: {len(prompt)}")
+                prompt = PromptBuilder.build_answer_prompt(question, hexagram_info, None, analysis, with_day)
                 
                 # 调用LLM
                 try:
-                    print(f"[DEBUG] 调用LLM.generate_answer...")
                     enhanced = await llm.generate_answer(prompt)
-                    print(f"[DEBUG] LLM返回结果，长度: {len(enhanced)}")
+                    logger.debug(
+                        "LLM返回结果",
+                        extra={"prompt_length": len(prompt), "length": len(enhanced)},
+                    )
                     return enhanced
                 finally:
                     if hasattr(llm, 'close'):
                         await llm.close()
         
         # 降级：使用默认LLM或返回原始摘要
-        print(f"[DEBUG] 使用默认LLM或返回原始摘要")
+        logger.debug("使用默认LLM或返回原始摘要")
         if self.llm_service:
-            prompt = PromptBuilder.build_answer_prompt(question, hexagram_info, None, analysis)
+            prompt = PromptBuilder.build_answer_prompt(question, hexagram_info, None, analysis, with_day)
             return await self.llm_service.generate_answer(prompt)
         
-        return hexagram_info.get('summary', '')
+        return None
     
-    async def _enhance_detail(self, question: str, hexagram_info: Dict[str, Any]) -> str:
-        """使用LLM增强详情"""
-        
-        print(f"[DEBUG] _enhance_detail开始")
+    async def _enhance_detail(self, question: str, hexagram_info: Dict[str, Any],
+                              analysis: Optional[Any] = None) -> str:
+        """使用LLM增强详情（同卦象、同类相近问题的解读跨用户复用）"""
         
         # 获取Prompt配置
         prompt_config = await self.prompt_repo.get_by_scene_and_type("divination", "detail")
         
+        key = InterpretationStore.make_key(question, hexagram_info, analysis, "detail", prompt_config)
+        reused = await self.interpretations.find(key)
+        if reused is not None:
+            return reused
+        
+        with_day = not InterpretationStore.reusable(key)
+        enhanced = await self._generate_detail(question, hexagram_info, prompt_config, with_day)
+        if enhanced is None:
+            return hexagram_info.get('detail', '')
+        await self.interpretations.save(key, enhanced)
+        return enhanced
+    
+    async def _generate_detail(self, question: str, hexagram_info: Dict[str, Any], prompt_config,
+                               with_day: bool = True) -> Optional[str]:
+        """调用LLM生成详情（没有可用LLM时返回None）"""
         if prompt_config and prompt_config.llm_config_id:
             # 使用配置的LLM
             llm_config = await self.llm_repo.get_by_id(prompt_config.llm_config_id)
@@ -201,7 +326,7 @@ class EnhancedDivinationService(DivinationService):
                 )
                 
                 # 构建Prompt
-                prompt = PromptBuilder.build_detail_prompt(question, hexagram_info)
+                prompt = PromptBuilder.build_detail_prompt(question, hexagram_info, with_day=with_day)
                 
                 # 调用LLM
                 try:
@@ -213,7 +338,7 @@ class EnhancedDivinationService(DivinationService):
         
         # 降级：使用默认LLM或返回原始详情
         if self.llm_service:
-            prompt = PromptBuilder.build_detail_prompt(question, hexagram_info)
+            prompt = PromptBuilder.build_detail_prompt(question, hexagram_info, with_day=with_day)
             return await self.llm_service.generate_detail(prompt)
         
-        return hexagram_info.get('detail', '')
+        return None
@@ -0,0 +1,168 @@
+"""访客每日运势缓存
+
+未登录用户的运势只由日期和（提供生日时的）生肖×星座群组决定，与具体访客无关，
+每个 (日期, 群组) 只需生成一次：
+
+- 两级缓存：进程内 LRU（L1）+ Redis（L2），都在本地时间午夜过期
+- 进程内同一键只有一个协程加载，跨节点由群组表唯一约束兜底；生成失败不缓存
+- 缓存值附带内容摘要作为 ETag，接口据此返回 Cache-Control / ETag 与 304，
+  让 CDN 和客户端在午夜前直接复用响应
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+from app.core.cache import RedisCache, get_redis_cache
+from app.core.config import settings
+
+
+class GuestFortune(NamedTuple):
+    """一份访客运势"""
+    payload: Dict[str, Any]     # DailyFortuneInfo 字段
+    etag: str                   # 带引号的强 ETag
+
+
+def seconds_until_midnight(now: Optional[datetime] = None) -> int:
+    """距下一个本地午夜的秒数（至少 1 秒）"""
+    now = now or datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), dt_time.min)
+    return max(1, int((midnight - now).total_seconds()))
+
+
+def make_etag(payload: Dict[str, Any]) -> str:
+    """按响应内容生成 ETag（内容相同则 ETag 相同，与节点无关）"""
+    body = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return '"' + hashlib.blake2b(body.encode("utf-8"), digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 是否命中（弱比较，支持 * 与多个 ETag）"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+
+class GuestFortuneCache:
+    """访客运势两级缓存"""
+
+    PREFIX = "daily_fortune:guest"
+
+    def __init__(self, cache: Optional[RedisCache] = None, capacity: int = 512,
+                 clock: Callable[[], datetime] = datetime.now):
+        """
+        Args:
+            cache: Redis缓存（L2），为空时只用进程内缓存
+            capacity: 进程内缓存的 (日期, 群组) 条数
+            clock: 本地时间，用于计算午夜过期
+        """
+        self.cache = cache
+        self.capacity = capacity
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[date, str], Tuple[float, GuestFortune]]" = OrderedDict()
+        self._locks: Dict[Tuple[date, str], asyncio.Lock] = {}
+        self._counts = {"l1_hits": 0, "l2_hits": 0, "loads": 0, "failures": 0}
+
+    def redis_key(self, fortune_date: date, cohort_key: str) -> str:
+        return f"{self.PREFIX}:{fortune_date.isoformat()}:{cohort_key}"
+
+    async def get_or_load(
+        self,
+        fortune_date: date,
+        cohort_key: str,
+        loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Optional[GuestFortune]:
+        """
+        取访客运势，两级缓存都未命中时调用 loader 生成
+
+        Args:
+            fortune_date: 运势日期
+            cohort_key: 群组键（无生日的访客为缺省群组）
+            loader: 生成 DailyFortuneInfo 字段的协程函数，生成失败时返回 None
+
+        Returns:
+            GuestFortune，生成失败时返回 None（不缓存，下次请求重新生成）
+        """
+        key = (fortune_date, cohort_key)
+        fortune = self._get_local(key)
+        if fortune is not None:
+            self._counts["l1_hits"] += 1
+            return fortune
+
+        async with self._lock(key):
+            fortune = self._get_local(key)
+            if fortune is not None:
+                self._counts["l1_hits"] += 1
+                return fortune
+
+            ttl = seconds_until_midnight(self._clock())
+            fortune = await self._get_remote(fortune_date, cohort_key)
+            if fortune is not None:
+                self._counts["l2_hits"] += 1
+            else:
+                self._counts["loads"] += 1
+                payload = await loader()
+                if payload is None:
+                    self._counts["failures"] += 1
+                    return None
+                fortune = GuestFortune(payload, make_etag(payload))
+                if self.cache:
+                    await self.cache.set(self.redis_key(fortune_date, cohort_key), fortune._asdict(), expire=ttl)
+            self._put_local(key, fortune, ttl)
+            return fortune
+
+    def stats(self) -> Dict[str, int]:
+        """命中统计"""
+        return {**self._counts, "size": len(self._entries)}
+
+    def _lock(self, key: Tuple[date, str]) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            if len(self._locks) >= self.capacity:
+                self._locks.clear()
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    def _get_local(self, key: Tuple[date, str]) -> Optional[GuestFortune]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, fortune = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return fortune
+
+    def _put_local(self, key: Tuple[date, str], fortune: GuestFortune, ttl: int):
+        self._entries[key] = (time.monotonic() + ttl, fortune)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    async def _get_remote(self, fortune_date: date, cohort_key: str) -> Optional[GuestFortune]:
+        if not self.cache:
+            return None
+        value = await self.cache.get(self.redis_key(fortune_date, cohort_key))
+        if not isinstance(value, dict) or "payload" not in value or "etag" not in value:
+            return None
+        return GuestFortune(value["payload"], value["etag"])
+
+
+_guest_cache: Optional[GuestFortuneCache] = None
+
+
+async def get_guest_fortune_cache() -> GuestFortuneCache:
+    """获取进程内共享的访客运势缓存"""
+    global _guest_cache
+    if _guest_cache is None:
+        _guest_cache = GuestFortuneCache(
+            cache=await get_redis_cache() if settings.REDIS_ENABLED else None,
+            capacity=settings.GUEST_FORTUNE_CACHE_SIZE,
+        )
+    return _guest_cache
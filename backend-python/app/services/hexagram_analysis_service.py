@@ -2,6 +2,11 @@
 
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
+from app.utils.hexagram_matrix import (
+    HexagramMatrix, WUXING_INDEX, WUXING_RELATION, RELATION_NAMES, OUTCOME_INDEX,
+    WUXING_COMPATIBILITY, OUTCOME_COMPATIBILITY, TRIGRAM_CHANGE_NAMES, compatibility_level
+)
+from app.utils.hexagram_data import HEXAGRAM_NAMES
 
 
 @dataclass
@@ -52,15 +57,15 @@ class HexagramAnalysisService:
         Trigram("兑", "☱", [True, True, False], "金", "西", 8),
     ]
     
-    # 五行生克关系
-    WUXING_RELATIONSHIPS = {
-        "木": {"火": "生", "土": "克", "金": "被克", "水": "被生", "木": "比和"},
-        "火": {"土": "生", "金": "克", "水": "被克", "木": "被生", "火": "比和"},
-        "土": {"金": "生", "水": "克", "木": "被克", "火": "被生", "土": "比和"},
-        "金": {"水": "生", "木": "克", "火": "被克", "土": "被生", "金": "比和"},
-        "水": {"木": "生", "火": "克", "土": "被克", "金": "被生", "水": "比和"},
-    }
+    # 五行生克关系见 app.utils.hexagram_matrix（WUXING_RELATION 查表）
     
+    @staticmethod
+    def _wuxing_relation(a: str, b: str) -> Optional[int]:
+        """五行关系码（查表，见 RELATION_NAMES），未知五行返回None"""
+        if a in WUXING_INDEX and b in WUXING_INDEX:
+            return WUXING_RELATION[WUXING_INDEX[a] * 5 + WUXING_INDEX[b]]
+        return None
+
     @staticmethod
     def analyze_hexagram_relationship(
         original: HexagramInfo,
@@ -153,10 +158,9 @@ class HexagramAnalysisService:
         if original_wuxing == changed_wuxing:
             return f"{original_wuxing}与{changed_wuxing}相同，五行不变，主稳定。"
         
-        relationships = HexagramAnalysisService.WUXING_RELATIONSHIPS
-        if original_wuxing in relationships and changed_wuxing in relationships[original_wuxing]:
-            rel = relationships[original_wuxing][changed_wuxing]
-            
+        code = HexagramAnalysisService._wuxing_relation(original_wuxing, changed_wuxing)
+        if code is not None:
+            rel = RELATION_NAMES[code]
             if rel == "生":
                 return f"{original_wuxing}生{changed_wuxing}，本卦生变卦，主吉，变化顺利。"
             elif rel == "克":
@@ -199,10 +203,9 @@ class HexagramAnalysisService:
         if lower_wuxing == upper_wuxing:
             return f"{lower_wuxing}与{upper_wuxing}比和，上下卦同类，主平，宜稳中求进。"
         
-        relationships = HexagramAnalysisService.WUXING_RELATIONSHIPS
-        if lower_wuxing in relationships and upper_wuxing in relationships[lower_wuxing]:
-            rel = relationships[lower_wuxing][upper_wuxing]
-            
+        code = HexagramAnalysisService._wuxing_relation(lower_wuxing, upper_wuxing)
+        if code is not None:
+            rel = RELATION_NAMES[code]
             if rel == "生":
                 return f"{lower_wuxing}生{upper_wuxing}，下卦生上卦，主吉，但需循序渐进。"
             elif rel == "克":
@@ -219,18 +222,14 @@ class HexagramAnalysisService:
     @staticmethod
     def get_trigram_by_number(number: int) -> Optional[Trigram]:
         """根据序号获取八卦"""
-        for trigram in HexagramAnalysisService.TRIGRAMS:
-            if trigram.number == number:
-                return trigram
+        if 1 <= number <= len(HexagramAnalysisService.TRIGRAMS):
+            return HexagramAnalysisService.TRIGRAMS[number - 1]
         return None
     
     @staticmethod
     def get_trigram_by_name(name: str) -> Optional[Trigram]:
         """根据名称获取八卦"""
-        for trigram in HexagramAnalysisService.TRIGRAMS:
-            if trigram.name == name:
-                return trigram
-        return None
+        return _TRIGRAM_BY_NAME.get(name)
     
     @staticmethod
     def analyze_line_position(position: int) -> str:
@@ -269,29 +268,18 @@ class HexagramAnalysisService:
             Dict: 相容性分析结果
         """
         # 五行相容性
-        wuxing_compat = 0
-        if hexagram1.wuxing == hexagram2.wuxing:
-            wuxing_compat = 100  # 相同五行，完全相容
+        code = HexagramAnalysisService._wuxing_relation(hexagram1.wuxing, hexagram2.wuxing)
+        if code is not None:
+            wuxing_compat = WUXING_COMPATIBILITY[code]
         else:
-            relationships = HexagramAnalysisService.WUXING_RELATIONSHIPS
-            if hexagram1.wuxing in relationships and hexagram2.wuxing in relationships[hexagram1.wuxing]:
-                rel = relationships[hexagram1.wuxing][hexagram2.wuxing]
-                if rel == "生" or rel == "被生":
-                    wuxing_compat = 80  # 相生，高度相容
-                elif rel == "比和":
-                    wuxing_compat = 100  # 比和，完全相容
-                elif rel == "克" or rel == "被克":
-                    wuxing_compat = 30  # 相克，低度相容
+            # 五行未知时仅相同视为相容
+            wuxing_compat = 100 if hexagram1.wuxing == hexagram2.wuxing else 0
         
         # 吉凶相容性
-        outcome_compat = 0
-        if hexagram1.outcome == hexagram2.outcome:
-            outcome_compat = 100
-        elif (hexagram1.outcome == "吉" and hexagram2.outcome == "平") or \
-             (hexagram1.outcome == "平" and hexagram2.outcome == "吉"):
-            outcome_compat = 70
+        if hexagram1.outcome in OUTCOME_INDEX and hexagram2.outcome in OUTCOME_INDEX:
+            outcome_compat = OUTCOME_COMPATIBILITY[OUTCOME_INDEX[hexagram1.outcome]][OUTCOME_INDEX[hexagram2.outcome]]
         else:
-            outcome_compat = 40
+            outcome_compat = 100 if hexagram1.outcome == hexagram2.outcome else 40
         
         # 综合相容性
         overall_compat = (wuxing_compat * 0.6 + outcome_compat * 0.4)
@@ -300,6 +288,49 @@ class HexagramAnalysisService:
             "wuxing_compatibility": wuxing_compat,
             "outcome_compatibility": outcome_compat,
             "overall_compatibility": overall_compat,
-            "level": "高" if overall_compat >= 70 else "中" if overall_compat >= 50 else "低"
+            "level": compatibility_level(overall_compat)
+        }
+    
+    @staticmethod
+    def compatibility_by_number(number1: int, number2: int) -> Dict[str, any]:
+        """
+        按卦序查询相容性（查预计算矩阵，五行取所属八宫）
+        
+        Args:
+            number1: 第一个卦序（1-64）
+            number2: 第二个卦序（1-64）
+        
+        Returns:
+            Dict: 相容性评分、等级、五行关系与上下卦变化
+        """
+        score = HexagramMatrix.compatibility(number1, number2)
+        return {
+            "overall_compatibility": score,
+            "level": compatibility_level(score),
+            "wuxing_relationship": RELATION_NAMES[HexagramMatrix.wuxing_relation(number1, number2)],
+            "trigram_change": TRIGRAM_CHANGE_NAMES[HexagramMatrix.trigram_change(number1, number2)],
+        }
+    
+    @staticmethod
+    def derived_hexagrams(number: int) -> Dict[str, Dict[str, any]]:
+        """
+        互卦、错卦、综卦
+        
+        Args:
+            number: 卦序（1-64）
+        
+        Returns:
+            Dict: nuclear/inverse/reverse -> {number, name}
+        """
+        derived = {
+            "nuclear": HexagramMatrix.nuclear(number),
+            "inverse": HexagramMatrix.inverse(number),
+            "reverse": HexagramMatrix.reverse(number),
         }
+        return {
+            key: {"number": value, "name": HEXAGRAM_NAMES[value - 1]}
+            for key, value in derived.items()
+        }
+
 
+_TRIGRAM_BY_NAME = {trigram.name: trigram for trigram in HexagramAnalysisService.TRIGRAMS}
@@ -1,40 +1,113 @@
 """周易六爻服务"""
 
+import sys
 import hashlib
-from typing import List, Dict, Any, Tuple
-from app.utils.hexagram_data import TRIGRAMS, HEXAGRAMS, get_hexagram_by_number
+from datetime import date
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
+from app.core.config import settings
+from app.utils.hexagram_data import (
+    TRIGRAM_BY_BITS, KING_WEN_BY_BITS, CHANGED_KING_WEN, CHANGING_LINES, get_hexagram_by_number
+)
+from app.utils.najia import NajiaEngine
 
+# 起卦方式
+CAST_MODE_DIGEST = "digest"  # 每次占卜一次带密钥摘要，展开为18枚硬币
+CAST_MODE_MD5 = "md5"        # 兼容旧会话：每枚硬币一次MD5
 
-class Line:
-    """单条爻"""
-    def __init__(self, value: int):
-        self.value = value  # 6=老阴(变爻), 7=少阳, 8=少阴, 9=老阳(变爻)
-        self.is_changing = value in [6, 9]  # 是否为变爻
-        self.yin_yang = value in [7, 9]  # True=阳, False=阴
+# 一爻3枚硬币（3位，1=正面）-> 爻值：正面数 0/1/2/3 对应 老阴/少阳/少阴/老阳
+LINE_VALUE_BY_COINS = bytes(6 + bin(coins).count("1") for coins in range(8))
+
+
+def _pack_three_lines(coins9: int) -> int:
+    """9枚硬币（三爻）-> (变爻掩码 << 3) | 阴阳位"""
+    bits = mask = 0
+    for i in range(3):
+        value = LINE_VALUE_BY_COINS[coins9 >> (3 * i) & 7]
+        bits |= (value & 1) << i
+        mask |= (value in (6, 9)) << i
+    return mask << 3 | bits
+
+
+# 9枚硬币 -> 三爻的阴阳位与变爻掩码（一卦查两次）
+LINES_BY_COINS9 = bytes(_pack_three_lines(coins9) for coins9 in range(512))
 
 
 class SixLines:
-    """六爻结构"""
-    def __init__(self, lines: List[Line]):
-        self.lines = lines  # 从下往上，6条爻
-        self.upper_trigram = self._get_trigram(lines[3:6])  # 上卦
-        self.lower_trigram = self._get_trigram(lines[0:3])  # 下卦
-        self.hexagram_number = self._get_hexagram_number()
-        self.changing_lines = [i for i, line in enumerate(lines) if line.is_changing]
-    
-    def _get_trigram(self, three_lines: List[Line]) -> int:
-        """根据三爻确定八卦序号"""
-        pattern = [line.yin_yang for line in three_lines]
-        for trigram in TRIGRAMS:
-            if trigram['yin_yang'] == pattern:
-                return trigram['number']
-        return 1  # 默认乾
-    
-    def _get_hexagram_number(self) -> int:
-        """根据上下卦确定六十四卦序号"""
-        # 简化实现：上卦序号*8 + 下卦序号
-        number = (self.upper_trigram - 1) * 8 + self.lower_trigram
-        return max(1, min(64, number))
+    """六爻结构（位表示）
+    
+    bits: 第i位（自下而上，初爻为第0位）为1表示阳爻
+    mask: 第i位为1表示该爻为变爻（老阴/老阳）
+    """
+    __slots__ = ('bits', 'mask')
+    
+    # (是否阳爻, 是否变爻) -> 爻值：6=老阴(变爻), 7=少阳, 8=少阴, 9=老阳(变爻)
+    LINE_VALUES = {(False, True): 6, (True, False): 7, (False, False): 8, (True, True): 9}
+    
+    def __init__(self, bits: int, mask: int = 0):
+        self.bits = bits
+        self.mask = mask
+    
+    @classmethod
+    def from_values(cls, values: List[int]) -> 'SixLines':
+        """由自下而上的6个爻值（6/7/8/9）构造"""
+        bits = mask = 0
+        for i, value in enumerate(values):
+            if value in (7, 9):
+                bits |= 1 << i
+            if value in (6, 9):
+                mask |= 1 << i
+        return cls(bits, mask)
+    
+    @property
+    def upper_trigram(self) -> int:
+        """上卦序号（1-8）"""
+        return TRIGRAM_BY_BITS[self.bits >> 3]['number']
+    
+    @property
+    def lower_trigram(self) -> int:
+        """下卦序号（1-8）"""
+        return TRIGRAM_BY_BITS[self.bits & 7]['number']
+    
+    @property
+    def hexagram_number(self) -> int:
+        """文王卦序（1-64）"""
+        return KING_WEN_BY_BITS[self.bits]
+    
+    @property
+    def changed_number(self) -> int:
+        """变卦文王卦序（无变爻时为本卦）"""
+        return CHANGED_KING_WEN[self.bits << 6 | self.mask]
+    
+    @property
+    def changing_lines(self) -> List[int]:
+        """变爻位置（0-5）"""
+        return list(CHANGING_LINES[self.mask])
+    
+    def is_yang(self, index: int) -> bool:
+        return bool(self.bits >> index & 1)
+    
+    def is_changing(self, index: int) -> bool:
+        return bool(self.mask >> index & 1)
+    
+    def line_value(self, index: int) -> int:
+        """第index爻的爻值（6/7/8/9）"""
+        return self.LINE_VALUES[(self.is_yang(index), self.is_changing(index))]
+    
+    def changed(self) -> 'SixLines':
+        """变卦（变爻阴阳互换，变卦不再有变爻）"""
+        if not self.mask:
+            return self
+        return SixLines(self.bits ^ self.mask)
+    
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SixLines) and self.bits == other.bits and self.mask == other.mask
+    
+    def __hash__(self) -> int:
+        return self.bits << 6 | self.mask
+    
+    def __repr__(self) -> str:
+        return f"SixLines(bits={self.bits:06b}, mask={self.mask:06b})"
 
 
 class IChingService:
@@ -43,56 +116,104 @@ class IChingService:
     @staticmethod
     def cast_line(seed: str, line_index: int) -> int:
         """
-        摇卦：模拟投掷3枚硬币，生成一爻
+        摇卦（兼容模式）：模拟投掷3枚硬币，生成一爻
         返回值：6(老阴)、7(少阳)、8(少阴)、9(老阳)
         """
-        # 使用不同的哈希种子来模拟3枚独立的硬币
-        coins = []
+        return LINE_VALUE_BY_COINS[IChingService._legacy_coins(seed, line_index)]
+    
+    @staticmethod
+    def _legacy_coins(seed: str, line_index: int) -> int:
+        """兼容模式下一爻的3枚硬币（每枚硬币一次MD5，第i位为第i+1枚）"""
+        coins = 0
         for i in range(3):
             hash_input = f"{seed}-coin{i+1}-{line_index}".encode()
-            hash_value = int(hashlib.md5(hash_input).hexdigest(), 16)
-            coins.append(hash_value % 2)  # 0=反面, 1=正面
+            coins |= (hashlib.md5(hash_input).digest()[-1] & 1) << i  # 摘要整数的奇偶 = 末字节最低位
+        return coins
+    
+    @staticmethod
+    def legacy_cast_word(session_id: str) -> int:
+        """兼容模式的18枚硬币（与旧版逐枚MD5结果完全一致）"""
+        word = 0
+        for line_index in range(6):
+            word |= IChingService._legacy_coins(session_id, line_index) << (3 * line_index)
+        return word
+    
+    @staticmethod
+    def cast_word(session_id: str, key: Optional[bytes] = None) -> int:
+        """
+        单次带密钥摘要起卦
+        
+        Args:
+            session_id: 会话ID
+            key: 摘要密钥，默认取 ICHING_CAST_KEY
         
-        # 计算总和并映射到传统值
-        coin_sum = sum(coins)
-        mapping = {0: 6, 1: 7, 2: 8, 3: 9}  # 老阴、少阳、少阴、老阳
-        return mapping.get(coin_sum, 7)
+        Returns:
+            18位整数：第i爻的3枚硬币为第3i~3i+2位（1=正面）
+        """
+        if key is None:
+            key = settings.ICHING_CAST_KEY.encode()[:64]
+        digest = hashlib.blake2b(session_id.encode(), digest_size=4, key=key).digest()
+        return int.from_bytes(digest, "little") & 0x3FFFF
     
     @staticmethod
-    def generate_six_lines(session_id: str) -> SixLines:
-        """生成六爻"""
-        lines = []
-        for i in range(6):
-            value = IChingService.cast_line(session_id, i)
-            lines.append(Line(value))
-        return SixLines(lines)
+    def six_lines_from_word(word: int) -> SixLines:
+        """18枚硬币 -> 六爻（查表，两次查询得到六爻）"""
+        lower = LINES_BY_COINS9[word & 0x1FF]
+        upper = LINES_BY_COINS9[word >> 9 & 0x1FF]
+        return SixLines((upper & 7) << 3 | lower & 7, (upper >> 3) << 3 | lower >> 3)
+    
+    @staticmethod
+    def generate_six_lines(session_id: str, mode: Optional[str] = None) -> SixLines:
+        """
+        生成六爻
+        
+        Args:
+            session_id: 会话ID
+            mode: 起卦方式（digest/md5），默认取 ICHING_CAST_MODE
+        """
+        if (mode or settings.ICHING_CAST_MODE) == CAST_MODE_MD5:
+            word = IChingService.legacy_cast_word(session_id)
+        else:
+            word = IChingService.cast_word(session_id)
+        return IChingService.six_lines_from_word(word)
     
     @staticmethod
     def calculate_changed_hexagram(original: SixLines) -> SixLines:
-        """计算变卦"""
-        if not original.changing_lines:
-            return original
-        
-        # 复制原始六爻并转换变爻
-        changed_lines = []
-        for i, line in enumerate(original.lines):
-            if i in original.changing_lines:
-                # 老阴(6)变阳(7)，老阳(9)变阴(8)
-                new_value = 7 if line.value == 6 else 8
-                changed_lines.append(Line(new_value))
-            else:
-                changed_lines.append(Line(line.value))
-        
-        return SixLines(changed_lines)
+        """计算变卦（老阴变阳，老阳变阴）"""
+        return original.changed()
+    
+    @staticmethod
+    def get_hexagram_info(six_lines: SixLines, day: Optional[date] = None) -> Dict[str, Any]:
+        """
+        获取卦象信息（按 (卦, 变爻掩码) 缓存渲染结果，纳甲装卦按占卜日组合）
+        
+        Args:
+            six_lines: 六爻
+            day: 占卜日期（定六神、旬空），默认当天
+        """
+        info = _render_hexagram_info_cached(six_lines.bits << 6 | six_lines.mask)
+        najia = NajiaEngine.assign(
+            six_lines.bits, six_lines.mask, NajiaEngine.day_index(day or date.today())
+        )
+        return {**info, 'changing_lines': six_lines.changing_lines, 'najia': najia}
     
     @staticmethod
-    def get_hexagram_info(six_lines: SixLines) -> Dict[str, Any]:
-        """获取卦象信息"""
+    def render_hexagram_info(key: int) -> Dict[str, Any]:
+        """
+        渲染卦象信息与详细解释（不经过缓存）
+        
+        Args:
+            key: 六爻位表示 << 6 | 变爻掩码（共 64×64 种）
+        
+        Returns:
+            Dict: 不含 changing_lines 的卦象信息，detail 为驻留字符串
+        """
+        six_lines = SixLines(key >> 6, key & 0b111111)
         hexagram = get_hexagram_by_number(six_lines.hexagram_number)
         
         # 获取上下卦信息
-        upper = next((t for t in TRIGRAMS if t['number'] == six_lines.upper_trigram), TRIGRAMS[0])
-        lower = next((t for t in TRIGRAMS if t['number'] == six_lines.lower_trigram), TRIGRAMS[0])
+        upper = TRIGRAM_BY_BITS[six_lines.bits >> 3]
+        lower = TRIGRAM_BY_BITS[six_lines.bits & 7]
         
         # 构建详细解释
         detail = IChingService._build_detail(hexagram, upper, lower, six_lines)
@@ -103,12 +224,27 @@ class IChingService:
             'upper_trigram': upper['name'],
             'lower_trigram': lower['name'],
             'outcome': hexagram['outcome'],
-            'summary': hexagram['summary'],
-            'detail': detail,
+            'summary': sys.intern(hexagram['summary']),
+            'detail': sys.intern(detail),
             'wuxing': hexagram.get('wuxing', ''),
-            'changing_lines': six_lines.changing_lines,
         }
     
+    @staticmethod
+    def warm_detail_cache():
+        """预渲染全部 64×64 种卦象解释"""
+        for key in range(64 * 64):
+            _render_hexagram_info_cached(key)
+    
+    @staticmethod
+    def detail_cache_info():
+        """LRU命中统计"""
+        return _render_hexagram_info_cached.cache_info()
+    
+    @staticmethod
+    def detail_cache_clear():
+        """清空LRU"""
+        _render_hexagram_info_cached.cache_clear()
+    
     @staticmethod
     def _build_detail(hexagram: Dict, upper: Dict, lower: Dict, six_lines: SixLines) -> str:
         """构建详细解释"""
@@ -121,12 +257,12 @@ class IChingService:
         # 六爻展示
         lines.append("## 六爻")
         for i in range(5, -1, -1):
-            line = six_lines.lines[i]
-            symbol = "—" if line.yin_yang else "--"
+            value = six_lines.line_value(i)
+            symbol = "—" if six_lines.is_yang(i) else "--"
             changing = ""
-            if line.is_changing:
-                changing = " (老阴，变阳)" if line.value == 6 else " (老阳，变阴)"
-            lines.append(f"第{i+1}爻：{symbol}{changing} (值：{line.value})")
+            if six_lines.is_changing(i):
+                changing = " (老阴，变阳)" if value == 6 else " (老阳，变阴)"
+            lines.append(f"第{i+1}爻：{symbol}{changing} (值：{value})")
         
         lines.append("")
         
@@ -135,19 +271,25 @@ class IChingService:
             lines.append("## 变爻")
             positions = [f"第{i+1}爻" for i in six_lines.changing_lines]
             lines.append(f"变爻：{', '.join(positions)}")
+            if six_lines.mask == 0b111111 and hexagram.get('use'):
+                # 乾坤六爻皆变，占用九/用六
+                lines.append(hexagram['use'])
+            elif hexagram.get('lines'):
+                lines.extend(hexagram['lines'][i] for i in six_lines.changing_lines)
             
             # 计算变卦
-            changed = IChingService.calculate_changed_hexagram(six_lines)
-            changed_hexagram = get_hexagram_by_number(changed.hexagram_number)
+            changed_hexagram = get_hexagram_by_number(six_lines.changed_number)
             lines.append(f"\n变卦：{changed_hexagram['name']}（第{changed_hexagram['number']}卦）")
             lines.append(IChingService._analyze_relationship(hexagram, changed_hexagram, len(six_lines.changing_lines)))
         
         lines.append("")
         
-        # 卦辞
-        if hexagram.get('detail'):
+        # 卦辞、彖辞、象辞
+        if hexagram.get('judgment'):
             lines.append("## 卦辞")
-            lines.append(hexagram['detail'])
+            lines.append(hexagram['judgment'])
+            lines.append(f"彖曰：{hexagram['tuan']}")
+            lines.append(f"象曰：{hexagram['image']}")
         
         lines.append("")
         
@@ -155,6 +297,7 @@ class IChingService:
         lines.append("## 运势")
         lines.append(f"总体判断：{hexagram['outcome']}")
         lines.append(hexagram['summary'])
+        lines.append(hexagram['detail'])
         
         return "\n".join(lines)
     
@@ -179,13 +322,14 @@ class IChingService:
         return "\n".join(lines)
     
     @staticmethod
-    def generate_result(session_id: str, question: str) -> Dict[str, Any]:
-        """生成完整的周易占卜结果"""
+    def generate_result(session_id: str, question: str, mode: Optional[str] = None,
+                        day: Optional[date] = None) -> Dict[str, Any]:
+        """生成完整的周易占卜结果（mode 见 generate_six_lines，day 见 get_hexagram_info）"""
         # 生成六爻
-        six_lines = IChingService.generate_six_lines(session_id)
+        six_lines = IChingService.generate_six_lines(session_id, mode)
         
         # 获取卦象信息
-        hexagram_info = IChingService.get_hexagram_info(six_lines)
+        hexagram_info = IChingService.get_hexagram_info(six_lines, day)
         
         return {
             'session_id': session_id,
@@ -195,3 +339,6 @@ class IChingService:
             'detail': hexagram_info['detail'],
             'hexagram_info': hexagram_info,
         }
+
+
+_render_hexagram_info_cached = lru_cache(maxsize=settings.ICHING_DETAIL_CACHE_SIZE)(IChingService.render_hexagram_info)
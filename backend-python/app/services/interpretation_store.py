@@ -0,0 +1,278 @@
+"""LLM 解读跨用户复用
+
+卦象解读最贵的是 LLM 调用，而不同用户问同一类问题、起到同一卦时解读几乎相同。
+解读按 (卦序号, 变爻掩码, 提示词类型, question_type/sub_type, Prompt配置版本) 分组存储，
+组内再按归一化问题的 SimHash 相似度匹配：相似度达到阈值即复用，省去一次 LLM 调用。
+
+- 占卜日：纳甲排盘中六神、旬空由日柱决定，若放进提示词并按日柱分组，同卦同类问题只能在同一天复用；
+  因此会存入复用的解读，提示词只含与日期无关的排盘（宫、世应、纳甲、六亲），复用键不含日期
+- 新鲜期：按 PromptConfig.reuse_ttl_hours（为空时取全局配置，0 表示该配置不复用）
+- 失效：Prompt配置的模板、模型或参数变化后版本随之变化，旧解读不再命中；
+  后台修改或删除配置时同时删除其解读
+- 个性化：复用时把解读中出现的原问题替换为当前问题
+- 统计：按天记录查找、命中（即省去的 LLM 调用）与新存入次数
+"""
+
+import hashlib
+import json
+from collections import Counter, OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, NamedTuple, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.models.interpretation import LLMInterpretation
+from app.utils.text_fingerprint import FINGERPRINT_BITS, hamming, normalize_question, simhash
+
+logger = get_logger(__name__)
+
+_SIGN_BIT = 1 << (FINGERPRINT_BITS - 1)
+_STATS_DAYS = 30
+
+# 按天统计：lookups 查找次数，hits 命中次数（省去的 LLM 调用），stores 新存入条数
+_DAILY_STATS: "OrderedDict[date, Counter]" = OrderedDict()
+
+
+def _record(event: str):
+    today = date.today()
+    counter = _DAILY_STATS.get(today)
+    if counter is None:
+        counter = _DAILY_STATS[today] = Counter()
+        while len(_DAILY_STATS) > _STATS_DAYS:
+            _DAILY_STATS.popitem(last=False)
+    counter[event] += 1
+
+
+def _to_signed(fingerprint: int) -> int:
+    return fingerprint - (1 << FINGERPRINT_BITS) if fingerprint & _SIGN_BIT else fingerprint
+
+
+def _to_unsigned(fingerprint: int) -> int:
+    return fingerprint & ((1 << FINGERPRINT_BITS) - 1)
+
+
+class InterpretationKey(NamedTuple):
+    """一次解读的复用键"""
+    hexagram_number: int
+    changing_mask: int
+    prompt_type: str
+    question_type: str
+    sub_type: str
+    prompt_config_id: Optional[int]
+    prompt_version: str
+    fingerprint: int            # 归一化问题的 SimHash（无符号）
+    question: str
+    ttl: Optional[timedelta]    # None 表示不复用
+
+
+class InterpretationStore:
+    """LLM 解读存储"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @staticmethod
+    def reusable(key: Optional[InterpretationKey]) -> bool:
+        """该解读是否会存入并跨用户复用（是则提示词不能含由占卜日决定的内容）"""
+        return key is not None and key.ttl is not None
+
+    @staticmethod
+    def prompt_version(prompt_config: Optional[Any]) -> str:
+        """
+        Prompt配置的版本（模板、模型与生成参数的摘要，应用版本升级时也会变化）
+
+        Args:
+            prompt_config: PromptConfig，为空表示默认LLM与内置提示词
+
+        Returns:
+            str: 32 位十六进制摘要
+        """
+        # najia：提示词中的排盘不含日期部分（此前的解读含六神、旬空，不再命中）
+        fields: Dict[str, Any] = {"app": settings.APP_VERSION, "najia": "without_day"}
+        if prompt_config is not None:
+            fields.update(
+                template=prompt_config.template,
+                llm_config_id=prompt_config.llm_config_id,
+                temperature=prompt_config.temperature,
+                max_tokens=prompt_config.max_tokens,
+            )
+        payload = json.dumps(fields, ensure_ascii=False, sort_keys=True)
+        return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def freshness(prompt_config: Optional[Any]) -> Optional[timedelta]:
+        """解读的新鲜期（None 表示不复用）"""
+        if not settings.INTERPRETATION_REUSE_ENABLED:
+            return None
+        hours = getattr(prompt_config, "reuse_ttl_hours", None)
+        if hours is None:
+            hours = settings.INTERPRETATION_REUSE_TTL_HOURS
+        return timedelta(hours=hours) if hours > 0 else None
+
+    @staticmethod
+    def make_key(question: str, hexagram_info: Any, analysis: Optional[Any], prompt_type: str,
+                 prompt_config: Optional[Any]) -> Optional[InterpretationKey]:
+        """
+        构造复用键
+
+        Args:
+            question: 用户问题
+            hexagram_info: 卦象信息（dict 或 HexagramInfo）
+            analysis: 问题分析结果（QuestionAnalysis，可为空）
+            prompt_type: answer/detail
+            prompt_config: 使用的Prompt配置
+
+        Returns:
+            InterpretationKey，卦象信息不完整或问题为空时返回 None
+        """
+        def get_value(obj, key, default=None):
+            if isinstance(obj, dict):
+                return obj.get(key, default)
+            return getattr(obj, key, default)
+
+        number = get_value(hexagram_info, 'number')
+        normalized = normalize_question(question)
+        if not number or not normalized:
+            return None
+        mask = 0
+        for line in get_value(hexagram_info, 'changing_lines') or ():
+            mask |= 1 << line
+        return InterpretationKey(
+            hexagram_number=number,
+            changing_mask=mask,
+            prompt_type=prompt_type,
+            question_type=getattr(analysis, 'question_type', '') or '',
+            sub_type=getattr(analysis, 'sub_type', '') or '',
+            prompt_config_id=getattr(prompt_config, 'id', None),
+            prompt_version=InterpretationStore.prompt_version(prompt_config),
+            fingerprint=simhash(normalized),
+            question=question,
+            ttl=InterpretationStore.freshness(prompt_config),
+        )
+
+    async def find(self, key: Optional[InterpretationKey]) -> Optional[str]:
+        """
+        查找可复用的解读
+
+        Args:
+            key: 复用键
+
+        Returns:
+            str: 解读内容（已个性化），没有时返回 None
+        """
+        if not self.reusable(key):
+            return None
+        _record("lookups")
+        try:
+            async with self.db.begin_nested():
+                return await self._find(key)
+        except Exception as e:
+            # 查找失败不影响正常生成（保存点回滚，不污染外层事务）
+            logger.warning("查找可复用解读失败: %s", e)
+            return None
+
+    async def _find(self, key: InterpretationKey) -> Optional[str]:
+        since = datetime.now(timezone.utc) - key.ttl
+        result = await self.db.execute(
+            select(LLMInterpretation)
+            .where(
+                LLMInterpretation.hexagram_number == key.hexagram_number,
+                LLMInterpretation.changing_mask == key.changing_mask,
+                LLMInterpretation.prompt_type == key.prompt_type,
+                LLMInterpretation.question_type == key.question_type,
+                LLMInterpretation.sub_type == key.sub_type,
+                LLMInterpretation.prompt_version == key.prompt_version,
+                LLMInterpretation.created_at >= since,
+            )
+            .order_by(LLMInterpretation.created_at.desc())
+            .limit(settings.INTERPRETATION_CANDIDATES)
+        )
+        max_distance = int((1 - settings.INTERPRETATION_SIMILARITY) * FINGERPRINT_BITS)
+        best, best_distance = None, max_distance + 1
+        for row in result.scalars().all():
+            distance = hamming(key.fingerprint, _to_unsigned(row.fingerprint))
+            if distance < best_distance:
+                best, best_distance = row, distance
+        if best is None:
+            return None
+
+        await self.db.execute(
+            update(LLMInterpretation)
+            .where(LLMInterpretation.id == best.id)
+            .values(hit_count=LLMInterpretation.hit_count + 1, last_used_at=datetime.now(timezone.utc))
+        )
+        _record("hits")
+        logger.debug(
+            "复用LLM解读",
+            extra={"interpretation_id": best.id, "hexagram": key.hexagram_number, "distance": best_distance},
+        )
+        return self.personalize(best.content, best.question, key.question)
+
+    async def save(self, key: Optional[InterpretationKey], content: str):
+        """
+        保存新生成的解读
+
+        Args:
+            key: 复用键
+            content: LLM 生成的解读
+        """
+        if not self.reusable(key) or not content:
+            return
+        try:
+            async with self.db.begin_nested():
+                self.db.add(self._row(key, content))
+        except Exception as e:
+            logger.warning("保存LLM解读失败: %s", e)
+            return
+        _record("stores")
+
+    @staticmethod
+    def _row(key: InterpretationKey, content: str) -> LLMInterpretation:
+        return LLMInterpretation(
+            hexagram_number=key.hexagram_number,
+            changing_mask=key.changing_mask,
+            prompt_type=key.prompt_type,
+            question_type=key.question_type,
+            sub_type=key.sub_type,
+            fingerprint=_to_signed(key.fingerprint),
+            question=key.question,
+            prompt_config_id=key.prompt_config_id,
+            prompt_version=key.prompt_version,
+            content=content,
+            hit_count=0,
+        )
+
+    async def invalidate_prompt(self, prompt_config_id: int) -> int:
+        """
+        删除某个Prompt配置生成的全部解读（配置修改或删除时调用）
+
+        Returns:
+            int: 删除条数
+        """
+        result = await self.db.execute(
+            delete(LLMInterpretation).where(LLMInterpretation.prompt_config_id == prompt_config_id)
+        )
+        return result.rowcount or 0
+
+    @staticmethod
+    def personalize(content: str, original_question: str, question: str) -> str:
+        """把解读中引用的原问题替换为当前问题"""
+        if not settings.INTERPRETATION_PERSONALIZE or not original_question or original_question == question:
+            return content
+        return content.replace(original_question.strip(), question.strip())
+
+    @staticmethod
+    def daily_stats() -> Dict[str, Dict[str, Any]]:
+        """按天统计（最近30天）：查找、命中（省去的LLM调用）、新存入及命中率"""
+        return {
+            day.isoformat(): {
+                "lookups": counter["lookups"],
+                "llm_calls_avoided": counter["hits"],
+                "stores": counter["stores"],
+                "hit_rate": round(counter["hits"] / counter["lookups"], 4) if counter["lookups"] else 0.0,
+            }
+            for day, counter in _DAILY_STATS.items()
+        }
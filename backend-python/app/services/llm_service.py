@@ -4,6 +4,9 @@ import httpx
 import json
 from abc import ABC, abstractmethod
 from typing import Optional, Dict, Any, List
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class LLMService(ABC):
@@ -83,9 +86,7 @@ class OpenAICompatibleLLMService(LLMService):
                 raise ValueError("Invalid response format")
         
         except Exception as e:
-            import traceback
-            print(f"LLM调用失败: {type(e).__name__}: {str(e)}")
-            print(f"详细错误:\n{traceback.format_exc()}")
+            logger.exception("LLM调用失败: %s: %s", type(e).__name__, e)
             # 降级到Mock服务
             return await MockLLMService().generate(prompt)
     
@@ -149,7 +150,7 @@ def create_llm_service(
         )
     else:
         # 未知provider，返回Mock服务
-        print(f"未知的LLM provider: {provider}，使用Mock服务")
+        logger.warning("未知的LLM provider: %s，使用Mock服务", provider)
         return MockLLMService()
 
 
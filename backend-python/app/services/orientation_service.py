@@ -1,8 +1,46 @@
 """方位推荐服务 - 八卦方位智能推荐系统"""
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from pydantic import BaseModel
 
+# 问题关键词微调规则：(方位, 关键词, 理由)，按优先顺序排列
+BAGUA_KEYWORD_RULES = [
+    # 学习、考试、启示 → 南方（离）
+    ("S", ["学习", "考试", "看清", "启示", "明白", "理解"], "此事偏'看清与求启示'，取南方（离）以明照。"),
+    # 止损、休息、内观 → 北方（坎）
+    ("N", ["止损", "休息", "焦虑", "内观", "冷静", "沉淀"], "此事宜先止损休整，取北方（坎）以沉潜内观。"),
+    # 规划、稳定 → 东北（艮）
+    ("NE", ["规划", "稳", "沉淀", "积累", "基础"], "此事宜规划沉淀，取东北（艮）以稳固。"),
+    # 机缘、扩展、变通 → 东南（巽）
+    ("SE", ["机缘", "扩展", "变通", "灵活", "顺势"], "此事偏机缘与灵活变通，取东南（巽）以顺势而入。"),
+    # 包容、承载、母性 → 西南（坤）
+    ("SW", ["包容", "承载", "母亲", "家庭", "养育"], "此事需包容承载，取西南（坤）以厚德载物。"),
+]
+TAROT_KEYWORD_RULES = [
+    # 金钱、财务、身体、健康 → 北方（土/星币）
+    ("N", ["money", "finance", "body", "health", "practical"],
+     "Face North (Earth) to ground the situation into practical steps."),
+]
+
+
+def match_keyword_rule(question: str, rules) -> Optional[Tuple[str, str]]:
+    """
+    按优先顺序取第一条命中的关键词规则（不区分大小写）
+
+    Args:
+        question: 问题
+        rules: BAGUA_KEYWORD_RULES 或 TAROT_KEYWORD_RULES
+
+    Returns:
+        (方位, 理由)，未命中返回 None
+    """
+    q = question.lower().strip()
+    for key, keywords, reason in rules:
+        for keyword in keywords:
+            if keyword in q:
+                return key, reason
+    return None
+
 
 class OrientationOption(BaseModel):
     """方位选项"""
@@ -86,9 +124,6 @@ class OrientationService:
         recommended_key = "E"
         reason = "难以归类时取东方（震），取'行动与开启'之象。"
         
-        # 问题文本（转小写便于匹配）
-        q = request.question.lower().strip()
-        
         # 第一层：根据事件类型确定基础方位
         if request.event_type == "decision":
             recommended_key = "E"
@@ -106,31 +141,10 @@ class OrientationService:
             recommended_key = "S"
             reason = "此事求知识启示，取南方（离）以明照智慧。"
         
-        # 第二层：根据问题关键词进行微调（优先级更高）
-        # 学习、考试、启示 → 南方（离）
-        if any(keyword in q for keyword in ["学习", "考试", "看清", "启示", "明白", "理解"]):
-            recommended_key = "S"
-            reason = "此事偏'看清与求启示'，取南方（离）以明照。"
-        
-        # 止损、休息、内观 → 北方（坎）
-        elif any(keyword in q for keyword in ["止损", "休息", "焦虑", "内观", "冷静", "沉淀"]):
-            recommended_key = "N"
-            reason = "此事宜先止损休整，取北方（坎）以沉潜内观。"
-        
-        # 规划、稳定 → 东北（艮）
-        elif any(keyword in q for keyword in ["规划", "稳", "沉淀", "积累", "基础"]):
-            recommended_key = "NE"
-            reason = "此事宜规划沉淀，取东北（艮）以稳固。"
-        
-        # 机缘、扩展、变通 → 东南（巽）
-        elif any(keyword in q for keyword in ["机缘", "扩展", "变通", "灵活", "顺势"]):
-            recommended_key = "SE"
-            reason = "此事偏机缘与灵活变通，取东南（巽）以顺势而入。"
-        
-        # 包容、承载、母性 → 西南（坤）
-        elif any(keyword in q for keyword in ["包容", "承载", "母亲", "家庭", "养育"]):
-            recommended_key = "SW"
-            reason = "此事需包容承载，取西南（坤）以厚德载物。"
+        # 第二层：根据问题关键词进行微调（优先级更高，按规则顺序取第一条命中）
+        matched = match_keyword_rule(request.question, BAGUA_KEYWORD_RULES)
+        if matched:
+            recommended_key, reason = matched
         
         # 找到对应的label
         recommended_label = OrientationService._find_label(options, recommended_key)
@@ -163,9 +177,6 @@ class OrientationService:
         recommended_key = "E"
         reason = "When it's unclear, face East to seek clarity."
         
-        # 问题文本（转小写便于匹配）
-        q = request.question.lower().strip()
-        
         # 第一层：根据事件类型确定基础方位
         if request.event_type == "decision":
             recommended_key = "E"
@@ -178,10 +189,9 @@ class OrientationService:
             reason = "Face West (Water) to soften emotions and support connection."
         
         # 第二层：根据问题关键词进行微调
-        # 金钱、财务、身体、健康 → 北方（土/星币）
-        if any(keyword in q for keyword in ["money", "finance", "body", "health", "practical"]):
-            recommended_key = "N"
-            reason = "Face North (Earth) to ground the situation into practical steps."
+        matched = match_keyword_rule(request.question, TAROT_KEYWORD_RULES)
+        if matched:
+            recommended_key, reason = matched
         
         # 找到对应的label
         recommended_label = OrientationService._find_label(options, recommended_key)
@@ -2,6 +2,7 @@
 
 from typing import Dict, Any, Optional, Union
 from app.services.question_analyzer import QuestionAnalysis
+from app.utils.najia import NajiaEngine
 
 
 class PromptBuilder:
@@ -10,8 +11,8 @@ class PromptBuilder:
     @staticmethod
     def build_answer_prompt(question: str, hexagram_info: Union[Dict[str, Any], Any], 
                            user_profile: Optional[Dict[str, Any]] = None,
-                           analysis: Optional[QuestionAnalysis] = None) -> str:
-        """构建答案Prompt（结果卡）"""
+                           analysis: Optional[QuestionAnalysis] = None, with_day: bool = True) -> str:
+        """构建答案Prompt（结果卡；with_day 为否时纳甲排盘不含日柱、旬空、六神）"""
         
         # 兼容字典和Pydantic对象
         def get_value(obj, key, default=''):
@@ -30,6 +31,7 @@ class PromptBuilder:
 - 卦辞：{get_value(hexagram_info, 'summary', '')}
 - 吉凶：{get_value(hexagram_info, 'outcome', '')}
 """
+        base_prompt += NajiaEngine.prompt_section(get_value(hexagram_info, 'najia', None), with_day)
         
         # 添加用户档案信息
         if user_profile:
@@ -72,8 +74,8 @@ class PromptBuilder:
     
     @staticmethod
     def build_detail_prompt(question: str, hexagram_info: Union[Dict[str, Any], Any],
-                           user_profile: Optional[Dict[str, Any]] = None) -> str:
-        """构建详情Prompt"""
+                           user_profile: Optional[Dict[str, Any]] = None, with_day: bool = True) -> str:
+        """构建详情Prompt（with_day 为否时纳甲排盘不含日柱、旬空、六神）"""
         
         # 兼容字典和Pydantic对象
         def get_value(obj, key, default=''):
@@ -92,6 +94,7 @@ class PromptBuilder:
 - 详细解释：{get_value(hexagram_info, 'detail', '')}
 - 吉凶：{get_value(hexagram_info, 'outcome', '')}
 """
+        prompt += NajiaEngine.prompt_section(get_value(hexagram_info, 'najia', None), with_day)
         
         if user_profile:
             prompt += f"""
@@ -1,14 +1,73 @@
 """问题分析器（LLM驱动 - 增强版）"""
 
 import json
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
 from typing import Dict, Any, Optional
 from app.services.llm_service import LLMService
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.services.analysis_cache import AnalysisCache, CacheHit, create_analysis_cache
+from app.utils.corpus import DATA_DIR
+from app.utils.question_model import LABEL_FIELDS, QuestionModel
+
+logger = get_logger(__name__)
+
+# 分析结果来源：cache=近似重复缓存，local=本地模型，llm=LLM，rules=规则引擎
+SOURCE_CACHE = "cache"
+SOURCE_LOCAL = "local"
+SOURCE_LLM = "llm"
+SOURCE_RULES = "rules"
+
+# 进程内各来源的分析次数（cache 与 local 即省下的 LLM 调用次数）
+ANALYSIS_SOURCES: Counter = Counter()
+
+# 降级规则引擎的词表
+RULES = {
+    "binary_choice": ("还是", "或者"),
+    "relationship": ("恋爱", "喜欢", "爱", "感情", "结婚", "分手", "追", "表白", "相亲", "约会"),
+    "career": ("工作", "事业", "职业", "跳槽", "升职", "面试", "公司", "老板", "同事"),
+    "fortune": ("运势", "运气", "今日", "本周", "本月", "今年", "财运", "桃花运"),
+    "knowledge": ("是什么", "什么意思", "解释", "含义", "为什么", "怎么理解"),
+    "yes_no": ("应该", "要不要", "该不该", "能不能", "可不可以"),
+    "timing": ("什么时候", "何时", "时机", "几时", "哪天"),
+    "concern": ("但是", "不过", "可是", "然而"),
+    "contrast": ("但是", "不过", "可是"),
+    "addition": ("又", "也", "还"),
+    "time_frame": ("最近", "现在", "未来", "以后"),
+    "target_person": ("他", "她", "男友", "女友", "对象", "喜欢的人"),
+}
+
+
+def question_model_path() -> Path:
+    """本地问题分析模型文件路径"""
+    return Path(settings.QUESTION_MODEL_PATH) if settings.QUESTION_MODEL_PATH else DATA_DIR / "question_model.npz"
+
+
+@lru_cache(maxsize=1)
+def load_question_model() -> Optional[QuestionModel]:
+    """加载本地问题分析模型（未启用、文件不存在或加载失败时返回 None）"""
+    if not settings.QUESTION_MODEL_ENABLED:
+        return None
+    path = question_model_path()
+    if not path.exists():
+        logger.info("未找到本地问题分析模型，问题分析使用LLM", extra={"path": str(path)})
+        return None
+    try:
+        model = QuestionModel.load(path)
+    except Exception as e:
+        logger.warning("本地问题分析模型加载失败: %s", e)
+        return None
+    logger.info("本地问题分析模型已加载", extra={"path": str(path), "meta": model.meta})
+    return model
 
 
 class QuestionAnalysis:
     """问题分析结果"""
     def __init__(self, question_type: str, sub_type: str, elements: Dict[str, str],
-                 intent: str, complexity: str, keywords: list, context: Dict[str, Any]):
+                 intent: str, complexity: str, keywords: list, context: Dict[str, Any],
+                 source: str = SOURCE_RULES):
         self.question_type = question_type  # decision, relationship, career, fortune, knowledge
         self.sub_type = sub_type            # binary_choice, yes_no, timing, compatibility
         self.elements = elements            # 问题要素（新增：option_a, option_b, concern_1等）
@@ -16,16 +75,75 @@ class QuestionAnalysis:
         self.complexity = complexity        # simple, medium, high（增强：多因素评估）
         self.keywords = keywords            # 关键词
         self.context = context              # 额外上下文
+        self.source = source                # 分析来源：cache, local, llm, rules
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """字段快照（供缓存保存）"""
+        return {
+            "question_type": self.question_type,
+            "sub_type": self.sub_type,
+            "elements": self.elements,
+            "intent": self.intent,
+            "complexity": self.complexity,
+            "keywords": self.keywords,
+            "context": self.context,
+        }
+
+
+# LLM 分析结果的近似重复缓存（进程内共享）
+ANALYSIS_CACHE = create_analysis_cache(LABEL_FIELDS)
 
 
 class QuestionAnalyzer:
     """问题分析器（增强版）"""
     
-    def __init__(self, llm_service: Optional[LLMService] = None):
+    def __init__(self, llm_service: Optional[LLMService] = None,
+                 local_model: Optional[QuestionModel] = None, threshold: Optional[float] = None,
+                 cache: Optional[AnalysisCache] = None):
         self.llm_service = llm_service
+        self.local_model = local_model if local_model is not None else load_question_model()
+        self.threshold = settings.QUESTION_MODEL_THRESHOLD if threshold is None else threshold
+        self.cache = cache if cache is not None else ANALYSIS_CACHE
     
     async def analyze_question(self, question: str) -> QuestionAnalysis:
-        """分析问题"""
+        """分析问题（相同或相近的问题复用缓存，本地模型有把握时不调用LLM）"""
+        hit = self.cache.lookup(question) if self.cache else None
+        if hit and not hit.audit:
+            ANALYSIS_SOURCES[SOURCE_CACHE] += 1
+            return self._from_cache(question, hit)
+        
+        analysis = await self._analyze_uncached(question)
+        if self.cache and analysis.source == SOURCE_LLM:
+            if hit:
+                # 抽样审计：缓存结果与重新分析的结果比对
+                self.cache.record_audit(question, hit, analysis.snapshot())
+            self.cache.store(question, analysis.snapshot())
+        return analysis
+    
+    def _from_cache(self, question: str, hit: CacheHit) -> QuestionAnalysis:
+        """
+        由缓存命中构造分析结果
+        
+        归一化文本相同时整份复用；近似命中只复用四个分类标签，
+        问题要素与关键词按本次问题由规则引擎提取（选项、人物等可能不同）
+        """
+        if hit.exact:
+            analysis = QuestionAnalysis(**hit.snapshot, source=SOURCE_CACHE)
+        else:
+            analysis = self._fallback_analysis(question)
+            for field in LABEL_FIELDS:
+                setattr(analysis, field, hit.snapshot[field])
+            analysis.source = SOURCE_CACHE
+        analysis.context["cache_distance"] = hit.distance
+        return analysis
+    
+    async def _analyze_uncached(self, question: str) -> QuestionAnalysis:
+        """本地模型 → LLM → 规则引擎"""
+        analysis = self._local_analysis(question)
+        if analysis:
+            ANALYSIS_SOURCES[SOURCE_LOCAL] += 1
+            return analysis
+        
         # 如果有LLM服务，使用LLM分析
         if self.llm_service:
             try:
@@ -33,15 +151,54 @@ class QuestionAnalyzer:
                 response = await self.llm_service.generate_answer(prompt)
                 analysis = self._parse_analysis_response(response)
                 if analysis:
+                    ANALYSIS_SOURCES[SOURCE_LLM] += 1
                     return analysis
             except Exception as e:
-                print(f"[WARN] LLM分析失败，降级到规则引擎: {e}")
+                logger.warning("LLM分析失败，降级到规则引擎: %s", e)
                 # LLM失败，降级到规则引擎
                 pass
         
         # 使用规则引擎降级
+        ANALYSIS_SOURCES[SOURCE_RULES] += 1
         return self._fallback_analysis(question)
     
+    def _local_analysis(self, question: str) -> Optional[QuestionAnalysis]:
+        """
+        本地模型分析：四个标签由模型预测，问题要素与关键词取自规则引擎
+        
+        Args:
+            question: 问题文本
+        
+        Returns:
+            QuestionAnalysis，模型未加载或置信度低于阈值时返回 None
+        """
+        if self.local_model is None or not question.strip():
+            return None
+        prediction = self.local_model.predict(question)
+        if prediction.confidence < self.threshold:
+            return None
+        
+        analysis = self._fallback_analysis(question)
+        for field in LABEL_FIELDS:
+            setattr(analysis, field, prediction.labels[field])
+        analysis.context["local_confidence"] = round(prediction.confidence, 3)
+        analysis.source = SOURCE_LOCAL
+        return analysis
+    
+    @staticmethod
+    def source_stats() -> Dict[str, Any]:
+        """进程内问题分析来源统计"""
+        total = sum(ANALYSIS_SOURCES.values())
+        return {
+            "total": total,
+            "sources": {
+                source: ANALYSIS_SOURCES[source]
+                for source in (SOURCE_CACHE, SOURCE_LOCAL, SOURCE_LLM, SOURCE_RULES)
+            },
+            "llm_calls_saved": ANALYSIS_SOURCES[SOURCE_CACHE] + ANALYSIS_SOURCES[SOURCE_LOCAL],
+            "local_ratio": round(ANALYSIS_SOURCES[SOURCE_LOCAL] / total, 4) if total else 0.0,
+        }
+    
     def _build_analysis_prompt(self, question: str) -> str:
         """构建分析Prompt（增强版，包含示例）"""
         return f"""你是一位专业的问题分析师。请分析以下用户问题，并以 JSON 格式返回分析结果。
@@ -156,15 +313,16 @@ class QuestionAnalyzer:
                 intent=data.get("intent", "guidance"),
                 complexity=data.get("complexity", "medium"),
                 keywords=data.get("keywords", []),
-                context=data.get("context", {})
+                context=data.get("context", {}),
+                source=SOURCE_LLM
             )
         except Exception as e:
-            print(f"[WARN] JSON解析失败: {e}")
+            logger.warning("JSON解析失败: %s", e)
             return None
     
     def _fallback_analysis(self, question: str) -> QuestionAnalysis:
         """降级分析（基于规则引擎 - 增强版，10条规则）"""
-        question_lower = question.lower()
+        text = question.lower()
         
         analysis = QuestionAnalysis(
             question_type="decision",
@@ -177,61 +335,59 @@ class QuestionAnalyzer:
         )
         
         # 规则1：检测是否为二选一问题
-        if "还是" in question or "或者" in question:
-            analysis.question_type = "decision"
-            analysis.sub_type = "binary_choice"
-            analysis.intent = "binary_choice"
-            
-            # 增强：提取选项A和B
-            if "还是" in question:
-                parts = question.split("还是", 1)
-                if len(parts) >= 2:
-                    # 清理选项文本
-                    option_a = parts[0].strip()
-                    option_b = parts[1].strip()
-                    
-                    # 移除常见前缀
-                    for prefix in ["我应该", "应该", "要不要", "该不该", "是"]:
-                        if option_a.startswith(prefix):
-                            option_a = option_a[len(prefix):].strip()
-                    
-                    # 移除常见后缀（如问号、句号）
-                    option_b = option_b.rstrip("？?。.")
-                    
-                    analysis.elements["option_a"] = option_a
-                    analysis.elements["option_b"] = option_b
+        for keyword in RULES["binary_choice"]:
+            if keyword in text:
+                analysis.question_type = "decision"
+                analysis.sub_type = "binary_choice"
+                analysis.intent = "binary_choice"
+                break
+        
+        # 增强：提取选项A和B
+        if analysis.sub_type == "binary_choice" and "还是" in question:
+            parts = question.split("还是", 1)
+            if len(parts) >= 2:
+                # 清理选项文本
+                option_a = parts[0].strip()
+                option_b = parts[1].strip()
+                
+                # 移除常见前缀
+                for prefix in ["我应该", "应该", "要不要", "该不该", "是"]:
+                    if option_a.startswith(prefix):
+                        option_a = option_a[len(prefix):].strip()
+                
+                # 移除常见后缀（如问号、句号）
+                option_b = option_b.rstrip("？?。.")
+                
+                analysis.elements["option_a"] = option_a
+                analysis.elements["option_b"] = option_b
         
         # 规则2：检测感情类问题
-        relationship_keywords = ["恋爱", "喜欢", "爱", "感情", "结婚", "分手", "追", "表白", "相亲", "约会"]
-        for keyword in relationship_keywords:
-            if keyword in question:
+        for keyword in RULES["relationship"]:
+            if keyword in text:
                 if analysis.question_type == "decision":
                     analysis.question_type = "relationship"
                 if keyword not in analysis.keywords:
                     analysis.keywords.append(keyword)
         
         # 规则3：检测事业类问题
-        career_keywords = ["工作", "事业", "职业", "跳槽", "升职", "面试", "公司", "老板", "同事"]
-        for keyword in career_keywords:
-            if keyword in question:
+        for keyword in RULES["career"]:
+            if keyword in text:
                 if analysis.question_type == "decision" and analysis.question_type != "relationship":
                     analysis.question_type = "career"
                 if keyword not in analysis.keywords:
                     analysis.keywords.append(keyword)
         
         # 规则4：检测运势类问题（新增）
-        fortune_keywords = ["运势", "运气", "今日", "本周", "本月", "今年", "财运", "桃花运"]
-        for keyword in fortune_keywords:
-            if keyword in question:
+        for keyword in RULES["fortune"]:
+            if keyword in text:
                 analysis.question_type = "fortune"
                 if keyword not in analysis.keywords:
                     analysis.keywords.append(keyword)
                 break
         
         # 规则5：检测知识类问题（新增）
-        knowledge_keywords = ["是什么", "什么意思", "解释", "含义", "为什么", "怎么理解"]
-        for keyword in knowledge_keywords:
-            if keyword in question:
+        for keyword in RULES["knowledge"]:
+            if keyword in text:
                 analysis.question_type = "knowledge"
                 analysis.sub_type = "open_ended"
                 analysis.intent = "understanding"
@@ -240,22 +396,25 @@ class QuestionAnalyzer:
                 break
         
         # 规则6：检测是非问题
-        if any(kw in question for kw in ["应该", "要不要", "该不该", "能不能", "可不可以"]):
-            if analysis.sub_type != "binary_choice":  # 二选一优先级更高
-                analysis.sub_type = "yes_no"
-                analysis.intent = "yes_no"
+        for keyword in RULES["yes_no"]:
+            if keyword in text:
+                if analysis.sub_type != "binary_choice":  # 二选一优先级更高
+                    analysis.sub_type = "yes_no"
+                    analysis.intent = "yes_no"
+                break
         
         # 规则7：检测时机问题
-        if any(kw in question for kw in ["什么时候", "何时", "时机", "几时", "哪天"]):
-            analysis.sub_type = "timing"
-            analysis.intent = "timing"
-            analysis.elements["time_frame"] = "未指定"
+        for keyword in RULES["timing"]:
+            if keyword in text:
+                analysis.sub_type = "timing"
+                analysis.intent = "timing"
+                analysis.elements["time_frame"] = "未指定"
+                break
         
         # 规则8：提取顾虑和关注点（新增）
-        concern_markers = ["但是", "不过", "可是", "然而"]
         concern_count = 0
-        for marker in concern_markers:
-            if marker in question:
+        for marker in RULES["concern"]:
+            if marker in text:
                 concern_count += 1
                 # 尝试提取顾虑内容
                 parts = question.split(marker, 1)
@@ -267,10 +426,14 @@ class QuestionAnalyzer:
         complexity_score = 0
         
         # 因素1：关联词数量
-        if "但是" in question or "不过" in question or "可是" in question:
-            complexity_score += 1
-        if "又" in question or "也" in question or "还" in question:
-            complexity_score += 1
+        for keyword in RULES["contrast"]:
+            if keyword in text:
+                complexity_score += 1
+                break
+        for keyword in RULES["addition"]:
+            if keyword in text:
+                complexity_score += 1
+                break
         
         # 因素2：问题长度
         if len(question) > 50:
@@ -283,8 +446,10 @@ class QuestionAnalyzer:
             complexity_score += 1
         
         # 因素4：时间因素
-        if any(kw in question for kw in ["最近", "现在", "未来", "以后"]):
-            complexity_score += 0.5
+        for keyword in RULES["time_frame"]:
+            if keyword in text:
+                complexity_score += 0.5
+                break
         
         # 评估复杂度
         if complexity_score >= 3:
@@ -297,8 +462,8 @@ class QuestionAnalyzer:
         # 规则10：提取目标人物（新增）
         if analysis.question_type == "relationship":
             # 简单的人物提取逻辑
-            for keyword in ["他", "她", "男友", "女友", "对象", "喜欢的人"]:
-                if keyword in question:
+            for keyword in RULES["target_person"]:
+                if keyword in text:
                     analysis.elements["target_person"] = keyword
                     break
         
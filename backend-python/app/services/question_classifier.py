@@ -3,6 +3,23 @@
 from typing import List, Dict, Any
 import re
 
+# 各类关键词（均为小写，直接在小写问题中查找）
+RECOMMENDATION_KEYWORDS = [
+    "吃什么", "去哪", "去哪儿", "看什么", "推荐", "建议", "有什么",
+    "吃什么好", "去哪玩", "看什么电影", "听什么", "读什么",
+]
+DECISION_KEYWORDS = [
+    "选", "选择", "应该", "哪个", "要不要", "是否", "该不该",
+    "去不去", "做不做", "选哪个", "哪个好",
+    "工作", "跳槽", "投资", "买房", "结婚", "分手",
+]
+FORTUNE_KEYWORDS = [
+    "运势", "运程", "运气", "今日", "本周", "本月", "今年",
+    "桃花运", "财运", "事业运", "健康运",
+]
+COMPANY_KEYWORDS = ["公司", "企业"]
+INDUSTRIES = ["互联网", "金融", "教育", "医疗", "房地产", "制造业"]
+
 
 class QuestionType:
     """问题类型常量"""
@@ -24,19 +41,9 @@ class QuestionClassifier:
     """问题分类器"""
     
     def __init__(self):
-        self.recommendation_keywords = [
-            "吃什么", "去哪", "去哪儿", "看什么", "推荐", "建议", "有什么",
-            "吃什么好", "去哪玩", "看什么电影", "听什么", "读什么",
-        ]
-        self.decision_keywords = [
-            "选", "选择", "应该", "哪个", "要不要", "是否", "该不该",
-            "去不去", "做不做", "选哪个", "哪个好",
-            "工作", "跳槽", "投资", "买房", "结婚", "分手",
-        ]
-        self.fortune_keywords = [
-            "运势", "运程", "运气", "今日", "本周", "本月", "今年",
-            "桃花运", "财运", "事业运", "健康运",
-        ]
+        self.recommendation_keywords = RECOMMENDATION_KEYWORDS
+        self.decision_keywords = DECISION_KEYWORDS
+        self.fortune_keywords = FORTUNE_KEYWORDS
     
     def classify(self, question: str) -> QuestionClassification:
         """分类问题"""
@@ -51,29 +58,14 @@ class QuestionClassifier:
         
         lower_question = question.lower()
         
-        # 统计各类关键词匹配数
-        recommendation_count = 0
-        decision_count = 0
-        fortune_count = 0
-        matched_keywords = []
-        
-        # 检查推荐类关键词
-        for keyword in self.recommendation_keywords:
-            if keyword in question or keyword.lower() in lower_question:
-                recommendation_count += 1
-                matched_keywords.append(keyword)
-        
-        # 检查决策类关键词
-        for keyword in self.decision_keywords:
-            if keyword in question or keyword.lower() in lower_question:
-                decision_count += 1
-                matched_keywords.append(keyword)
-        
-        # 检查运势类关键词
-        for keyword in self.fortune_keywords:
-            if keyword in question or keyword.lower() in lower_question:
-                fortune_count += 1
-                matched_keywords.append(keyword)
+        # 各类关键词的命中（不区分大小写）
+        recommended = [keyword for keyword in RECOMMENDATION_KEYWORDS if keyword in lower_question]
+        decided = [keyword for keyword in DECISION_KEYWORDS if keyword in lower_question]
+        fortunes = [keyword for keyword in FORTUNE_KEYWORDS if keyword in lower_question]
+        recommendation_count = len(recommended)
+        decision_count = len(decided)
+        fortune_count = len(fortunes)
+        matched_keywords = recommended + decided + fortunes
         
         # 确定问题类型
         if decision_count > 0:
@@ -117,12 +109,11 @@ class QuestionClassifier:
         context = {}
         
         # 提取公司名
-        if "公司" in question or "企业" in question:
+        if any(keyword in question for keyword in COMPANY_KEYWORDS):
             context["has_company"] = True
         
         # 提取行业信息
-        industries = ["互联网", "金融", "教育", "医疗", "房地产", "制造业"]
-        for industry in industries:
+        for industry in INDUSTRIES:
             if industry in question:
                 context["industry"] = industry
                 break
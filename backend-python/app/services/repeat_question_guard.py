@@ -0,0 +1,163 @@
+"""同一用户重复提问检测
+
+易占讲究"初筮告，再三渎，渎则不告"：同一个问题短时间内再问，不重新起卦，
+而是返回上一次的占卜结果（标记为重复提问）。
+
+每个用户最近问过的问题记在 Redis 中，键为 (user_id, 归一化问题的摘要)，
+归一化与问题分析缓存相同（全角半角、标点、"请问/我应该/吗"等不影响判断）。
+值有两种状态：
+- {"pending": token}：正在占卜，用 SET NX 抢占，过期时间为 claim_seconds；
+  起卦期间（可能有多次LLM调用）每 claim_seconds/3 续期一次，占卜进程异常退出时自动释放
+- {"session_id": id}：占卜已完成，在 window_seconds 内命中即返回该会话
+
+两个相同的请求并发到达时只有一个抢占成功并起卦，另一个轮询等待其结果；
+Redis 不可用时不做检测，照常起卦。
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, NamedTuple, Optional
+
+from app.core.cache import RedisCache, get_redis_cache
+from app.core.config import settings
+from app.core.exceptions import ConflictError
+from app.core.logger import get_logger
+from app.utils.text_fingerprint import normalize_question
+
+logger = get_logger(__name__)
+
+
+class RepeatClaim(NamedTuple):
+    """一次检测的结果"""
+    key: str
+    token: Optional[str]        # 抢占成功时的持有者标识，由调用方起卦后 complete/release
+    session_id: Optional[str]   # 窗口内已有的会话，非空表示重复提问
+
+
+class RepeatQuestionGuard:
+    """同一用户重复提问检测"""
+
+    KEY_PREFIX = "repeat_question"
+
+    def __init__(self, cache: RedisCache, window_seconds: int = 86400, claim_seconds: float = 60,
+                 wait_seconds: float = 100.0, poll_interval: float = 0.2):
+        """
+        Args:
+            cache: Redis缓存
+            window_seconds: 重复提问窗口（秒），窗口内同一问题返回上次结果
+            claim_seconds: 起卦中占位的过期时间（秒），起卦期间持续续期
+            wait_seconds: 并发的相同请求等待对方完成的最长时间（秒），应不短于一次起卦的最长耗时
+            poll_interval: 等待时的轮询间隔（秒）
+        """
+        self.cache = cache
+        self.window_seconds = window_seconds
+        self.claim_seconds = claim_seconds
+        self.wait_seconds = wait_seconds
+        self.poll_interval = poll_interval
+
+    @classmethod
+    def make_key(cls, user_id: str, question: str) -> Optional[str]:
+        """
+        生成用户问题键
+
+        Args:
+            user_id: 用户ID
+            question: 问题文本
+
+        Returns:
+            str: 缓存键，问题归一化后为空时返回 None
+        """
+        normalized = normalize_question(question)
+        if not user_id or not normalized:
+            return None
+        digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+        return f"{cls.KEY_PREFIX}:{user_id}:{digest}"
+
+    async def claim(self, user_id: str, question: str) -> Optional[RepeatClaim]:
+        """
+        检测重复提问，不是重复时抢占该问题
+
+        Args:
+            user_id: 用户ID
+            question: 问题文本
+
+        Returns:
+            RepeatClaim：session_id 非空表示窗口内问过，token 非空表示本请求负责起卦；
+            问题为空时返回 None
+
+        Raises:
+            ConflictError: 相同问题正在占卜且等待超时
+        """
+        key = self.make_key(user_id, question)
+        if key is None:
+            return None
+
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            token = uuid.uuid4().hex
+            pending = json.dumps({"pending": token})
+            if await self.cache.acquire_lock(key, pending, int(self.claim_seconds * 1000)):
+                return RepeatClaim(key, token, None)
+
+            value = await self.cache.get(key) or {}
+            if value.get("session_id"):
+                return RepeatClaim(key, None, value["session_id"])
+            if time.monotonic() >= deadline:
+                logger.warning("等待相同问题的占卜结果超时", extra={"user_id": user_id})
+                raise ConflictError(detail="相同的问题正在占卜中，请稍后查看结果")
+            # 对方仍在起卦（或占位刚过期），稍后重试
+            await asyncio.sleep(self.poll_interval)
+
+    @asynccontextmanager
+    async def hold(self, claim: RepeatClaim) -> AsyncIterator[None]:
+        """
+        起卦期间持续续期占位，退出时停止续期（占位由 complete/release 处理）
+
+        Args:
+            claim: claim 返回的抢占结果（token 为空时不续期）
+        """
+        if claim.token is None:
+            yield
+            return
+        pending = json.dumps({"pending": claim.token})
+        async with self.cache.hold_lock(claim.key, pending, int(self.claim_seconds * 1000)):
+            yield
+
+    async def complete(self, claim: RepeatClaim, session_id: str) -> bool:
+        """
+        起卦完成后记录会话，窗口内再问即返回该会话
+
+        Args:
+            claim: claim 返回的抢占结果
+            session_id: 本次占卜的会话ID
+
+        Returns:
+            是否记录成功
+        """
+        return await self.cache.set(claim.key, {"session_id": session_id}, expire=self.window_seconds)
+
+    async def release(self, claim: RepeatClaim) -> bool:
+        """起卦失败时释放占位，让相同的请求重新起卦"""
+        if claim.token is None:
+            return False
+        return await self.cache.release_lock(claim.key, json.dumps({"pending": claim.token}))
+
+    async def forget(self, claim: RepeatClaim) -> bool:
+        """记录的会话已不存在（如被删除）时清除该问题"""
+        return await self.cache.delete(claim.key)
+
+
+async def create_repeat_guard() -> Optional[RepeatQuestionGuard]:
+    """按配置创建检测器（未启用或未启用Redis时返回 None）"""
+    if not settings.REPEAT_QUESTION_ENABLED or not settings.REDIS_ENABLED:
+        return None
+    return RepeatQuestionGuard(
+        await get_redis_cache(),
+        window_seconds=settings.REPEAT_QUESTION_WINDOW_SECONDS,
+        claim_seconds=settings.REPEAT_QUESTION_CLAIM_SECONDS,
+        wait_seconds=settings.REPEAT_QUESTION_WAIT_SECONDS,
+    )
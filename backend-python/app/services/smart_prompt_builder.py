@@ -2,6 +2,8 @@
 
 from typing import Dict, Any, Optional
 from app.services.question_analyzer import QuestionAnalysis
+from app.utils.hexagram_matrix import HexagramMatrix
+from app.utils.najia import NajiaEngine
 
 
 class SmartPromptBuilder:
@@ -90,6 +92,15 @@ class SmartPromptBuilder:
 - 吉凶：{hexagram_info.get('outcome', '平')}
 - 五行：{hexagram_info.get('wuxing', '')}"""
         
+        number = hexagram_info.get('number')
+        if isinstance(number, int) and 1 <= number <= 64:
+            nuclear, inverse, reverse = HexagramMatrix.derived_names(number)
+            info += f"\n- 互卦：{nuclear}，错卦：{inverse}，综卦：{reverse}"
+        
+        najia = NajiaEngine.prompt_section(hexagram_info.get('najia'))
+        if najia:
+            info += "\n" + najia.rstrip("\n")
+        
         # 添加用户档案信息（如果有）
         if profile:
             info += f"""
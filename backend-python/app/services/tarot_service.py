@@ -2,121 +2,134 @@
 
 import hashlib
 import random
-from typing import List, Dict, Any, Tuple
-from app.utils.tarot_data import TAROT_CARDS, get_spread_positions
+import sys
+from functools import lru_cache
+from typing import List, Dict, Any, NamedTuple, Tuple
+from app.core.config import settings
+from app.utils.tarot_data import CARD_COUNT, Spread, SpreadPosition, get_card, get_spread
+
+
+class RenderedCard(NamedTuple):
+    """单张牌在某个位置上的渲染结果"""
+    name: str       # 逆位时带“（逆位）”
+    meaning: str    # 按正逆位取牌义
+    summary: str    # 摘要中的一行
+    detail: str     # 详细解读中的一节
 
 
 class TarotService:
     """塔罗牌服务"""
-    
+
     @staticmethod
-    def draw_cards(session_id: str, spread: str = "single") -> Tuple[List[Dict], List[str]]:
+    def draw_cards(session_id: str, spread: str = "single") -> List[Tuple[int, bool]]:
         """
-        抽牌
-        返回：(抽到的牌列表, 位置列表)
+        抽牌（同一会话ID结果可重现）
+
+        Args:
+            session_id: 会话ID
+            spread: 牌阵
+
+        Returns:
+            List[Tuple[int, bool]]: 按牌阵位置排列的 (牌号, 是否逆位)
         """
-        # 根据牌阵确定抽牌数量和位置
-        positions = get_spread_positions(spread)
-        count = len(positions)
-        
+        count = len(get_spread(spread).positions)
+
         # 使用session_id作为随机种子，确保可重现
         hash_value = int(hashlib.md5(session_id.encode()).hexdigest(), 16)
         rng = random.Random(hash_value)
-        
-        # 随机抽取不重复的牌
-        all_cards = list(TAROT_CARDS)
-        selected_indices = rng.sample(range(len(all_cards)), count)
-        
-        cards = []
-        for idx in selected_indices:
-            card = all_cards[idx].copy()
-            # 50%概率逆位
-            is_reversed = rng.random() < 0.5
-            if is_reversed:
-                card['is_reversed'] = True
-                card['name'] = card['name'] + '（逆位）'
-            else:
-                card['is_reversed'] = False
-            cards.append(card)
-        
-        return cards, positions
-    
+
+        # 随机抽取不重复的牌，每张50%概率逆位
+        selected_indices = rng.sample(range(CARD_COUNT), count)
+        return [(idx, rng.random() < 0.5) for idx in selected_indices]
+
     @staticmethod
     def generate_result(session_id: str, question: str, spread: str = "single") -> Dict[str, Any]:
         """生成完整的塔罗占卜结果"""
-        # 抽牌
-        cards, positions = TarotService.draw_cards(session_id, spread)
-        
-        # 构建摘要
-        summary = TarotService._build_summary(cards, positions)
-        
-        # 构建详细解释
-        detail = TarotService._build_detail(cards, positions, spread)
-        
-        # 转换为响应格式
+        definition = get_spread(spread)
+        draws = TarotService.draw_cards(session_id, definition.key)
+        rendered = [
+            _render_card_cached(number, is_reversed, position)
+            for (number, is_reversed), position in zip(draws, definition.positions)
+        ]
+
         card_list = []
-        for i, card in enumerate(cards):
+        for (number, is_reversed), position, card in zip(draws, definition.positions, rendered):
             card_list.append({
-                'name': card['name'],
-                'name_en': card.get('name_en', ''),
-                'position': positions[i] if i < len(positions) else '当前',
-                'is_reversed': card.get('is_reversed', False),
-                'meaning': card.get('meaning', ''),
+                'name': card.name,
+                'name_en': get_card(number).name_en,
+                'position': position.name,
+                'is_reversed': is_reversed,
+                'meaning': get_card(number).meaning,
             })
-        
+
         return {
             'session_id': session_id,
-            'spread': spread,
+            'spread': definition.key,
             'cards': card_list,
-            'summary': summary,
-            'detail': detail,
+            'summary': TarotService._build_summary(rendered),
+            'detail': TarotService._build_detail(rendered, definition),
         }
-    
+
     @staticmethod
-    def _build_summary(cards: List[Dict], positions: List[str]) -> str:
+    def render_card(number: int, is_reversed: bool, position: SpreadPosition) -> RenderedCard:
+        """
+        渲染单张牌（不经过缓存）
+
+        Args:
+            number: 牌号
+            is_reversed: 是否逆位
+            position: 牌阵位置
+
+        Returns:
+            RenderedCard，文本为驻留字符串
+        """
+        card = get_card(number)
+        name = card.name + '（逆位）' if is_reversed else card.name
+        meaning = card.reversed if is_reversed else card.meaning
+
+        # 摘要截取前50个字符
+        short_meaning = meaning[:50] + "..." if len(meaning) > 50 else meaning
+        summary = f"**{position.name} - {name}**：{short_meaning}\n"
+
+        lines = [
+            f"## {position.name}: {name}\n",
+            f"**位置含义**: {position.meaning}\n",
+            f"**含义**: {meaning}\n",
+        ]
+        if card.description:
+            lines.append(f"**牌面解读**: {card.description}\n")
+
+        return RenderedCard(name, meaning, sys.intern(summary), sys.intern("\n".join(lines)))
+
+    @staticmethod
+    def render_cache_info():
+        """LRU命中统计"""
+        return _render_card_cached.cache_info()
+
+    @staticmethod
+    def _build_summary(cards: List[RenderedCard]) -> str:
         """构建摘要"""
         if not cards:
             return "未能完成占卜，请稍后再试。"
-        
+
         lines = ["根据您抽出的牌面：\n"]
-        for i, card in enumerate(cards):
-            pos = positions[i] if i < len(positions) else "当前"
-            meaning = card.get('meaning', '')
-            if card.get('is_reversed'):
-                meaning = card.get('reversed', meaning)
-            
-            # 截取前50个字符
-            short_meaning = meaning[:50] + "..." if len(meaning) > 50 else meaning
-            lines.append(f"**{pos} - {card['name']}**：{short_meaning}\n")
-        
+        lines.extend(card.summary for card in cards)
         lines.append("\n建议您保持开放的心态，结合牌面的指引，相信自己的直觉做出决定。")
         return "\n".join(lines)
-    
+
     @staticmethod
-    def _build_detail(cards: List[Dict], positions: List[str], spread: str) -> str:
+    def _build_detail(cards: List[RenderedCard], spread: Spread) -> str:
         """构建详细解释"""
         lines = ["# 塔罗牌占卜解读\n"]
-        
-        spread_names = {
-            'single': '单张牌',
-            'three': '三张牌阵（过去/现在/未来）',
-            'cross': '十字牌阵',
-        }
-        lines.append(f"**牌阵类型**：{spread_names.get(spread, '单张牌')}\n")
-        
-        for i, card in enumerate(cards):
-            pos = positions[i] if i < len(positions) else "当前"
-            lines.append(f"## {pos}: {card['name']}\n")
-            
-            meaning = card.get('meaning', '')
-            if card.get('is_reversed'):
-                meaning = card.get('reversed', meaning)
-            
-            lines.append(f"**含义**: {meaning}\n")
-        
+        lines.append(f"**牌阵类型**：{spread.name}\n")
+        lines.extend(card.detail for card in cards)
+
         lines.append("## 综合建议\n")
         lines.append("请结合每张牌的含义，思考它们与您问题的关联。")
         lines.append("塔罗牌为您提供了一个视角，但最终的决定权在您手中。")
         lines.append("相信您的直觉会指引您找到答案。")
-        
+
         return "\n".join(lines)
+
+
+_render_card_cached = lru_cache(maxsize=settings.TAROT_RENDER_CACHE_SIZE)(TarotService.render_card)
@@ -1,42 +1,126 @@
 """时间转换服务"""
 
-from datetime import datetime
-from typing import Dict, Any
-from app.utils.calendar import CalendarConverter
+from datetime import datetime, date, timedelta
+from typing import Dict, Any, List, Optional
+from app.utils.calendar import CalendarConverter, LunarTable
+from app.services.almanac_service import AlmanacService, AlmanacDay
+from app.services.cached_divination_service import CacheStrategy
 
 
 class TimeConvertService:
     """时间转换服务"""
     
-    def __init__(self):
+    # 月视图固定6行7列
+    GRID_DAYS = 42
+    
+    def __init__(self, cache_manager=None):
         self.converter = CalendarConverter()
+        self.cache_manager = cache_manager
     
     def solar_to_lunar(self, year: int, month: int, day: int) -> Dict[str, Any]:
         """公历转农历"""
-        return self.converter.solar_to_lunar(year, month, day)
+        return AlmanacService.get_day(date(year, month, day)).to_dict()
     
     def lunar_to_solar(self, year: int, month: int, day: int, is_leap_month: bool = False) -> Dict[str, Any]:
         """农历转公历"""
-        return self.converter.lunar_to_solar(year, month, day, is_leap_month)
+        solar_date = self.converter.lunar_to_solar_date(year, month, day, is_leap_month)
+        return AlmanacService.get_day(solar_date).to_dict()
+    
+    def convert_range(self, start: date, end: date) -> List[Dict[str, Any]]:
+        """
+        批量公历转农历
+        
+        Args:
+            start: 开始日期
+            end: 结束日期（包含）
+        
+        Returns:
+            List[Dict]: 每天一条转换结果
+        """
+        return self.converter.solar_to_lunar_range(start, end)
+    
+    def get_month_grid(self, year: int, month: int, week_start: int = 0) -> Dict[str, Any]:
+        """
+        获取月视图（6周42天，包含前后月补齐的日期）
+        
+        Args:
+            year: 公历年
+            month: 公历月
+            week_start: 每周第一天（0=周一 ... 6=周日）
+        
+        Returns:
+            Dict: 月视图数据，days 为42天的转换结果（超出支持范围的补齐日期被截去）
+        """
+        first = date(year, month, 1)
+        start = first - timedelta(days=(first.weekday() - week_start) % 7)
+        end = start + timedelta(days=self.GRID_DAYS - 1)
+        
+        start = max(start, LunarTable.BASE_DATE)
+        end = min(end, LunarTable.MAX_DATE)
+        
+        return {
+            "year": year,
+            "month": month,
+            "week_start": week_start,
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "days": self.convert_range(start, end),
+        }
+    
+    async def get_month_grid_cached(self, year: int, month: int, week_start: int = 0) -> Dict[str, Any]:
+        """
+        获取月视图（带缓存，按年月缓存；is_today 在读取后按当天重新标记）
+        
+        Args:
+            year: 公历年
+            month: 公历月
+            week_start: 每周第一天（0=周一 ... 6=周日）
+        
+        Returns:
+            Dict: 月视图数据
+        """
+        if not self.cache_manager:
+            return self.get_month_grid(year, month, week_start)
+        
+        grid = await self.cache_manager.get_or_set(
+            key=CacheStrategy.get_calendar_month_key(year, month, week_start),
+            fetch_func=lambda: self.get_month_grid(year, month, week_start),
+            expire=CacheStrategy.TTL_CALENDAR_MONTH
+        )
+        self.mark_today(grid["days"])
+        return grid
+    
+    @staticmethod
+    def mark_today(days: List[Dict[str, Any]], today: Optional[date] = None):
+        """
+        重新标记 is_today（缓存结果跨天后仍然正确）
+        
+        Args:
+            days: 转换结果列表
+            today: 当天日期，默认取系统日期
+        """
+        today = today or date.today()
+        for item in days:
+            item["is_today"] = (
+                item["solar_day"] == today.day
+                and item["solar_month"] == today.month
+                and item["solar_year"] == today.year
+            )
+    
+    def get_almanac(self, day: date) -> AlmanacDay:
+        """获取指定日期的历法信息（进程内缓存）"""
+        if isinstance(day, datetime):
+            day = day.date()
+        return AlmanacService.get_day(day)
     
     def get_daily_info(self, date: datetime) -> Dict[str, Any]:
         """获取指定日期的详细信息（包含农历、节气、节日等）"""
-        return self.solar_to_lunar(date.year, date.month, date.day)
+        return self.get_almanac(date).to_dict()
     
     def get_solar_term(self, date: datetime) -> str:
         """获取指定日期的节气"""
-        info = self.get_daily_info(date)
-        return info.get("term", "")
+        return self.get_almanac(date).term
     
     def get_festivals(self, date: datetime) -> list:
         """获取指定日期的节日列表（公历和农历）"""
-        info = self.get_daily_info(date)
-        festivals = []
-        
-        if info.get("festival"):
-            festivals.append(info["festival"])
-        
-        if info.get("lunar_festival"):
-            festivals.append(info["lunar_festival"])
-        
-        return festivals
+        return self.get_almanac(date).festivals
@@ -5,9 +5,13 @@ from typing import Optional, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models.user_profile import UserProfile
+from app.repositories.user_profile_repository import UserProfileRepository
 from app.schemas.user_profile import UserProfileCreate, UserProfileUpdate
-from app.services.time_convert_service import TimeConvertService
 from app.core.exceptions import NotFoundError, BadRequestError
+from app.core.logger import get_logger
+from app.utils.bazi import BaziCalculator
+
+logger = get_logger(__name__)
 
 
 class UserProfileService:
@@ -15,7 +19,6 @@ class UserProfileService:
     
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.time_service = TimeConvertService()
     
     async def get_profile(self, user_id: int) -> Optional[UserProfile]:
         """获取用户档案"""
@@ -78,9 +81,9 @@ class UserProfileService:
             if value is not None:
                 setattr(profile, field, value)
         
-        # 如果生日更新，重新计算命理信息
-        if 'birth_date' in update_data and update_data['birth_date']:
-            self._calculate_destiny_info(profile, update_data['birth_date'])
+        # 如果生日或出生时间更新，重新计算命理信息
+        if profile.birth_date and (update_data.get('birth_date') or update_data.get('birth_time') is not None):
+            self._calculate_destiny_info(profile, profile.birth_date)
         
         await self.db.flush()
         await self.db.refresh(profile)
@@ -99,56 +102,44 @@ class UserProfileService:
     
     def _calculate_destiny_info(self, profile: UserProfile, birth_date: date):
         """计算命理信息"""
-        # 转换为农历 - 修复：传入year, month, day三个参数
-        lunar_info = self.time_service.solar_to_lunar(birth_date.year, birth_date.month, birth_date.day)
-        
-        # 设置农历生日
-        profile.lunar_birth = f"{lunar_info['lunar_year']}年{lunar_info['lunar_month_cn']}{lunar_info['lunar_day_cn']}"
-        
-        # 设置生肖
-        profile.animal = lunar_info['animal']
-        
-        # 设置星座
-        profile.zodiac_sign = lunar_info['astro']
+        try:
+            info = BaziCalculator.destiny_info(birth_date, profile.birth_time)
+        except ValueError as e:
+            raise BadRequestError(f"出生日期超出支持范围: {e}")
         
-        # 计算八字（简化版）
-        profile.bazi = self._calculate_bazi(birth_date, profile.birth_time)
+        for field, value in info.items():
+            setattr(profile, field, value)
     
-    def _calculate_bazi(self, birth_date: date, birth_time: str) -> str:
-        """计算八字（简化版）"""
-        # 天干地支
-        tian_gan = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']
-        di_zhi = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥']
-        
-        # 年柱（简化算法）
-        year_offset = (birth_date.year - 1864) % 60
-        year_gan = tian_gan[year_offset % 10]
-        year_zhi = di_zhi[year_offset % 12]
-        
-        # 月柱（简化算法）
-        month_offset = (birth_date.month - 1 + year_offset * 2) % 60
-        month_gan = tian_gan[month_offset % 10]
-        month_zhi = di_zhi[(birth_date.month + 1) % 12]
-        
-        # 日柱（简化算法）
-        day_offset = (birth_date.toordinal() - date(1900, 1, 1).toordinal()) % 60
-        day_gan = tian_gan[day_offset % 10]
-        day_zhi = di_zhi[day_offset % 12]
-        
-        # 时柱（简化算法）
-        if birth_time:
-            try:
-                hour = int(birth_time.split(':')[0])
-                hour_zhi_index = (hour + 1) // 2 % 12
-                hour_zhi = di_zhi[hour_zhi_index]
-                hour_gan_offset = (day_offset * 2 + hour_zhi_index) % 10
-                hour_gan = tian_gan[hour_gan_offset]
-                
-                return f"{year_gan}{year_zhi} {month_gan}{month_zhi} {day_gan}{day_zhi} {hour_gan}{hour_zhi}"
-            except:
-                pass
-        
-        return f"{year_gan}{year_zhi} {month_gan}{month_zhi} {day_gan}{day_zhi}"
+    async def recompute_destiny_all(self, chunk_size: int = 1000) -> Dict[str, int]:
+        """
+        重新计算所有档案的命理信息（迁移任务）
+        
+        按主键分块读取 (id, birth_date, birth_time)，批量计算后以一次 executemany 写回，
+        每块提交一次，不逐行加载ORM对象。
+        
+        Args:
+            chunk_size: 每块行数
+        
+        Returns:
+            Dict: updated（更新行数）/ skipped（超出历法表范围的行数）
+        """
+        repo = UserProfileRepository(self.db)
+        updated = skipped = 0
+        
+        async for rows in repo.iter_birth_chunks(chunk_size):
+            infos = BaziCalculator.destiny_info_many([(row.birth_date, row.birth_time) for row in rows])
+            values = []
+            for row, info in zip(rows, infos):
+                if info is None:
+                    skipped += 1
+                    continue
+                values.append({"id": row.id, **info})
+            
+            updated += await repo.bulk_update(values)
+            await self.db.commit()
+            logger.info("命理信息重算进度", extra={"updated": updated, "skipped": skipped})
+        
+        return {"updated": updated, "skipped": skipped}
     
     async def get_profile_summary(self, user_id: int) -> Dict[str, Any]:
         """获取用户档案摘要（用于运势生成）"""
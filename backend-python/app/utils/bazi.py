@@ -0,0 +1,139 @@
+"""八字（四柱）排盘
+
+基于预计算的历法表：
+- 年柱：以立春交节时刻为界
+- 月柱：以十二节交节时刻为界
+- 日柱：六十甲子循环，子初（23:00）换日
+- 时柱：由日干推时干（甲己还加甲……）
+
+未提供出生时间时，年柱、月柱按“交节当日起算”处理，且不排时柱。
+输入时间均视为北京时间。
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Optional, List, Tuple, Dict, Any
+from app.utils.calendar import CalendarConverter, LunarTable, SolarTermTable
+from app.utils.calendar_constants import JIAZI, CHINESE_ZODIAC
+
+# 时支 -> 时柱起点：日干序号 % 5 * 12（甲己日起甲子时，乙庚日起丙子时……）
+_HOUR_START = [day_gan * 12 for day_gan in range(5)]
+
+
+@dataclass(frozen=True)
+class Bazi:
+    """四柱（六十甲子序号，时柱可能缺失）"""
+    year: int
+    month: int
+    day: int
+    hour: Optional[int] = None
+
+    def __str__(self) -> str:
+        pillars = [JIAZI[self.year], JIAZI[self.month], JIAZI[self.day]]
+        if self.hour is not None:
+            pillars.append(JIAZI[self.hour])
+        return " ".join(pillars)
+
+
+class BaziCalculator:
+    """八字计算器"""
+
+    @staticmethod
+    def parse_time(birth_time: Optional[str]) -> Optional[time]:
+        """
+        解析出生时间
+
+        Args:
+            birth_time: "HH:MM" 或 "HH"
+
+        Returns:
+            time，无法解析时返回None
+        """
+        if not birth_time:
+            return None
+        try:
+            parts = birth_time.strip().split(":")
+            hour = int(parts[0])
+            minute = int(parts[1]) if len(parts) > 1 and parts[1] else 0
+            return time(hour, minute)
+        except (ValueError, IndexError):
+            return None
+
+    @staticmethod
+    def calculate(birth_date: date, birth_time: Optional[time] = None) -> Bazi:
+        """
+        排四柱
+
+        Args:
+            birth_date: 公历出生日期
+            birth_time: 出生时间（北京时间），未知时为None
+
+        Returns:
+            Bazi
+        """
+        if birth_time is None:
+            term_index = SolarTermTable.latest_index_on(birth_date)
+            return Bazi(
+                year=SolarTermTable.year_index_of(term_index),
+                month=SolarTermTable.month_index_of(term_index),
+                day=CalendarConverter.day_ganzhi_index(birth_date),
+            )
+
+        term_index = SolarTermTable.latest_index(datetime.combine(birth_date, birth_time))
+
+        # 子初换日：23点后的日柱属于次日
+        day_of_pillar = birth_date + timedelta(days=1) if birth_time.hour >= 23 else birth_date
+        day = CalendarConverter.day_ganzhi_index(day_of_pillar)
+        hour_zhi = (birth_time.hour + 1) // 2 % 12
+
+        return Bazi(
+            year=SolarTermTable.year_index_of(term_index),
+            month=SolarTermTable.month_index_of(term_index),
+            day=day,
+            hour=(_HOUR_START[day % 5] + hour_zhi) % 60,
+        )
+
+    @staticmethod
+    def destiny_info(birth_date: date, birth_time: Optional[str] = None) -> Dict[str, Any]:
+        """
+        计算档案中的命理字段
+
+        Args:
+            birth_date: 公历出生日期
+            birth_time: 出生时间字符串 "HH:MM"
+
+        Returns:
+            Dict: lunar_birth / animal / zodiac_sign / bazi
+        """
+        lunar_year, lunar_month, lunar_day, is_leap = LunarTable.lookup(birth_date)
+        lunar_month_cn = CalendarConverter.to_china_month(lunar_month)
+        if is_leap:
+            lunar_month_cn = "闰" + lunar_month_cn
+
+        bazi = BaziCalculator.calculate(birth_date, BaziCalculator.parse_time(birth_time))
+
+        return {
+            "lunar_birth": f"{lunar_year}年{lunar_month_cn}{CalendarConverter.to_china_day(lunar_day)}",
+            "animal": CHINESE_ZODIAC[(lunar_year - 4) % 12],
+            "zodiac_sign": CalendarConverter.to_astro(birth_date.month, birth_date.day),
+            "bazi": str(bazi),
+        }
+
+    @staticmethod
+    def destiny_info_many(births: List[Tuple[date, Optional[str]]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        批量计算命理字段（每条均为查表与二分查找，无逐条换算循环）
+
+        Args:
+            births: [(出生日期, 出生时间字符串)]
+
+        Returns:
+            List[Dict]: 与输入顺序一致，超出历法表范围的为None
+        """
+        results = []
+        for birth_date, birth_time in births:
+            try:
+                results.append(BaziCalculator.destiny_info(birth_date, birth_time))
+            except ValueError:
+                results.append(None)
+        return results
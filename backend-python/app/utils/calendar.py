@@ -1,13 +1,21 @@
 """农历转换工具"""
 
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, date, timedelta
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+import numpy as np
 from app.utils.calendar_constants import (
     LUNAR_INFO, SOLAR_MONTH, GAN, ZHI, CHINESE_ZODIAC,
-    NSTR1, NSTR2, NSTR3, SOLAR_TERM, FESTIVAL, LUNAR_FESTIVAL
+    NSTR1, NSTR2, NSTR3, SOLAR_TERM, FESTIVAL, LUNAR_FESTIVAL, JIAZI
 )
 
 
+_DATE_1900 = date(1900, 1, 1)
+
+
 class CalendarConverter:
     """农历转换器"""
     
@@ -15,9 +23,11 @@ class CalendarConverter:
     def l_year_days(year: int) -> int:
         """返回农历year年一整年的总天数"""
         sum_days = 348
-        for i in range(0x8000, 0x8, -1):
+        i = 0x8000
+        while i > 0x8:
             if LUNAR_INFO[year - 1900] & i:
                 sum_days += 1
+            i >>= 1
         return sum_days + CalendarConverter.leap_days(year)
     
     @staticmethod
@@ -70,6 +80,11 @@ class CalendarConverter:
         """传入offset偏移量返回干支"""
         return GAN[offset % 10] + ZHI[offset % 12]
     
+    @staticmethod
+    def day_ganzhi_index(day: date) -> int:
+        """日柱在六十甲子中的序号（1900年1月1日甲戌为10）"""
+        return ((day - _DATE_1900).days + 10) % 60
+    
     @staticmethod
     def to_china_month(month: int) -> str:
         """传入农历数字月份返回汉语表示"""
@@ -121,29 +136,18 @@ class CalendarConverter:
     def solar_to_lunar(year: int, month: int, day: int) -> Dict[str, Any]:
         """公历转农历"""
         # 参数验证
-        if year < 1900 or year > 3000:
-            raise ValueError("年份超出支持范围（1900-3000）")
+        if year < 1900 or year > LunarTable.MAX_SOLAR_YEAR:
+            raise ValueError(f"年份超出支持范围（1900-{LunarTable.MAX_SOLAR_YEAR}）")
         if year == 1900 and month == 1 and day < 31:
             raise ValueError("日期超出支持范围（最早1900年1月31日）")
         
         # 创建日期对象
         obj_date = datetime(year, month, day)
+        if obj_date.date() > LunarTable.MAX_DATE:
+            raise ValueError(f"日期超出支持范围（最晚{LunarTable.MAX_DATE.isoformat()}）")
         
-        # 计算与1900年1月31日的天数差
-        base_date = datetime(1900, 1, 31)
-        offset = (obj_date - base_date).days
-        
-        # 计算农历年
-        i = 1900
-        temp = 0
-        while i < 2101 and offset > 0:
-            temp = CalendarConverter.l_year_days(i)
-            offset -= temp
-            i += 1
-        
-        if offset < 0:
-            offset += temp
-            i -= 1
+        # 查表得到农历年月日
+        lunar_year, lunar_month, lunar_day, is_leap = LunarTable.lookup(obj_date.date())
         
         # 判断是否是今天
         now = datetime.now()
@@ -157,55 +161,17 @@ class CalendarConverter:
         if weekday == 0:
             weekday = 7
         
-        # 农历年
-        lunar_year = i
-        leap = CalendarConverter.leap_month(i)
-        is_leap = False
-        
-        # 计算农历月
-        i = 1
-        while i < 13 and offset > 0:
-            # 闰月
-            if leap > 0 and i == (leap + 1) and not is_leap:
-                i -= 1
-                is_leap = True
-                temp = CalendarConverter.leap_days(lunar_year)
-            else:
-                temp = CalendarConverter.month_days(lunar_year, i)
-            
-            # 解除闰月
-            if is_leap and i == (leap + 1):
-                is_leap = False
-            
-            offset -= temp
-            i += 1
-        
-        # 闰月导致数组下标重叠取反
-        if offset == 0 and leap > 0 and i == leap + 1:
-            if is_leap:
-                is_leap = False
-            else:
-                is_leap = True
-                i -= 1
-        
-        if offset < 0:
-            offset += temp
-            i -= 1
-        
-        lunar_month = i
-        lunar_day = offset + 1
-        
         # 天干地支处理
         gz_year = CalendarConverter.to_ganzhi_year(lunar_year)
         
-        # 依据12节气修正干支月（简化处理）
-        gz_month = CalendarConverter.to_ganzhi((year - 1900) * 12 + month + 11)
+        # 月柱以节（立春、惊蛰……）为界，交节当日起算新月
+        gz_month = JIAZI[SolarTermTable.month_ganzhi_index(obj_date.date())]
         
-        # 日柱
-        day_base = datetime(year, month, 1)
-        base_1900 = datetime(1900, 1, 1)
-        day_cyclical = (day_base - base_1900).days + 25567 + 10
-        gz_day = CalendarConverter.to_ganzhi(day_cyclical + day - 1)
+        # 节气
+        term = SolarTermTable.term_on(obj_date.date())
+        
+        # 日柱（1900年1月1日为甲戌日）
+        gz_day = JIAZI[CalendarConverter.day_ganzhi_index(obj_date.date())]
         
         # 星座
         astro = CalendarConverter.to_astro(month, day)
@@ -242,19 +208,127 @@ class CalendarConverter:
             "weekday": weekday,
             "weekday_cn": weekday_cn,
             "astro": astro,
-            "term": "",  # 节气需要更复杂的计算
-            "is_term": False,
+            "term": term,
+            "is_term": bool(term),
             "festival": festival_title,
             "lunar_festival": lunar_festival_title,
             "is_today": is_today,
         }
     
+    @staticmethod
+    def solar_to_lunar_range(start: date, end: date) -> List[Dict[str, Any]]:
+        """
+        批量公历转农历（闭区间，NumPy按列计算，结果与逐日 solar_to_lunar 一致）
+        
+        Args:
+            start: 开始日期
+            end: 结束日期
+        
+        Returns:
+            List[Dict]: 每天一条，字段同 solar_to_lunar
+        """
+        if end < start:
+            raise ValueError("结束日期不能早于开始日期")
+        if start < LunarTable.BASE_DATE or end > LunarTable.MAX_DATE:
+            raise ValueError(f"日期超出支持范围（1900-01-31至{LunarTable.MAX_DATE.isoformat()}）")
+        
+        first = (start - LunarTable.BASE_DATE).days
+        count = (end - start).days + 1
+        packed = LunarTable.as_numpy()[first:first + count].astype(np.int64)
+        
+        # 农历
+        lunar_year = (packed >> 11) + 1900
+        lunar_month = (packed >> 6) & 0xf
+        lunar_day = packed & 0x1f
+        is_leap = (packed & 0x20) != 0
+        
+        # 公历
+        dates = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+        epoch_days = dates.astype(np.int64)
+        solar_year = dates.astype("datetime64[Y]").astype(np.int64) + 1970
+        month_index = dates.astype("datetime64[M]").astype(np.int64)
+        solar_month = month_index % 12 + 1
+        solar_day = epoch_days - month_index.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64) + 1
+        py_weekday = (epoch_days + 3) % 7  # 1970-01-01 为星期四
+        
+        # 天干地支（与 solar_to_lunar 中的偏移公式一致）
+        gz_year = (lunar_year - 4) % 60
+        gz_day = (epoch_days + _EPOCH_DAYS_FROM_1900 + 10) % 60
+        
+        # 节气与月柱：在节气日表上二分查找
+        term_days = SolarTermTable.days_numpy()
+        day_numbers = epoch_days + _EPOCH_DAYS_FROM_1900
+        term_index = np.searchsorted(term_days, day_numbers, side="right") - 1
+        gz_month = (term_index // 2 + 13) % 60
+        on_term = term_days[np.maximum(term_index, 0)] == day_numbers
+        term = _TERM_NAMES[np.where(on_term, term_index % 24, 24)]
+        
+        # 星座
+        astro = solar_month - (solar_day < _ASTRO_BOUNDARY[solar_month - 1])
+        
+        # 节日：农历12月小月则29号为除夕
+        lunar_festival_day = lunar_day.copy()
+        small_last_month = (lunar_month == 12) & (lunar_day == 29) & (
+            (_LUNAR_INFO[lunar_year - 1900] & (0x10000 >> 12)) == 0
+        )
+        lunar_festival_day[small_last_month] = 30
+        festival = _FESTIVAL_TABLE[solar_month * 32 + solar_day]
+        lunar_festival = _LUNAR_FESTIVAL_TABLE[lunar_month * 32 + lunar_festival_day]
+        
+        today = (date.today() - start).days
+        columns = zip(
+            solar_year.tolist(), solar_month.tolist(), solar_day.tolist(),
+            lunar_year.tolist(), lunar_month.tolist(), lunar_day.tolist(), is_leap.tolist(),
+            gz_year.tolist(), gz_month.tolist(), gz_day.tolist(),
+            py_weekday.tolist(), astro.tolist(), festival.tolist(), lunar_festival.tolist(),
+            term.tolist(),
+        )
+        
+        results = []
+        for index, (sy, sm, sd, ly, lm, ld, leap, gy, gm, gd, wd, ast, fest, lfest, tm) in enumerate(columns):
+            results.append({
+                "solar_year": sy,
+                "solar_month": sm,
+                "solar_day": sd,
+                "lunar_year": ly,
+                "lunar_month": lm,
+                "lunar_day": ld,
+                "is_leap": leap,
+                "lunar_month_cn": ("闰" if leap else "") + _LUNAR_MONTH_CN[lm],
+                "lunar_day_cn": _LUNAR_DAY_CN[ld],
+                "ganzhi_year": JIAZI[gy],
+                "ganzhi_month": JIAZI[gm],
+                "ganzhi_day": JIAZI[gd],
+                "animal": CHINESE_ZODIAC[(ly - 4) % 12],
+                "weekday": wd + 1,
+                "weekday_cn": _WEEKDAY_CN[wd],
+                "astro": _ASTRO_NAMES[ast],
+                "term": tm,
+                "is_term": bool(tm),
+                "festival": fest,
+                "lunar_festival": lfest,
+                "is_today": index == today,
+            })
+        return results
+    
     @staticmethod
     def lunar_to_solar(year: int, month: int, day: int, is_leap_month: bool = False) -> Dict[str, Any]:
         """农历转公历"""
+        target_date = CalendarConverter.lunar_to_solar_date(year, month, day, is_leap_month)
+        
+        # 使用 solar_to_lunar 获取完整信息
+        return CalendarConverter.solar_to_lunar(
+            target_date.year,
+            target_date.month,
+            target_date.day
+        )
+    
+    @staticmethod
+    def lunar_to_solar_date(year: int, month: int, day: int, is_leap_month: bool = False) -> date:
+        """农历转公历日期（只做校验与查表）"""
         # 参数验证
-        if year < 1900 or year > 3000:
-            raise ValueError("年份超出支持范围（1900-3000）")
+        if year < 1900 or year > LunarTable.MAX_LUNAR_YEAR:
+            raise ValueError(f"年份超出支持范围（1900-{LunarTable.MAX_LUNAR_YEAR}）")
         
         leap_month_num = CalendarConverter.leap_month(year)
         if is_leap_month and leap_month_num != month:
@@ -267,32 +341,281 @@ class CalendarConverter:
         if day > day_count:
             raise ValueError(f"日期超出该月范围（最大{day_count}天）")
         
-        # 计算农历的时间差
-        offset = 0
-        for i in range(1900, year):
-            offset += CalendarConverter.l_year_days(i)
-        
-        # 在循环外计算闰月信息，提高效率
-        leap = CalendarConverter.leap_month(year)
-        is_add = False
-        for i in range(1, month):
-            # 处理闰月
-            if not is_add and leap > 0 and leap <= i:
-                offset += CalendarConverter.leap_days(year)
-                is_add = True
-            offset += CalendarConverter.month_days(year, i)
-        
-        # 转换闰月农历 需补充该年闰月的前一个月的时差
-        if is_leap_month:
-            offset += CalendarConverter.month_days(year, month)
-        
-        # 1900年农历正月一日的公历时间为1900年1月31日
-        base_date = datetime(1900, 1, 31)
-        target_date = base_date + timedelta(days=offset + day - 1)
-        
-        # 使用 solar_to_lunar 获取完整信息
-        return CalendarConverter.solar_to_lunar(
-            target_date.year,
-            target_date.month,
-            target_date.day
-        )
+        # 查表得到该农历月首日，再加日数
+        return LunarTable.month_start(year, month, is_leap_month) + timedelta(days=day - 1)
+
+
+class LunarTable:
+    """按日索引的农历预计算表
+
+    从1900年1月31日（农历1900年正月初一）起，每天一个uint32：
+    (农历年-1900) << 11 | 月 << 6 | 闰月标记 << 5 | 日
+    公历→农历、农历→公历均为一次下标计算，导入时构建一次（约7.4万项，约290KB）。
+    """
+
+    BASE_DATE = date(1900, 1, 31)
+    MAX_LUNAR_YEAR = 1900 + len(LUNAR_INFO) - 1
+    # 表中最后一天（农历最后一年的除夕，落在次年初）与其公历年份，build 时确定
+    MAX_DATE: date = BASE_DATE
+    MAX_SOLAR_YEAR = MAX_LUNAR_YEAR + 1
+
+    _days: array = array("I")
+    # 月首偏移：下标 (年-1900) * 26 + (月-1) * 2 + 闰月标记，不存在的月份为 -1
+    _month_starts: array = array("i")
+    _days_np: Optional[np.ndarray] = None
+
+    @staticmethod
+    def pack(lunar_year: int, lunar_month: int, lunar_day: int, is_leap: bool) -> int:
+        """打包农历日期"""
+        return (lunar_year - 1900) << 11 | lunar_month << 6 | int(is_leap) << 5 | lunar_day
+
+    @staticmethod
+    def unpack(value: int) -> Tuple[int, int, int, bool]:
+        """解包农历日期，返回 (年, 月, 日, 是否闰月)"""
+        return (value >> 11) + 1900, (value >> 6) & 0xf, value & 0x1f, bool(value & 0x20)
+
+    @classmethod
+    def build(cls):
+        """由 LUNAR_INFO 构建按日表与月首偏移表"""
+        days = array("I")
+        month_starts = array("i", [-1]) * (len(LUNAR_INFO) * 26)
+
+        for year in range(1900, cls.MAX_LUNAR_YEAR + 1):
+            leap = CalendarConverter.leap_month(year)
+            for month in range(1, 13):
+                months = [(False, CalendarConverter.month_days(year, month))]
+                if month == leap:
+                    months.append((True, CalendarConverter.leap_days(year)))
+                for is_leap, count in months:
+                    month_starts[(year - 1900) * 26 + (month - 1) * 2 + is_leap] = len(days)
+                    first = cls.pack(year, month, 1, is_leap)
+                    days.extend(range(first, first + count))
+
+        cls._days = days
+        cls._month_starts = month_starts
+        cls._days_np = None
+        cls.MAX_DATE = cls.BASE_DATE + timedelta(days=len(days) - 1)
+        cls.MAX_SOLAR_YEAR = cls.MAX_DATE.year
+
+    @classmethod
+    def as_numpy(cls) -> np.ndarray:
+        """按日表的NumPy只读视图（与array共享内存，不复制）"""
+        if cls._days_np is None:
+            view = np.frombuffer(cls._days, dtype=np.uint32)
+            view.flags.writeable = False
+            cls._days_np = view
+        return cls._days_np
+
+    @classmethod
+    def lookup(cls, solar_date: date) -> Tuple[int, int, int, bool]:
+        """
+        公历日期查农历
+
+        Args:
+            solar_date: 公历日期
+
+        Returns:
+            (农历年, 农历月, 农历日, 是否闰月)
+        """
+        offset = (solar_date - cls.BASE_DATE).days
+        if offset < 0 or offset >= len(cls._days):
+            raise ValueError("日期超出支持范围")
+        return cls.unpack(cls._days[offset])
+
+    @classmethod
+    def month_start(cls, lunar_year: int, lunar_month: int, is_leap: bool = False) -> date:
+        """
+        农历月首日对应的公历日期
+
+        Args:
+            lunar_year: 农历年
+            lunar_month: 农历月
+            is_leap: 是否闰月
+
+        Returns:
+            公历日期
+        """
+        if lunar_year < 1900 or lunar_year > cls.MAX_LUNAR_YEAR or not 1 <= lunar_month <= 12:
+            raise ValueError("日期超出支持范围")
+        offset = cls._month_starts[(lunar_year - 1900) * 26 + (lunar_month - 1) * 2 + int(is_leap)]
+        if offset < 0:
+            raise ValueError(f"该年没有闰{lunar_month}月")
+        return cls.BASE_DATE + timedelta(days=offset)
+
+
+LunarTable.build()
+
+
+class SolarTermTable:
+    """二十四节气时刻表
+
+    数据由 scripts/generate_solar_terms.py 按天文算法离线生成，随代码发布：
+    1900-2101 年每年 24 项（小寒起），小端 uint32，值为自 1900-01-01 00:00（北京时间）起的分钟数。
+    时刻单调递增，查询均为二分查找。
+    """
+
+    DATA_FILE = Path(__file__).resolve().parent / "data" / "solar_terms.bin"
+    BASE = datetime(1900, 1, 1)
+    BASE_DATE = BASE.date()
+    FIRST_YEAR = 1900
+
+    _minutes: array = array("I")
+    # 节气所在日（自 BASE_DATE 起的天数），与 _minutes 一一对应
+    _days: array = array("I")
+    _days_np: Optional[np.ndarray] = None
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None):
+        """加载节气时刻表"""
+        minutes = array("I")
+        minutes.frombytes((path or cls.DATA_FILE).read_bytes())
+        if sys.byteorder != "little":
+            minutes.byteswap()
+        cls._minutes = minutes
+        cls._days = array("I", (m // 1440 for m in minutes))
+        cls._days_np = None
+
+    @classmethod
+    def last_year(cls) -> int:
+        """表中最后一年"""
+        return cls.FIRST_YEAR + len(cls._minutes) // 24 - 1
+
+    @classmethod
+    def term_datetime(cls, year: int, index: int) -> datetime:
+        """
+        节气时刻
+
+        Args:
+            year: 公历年
+            index: 节气序号（0=小寒 ... 23=冬至）
+
+        Returns:
+            交节时刻（北京时间）
+        """
+        if year < cls.FIRST_YEAR or year > cls.last_year() or not 0 <= index < 24:
+            raise ValueError("节气超出支持范围")
+        return cls.BASE + timedelta(minutes=cls._minutes[(year - cls.FIRST_YEAR) * 24 + index])
+
+    @classmethod
+    def term_on(cls, day: date) -> str:
+        """
+        当天交节的节气名
+
+        Args:
+            day: 公历日期
+
+        Returns:
+            节气名，当天不交节时返回空字符串
+        """
+        day_number = (day - cls.BASE_DATE).days
+        index = bisect_left(cls._days, day_number)
+        if index < len(cls._days) and cls._days[index] == day_number:
+            return SOLAR_TERM[index % 24]
+        return ""
+
+    @classmethod
+    def latest_index(cls, moment: datetime) -> int:
+        """
+        不晚于指定时刻的最近一个节气在表中的下标
+
+        Args:
+            moment: 北京时间
+
+        Returns:
+            下标（年序 * 24 + 节气序号），早于表中第一个节气时返回 -1
+        """
+        minute = (moment - cls.BASE) // timedelta(minutes=1)
+        return bisect_right(cls._minutes, minute) - 1
+
+    @classmethod
+    def latest_index_on(cls, day: date) -> int:
+        """
+        不晚于指定日期（含当天交节）的最近一个节气在表中的下标
+
+        Args:
+            day: 公历日期
+
+        Returns:
+            下标（年序 * 24 + 节气序号），早于表中第一个节气时返回 -1
+        """
+        return bisect_right(cls._days, (day - cls.BASE_DATE).days) - 1
+
+    @staticmethod
+    def month_index_of(term_index: int) -> int:
+        """
+        由节气下标求月柱在六十甲子中的序号（中气不换月）
+
+        Args:
+            term_index: latest_index / latest_index_on 的结果
+
+        Returns:
+            0-59
+        """
+        # 下标 0 为1900年小寒（丁丑月），其前为丙子月
+        return (term_index // 2 + 13) % 60
+
+    @staticmethod
+    def year_index_of(term_index: int) -> int:
+        """
+        由节气下标求年柱在六十甲子中的序号（以立春为界）
+
+        Args:
+            term_index: latest_index / latest_index_on 的结果
+
+        Returns:
+            0-59
+        """
+        year = SolarTermTable.FIRST_YEAR + term_index // 24
+        if term_index % 24 < 2:  # 小寒、大寒仍属上一年
+            year -= 1
+        return (year - 4) % 60
+
+    @classmethod
+    def month_ganzhi_index(cls, day: date) -> int:
+        """
+        月柱在六十甲子中的序号（以节为界，交节当日即换月）
+
+        Args:
+            day: 公历日期
+
+        Returns:
+            0-59
+        """
+        return cls.month_index_of(cls.latest_index_on(day))
+
+    @classmethod
+    def days_numpy(cls) -> np.ndarray:
+        """节气日表的NumPy视图（供批量二分查找）"""
+        if cls._days_np is None:
+            cls._days_np = np.frombuffer(cls._days, dtype=np.uint32).astype(np.int64)
+        return cls._days_np
+
+
+SolarTermTable.load()
+
+
+# 批量转换用的查找表（下标即编码值）
+_LUNAR_INFO = np.array(LUNAR_INFO, dtype=np.int64)
+_EPOCH_DAYS_FROM_1900 = (date(1970, 1, 1) - date(1900, 1, 1)).days
+_LUNAR_MONTH_CN = [""] + [CalendarConverter.to_china_month(m) for m in range(1, 13)]
+_LUNAR_DAY_CN = [""] + [CalendarConverter.to_china_day(d) for d in range(1, 31)]
+# solar_to_lunar 中星期日取 NSTR1[7]，此处保持一致
+_WEEKDAY_CN = ["星期" + NSTR1[wd + 1] for wd in range(7)]
+# 下标 24 表示当天不交节
+_TERM_NAMES = np.array(SOLAR_TERM + [""], dtype=object)
+_ASTRO_BOUNDARY = np.array([20, 19, 21, 21, 21, 22, 23, 23, 23, 23, 22, 22])
+# 下标 = 月份 - (日 < 当月分界日)
+_ASTRO_NAMES = [CalendarConverter.to_astro(1, 1)] + [CalendarConverter.to_astro(m, 31) for m in range(1, 13)]
+
+
+def _festival_table(festivals: Dict[str, str]) -> np.ndarray:
+    """将 "月-日" 节日表展开为以 月*32+日 为下标的数组"""
+    table = np.full(13 * 32, "", dtype=object)
+    for key, title in festivals.items():
+        month, day = (int(part) for part in key.split("-"))
+        table[month * 32 + day] = title
+    return table
+
+
+_FESTIVAL_TABLE = _festival_table(FESTIVAL)
+_LUNAR_FESTIVAL_TABLE = _festival_table(LUNAR_FESTIVAL)
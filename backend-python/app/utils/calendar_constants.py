@@ -34,6 +34,9 @@ GAN = ["甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸"]
 # 地支
 ZHI = ["子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥"]
 
+# 六十甲子（下标 i 对应 GAN[i % 10] + ZHI[i % 12]）
+JIAZI = [GAN[i % 10] + ZHI[i % 12] for i in range(60)]
+
 # 生肖
 CHINESE_ZODIAC = ["鼠", "牛", "虎", "兔", "龙", "蛇", "马", "羊", "猴", "鸡", "狗", "猪"]
 
@@ -0,0 +1,103 @@
+"""只读语料文件（卦辞爻辞、塔罗牌义等）
+
+文件格式（小端）：
+    魔数 b"DDC1" | uint32 记录数 N | uint32 偏移表[N+1] | 记录区
+记录区中每条记录为一个 UTF-8 JSON 对象，偏移相对记录区起点。
+
+文件以只读 mmap 打开：启动时不读取内容，按序号解码单条记录，
+常驻内存只有被访问过的页。语料由 scripts/build_corpus.py 离线生成。
+"""
+
+import json
+import mmap
+import struct
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+MAGIC = b"DDC1"
+_HEADER = struct.Struct("<4sI")
+_OFFSET_PAIR = struct.Struct("<II")
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+
+
+class CorpusFile(Sequence):
+    """按序号随机访问的语料文件（首次访问时才打开）
+
+    每次访问返回新解码的 dict，调用方可以自由修改。
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._count = 0
+        self._data_start = 0
+
+    def _open(self) -> mmap.mmap:
+        with self._lock:
+            if self._mmap is None:
+                with open(self.path, "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, count = _HEADER.unpack_from(mapped, 0)
+                if magic != MAGIC:
+                    mapped.close()
+                    raise ValueError(f"语料文件格式错误: {self.path}")
+                self._count = count
+                self._data_start = _HEADER.size + (count + 1) * 4
+                self._mmap = mapped
+            return self._mmap
+
+    def __len__(self) -> int:
+        if self._mmap is None:
+            self._open()
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        mapped = self._mmap if self._mmap is not None else self._open()
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        start, end = _OFFSET_PAIR.unpack_from(mapped, _HEADER.size + index * 4)
+        return json.loads(mapped[self._data_start + start:self._data_start + end])
+
+    def close(self):
+        """释放映射（测试或重新生成文件后使用）"""
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+
+    @staticmethod
+    def write(path: Path, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        写入语料文件
+
+        Args:
+            path: 输出路径
+            records: 记录列表，按序号排列
+
+        Returns:
+            写入的记录数
+        """
+        blobs = [
+            json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            for record in records
+        ]
+        offsets = [0]
+        for blob in blobs:
+            offsets.append(offsets[-1] + len(blob))
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, len(blobs)))
+            f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+            for blob in blobs:
+                f.write(blob)
+        return len(blobs)
@@ -1,4 +1,11 @@
-"""卦象数据"""
+"""卦象数据
+
+八卦与卦序等结构数据直接定义在本模块；
+六十四卦的卦辞、彖辞、象辞与三百八十四爻辞存放在语料文件 data/hexagrams.bin，
+按卦序懒加载（见 app.utils.corpus）。
+"""
+
+from app.utils.corpus import CorpusFile, DATA_DIR
 
 # 八卦定义
 TRIGRAMS = [
@@ -12,22 +19,80 @@ TRIGRAMS = [
     {'number': 8, 'name': '兑', 'symbol': '☱', 'yin_yang': [True, True, False], 'wuxing': '金', 'direction': '西'},
 ]
 
-# 六十四卦定义（简化版，实际应该有完整的64卦）
-HEXAGRAMS = [
-    {'number': 1, 'name': '乾', 'upper': '乾', 'lower': '乾', 'outcome': '吉', 'summary': '元亨利贞，大吉之象', 'detail': '乾卦，纯阳之卦。天行健，君子以自强不息。', 'wuxing': '金'},
-    {'number': 2, 'name': '坤', 'upper': '坤', 'lower': '坤', 'outcome': '吉', 'summary': '厚德载物，柔顺之象', 'detail': '坤卦，纯阴之卦。地势坤，君子以厚德载物。', 'wuxing': '土'},
-    {'number': 3, 'name': '屯', 'upper': '坎', 'lower': '震', 'outcome': '平', 'summary': '初始艰难，需耐心等待', 'detail': '屯卦，象征初生之难。宜守不宜攻。', 'wuxing': '水'},
-    # ... 其他61卦（为简化先省略）
+# 卦名（按文王卦序）
+HEXAGRAM_NAMES = [
+    '乾', '坤', '屯', '蒙', '需', '讼', '师', '比', '小畜', '履',
+    '泰', '否', '同人', '大有', '谦', '豫', '随', '蛊', '临', '观',
+    '噬嗑', '贲', '剥', '复', '无妄', '大畜', '颐', '大过', '坎', '离',
+    '咸', '恒', '遁', '大壮', '晋', '明夷', '家人', '睽', '蹇', '解',
+    '损', '益', '夬', '姤', '萃', '升', '困', '井', '革', '鼎',
+    '震', '艮', '渐', '归妹', '丰', '旅', '巽', '兑', '涣', '节',
+    '中孚', '小过', '既济', '未济',
+]
+
+# 文王卦序：KING_WEN_TABLE[上卦序号-1][下卦序号-1]（八卦序号同 TRIGRAMS）
+KING_WEN_TABLE = [
+    # 下卦： 乾  坤  震  巽  坎  离  艮  兑
+    [1, 12, 25, 44, 6, 13, 33, 10],   # 上卦乾
+    [11, 2, 24, 46, 7, 36, 15, 19],   # 上卦坤
+    [34, 16, 51, 32, 40, 55, 62, 54],  # 上卦震
+    [9, 20, 42, 57, 59, 37, 53, 61],  # 上卦巽
+    [5, 8, 3, 48, 29, 63, 39, 60],    # 上卦坎
+    [14, 35, 21, 50, 64, 30, 56, 38],  # 上卦离
+    [26, 23, 27, 18, 4, 22, 52, 41],  # 上卦艮
+    [43, 45, 17, 28, 47, 49, 31, 58],  # 上卦兑
 ]
 
-# 补充默认卦象（当数据库中没有时使用）
+
+# ---- 位表示与预计算查找表 ----
+# 六爻用6位整数表示：第i位（自下而上，初爻为第0位）为1表示阳爻；
+# 下卦为低3位，上卦为高3位。变爻同样用6位掩码表示。
+
+def _trigram_bits(trigram: dict) -> int:
+    """三爻（自下而上）转3位整数"""
+    return sum(1 << i for i, yang in enumerate(trigram['yin_yang']) if yang)
+
+
+# 3位值 -> 八卦元数据
+TRIGRAM_BY_BITS = tuple(sorted(TRIGRAMS, key=_trigram_bits))
+# 八卦序号 -> 3位值
+TRIGRAM_BITS_BY_NUMBER = {t['number']: _trigram_bits(t) for t in TRIGRAMS}
+
+# 6位值 -> 文王卦序
+KING_WEN_BY_BITS = bytes(
+    KING_WEN_TABLE[TRIGRAM_BY_BITS[bits >> 3]['number'] - 1][TRIGRAM_BY_BITS[bits & 7]['number'] - 1]
+    for bits in range(64)
+)
+# 文王卦序 -> 6位值（下标0不用）
+BITS_BY_KING_WEN = bytes([0] + sorted(range(64), key=lambda bits: KING_WEN_BY_BITS[bits]))
+# (6位值 << 6 | 变爻掩码) -> 变卦文王卦序
+CHANGED_KING_WEN = bytes(KING_WEN_BY_BITS[bits ^ mask] for bits in range(64) for mask in range(64))
+# 变爻掩码 -> 变爻位置（0-5）
+CHANGING_LINES = tuple(tuple(i for i in range(6) if mask >> i & 1) for mask in range(64))
+
+
+# 八宫：6位值 -> (本宫纯卦3位值 << 3) | 世代
+# 世代 0 为本宫卦，1-5 为一世至五世，6 为游魂，7 为归魂
+_PALACE_MASKS = (0b000000, 0b000001, 0b000011, 0b000111, 0b001111, 0b011111, 0b010111, 0b010000)
+PALACE_BY_BITS = bytes(
+    palace << 3 | generation
+    for _, palace, generation in sorted(
+        ((palace << 3 | palace) ^ mask, palace, generation)
+        for palace in range(8)
+        for generation, mask in enumerate(_PALACE_MASKS)
+    )
+)
+
+# 六十四卦语料（下标为卦序-1），每条记录包含：
+# number/name/upper/lower/wuxing/outcome/summary/detail
+# judgment（卦辞）/tuan（彖辞）/image（大象）/lines（六爻爻辞，自初爻起）/use（用九、用六，仅乾坤）
+HEXAGRAMS = CorpusFile(DATA_DIR / "hexagrams.bin")
+
+
 def get_hexagram_by_number(number: int) -> dict:
     """根据卦序号获取卦象信息"""
-    for hexagram in HEXAGRAMS:
-        if hexagram['number'] == number:
-            return hexagram
-    
-    # 如果没有找到，返回默认卦象
+    if 1 <= number <= 64:
+        return HEXAGRAMS[number - 1]
     return {
         'number': number,
         'name': f'第{number}卦',
@@ -0,0 +1,212 @@
+"""衍生卦（互卦/错卦/综卦）与六十四卦关系矩阵
+
+衍生卦按6位卦值（见 hexagram_data）用位运算预计算：
+- 互卦：二至四爻为下卦，三至五爻为上卦
+- 错卦：六爻阴阳全反（按位取反）
+- 综卦：卦画上下颠倒（6位反转）
+
+关系矩阵为 64×64 的 bytes 表，下标为 (卦序A-1) * 64 + (卦序B-1)：
+- WUXING_MATRIX：A 对 B 的五行生克关系码（五行取所属八宫）
+- TRIGRAM_CHANGE_MATRIX：A 到 B 的上下卦变化码
+- COMPATIBILITY_MATRIX：相容性评分（0-100）
+
+单次查询只做下标运算，返回小整数（解释器缓存对象，不分配内存）；
+批量查询通过 NumPy 视图做花式索引，可传入 out 复用结果数组。
+"""
+
+from typing import Optional, Tuple
+import numpy as np
+from app.utils.hexagram_data import (
+    HEXAGRAMS, HEXAGRAM_NAMES, KING_WEN_BY_BITS, BITS_BY_KING_WEN, TRIGRAM_BY_BITS, PALACE_BY_BITS
+)
+
+# 五行按相生顺序排列：木生火、火生土、土生金、金生水、水生木；隔一位相克
+WUXING_ORDER = "木火土金水"
+WUXING_INDEX = {name: i for i, name in enumerate(WUXING_ORDER)}
+
+# 五行关系码（A 对 B）
+RELATION_SAME = 0
+RELATION_GENERATES = 1
+RELATION_OVERCOMES = 2
+RELATION_GENERATED = 3
+RELATION_OVERCOME = 4
+RELATION_NAMES = ("比和", "生", "克", "被生", "被克")
+
+# (B - A) mod 5 -> 关系码
+_RELATION_BY_STEP = (RELATION_SAME, RELATION_GENERATES, RELATION_OVERCOMES, RELATION_OVERCOME, RELATION_GENERATED)
+# 五行序号 A * 5 + B -> 关系码
+WUXING_RELATION = bytes(_RELATION_BY_STEP[(b - a) % 5] for a in range(5) for b in range(5))
+
+# 上下卦变化码：bit0 下卦变，bit1 上卦变
+TRIGRAM_CHANGE_NAMES = ("上下卦未变", "下卦变", "上卦变", "上下卦皆变")
+
+OUTCOME_INDEX = {"吉": 0, "平": 1, "凶": 2}
+
+# 相容性：五行（按关系码）占六成，吉凶占四成
+WUXING_COMPATIBILITY = (100, 80, 30, 80, 30)
+OUTCOME_COMPATIBILITY = (
+    (100, 70, 40),
+    (70, 100, 40),
+    (40, 40, 100),
+)
+
+
+def compatibility_level(score: float) -> str:
+    """相容性等级"""
+    return "高" if score >= 70 else "中" if score >= 50 else "低"
+
+
+def _reverse_bits(bits: int) -> int:
+    return int(f"{bits:06b}"[::-1], 2)
+
+
+# 6位值 -> 衍生卦6位值
+NUCLEAR_BY_BITS = bytes((bits >> 1 & 7) | (bits >> 2 & 7) << 3 for bits in range(64))
+INVERSE_BY_BITS = bytes(bits ^ 0b111111 for bits in range(64))
+REVERSE_BY_BITS = bytes(_reverse_bits(bits) for bits in range(64))
+
+# 文王卦序 -> 衍生卦文王卦序（下标0不用）
+NUCLEAR_KING_WEN = bytes([0] + [KING_WEN_BY_BITS[NUCLEAR_BY_BITS[BITS_BY_KING_WEN[n]]] for n in range(1, 65)])
+INVERSE_KING_WEN = bytes([0] + [KING_WEN_BY_BITS[INVERSE_BY_BITS[BITS_BY_KING_WEN[n]]] for n in range(1, 65)])
+REVERSE_KING_WEN = bytes([0] + [KING_WEN_BY_BITS[REVERSE_BY_BITS[BITS_BY_KING_WEN[n]]] for n in range(1, 65)])
+
+# 文王卦序 -> 五行序号（所属八宫的五行）、吉凶序号（下标0不用）
+WUXING_BY_KING_WEN = bytes(
+    [0] + [WUXING_INDEX[TRIGRAM_BY_BITS[PALACE_BY_BITS[BITS_BY_KING_WEN[n]] >> 3]["wuxing"]] for n in range(1, 65)]
+)
+OUTCOME_BY_KING_WEN = bytes([0] + [OUTCOME_INDEX[record["outcome"]] for record in HEXAGRAMS])
+
+
+def _build_matrices() -> Tuple[bytes, bytes, bytes]:
+    wuxing = bytearray(4096)
+    change = bytearray(4096)
+    score = bytearray(4096)
+    for a in range(1, 65):
+        bits_a = BITS_BY_KING_WEN[a]
+        wuxing_a = WUXING_BY_KING_WEN[a]
+        outcome_a = OUTCOME_BY_KING_WEN[a]
+        for b in range(1, 65):
+            index = (a - 1) << 6 | (b - 1)
+            diff = bits_a ^ BITS_BY_KING_WEN[b]
+            relation = WUXING_RELATION[wuxing_a * 5 + WUXING_BY_KING_WEN[b]]
+            wuxing[index] = relation
+            change[index] = (diff & 7 != 0) | (diff >> 3 != 0) << 1
+            # 各项得分均为10的倍数，加权结果为整数
+            score[index] = (
+                WUXING_COMPATIBILITY[relation] * 6
+                + OUTCOME_COMPATIBILITY[outcome_a][OUTCOME_BY_KING_WEN[b]] * 4
+            ) // 10
+    return bytes(wuxing), bytes(change), bytes(score)
+
+
+WUXING_MATRIX, TRIGRAM_CHANGE_MATRIX, COMPATIBILITY_MATRIX = _build_matrices()
+
+# 只读 NumPy 视图（与上面的 bytes 共享内存），形状 (64, 64)
+_MATRICES = {
+    name: np.frombuffer(table, dtype=np.uint8).reshape(64, 64)
+    for name, table in (
+        ("wuxing", WUXING_MATRIX),
+        ("trigram_change", TRIGRAM_CHANGE_MATRIX),
+        ("compatibility", COMPATIBILITY_MATRIX),
+    )
+}
+_DERIVED = {
+    name: np.frombuffer(table, dtype=np.uint8)
+    for name, table in (
+        ("nuclear", NUCLEAR_KING_WEN),
+        ("inverse", INVERSE_KING_WEN),
+        ("reverse", REVERSE_KING_WEN),
+    )
+}
+
+
+class HexagramMatrix:
+    """衍生卦与卦间关系查询（参数均为文王卦序 1-64）"""
+
+    MATRICES = tuple(_MATRICES)
+    DERIVED = tuple(_DERIVED)
+
+    @staticmethod
+    def nuclear(number: int) -> int:
+        """互卦卦序"""
+        return NUCLEAR_KING_WEN[number]
+
+    @staticmethod
+    def inverse(number: int) -> int:
+        """错卦卦序"""
+        return INVERSE_KING_WEN[number]
+
+    @staticmethod
+    def reverse(number: int) -> int:
+        """综卦卦序"""
+        return REVERSE_KING_WEN[number]
+
+    @staticmethod
+    def derived_names(number: int) -> Tuple[str, str, str]:
+        """互卦、错卦、综卦卦名"""
+        return (
+            HEXAGRAM_NAMES[NUCLEAR_KING_WEN[number] - 1],
+            HEXAGRAM_NAMES[INVERSE_KING_WEN[number] - 1],
+            HEXAGRAM_NAMES[REVERSE_KING_WEN[number] - 1],
+        )
+
+    @staticmethod
+    def wuxing_relation(a: int, b: int) -> int:
+        """A 对 B 的五行关系码（见 RELATION_NAMES）"""
+        return WUXING_MATRIX[(a - 1) << 6 | (b - 1)]
+
+    @staticmethod
+    def trigram_change(a: int, b: int) -> int:
+        """A 到 B 的上下卦变化码（见 TRIGRAM_CHANGE_NAMES）"""
+        return TRIGRAM_CHANGE_MATRIX[(a - 1) << 6 | (b - 1)]
+
+    @staticmethod
+    def compatibility(a: int, b: int) -> int:
+        """相容性评分（0-100）"""
+        return COMPATIBILITY_MATRIX[(a - 1) << 6 | (b - 1)]
+
+    @staticmethod
+    def matrix(name: str) -> np.ndarray:
+        """
+        整张关系矩阵的只读视图
+
+        Args:
+            name: wuxing/trigram_change/compatibility
+
+        Returns:
+            np.ndarray: 形状 (64, 64)，下标为卦序-1
+        """
+        return _MATRICES[name]
+
+    @staticmethod
+    def lookup_many(name: str, a: np.ndarray, b: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        批量查询关系矩阵
+
+        Args:
+            name: wuxing/trigram_change/compatibility
+            a: 卦序数组
+            b: 卦序数组（与 a 等长或可广播）
+            out: 可选的结果数组（uint8），传入时原地写入
+
+        Returns:
+            np.ndarray: uint8 结果
+        """
+        a = np.asarray(a, dtype=np.intp)
+        b = np.asarray(b, dtype=np.intp)
+        return _MATRICES[name].take((a - 1) * 64 + (b - 1), out=out)
+
+    @staticmethod
+    def derived_many(name: str, numbers: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        批量查询衍生卦
+
+        Args:
+            name: nuclear/inverse/reverse
+            numbers: 卦序数组
+            out: 可选的结果数组（uint8）
+
+        Returns:
+            np.ndarray: 衍生卦卦序
+        """
+        return _DERIVED[name].take(np.asarray(numbers, dtype=np.intp), out=out)
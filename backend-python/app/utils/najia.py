@@ -0,0 +1,195 @@
+"""纳甲六爻装卦
+
+六十四卦的静态部分全部预计算（按6位卦值，见 hexagram_data）：
+- 八宫与世代（PALACE_BY_BITS），由世代定世爻，应爻与世爻相隔三位
+- 纳甲：内卦（下三爻）、外卦（上三爻）各按所属八卦纳天干、地支
+- 六亲：以本宫五行对各爻地支五行论生克
+
+每次起卦只需把这些表与占卜当日的日干支组合：日干定六神起点，日柱所在旬定空亡。
+变爻的变出爻取变卦同位爻的纳甲，六亲仍按本卦所属宫论。
+"""
+
+from datetime import date
+from typing import Any, Dict, List
+from app.utils.calendar import CalendarConverter
+from app.utils.calendar_constants import GAN, ZHI, JIAZI
+from app.utils.hexagram_data import TRIGRAM_BY_BITS, PALACE_BY_BITS
+from app.utils.hexagram_matrix import WUXING_ORDER, WUXING_INDEX, WUXING_RELATION
+
+# 八卦纳甲：(内卦天干, 外卦天干, 内卦三爻地支, 外卦三爻地支)，地支自下而上
+_NAJIA = {
+    "乾": ("甲", "壬", "子寅辰", "午申戌"),
+    "坤": ("乙", "癸", "未巳卯", "丑亥酉"),
+    "震": ("庚", "庚", "子寅辰", "午申戌"),
+    "巽": ("辛", "辛", "丑亥酉", "未巳卯"),
+    "坎": ("戊", "戊", "寅辰午", "申戌子"),
+    "离": ("己", "己", "卯丑亥", "酉未巳"),
+    "艮": ("丙", "丙", "辰午申", "戌子寅"),
+    "兑": ("丁", "丁", "巳卯丑", "亥酉未"),
+}
+
+# 地支五行（WUXING_ORDER 序号）
+BRANCH_WUXING = bytes(WUXING_INDEX[w] for w in "水土木木土火火土金金土水")
+
+# 六亲：按本宫五行对爻五行的关系码（见 hexagram_matrix.RELATION_NAMES）
+# 比和=兄弟、我生=子孙、我克=妻财、生我=父母、克我=官鬼
+RELATIVES = ("兄弟", "子孙", "妻财", "父母", "官鬼")
+# 本宫五行 * 12 + 地支 -> 六亲
+RELATIVE_BY_WUXING_BRANCH = bytes(
+    WUXING_RELATION[palace * 5 + BRANCH_WUXING[branch]] for palace in range(5) for branch in range(12)
+)
+
+GENERATIONS = ("本宫卦", "一世卦", "二世卦", "三世卦", "四世卦", "五世卦", "游魂卦", "归魂卦")
+# 世代 -> 世爻位置（0-5）
+_SHI_BY_GENERATION = (5, 0, 1, 2, 3, 4, 3, 2)
+
+# 六神自初爻起依次排列，起点由日干决定：甲乙青龙、丙丁朱雀、戊勾陈、己螣蛇、庚辛白虎、壬癸玄武
+SPIRITS = ("青龙", "朱雀", "勾陈", "螣蛇", "白虎", "玄武")
+SPIRIT_START_BY_STEM = (0, 0, 1, 1, 2, 3, 4, 4, 5, 5)
+
+
+def _line_najia(bits: int, position: int):
+    """(天干序号, 地支序号)"""
+    if position < 3:
+        stem, _, branches, _ = _NAJIA[TRIGRAM_BY_BITS[bits & 7]["name"]]
+    else:
+        _, stem, _, branches = _NAJIA[TRIGRAM_BY_BITS[bits >> 3]["name"]]
+    return GAN.index(stem), ZHI.index(branches[position % 3])
+
+
+# 6位值 -> 本宫五行、世爻位置
+PALACE_WUXING_BY_BITS = bytes(WUXING_INDEX[TRIGRAM_BY_BITS[PALACE_BY_BITS[bits] >> 3]["wuxing"]] for bits in range(64))
+SHI_BY_BITS = bytes(_SHI_BY_GENERATION[PALACE_BY_BITS[bits] & 7] for bits in range(64))
+# 6位值 * 6 + 爻位 -> 纳甲天干、地支、六亲（按本卦所属宫）
+LINE_STEM = bytes(_line_najia(bits, i)[0] for bits in range(64) for i in range(6))
+LINE_BRANCH = bytes(_line_najia(bits, i)[1] for bits in range(64) for i in range(6))
+LINE_RELATIVE = bytes(
+    RELATIVE_BY_WUXING_BRANCH[PALACE_WUXING_BY_BITS[bits] * 12 + LINE_BRANCH[bits * 6 + i]]
+    for bits in range(64) for i in range(6)
+)
+
+
+class NajiaEngine:
+    """纳甲装卦"""
+
+    @staticmethod
+    def day_index(day: date) -> int:
+        """占卜日的日柱序号（六十甲子，0-59）"""
+        return CalendarConverter.day_ganzhi_index(day)
+
+    @staticmethod
+    def void_branches(day_index: int) -> List[str]:
+        """旬空：日柱所在旬中未配天干的两个地支"""
+        start = (day_index - day_index % 10) % 12
+        return [ZHI[(start + 10) % 12], ZHI[(start + 11) % 12]]
+
+    @staticmethod
+    def assign(bits: int, mask: int, day_index: int) -> Dict[str, Any]:
+        """
+        装卦
+
+        Args:
+            bits: 本卦6位值
+            mask: 变爻掩码
+            day_index: 占卜日的日柱序号（0-59）
+
+        Returns:
+            Dict: palace/palace_wuxing/generation/shi/ying（爻位1-6）/day/void/lines，
+            lines 自初爻起，每爻含 position/yang/changing/stem/branch/wuxing/relative/spirit/marker，
+            变爻另含 changed（变出爻的 stem/branch/wuxing/relative）
+        """
+        palace = PALACE_BY_BITS[bits]
+        palace_wuxing = PALACE_WUXING_BY_BITS[bits]
+        shi = SHI_BY_BITS[bits]
+        ying = (shi + 3) % 6
+        spirit_start = SPIRIT_START_BY_STEM[day_index % 10]
+        changed_bits = bits ^ mask
+
+        lines = []
+        for i in range(6):
+            index = bits * 6 + i
+            branch = LINE_BRANCH[index]
+            line = {
+                "position": i + 1,
+                "yang": bool(bits >> i & 1),
+                "changing": bool(mask >> i & 1),
+                "stem": GAN[LINE_STEM[index]],
+                "branch": ZHI[branch],
+                "wuxing": WUXING_ORDER[BRANCH_WUXING[branch]],
+                "relative": RELATIVES[LINE_RELATIVE[index]],
+                "spirit": SPIRITS[(spirit_start + i) % 6],
+                "marker": "世" if i == shi else "应" if i == ying else "",
+            }
+            if mask >> i & 1:
+                changed_index = changed_bits * 6 + i
+                changed_branch = LINE_BRANCH[changed_index]
+                line["changed"] = {
+                    "stem": GAN[LINE_STEM[changed_index]],
+                    "branch": ZHI[changed_branch],
+                    "wuxing": WUXING_ORDER[BRANCH_WUXING[changed_branch]],
+                    "relative": RELATIVES[RELATIVE_BY_WUXING_BRANCH[palace_wuxing * 12 + changed_branch]],
+                }
+            lines.append(line)
+
+        return {
+            "palace": TRIGRAM_BY_BITS[palace >> 3]["name"] + "宫",
+            "palace_wuxing": WUXING_ORDER[palace_wuxing],
+            "generation": GENERATIONS[palace & 7],
+            "shi": shi + 1,
+            "ying": ying + 1,
+            "day": JIAZI[day_index],
+            "void": NajiaEngine.void_branches(day_index),
+            "lines": lines,
+        }
+
+    @staticmethod
+    def format_lines(najia: Dict[str, Any], with_day: bool = True) -> str:
+        """
+        排盘文本（自上爻至初爻，供Prompt直接引用）
+
+        Args:
+            najia: assign 的结果
+            with_day: 是否包含由占卜日决定的部分（日柱、旬空、六神）
+
+        Returns:
+            str: 每爻一行，如 “玄武 父母 壬戌土 — 世”，变爻附 “○→ 官鬼 戊午火”；
+            不含日期部分时为 “父母 壬戌土 — 世”
+        """
+        header = f"{najia['palace']}{najia['generation']}（{najia['palace_wuxing']}）"
+        if with_day:
+            header += f"，{najia['day']}日，旬空{''.join(najia['void'])}"
+        rows = [header]
+        for line in reversed(najia["lines"]):
+            symbol = "—" if line["yang"] else "--"
+            spirit = f"{line['spirit']} " if with_day else ""
+            row = (
+                f"{spirit}{line['relative']} {line['stem']}{line['branch']}{line['wuxing']} "
+                f"{symbol} {line['marker']}".rstrip()
+            )
+            changed = line.get("changed")
+            if changed:
+                row += f" ○→ {changed['relative']} {changed['stem']}{changed['branch']}{changed['wuxing']}"
+            rows.append(row)
+        return "\n".join(rows)
+
+    @staticmethod
+    def prompt_section(najia: Any, with_day: bool = True) -> str:
+        """
+        Prompt中的纳甲排盘段落
+
+        Args:
+            najia: assign 的结果或对应的 Pydantic 对象，为空时返回空字符串
+            with_day: 是否包含日柱、旬空、六神（跨日复用的解读不含，见 InterpretationStore）
+
+        Returns:
+            str
+        """
+        if not najia:
+            return ""
+        if not isinstance(najia, dict):
+            najia = najia.model_dump()
+        cited = "世应、六亲、六神" if with_day else "世应、六亲"
+        return (
+            f"\n纳甲排盘（已排定，{cited}请直接引用，无需重新推算）：\n"
+            + NajiaEngine.format_lines(najia, with_day) + "\n"
+        )
@@ -0,0 +1,237 @@
+"""本地问题分析模型（字符 n-gram + 线性分类）
+
+代替问题分析的 LLM 调用，预测 question_type / sub_type / intent / complexity 四个标签。
+
+特征：问题转小写、首尾加边界符后取 1-3 字符 n-gram，外加问题长度分档，
+经 CRC32 哈希到 2^k 维，取值 1/sqrt(特征数)（另有一个偏置特征）。
+模型：每个标签一个 softmax 线性分类器，权重按列拼成一个 (维度, 类别总数) 矩阵，
+推理时一次按行取出命中的权重求和，再按标签分段做 softmax，纯 NumPy，亚毫秒级。
+
+训练（AdaGrad 小批量）只在离线脚本 scripts/train_question_model.py 中进行，
+模型保存为 .npz，服务启动时加载；文件不存在时本地模型不启用。
+"""
+
+import json
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 预测的标签（与 QuestionAnalysis 的字段同名）
+LABEL_FIELDS = ("question_type", "sub_type", "intent", "complexity")
+
+DEFAULT_DIM_BITS = 16
+NGRAM_RANGE = (1, 3)
+_BOUNDARY = "\x02"
+_LENGTH_BUCKET = 25     # 长度分档宽度（字）
+_LENGTH_BUCKETS = 8
+
+
+def question_features(question: str, dim_bits: int = DEFAULT_DIM_BITS) -> np.ndarray:
+    """
+    问题的特征下标（去重，升序；下标 0 为偏置特征）
+
+    Args:
+        question: 问题文本
+        dim_bits: 特征维度的位数
+
+    Returns:
+        np.ndarray: int64 下标
+    """
+    mask = (1 << dim_bits) - 1
+    question = question.strip().lower()
+    text = _BOUNDARY + question + _BOUNDARY
+    grams = [f"{_BOUNDARY}len{min(len(question) // _LENGTH_BUCKET, _LENGTH_BUCKETS)}"]
+    low, high = NGRAM_RANGE
+    for n in range(low, high + 1):
+        grams.extend(text[i:i + n] for i in range(len(text) - n + 1))
+    # 0 留给偏置，哈希值落到 0 时改为 1
+    ids = {0}
+    ids.update((zlib.crc32(gram.encode("utf-8")) & mask) or 1 for gram in grams)
+    return np.fromiter(sorted(ids), dtype=np.int64, count=len(ids))
+
+
+class Prediction(NamedTuple):
+    """一次预测"""
+    labels: Dict[str, str]          # 标签 -> 预测类别
+    confidences: Dict[str, float]   # 标签 -> 预测类别的概率
+    confidence: float               # 各标签概率中的最小值（整体置信度）
+
+
+class QuestionModel:
+    """多标签线性分类模型"""
+
+    def __init__(self, weights: np.ndarray, classes: Dict[str, Sequence[str]],
+                 dim_bits: int = DEFAULT_DIM_BITS, meta: Optional[Dict] = None):
+        self.weights = weights
+        self.classes = {field: list(classes[field]) for field in LABEL_FIELDS}
+        self.dim_bits = dim_bits
+        self.meta = meta or {}
+        # 每个标签在权重矩阵中的列区间
+        self._slices: List[Tuple[str, int, int]] = []
+        offset = 0
+        for field in LABEL_FIELDS:
+            self._slices.append((field, offset, offset + len(self.classes[field])))
+            offset += len(self.classes[field])
+
+    # ---------- 推理 ----------
+
+    def _scores(self, ids: np.ndarray) -> np.ndarray:
+        return self.weights[ids].sum(axis=0) / np.sqrt(len(ids))
+
+    def predict(self, question: str) -> Prediction:
+        """
+        预测问题的各标签
+
+        Args:
+            question: 问题文本
+
+        Returns:
+            Prediction
+        """
+        scores = self._scores(question_features(question, self.dim_bits))
+        labels: Dict[str, str] = {}
+        confidences: Dict[str, float] = {}
+        for field, start, end in self._slices:
+            head = scores[start:end]
+            probs = np.exp(head - head.max())
+            best = int(probs.argmax())
+            labels[field] = self.classes[field][best]
+            confidences[field] = float(probs[best] / probs.sum())
+        return Prediction(labels, confidences, min(confidences.values()))
+
+    # ---------- 训练 ----------
+
+    @classmethod
+    def train(cls, questions: Sequence[str], labels: Sequence[Dict[str, str]],
+              dim_bits: int = DEFAULT_DIM_BITS, epochs: int = 8, batch_size: int = 256,
+              learning_rate: float = 0.5, l2: float = 1e-6, seed: int = 0) -> "QuestionModel":
+        """
+        训练模型（多类 softmax 交叉熵，各标签损失相加，AdaGrad 小批量）
+
+        Args:
+            questions: 问题列表
+            labels: 与问题一一对应的标签字典（须包含 LABEL_FIELDS 中的全部字段）
+            dim_bits: 特征维度的位数
+            epochs: 训练轮数
+            batch_size: 批大小
+            learning_rate: 学习率
+            l2: L2 正则系数
+            seed: 打乱顺序用的随机种子
+
+        Returns:
+            QuestionModel
+        """
+        if not questions:
+            raise ValueError("没有训练样本")
+        classes = {field: sorted({label[field] for label in labels}) for field in LABEL_FIELDS}
+        class_index = {field: {name: i for i, name in enumerate(names)} for field, names in classes.items()}
+        model = cls(np.zeros((1 << dim_bits, sum(len(c) for c in classes.values())), dtype=np.float32),
+                    classes, dim_bits)
+
+        # 目标列：每个样本在每个标签段中的正确列
+        targets = np.empty((len(questions), len(LABEL_FIELDS)), dtype=np.int64)
+        for row, label in enumerate(labels):
+            for col, (field, start, _) in enumerate(model._slices):
+                targets[row, col] = start + class_index[field][label[field]]
+        features = [question_features(question, dim_bits) for question in questions]
+
+        weights = model.weights
+        history = np.zeros_like(weights)
+        rng = np.random.default_rng(seed)
+        for _ in range(epochs):
+            order = rng.permutation(len(questions))
+            for begin in range(0, len(order), batch_size):
+                batch = order[begin:begin + batch_size]
+                rows = [features[i] for i in batch]
+                lengths = np.fromiter((len(ids) for ids in rows), dtype=np.int64, count=len(rows))
+                ids = np.concatenate(rows)
+                values = np.repeat(1.0 / np.sqrt(lengths), lengths).astype(np.float32)
+                starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+                scores = np.add.reduceat(weights[ids] * values[:, None], starts, axis=0)
+                grad_scores = np.empty_like(scores)
+                for _, start, end in model._slices:
+                    head = scores[:, start:end]
+                    probs = np.exp(head - head.max(axis=1, keepdims=True))
+                    grad_scores[:, start:end] = probs / probs.sum(axis=1, keepdims=True)
+                grad_scores[np.arange(len(batch))[:, None], targets[batch]] -= 1.0
+                grad_scores /= len(batch)
+
+                # 只更新本批出现过的特征行
+                touched, inverse = np.unique(ids, return_inverse=True)
+                grad = np.zeros((len(touched), weights.shape[1]), dtype=np.float32)
+                np.add.at(grad, inverse, np.repeat(grad_scores, lengths, axis=0) * values[:, None])
+                grad += l2 * weights[touched]
+                history[touched] += grad * grad
+                weights[touched] -= learning_rate * grad / (np.sqrt(history[touched]) + 1e-8)
+        return model
+
+    # ---------- 保存 / 加载 ----------
+
+    def save(self, path: Path):
+        """保存为 .npz（权重 float16 存储）"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                weights=self.weights.astype(np.float16),
+                dim_bits=np.int64(self.dim_bits),
+                classes=np.array(json.dumps(self.classes, ensure_ascii=False)),
+                meta=np.array(json.dumps(self.meta, ensure_ascii=False)),
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> "QuestionModel":
+        """从 .npz 加载"""
+        with np.load(Path(path)) as data:
+            return cls(
+                data["weights"].astype(np.float32),
+                json.loads(str(data["classes"])),
+                int(data["dim_bits"]),
+                json.loads(str(data["meta"])),
+            )
+
+
+def evaluate(model: QuestionModel, questions: Sequence[str], labels: Sequence[Dict[str, str]],
+             thresholds: Iterable[float]) -> Dict:
+    """
+    在标注样本上评估模型
+
+    Args:
+        model: 模型
+        questions: 问题列表
+        labels: 参考标签（LLM 标注）
+        thresholds: 要统计的置信度阈值
+
+    Returns:
+        Dict: accuracy（各标签准确率）、exact（四个标签全对的比例），
+        以及每个阈值下的 coverage（可本地回答、省去 LLM 调用的比例）与该部分的 exact
+    """
+    predictions = [model.predict(question) for question in questions]
+    total = len(predictions)
+    if not total:
+        return {"samples": 0, "accuracy": {}, "exact": 0.0, "thresholds": []}
+    correct = [
+        all(prediction.labels[field] == label[field] for field in LABEL_FIELDS)
+        for prediction, label in zip(predictions, labels)
+    ]
+    report = {
+        "samples": total,
+        "accuracy": {
+            field: sum(p.labels[field] == label[field] for p, label in zip(predictions, labels)) / total
+            for field in LABEL_FIELDS
+        },
+        "exact": sum(correct) / total,
+        "thresholds": [],
+    }
+    for threshold in thresholds:
+        covered = [ok for p, ok in zip(predictions, correct) if p.confidence >= threshold]
+        report["thresholds"].append({
+            "threshold": threshold,
+            "coverage": len(covered) / total,
+            "exact": sum(covered) / len(covered) if covered else 0.0,
+        })
+    return report
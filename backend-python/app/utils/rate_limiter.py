@@ -0,0 +1,41 @@
+"""异步令牌桶限流
+
+批量调用 LLM 等外部服务时按服务商的速率限制匀速发出请求：
+桶内最多积累 burst 个令牌，每秒补充 rate 个，每次调用取走一个，取不到时等待。
+"""
+
+import asyncio
+import time
+from typing import Callable
+
+
+class AsyncTokenBucket:
+    """异步令牌桶（单进程内多个协程共享）"""
+
+    def __init__(self, rate: float, burst: int = 1, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            rate: 每秒补充的令牌数（<=0 表示不限流）
+            burst: 桶容量，允许的瞬时并发调用数
+            clock: 单调时钟
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """取一个令牌，桶空时等待补充"""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
@@ -1,44 +1,108 @@
 """塔罗牌数据"""
 
-from typing import List
-
-# 78张标准韦特塔罗牌（简化版，实际应该有完整数据）
-TAROT_CARDS = [
-    # 大阿卡纳（22张）
-    {'number': 0, 'name': '愚者', 'name_en': 'The Fool', 'arcana': 'major', 'meaning': '新的开始，冒险精神，天真无邪', 'reversed': '鲁莽，缺乏计划，逃避责任'},
-    {'number': 1, 'name': '魔术师', 'name_en': 'The Magician', 'arcana': 'major', 'meaning': '创造力，技能，意志力', 'reversed': '操纵，欺骗，缺乏能力'},
-    {'number': 2, 'name': '女祭司', 'name_en': 'The High Priestess', 'arcana': 'major', 'meaning': '直觉，神秘，内在智慧', 'reversed': '隐藏的秘密，缺乏洞察力'},
-    {'number': 3, 'name': '皇后', 'name_en': 'The Empress', 'arcana': 'major', 'meaning': '丰饶，母性，自然', 'reversed': '依赖，空虚，缺乏成长'},
-    {'number': 4, 'name': '皇帝', 'name_en': 'The Emperor', 'arcana': 'major', 'meaning': '权威，结构，控制', 'reversed': '专制，僵化，缺乏纪律'},
-    {'number': 5, 'name': '教皇', 'name_en': 'The Hierophant', 'arcana': 'major', 'meaning': '传统，精神指导，教育', 'reversed': '反叛，非传统，个人信仰'},
-    {'number': 6, 'name': '恋人', 'name_en': 'The Lovers', 'arcana': 'major', 'meaning': '爱情，和谐，选择', 'reversed': '失衡，冲突，错误选择'},
-    {'number': 7, 'name': '战车', 'name_en': 'The Chariot', 'arcana': 'major', 'meaning': '胜利，意志力，决心', 'reversed': '失控，缺乏方向，侵略'},
-    {'number': 8, 'name': '力量', 'name_en': 'Strength', 'arcana': 'major', 'meaning': '勇气，耐心，内在力量', 'reversed': '软弱，自我怀疑，缺乏信心'},
-    {'number': 9, 'name': '隐者', 'name_en': 'The Hermit', 'arcana': 'major', 'meaning': '内省，寻找真理，孤独', 'reversed': '孤立，逃避，迷失'},
-    {'number': 10, 'name': '命运之轮', 'name_en': 'Wheel of Fortune', 'arcana': 'major', 'meaning': '变化，命运，机遇', 'reversed': '厄运，抗拒变化，失控'},
-    {'number': 11, 'name': '正义', 'name_en': 'Justice', 'arcana': 'major', 'meaning': '公平，真理，因果', 'reversed': '不公，偏见，逃避责任'},
-    {'number': 12, 'name': '倒吊人', 'name_en': 'The Hanged Man', 'arcana': 'major', 'meaning': '牺牲，放手，新视角', 'reversed': '拖延，抗拒，无谓牺牲'},
-    {'number': 13, 'name': '死神', 'name_en': 'Death', 'arcana': 'major', 'meaning': '结束，转变，重生', 'reversed': '抗拒改变，停滞，恐惧'},
-    {'number': 14, 'name': '节制', 'name_en': 'Temperance', 'arcana': 'major', 'meaning': '平衡，耐心，和谐', 'reversed': '失衡，过度，缺乏耐心'},
-    {'number': 15, 'name': '恶魔', 'name_en': 'The Devil', 'arcana': 'major', 'meaning': '束缚，诱惑，物质主义', 'reversed': '解脱，觉醒，摆脱束缚'},
-    {'number': 16, 'name': '塔', 'name_en': 'The Tower', 'arcana': 'major', 'meaning': '突变，混乱，启示', 'reversed': '逃避灾难，恐惧改变，延迟'},
-    {'number': 17, 'name': '星星', 'name_en': 'The Star', 'arcana': 'major', 'meaning': '希望，灵感，宁静', 'reversed': '绝望，缺乏信心，失去方向'},
-    {'number': 18, 'name': '月亮', 'name_en': 'The Moon', 'arcana': 'major', 'meaning': '幻觉，恐惧，潜意识', 'reversed': '释放恐惧，真相揭示，直觉'},
-    {'number': 19, 'name': '太阳', 'name_en': 'The Sun', 'arcana': 'major', 'meaning': '成功，喜悦，活力', 'reversed': '过度乐观，延迟成功，沮丧'},
-    {'number': 20, 'name': '审判', 'name_en': 'Judgement', 'arcana': 'major', 'meaning': '觉醒，更新，决定', 'reversed': '自我怀疑，拒绝改变，内疚'},
-    {'number': 21, 'name': '世界', 'name_en': 'The World', 'arcana': 'major', 'meaning': '完成，成就，旅程结束', 'reversed': '未完成，缺乏闭环，延迟'},
-    
-    # 小阿卡纳 - 权杖（简化，只列举几张）
-    {'number': 22, 'name': '权杖王牌', 'name_en': 'Ace of Wands', 'arcana': 'minor', 'suit': 'wands', 'meaning': '新的开始，灵感，创造力', 'reversed': '缺乏方向，延迟，挫折'},
-    {'number': 23, 'name': '权杖二', 'name_en': 'Two of Wands', 'arcana': 'minor', 'suit': 'wands', 'meaning': '计划，决策，发现', 'reversed': '犹豫不决，恐惧未知，缺乏计划'},
-]
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from app.utils.corpus import CorpusFile, DATA_DIR
+
+# 78张标准韦特塔罗牌（下标即牌号：0-21 大阿卡纳，22-77 依次为权杖、圣杯、宝剑、星币）
+# 每条记录包含 number/name/name_en/arcana/suit/meaning/reversed/description，
+# 存放在语料文件 data/tarot.bin 中按牌号懒加载（见 app.utils.corpus）
+TAROT_CARDS = CorpusFile(DATA_DIR / "tarot.bin")
+CARD_COUNT = 78
+
+
+class TarotCard(NamedTuple):
+    """不可变的牌记录"""
+    number: int
+    name: str
+    name_en: str
+    arcana: str
+    meaning: str
+    reversed: str
+    description: str
+    suit: Optional[str] = None
+
+
+@lru_cache(maxsize=CARD_COUNT)
+def get_card(number: int) -> TarotCard:
+    """按牌号取牌（首次访问时从语料解码，之后复用同一对象）"""
+    return TarotCard(**TAROT_CARDS[number])
+
+
+class SpreadPosition(NamedTuple):
+    """牌阵中的一个位置"""
+    name: str
+    meaning: str
+
+
+class Spread(NamedTuple):
+    """牌阵定义"""
+    key: str
+    name: str
+    positions: Tuple[SpreadPosition, ...]
+
+    @property
+    def position_names(self) -> Tuple[str, ...]:
+        return tuple(position.name for position in self.positions)
+
+
+def _spread(key: str, name: str, positions: List[Tuple[str, str]]) -> Spread:
+    return Spread(key, name, tuple(SpreadPosition(*position) for position in positions))
+
+
+# 牌阵定义（启动时编译一次）
+SPREADS: Dict[str, Spread] = {
+    spread.key: spread
+    for spread in (
+        _spread("single", "单张牌", [
+            ("当前", "当下最需要关注的核心讯息"),
+        ]),
+        _spread("three", "三张牌阵（过去/现在/未来）", [
+            ("过去", "影响此事的过往经历与成因"),
+            ("现在", "当前的处境与正在发生的变化"),
+            ("未来", "按目前方向发展的可能结果"),
+        ]),
+        _spread("cross", "凯尔特十字牌阵", [
+            ("现状", "问题的核心，问卜者此刻的处境"),
+            ("障碍", "横跨于现状之上的阻力或考验，可能助力也可能妨碍"),
+            ("目标", "意识层面的目标与期望，能达到的最好结果"),
+            ("基础", "潜意识中的根源，事情的深层基础"),
+            ("过去", "刚刚过去、正在远离的影响"),
+            ("未来", "即将到来的发展，近期会出现的情况"),
+            ("自己", "问卜者的态度、立场与自我认知"),
+            ("环境", "他人与外部环境对此事的影响"),
+            ("希望/恐惧", "内心的期盼与担忧，二者往往一体两面"),
+            ("结果", "综合以上因素，事情的最终走向"),
+        ]),
+        _spread("horseshoe", "马蹄铁牌阵", [
+            ("过去", "过往对此事的影响"),
+            ("现在", "当前的处境"),
+            ("隐藏因素", "尚未察觉、暗中起作用的因素"),
+            ("阻碍", "需要克服的困难"),
+            ("他人", "周围的人对此事的态度与影响"),
+            ("建议", "应当采取的行动方向"),
+            ("结果", "可能的结局"),
+        ]),
+        _spread("relationship", "关系牌阵", [
+            ("你", "你在这段关系中的状态与感受"),
+            ("对方", "对方在这段关系中的状态与感受"),
+            ("关系基础", "维系这段关系的根基"),
+            ("当前挑战", "这段关系目前面临的问题"),
+            ("未来走向", "关系的发展方向"),
+        ]),
+    )
+}
+# 别名
+SPREADS["celtic_cross"] = SPREADS["cross"]
+
+DEFAULT_SPREAD = SPREADS["single"]
+
+
+def get_spread(spread: str) -> Spread:
+    """获取牌阵定义，未知牌阵按单张牌处理"""
+    return SPREADS.get(spread, DEFAULT_SPREAD)
 
 
 def get_spread_positions(spread: str) -> List[str]:
     """获取牌阵位置"""
-    spreads = {
-        'single': ['当前'],
-        'three': ['过去', '现在', '未来'],
-        'cross': ['现状', '障碍', '目标', '基础', '过去', '未来', '自己', '环境', '希望/恐惧', '结果'],
-    }
-    return spreads.get(spread, ['当前'])
+    return list(get_spread(spread).position_names)
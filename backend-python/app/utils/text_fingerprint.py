@@ -0,0 +1,156 @@
+"""问题文本归一化与 SimHash 指纹
+
+归一化：NFKC（全角转半角）、转小写、去掉标点符号与空白，
+再去掉句首的客套/引导语（"请问"、"我应该"……）与句尾语气词（"吗"、"呢"……）。
+
+指纹：对归一化文本的字符 1-2 gram 取 64 位哈希，按位投票得到 64 位 SimHash，
+相近的文本指纹的汉明距离小。BandedIndex 把指纹切成若干段分别建索引，
+段数大于最大距离时（抽屉原理）距离不超过该值的指纹至少有一段完全相同，
+查找只需比较同段候选。
+"""
+
+import hashlib
+import unicodedata
+from typing import Dict, Generic, Hashable, List, Optional, Set, Tuple, TypeVar
+
+import numpy as np
+
+FINGERPRINT_BITS = 64
+
+# 句首引导语（按长度从长到短匹配，可连续去掉多个；不含单独的"我"与"我要不要"，
+# 否则"我们"、"要不要"这类词会被拆开或整个去掉）
+FILLER_PREFIXES = sorted([
+    "请问一下", "请问", "想问一下", "想问问", "我想问", "我想知道", "帮我看看", "帮我算算", "帮我算一下",
+    "麻烦问下", "大师", "老师", "你好", "您好", "我应该", "我该", "我想",
+], key=len, reverse=True)
+# 句尾语气词
+FILLER_SUFFIXES = ("吗", "呢", "吧", "啊", "呀", "嘛", "哦", "么")
+
+
+def _splits_word(prefix: str, rest: str) -> bool:
+    """去掉引导语后是否会拆开一个词：后接"们"（我们），或拆开"X不X"（该不该、应该不应该）"""
+    if rest.startswith("们"):
+        return True
+    if not rest.startswith("不"):
+        return False
+    return any(rest.startswith(prefix[-size:], 1) for size in range(1, len(prefix) + 1))
+
+
+def normalize_question(question: str) -> str:
+    """
+    归一化问题文本（用于判断两个问题是否只是写法不同）
+
+    Args:
+        question: 问题文本
+
+    Returns:
+        str: 归一化文本，可能为空
+    """
+    text = unicodedata.normalize("NFKC", question).lower()
+    text = "".join(ch for ch in text if unicodedata.category(ch)[0] not in "PSZC")
+    stripped = True
+    while stripped and text:
+        stripped = False
+        for prefix in FILLER_PREFIXES:
+            if (text.startswith(prefix) and len(text) > len(prefix)
+                    and not _splits_word(prefix, text[len(prefix):])):
+                text = text[len(prefix):]
+                stripped = True
+                break
+    while len(text) > 1 and text[-1] in FILLER_SUFFIXES:
+        text = text[:-1]
+    return text
+
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    shingles = list(text) + [text[i:i + 2] for i in range(len(text) - 1)]
+    digest = b"".join(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest() for s in shingles)
+    return np.frombuffer(digest, dtype=np.uint8).reshape(len(shingles), 8)
+
+
+def simhash(text: str) -> int:
+    """
+    64 位 SimHash（输入应为归一化文本；空文本返回 0）
+
+    Args:
+        text: 文本
+
+    Returns:
+        int: 指纹
+    """
+    if not text:
+        return 0
+    bits = np.unpackbits(_shingle_hashes(text), axis=1)          # (n, 64)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 > len(bits)     # 多数为 1 的位
+    return int.from_bytes(np.packbits(votes).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    """两个指纹的汉明距离"""
+    return (a ^ b).bit_count()
+
+
+K = TypeVar("K", bound=Hashable)
+
+
+class BandedIndex(Generic[K]):
+    """按段索引的指纹表，查找汉明距离不超过 max_distance 的最近指纹"""
+
+    def __init__(self, max_distance: int = 3):
+        # 段数取大于 max_distance 的最小 2 的幂，保证不漏
+        bands = 1
+        while bands <= max_distance:
+            bands *= 2
+        if bands > FINGERPRINT_BITS:
+            raise ValueError(f"max_distance 过大: {max_distance}")
+        self.max_distance = max_distance
+        self.bands = bands
+        self._width = FINGERPRINT_BITS // bands
+        self._mask = (1 << self._width) - 1
+        self._tables: List[Dict[int, Set[K]]] = [{} for _ in range(bands)]
+        self._fingerprints: Dict[K, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def _band_values(self, fingerprint: int):
+        width, mask = self._width, self._mask
+        return [(fingerprint >> (band * width)) & mask for band in range(self.bands)]
+
+    def add(self, key: K, fingerprint: int):
+        """登记（同一键重复登记时覆盖）"""
+        if key in self._fingerprints:
+            self.remove(key)
+        self._fingerprints[key] = fingerprint
+        for table, value in zip(self._tables, self._band_values(fingerprint)):
+            table.setdefault(value, set()).add(key)
+
+    def remove(self, key: K):
+        fingerprint = self._fingerprints.pop(key, None)
+        if fingerprint is None:
+            return
+        for table, value in zip(self._tables, self._band_values(fingerprint)):
+            bucket = table.get(value)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del table[value]
+
+    def nearest(self, fingerprint: int) -> Optional[Tuple[K, int]]:
+        """
+        距离最近且不超过 max_distance 的键
+
+        Returns:
+            (键, 距离)，没有时返回 None
+        """
+        best: Optional[Tuple[K, int]] = None
+        seen: Set[K] = set()
+        for table, value in zip(self._tables, self._band_values(fingerprint)):
+            for key in table.get(value, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                distance = hamming(fingerprint, self._fingerprints[key])
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (key, distance)
+        return best
@@ -0,0 +1,103 @@
+"""生成卦辞/塔罗语料文件（离线运行）
+
+源文件（便于审阅和修改的 JSON Lines，每行一条）：
+    scripts/corpus/hexagrams.jsonl  六十四卦：卦辞、彖辞、大象、六爻爻辞、运势摘要
+    scripts/corpus/tarot.jsonl      七十八张塔罗牌：正位/逆位牌义与牌面解读
+
+卦的上下卦与五行（所属八宫的五行）由 hexagram_data 的卦表推算，不在源文件中维护。
+爻辞以“初九/六二……”开头，生成时与卦画逐爻核对。
+
+输出：app/utils/data/hexagrams.bin、app/utils/data/tarot.bin（格式见 app.utils.corpus）
+
+运行：python scripts/build_corpus.py
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.corpus import CorpusFile, DATA_DIR
+from app.utils.hexagram_data import (
+    HEXAGRAM_NAMES, BITS_BY_KING_WEN, TRIGRAM_BY_BITS, PALACE_BY_BITS
+)
+
+SOURCE_DIR = Path(__file__).resolve().parent / "corpus"
+LINE_POSITIONS = ["初", "二", "三", "四", "五", "上"]
+TAROT_COUNT = 78
+
+
+def load_jsonl(path: Path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def line_label(index: int, yang: bool) -> str:
+    """爻题，如 初九、六二、上六"""
+    number = "九" if yang else "六"
+    if index in (0, 5):
+        return LINE_POSITIONS[index] + number
+    return number + LINE_POSITIONS[index]
+
+
+def build_hexagrams() -> list:
+    records = []
+    for number, source in enumerate(load_jsonl(SOURCE_DIR / "hexagrams.jsonl"), start=1):
+        if source["number"] != number or source["name"] != HEXAGRAM_NAMES[number - 1]:
+            raise ValueError(f"卦序不符: {source['number']} {source['name']}")
+        if len(source["lines"]) != 6:
+            raise ValueError(f"{source['name']}卦爻辞数量错误")
+
+        bits = BITS_BY_KING_WEN[number]
+        for index, text in enumerate(source["lines"]):
+            label = line_label(index, bool(bits >> index & 1))
+            if not text.startswith(label + "："):
+                raise ValueError(f"{source['name']}卦第{index + 1}爻应为{label}: {text}")
+
+        upper = TRIGRAM_BY_BITS[bits >> 3]
+        lower = TRIGRAM_BY_BITS[bits & 7]
+        palace = TRIGRAM_BY_BITS[PALACE_BY_BITS[bits] >> 3]
+        record = {
+            "number": number,
+            "name": source["name"],
+            "upper": upper["name"],
+            "lower": lower["name"],
+            "outcome": source["outcome"],
+            "summary": source["summary"],
+            "detail": source["detail"],
+            "wuxing": palace["wuxing"],
+            "judgment": source["judgment"],
+            "tuan": source["tuan"],
+            "image": source["image"],
+            "lines": source["lines"],
+        }
+        if "use" in source:
+            record["use"] = source["use"]
+        records.append(record)
+
+    if len(records) != 64:
+        raise ValueError(f"应为64卦，实际 {len(records)}")
+    return records
+
+
+def build_tarot() -> list:
+    records = load_jsonl(SOURCE_DIR / "tarot.jsonl")
+    if [card["number"] for card in records] != list(range(TAROT_COUNT)):
+        raise ValueError("塔罗牌应按 0-77 顺序排列")
+    for card in records:
+        for field in ("name", "name_en", "arcana", "meaning", "reversed", "description"):
+            if not card.get(field):
+                raise ValueError(f"第{card['number']}张牌缺少 {field}")
+    return records
+
+
+def main():
+    for name, records in (("hexagrams.bin", build_hexagrams()), ("tarot.bin", build_tarot())):
+        path = DATA_DIR / name
+        count = CorpusFile.write(path, records)
+        print(f"写入 {count} 条 -> {path}（{path.stat().st_size} 字节）")
+
+
+if __name__ == "__main__":
+    main()
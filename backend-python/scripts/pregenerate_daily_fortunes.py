@@ -0,0 +1,56 @@
+"""手动预生成每日运势（与夜间调度共用主节点锁和断点）
+
+调度未开启、或需要补跑某天时运行：
+    python scripts/pregenerate_daily_fortunes.py --date 2026-10-20 --concurrency 8 --rate 5
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.cache import close_redis, get_redis_cache
+from app.core.config import settings
+from app.core.database import close_db
+from app.services.daily_fortune_pregen import DailyFortunePregenerator
+
+
+async def run(args):
+    pregenerator = DailyFortunePregenerator(
+        cache=None if args.no_redis or not settings.REDIS_ENABLED else await get_redis_cache(),
+        concurrency=args.concurrency,
+        rate_per_second=args.rate,
+        batch_size=args.batch_size,
+        active_days=args.active_days,
+    )
+    state = await pregenerator.run(args.date)
+    await close_db()
+    await close_redis()
+    if not state.get("leader", True):
+        print("其他节点正在预生成，已跳过")
+        return
+    progress = "已完成" if state["done"] else f"中断于用户 {state['last_user_id']}，可再次运行继续"
+    print(f"{args.date}: 新生成 {state['generated']}，已存在 {state['existing']}，失败 {state['failed']}，{progress}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="预生成每日运势")
+    parser.add_argument("--date", type=date.fromisoformat, default=date.today() + timedelta(days=1),
+                        help="运势日期（默认明天）")
+    parser.add_argument("--concurrency", type=int, default=settings.DAILY_FORTUNE_PREGEN_CONCURRENCY,
+                        help="同时生成的用户数")
+    parser.add_argument("--rate", type=float, default=settings.DAILY_FORTUNE_PREGEN_RATE,
+                        help="LLM调用速率上限（次/秒，0 不限）")
+    parser.add_argument("--batch-size", type=int, default=settings.DAILY_FORTUNE_PREGEN_BATCH_SIZE,
+                        help="每批用户数")
+    parser.add_argument("--active-days", type=int, default=settings.DAILY_FORTUNE_PREGEN_ACTIVE_DAYS,
+                        help="最近登录天数内的用户算活跃")
+    parser.add_argument("--no-redis", action="store_true", help="不使用Redis（不选主、不记录断点）")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
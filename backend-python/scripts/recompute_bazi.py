@@ -0,0 +1,33 @@
+"""重算所有用户档案的命理信息（八字 / 生肖 / 农历生日 / 星座）
+
+历法或八字算法更新后运行一次：
+    python scripts/recompute_bazi.py --chunk-size 1000
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.database import async_session_maker, close_db
+from app.services.user_profile_service import UserProfileService
+
+
+async def run(chunk_size: int):
+    async with async_session_maker() as session:
+        result = await UserProfileService(session).recompute_destiny_all(chunk_size)
+    await close_db()
+    print(f"更新 {result['updated']} 条，跳过 {result['skipped']} 条（超出历法表范围）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重算用户档案命理信息")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="每批处理行数")
+    args = parser.parse_args()
+    asyncio.run(run(args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
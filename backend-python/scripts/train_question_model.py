@@ -0,0 +1,158 @@
+"""训练本地问题分析模型
+
+训练数据：
+- question_intents 表中 context.analysis.source == "llm" 的记录（LLM 标注的历史问题）
+- --jsonl 指定的导出文件，每行 {"question": ..., "question_type": ..., "sub_type": ...,
+  "intent": ..., "complexity": ...}，视为 LLM 标注
+- --bootstrap-rules：其余没有 LLM 标注的问题用规则引擎打标签补充训练集（不参与评估）
+
+按问题文本哈希留出一部分 LLM 标注样本做评估，报告各标签与 LLM 的一致率，
+以及不同置信度阈值下可本地回答（省去 LLM 调用）的比例。
+
+    python scripts/train_question_model.py --holdout 0.2 --epochs 10
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import async_session_maker, close_db
+from app.models.question_intent import QuestionIntent
+from app.services.question_analyzer import SOURCE_LLM, QuestionAnalyzer, question_model_path
+from app.utils.question_model import DEFAULT_DIM_BITS, LABEL_FIELDS, QuestionModel, evaluate
+
+THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95)
+
+
+async def load_intents() -> List[Tuple[str, Dict]]:
+    """读取意图记录中的问题与分析标签"""
+    rows = []
+    async with async_session_maker() as session:
+        result = await session.stream(
+            select(QuestionIntent.original_question, QuestionIntent.context).order_by(QuestionIntent.id)
+        )
+        async for question, context in result:
+            analysis = (context or {}).get("analysis") if isinstance(context, dict) else None
+            rows.append((question, analysis or {}))
+    await close_db()
+    return rows
+
+
+def load_jsonl(path: Path) -> List[Tuple[str, Dict]]:
+    """读取导出的 LLM 标注文件"""
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                rows.append((record.pop("question"), {**record, "source": SOURCE_LLM}))
+    return rows
+
+
+def is_labelled(analysis: Dict) -> bool:
+    return analysis.get("source") == SOURCE_LLM and all(analysis.get(field) for field in LABEL_FIELDS)
+
+
+def in_holdout(question: str, holdout: float) -> bool:
+    """按问题文本哈希划分，同一问题总在同一侧"""
+    return zlib.crc32(question.encode("utf-8")) % 10000 < holdout * 10000
+
+
+def build_dataset(rows: List[Tuple[str, Dict]], holdout: float, bootstrap_rules: bool):
+    # 同一问题以最后一条 LLM 标注为准
+    labelled: Dict[str, Dict[str, str]] = {}
+    unlabelled = set()
+    for question, analysis in rows:
+        question = question.strip()
+        if not question:
+            continue
+        if is_labelled(analysis):
+            labelled[question] = {field: analysis[field] for field in LABEL_FIELDS}
+        else:
+            unlabelled.add(question)
+
+    train, test = [], []
+    for question, label in labelled.items():
+        (test if in_holdout(question, holdout) else train).append((question, label))
+    bootstrapped = 0
+    if bootstrap_rules:
+        analyzer = QuestionAnalyzer()
+        for question in sorted(unlabelled - labelled.keys()):
+            analysis = analyzer._fallback_analysis(question)
+            train.append((question, {field: getattr(analysis, field) for field in LABEL_FIELDS}))
+            bootstrapped += 1
+    return train, test, bootstrapped
+
+
+def print_report(report: Dict):
+    print(f"评估样本 {report['samples']} 条（与 LLM 标注对比）")
+    for field, accuracy in report["accuracy"].items():
+        print(f"  {field:<14} {accuracy:7.2%}")
+    print(f"  {'四项全对':<12} {report['exact']:7.2%}")
+    print("  阈值   本地回答(省去LLM调用)   本地回答部分四项全对")
+    for row in report["thresholds"]:
+        print(f"  {row['threshold']:.2f}   {row['coverage']:18.2%}   {row['exact']:18.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="训练本地问题分析模型")
+    parser.add_argument("--jsonl", type=Path, action="append", default=[], help="额外的 LLM 标注文件（可多次指定）")
+    parser.add_argument("--no-db", action="store_true", help="不读取 question_intents 表")
+    parser.add_argument("--bootstrap-rules", action="store_true", help="没有 LLM 标注的问题用规则引擎标签补充训练")
+    parser.add_argument("--holdout", type=float, default=0.2, help="留作评估的 LLM 标注样本比例")
+    parser.add_argument("--epochs", type=int, default=10, help="训练轮数")
+    parser.add_argument("--dim-bits", type=int, default=DEFAULT_DIM_BITS, help="特征哈希维度位数")
+    parser.add_argument("--output", type=Path, default=None, help="模型输出路径（默认 QUESTION_MODEL_PATH）")
+    parser.add_argument("--dry-run", action="store_true", help="只评估，不保存模型")
+    args = parser.parse_args()
+
+    rows = [] if args.no_db else asyncio.run(load_intents())
+    for path in args.jsonl:
+        rows.extend(load_jsonl(path))
+    train, test, bootstrapped = build_dataset(rows, args.holdout, args.bootstrap_rules)
+    print(f"训练样本 {len(train)} 条（其中规则引擎标注 {bootstrapped} 条），评估样本 {len(test)} 条")
+    if not train:
+        print("没有可用的训练样本")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    model = QuestionModel.train(
+        [question for question, _ in train], [label for _, label in train],
+        dim_bits=args.dim_bits, epochs=args.epochs,
+    )
+    print(f"训练耗时 {time.perf_counter() - start:.1f} s")
+
+    report = evaluate(model, [q for q, _ in test], [label for _, label in test], THRESHOLDS)
+    if test:
+        print_report(report)
+        start = time.perf_counter()
+        for question, _ in test:
+            model.predict(question)
+        print(f"推理 {(time.perf_counter() - start) / len(test) * 1e6:.0f} us/问")
+
+    model.meta = {
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+        "train_samples": len(train),
+        "bootstrapped": bootstrapped,
+        "holdout": report,
+    }
+    if args.dry_run:
+        return
+    output = args.output or question_model_path()
+    model.save(output)
+    print(f"模型已保存：{output}（当前阈值 {settings.QUESTION_MODEL_THRESHOLD}，重启服务后生效）")
+
+
+if __name__ == "__main__":
+    main()
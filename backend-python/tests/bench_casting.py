@@ -0,0 +1,39 @@
+"""起卦基准
+
+对比兼容模式（每枚硬币一次MD5，每卦18次）与单次带密钥摘要的起卦耗时，
+以及起卦审计的向量化统计吞吐。
+
+运行：python -m tests.bench_casting
+"""
+
+import time
+from app.services.iching_service import IChingService, CAST_MODE_MD5, CAST_MODE_DIGEST
+from app.services.casting_audit_service import CastingAuditService
+
+CASTS = 50000
+
+
+def measure_cast(mode: str) -> float:
+    """返回每卦平均耗时（微秒）"""
+    start = time.perf_counter()
+    for i in range(CASTS):
+        IChingService.generate_six_lines(f"bench-{i}", mode)
+    return (time.perf_counter() - start) / CASTS * 1e6
+
+
+def main():
+    print(f"起卦 {CASTS} 次")
+    for mode in (CAST_MODE_MD5, CAST_MODE_DIGEST):
+        print(f"  {mode:<8} {measure_cast(mode):8.2f} us/卦")
+
+    for mode, samples in (("model", 5_000_000), (CAST_MODE_DIGEST, 1_000_000)):
+        report = CastingAuditService.run(samples, mode, seed=1)
+        print(
+            f"审计 {mode:<8} {samples:>9} 卦  生成 {report['cast_ms']:8.1f} ms"
+            f"  总计 {report['elapsed_ms']:8.1f} ms"
+            f"  卦频 p={report['hexagrams_test']['p_value']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
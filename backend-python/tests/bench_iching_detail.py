@@ -0,0 +1,39 @@
+"""卦象解释渲染基准
+
+对比每次起卦都重新渲染解释（旧行为）与按 (卦, 变爻掩码) 缓存后的单次起卦CPU耗时。
+
+运行：python -m tests.bench_iching_detail
+"""
+
+import time
+from app.services.iching_service import IChingService
+
+CASTS = 20000
+
+
+def measure(warm: bool) -> float:
+    """返回每卦平均CPU耗时（微秒）"""
+    IChingService.detail_cache_clear()
+    if warm:
+        IChingService.warm_detail_cache()
+
+    start = time.process_time()
+    for i in range(CASTS):
+        if not warm:
+            IChingService.detail_cache_clear()
+        IChingService.generate_result(f"bench-{i}", "问题")
+    return (time.process_time() - start) / CASTS * 1e6
+
+
+def main():
+    start = time.perf_counter()
+    IChingService.warm_detail_cache()
+    print(f"预渲染 64×64 种解释：{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    print(f"起卦 {CASTS} 次（含摘要起卦与结果组装）")
+    print(f"  每次渲染   {measure(warm=False):8.2f} us/卦")
+    print(f"  缓存命中   {measure(warm=True):8.2f} us/卦")
+
+
+if __name__ == "__main__":
+    main()
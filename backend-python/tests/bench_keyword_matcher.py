@@ -0,0 +1,268 @@
+"""关键词匹配基准
+
+对比旧实现（问题分类、降级分析、方位推荐各自在调用时构造词表、逐个子串查找）
+与当前实现（词表提升为模块常量）在大批问题上的耗时，并给出
+列出全部词表命中的两种做法作参照：逐词子串查找，与一次扫描（一个编译好的正则，C 实现）。
+当前词表规模（百余个短词）下单次扫描反而更慢，因此各引擎仍逐词查找。
+旧实现保留在本文件中，同时作为 tests/test_keyword_matcher.py 的对照。
+
+运行：python -m tests.bench_keyword_matcher
+"""
+
+import random
+import re
+import time
+from typing import Any, Callable, Dict, List, Set, Tuple
+from app.services.orientation_service import BAGUA_KEYWORD_RULES, TAROT_KEYWORD_RULES, match_keyword_rule
+from app.services.question_analyzer import RULES, QuestionAnalyzer
+from app.services.question_classifier import (
+    COMPANY_KEYWORDS, DECISION_KEYWORDS, FORTUNE_KEYWORDS, INDUSTRIES, RECOMMENDATION_KEYWORDS, QuestionClassifier
+)
+
+QUESTIONS = 20000
+
+_FRAGMENTS = [
+    "我应该", "还是", "或者", "跳槽", "去大厂", "留在老家", "最近", "但是", "不过", "可是", "然而",
+    "喜欢的人", "他", "她", "对象", "表白", "结婚", "分手", "工作", "面试", "老板", "同事",
+    "今年的运势", "本月财运", "桃花运", "今日", "是什么意思", "为什么", "怎么理解", "什么时候", "何时",
+    "要不要", "该不该", "能不能", "吃什么好", "去哪玩", "推荐", "看什么电影", "互联网", "金融", "公司",
+    "学习", "考试", "焦虑", "冷静", "规划", "稳定", "积累", "机缘", "顺势", "家庭", "母亲",
+    "money", "Health", "FINANCE", "practical", "A方案", "B方案", "也", "又", "还", "，", "。", "？",
+    "换个城市生活", "和朋友合伙创业", "买房", "投资", "心里很乱", "不知道怎么办",
+]
+
+
+def question_corpus(count: int = QUESTIONS, seed: int = 7) -> List[str]:
+    """合成问题语料（由常见片段随机拼接，长度 2-40 段）"""
+    rng = random.Random(seed)
+    return ["".join(rng.choices(_FRAGMENTS, k=rng.randint(2, 40))) for _ in range(count)]
+
+
+def legacy_classify(question: str) -> Tuple[str, float, List[str], Dict[str, Any]]:
+    """旧版 QuestionClassifier.classify"""
+    classifier = QuestionClassifier()
+    question = question.strip()
+    if not question:
+        return "recommendation", 0.5, [], {}
+    lower_question = question.lower()
+    counts = []
+    matched_keywords = []
+    for keywords in (classifier.recommendation_keywords, classifier.decision_keywords, classifier.fortune_keywords):
+        count = 0
+        for keyword in keywords:
+            if keyword in question or keyword.lower() in lower_question:
+                count += 1
+                matched_keywords.append(keyword)
+        counts.append(count)
+    recommendation_count, decision_count, fortune_count = counts
+    if decision_count > 0:
+        q_type, confidence = "decision", classifier._calculate_confidence(decision_count, len(classifier.decision_keywords))
+    elif fortune_count > 0:
+        q_type, confidence = "fortune", classifier._calculate_confidence(fortune_count, len(classifier.fortune_keywords))
+    elif recommendation_count > 0:
+        q_type, confidence = "recommendation", classifier._calculate_confidence(
+            recommendation_count, len(classifier.recommendation_keywords))
+    else:
+        q_type, confidence = "recommendation", 0.3
+
+    context = {}
+    if "公司" in question or "企业" in question:
+        context["has_company"] = True
+    for industry in ["互联网", "金融", "教育", "医疗", "房地产", "制造业"]:
+        if industry in question:
+            context["industry"] = industry
+            break
+    if "A" in question and "B" in question:
+        context["has_options"] = True
+        context["option_count"] = 2
+    return q_type, confidence, matched_keywords, context
+
+
+def legacy_fallback_analysis(question: str) -> Dict[str, Any]:
+    """旧版 QuestionAnalyzer._fallback_analysis（返回各字段）"""
+    question_type, sub_type, intent = "decision", "open_ended", "guidance"
+    elements: Dict[str, str] = {}
+    keywords: List[str] = []
+
+    if "还是" in question or "或者" in question:
+        question_type, sub_type, intent = "decision", "binary_choice", "binary_choice"
+        if "还是" in question:
+            parts = question.split("还是", 1)
+            if len(parts) >= 2:
+                option_a = parts[0].strip()
+                option_b = parts[1].strip()
+                for prefix in ["我应该", "应该", "要不要", "该不该", "是"]:
+                    if option_a.startswith(prefix):
+                        option_a = option_a[len(prefix):].strip()
+                option_b = option_b.rstrip("？?。.")
+                elements["option_a"] = option_a
+                elements["option_b"] = option_b
+
+    for keyword in ["恋爱", "喜欢", "爱", "感情", "结婚", "分手", "追", "表白", "相亲", "约会"]:
+        if keyword in question:
+            if question_type == "decision":
+                question_type = "relationship"
+            if keyword not in keywords:
+                keywords.append(keyword)
+    for keyword in ["工作", "事业", "职业", "跳槽", "升职", "面试", "公司", "老板", "同事"]:
+        if keyword in question:
+            if question_type == "decision":
+                question_type = "career"
+            if keyword not in keywords:
+                keywords.append(keyword)
+    for keyword in ["运势", "运气", "今日", "本周", "本月", "今年", "财运", "桃花运"]:
+        if keyword in question:
+            question_type = "fortune"
+            if keyword not in keywords:
+                keywords.append(keyword)
+            break
+    for keyword in ["是什么", "什么意思", "解释", "含义", "为什么", "怎么理解"]:
+        if keyword in question:
+            question_type, sub_type, intent = "knowledge", "open_ended", "understanding"
+            if keyword not in keywords:
+                keywords.append(keyword)
+            break
+    if any(kw in question for kw in ["应该", "要不要", "该不该", "能不能", "可不可以"]):
+        if sub_type != "binary_choice":
+            sub_type, intent = "yes_no", "yes_no"
+    if any(kw in question for kw in ["什么时候", "何时", "时机", "几时", "哪天"]):
+        sub_type, intent = "timing", "timing"
+        elements["time_frame"] = "未指定"
+    concern_count = 0
+    for marker in ["但是", "不过", "可是", "然而"]:
+        if marker in question:
+            concern_count += 1
+            parts = question.split(marker, 1)
+            if len(parts) > 1:
+                elements[f"concern_{concern_count}"] = parts[1].split("。")[0].split("，")[0].strip()
+
+    score = 0
+    if "但是" in question or "不过" in question or "可是" in question:
+        score += 1
+    if "又" in question or "也" in question or "还" in question:
+        score += 1
+    if len(question) > 50:
+        score += 1
+    if len(question) > 100:
+        score += 1
+    if len(keywords) >= 3:
+        score += 1
+    if any(kw in question for kw in ["最近", "现在", "未来", "以后"]):
+        score += 0.5
+    complexity = "high" if score >= 3 else "medium" if score >= 1.5 else "simple"
+
+    if question_type == "relationship":
+        for keyword in ["他", "她", "男友", "女友", "对象", "喜欢的人"]:
+            if keyword in question:
+                elements["target_person"] = keyword
+                break
+
+    return {
+        "question_type": question_type, "sub_type": sub_type, "elements": elements,
+        "intent": intent, "complexity": complexity, "keywords": keywords,
+    }
+
+
+def legacy_orientation(question: str, rules) -> str:
+    """旧版方位推荐的关键词微调（返回命中的方位，未命中为空）"""
+    q = question.lower().strip()
+    for key, keywords, _ in rules:
+        if any(keyword in q for keyword in keywords):
+            return key
+    return ""
+
+
+def legacy_pipeline(question: str):
+    return (
+        legacy_classify(question),
+        legacy_fallback_analysis(question),
+        legacy_orientation(question, BAGUA_KEYWORD_RULES),
+        legacy_orientation(question, TAROT_KEYWORD_RULES),
+    )
+
+
+def all_keywords() -> List[str]:
+    """各引擎词表的并集（小写）"""
+    vocabularies = (
+        RECOMMENDATION_KEYWORDS, DECISION_KEYWORDS, FORTUNE_KEYWORDS, COMPANY_KEYWORDS, INDUSTRIES,
+        *RULES.values(), *(keywords for _, keywords, _ in BAGUA_KEYWORD_RULES + TAROT_KEYWORD_RULES),
+    )
+    return sorted({keyword.lower() for vocabulary in vocabularies for keyword in vocabulary})
+
+
+def single_pass_scanner(words: List[str]) -> Callable[[str], Set[str]]:
+    """
+    一次扫描列出小写文本中出现的全部关键词
+
+    全部词表按字典树展开成一个正则，首字符集让引擎跳过不可能命中的位置；每次只消耗一个字符，
+    回顾断言内的前瞻取出该位置最长的命中，同一位置更短的命中由前缀表补全，重叠命中不会漏掉。
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def branch(node) -> str:
+        alternatives = [re.escape(char) + branch(child) for char, child in sorted(node.items()) if char]
+        if not alternatives:
+            return ""
+        body = alternatives[0] if len(alternatives) == 1 else f"(?:{'|'.join(alternatives)})"
+        return f"(?:{body})?" if "" in node else body
+
+    first = "".join(sorted({word[0] for word in words}))
+    pattern = re.compile(f"[{re.escape(first)}](?<=(?=({branch(trie)})).)")
+    prefixes = {word: {other for other in words if other != word and word.startswith(other)} for word in words}
+    prefixes = {word: shorter for word, shorter in prefixes.items() if shorter}
+
+    def scan(text: str) -> Set[str]:
+        found = set(pattern.findall(text))
+        for word in prefixes.keys() & found:
+            found |= prefixes[word]
+        return found
+
+    return scan
+
+
+def pipeline(question: str, classifier: QuestionClassifier, analyzer: QuestionAnalyzer):
+    return (
+        classifier.classify(question),
+        analyzer._fallback_analysis(question),
+        match_keyword_rule(question, BAGUA_KEYWORD_RULES),
+        match_keyword_rule(question, TAROT_KEYWORD_RULES),
+    )
+
+
+def main():
+    questions = question_corpus()
+    chars = sum(len(q) for q in questions)
+    print(f"问题 {len(questions)} 条，平均 {chars / len(questions):.0f} 字")
+
+    words = all_keywords()
+    scan = single_pass_scanner(words)
+    lowered = [question.lower() for question in questions]
+    for name, find in (
+        ("全部词表逐词子串查找", lambda text: {word for word in words if word in text}),
+        ("全部词表单次正则扫描", scan),
+    ):
+        start = time.perf_counter()
+        for text in lowered:
+            find(text)
+        print(f"  {name} {(time.perf_counter() - start) / len(questions) * 1e6:8.2f} us/问")
+
+    start = time.perf_counter()
+    for question in questions:
+        legacy_pipeline(question)
+    print(f"  旧版逐词查找（全部规则） {(time.perf_counter() - start) / len(questions) * 1e6:8.2f} us/问")
+
+    classifier = QuestionClassifier()
+    analyzer = QuestionAnalyzer()
+    start = time.perf_counter()
+    for question in questions:
+        pipeline(question, classifier, analyzer)
+    print(f"  模块常量（全部规则）   {(time.perf_counter() - start) / len(questions) * 1e6:8.2f} us/问")
+
+
+if __name__ == "__main__":
+    main()
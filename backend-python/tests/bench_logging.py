@@ -0,0 +1,76 @@
+"""日志开销基准
+
+模拟一次占卜请求路径上的日志调用（约 3 条 INFO、15 条 DEBUG），
+分别测量 print()、INFO 级别、DEBUG 级别（全量/采样）下每个请求的耗时。
+print() 写入行缓冲的 /dev/null（每行一次 write 系统调用，与容器内 stdout 管道一致）；
+日志写入空流，耗时为请求线程中的开销（含后台线程格式化时对GIL的争用）。
+
+运行：python -m tests.bench_logging
+"""
+
+import io
+import os
+import sys
+import time
+from app.core.logger import setup_logging, shutdown_logging, get_logger
+
+REQUESTS = 20000
+INFO_PER_REQUEST = 3
+DEBUG_PER_REQUEST = 15
+
+
+class NullStream(io.TextIOBase):
+    """丢弃输出，只测量日志系统本身的开销"""
+
+    def write(self, s):
+        return len(s)
+
+
+def request_with_print():
+    for i in range(INFO_PER_REQUEST + DEBUG_PER_REQUEST):
+        print(f"[DEBUG] 步骤 {i}, question_type=decision, session_id=abc123")
+
+
+def request_with_logger(logger):
+    for i in range(INFO_PER_REQUEST):
+        logger.info("步骤 %s", i, extra={"session_id": "abc123"})
+    for i in range(DEBUG_PER_REQUEST):
+        logger.debug("步骤 %s", i, extra={"question_type": "decision"})
+
+
+def measure(func, *args) -> float:
+    """返回每个请求的平均耗时（微秒），只计请求线程中的耗时"""
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        func(*args)
+    return (time.perf_counter() - start) / REQUESTS * 1e6
+
+
+def main():
+    results = {}
+
+    stdout = sys.stdout
+    with open(os.devnull, "w", buffering=1) as devnull:
+        sys.stdout = devnull
+        try:
+            results["print()"] = measure(request_with_print)
+        finally:
+            sys.stdout = stdout
+
+    logger = get_logger("bench")
+    for label, level, rate in [
+        ("INFO", "INFO", 1.0),
+        ("DEBUG", "DEBUG", 1.0),
+        ("DEBUG 采样10%", "DEBUG", 0.1),
+    ]:
+        setup_logging(level, json_format=True, debug_sample_rate=rate, stream=NullStream())
+        results[label] = measure(request_with_logger, logger)
+        shutdown_logging()
+
+    print(f"每请求 {INFO_PER_REQUEST} 条INFO + {DEBUG_PER_REQUEST} 条DEBUG，{REQUESTS} 次请求")
+    for label, us in results.items():
+        print(f"  {label:<16} {us:8.2f} us/请求")
+
+
+if __name__ == "__main__":
+    main()
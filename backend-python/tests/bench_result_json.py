@@ -0,0 +1,142 @@
+"""占卜结果读取吞吐基准
+
+对比 GET /divinations/{session_id} 每次从会话记录构建 DivinationResult 并按 response_model
+序列化（旧行为，默认 JSONResponse）与直接返回完成时序列化好的字节（orjson）的每秒请求数。
+两种路径使用同一个进程内 SQLite 会话记录，差异只在结果构建与序列化；
+请求在同一事件循环内直接调用 ASGI 应用，不经过网络与 TestClient 的线程切换。
+另外单独测量不含数据库查询与路由开销时，每次读取花在结果构建与序列化上的CPU时间。
+
+运行：python -m tests.bench_result_json
+"""
+
+import asyncio
+import json
+import time
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from app.api.v1 import divination
+from app.core.database import get_db
+from app.core.responses import RawJSONResponse, dump_model
+from app.dependencies import get_current_user
+from app.models.divination import DivinationSession
+from app.schemas.divination import DivinationResult
+from app.services.divination_service import DivinationService
+from app.services.iching_service import IChingService
+from tests.test_daily_fortune_pregen import AsyncSessionAdapter
+
+REQUESTS = 3000
+RENDERS = 20000
+SESSION_ID = "bench-session"
+
+
+def make_app(engine) -> FastAPI:
+    app = FastAPI()
+
+    async def db():
+        session = AsyncSessionAdapter(Session(engine))
+        try:
+            yield session
+            await session.commit()
+        finally:
+            await session.__aexit__(None, None, None)
+
+    @app.get("/before/{session_id}", response_model=DivinationResult, response_class=JSONResponse)
+    async def before(session_id: str, session=Depends(get_db)):
+        return await DivinationService(session).get_result(session_id)
+
+    app.include_router(divination.router, prefix="/divinations")
+    app.dependency_overrides[get_db] = db
+    app.dependency_overrides[get_current_user] = lambda: None
+    app.state.engine = engine
+    return app
+
+
+async def get(app: FastAPI, path: str):
+    """直接调用 ASGI 应用，返回 (状态码, 响应体)"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [], "client": ("bench", 0), "server": ("bench", 80),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return messages[0]["status"], body
+
+
+async def measure(app: FastAPI, path: str) -> float:
+    """返回每秒请求数"""
+    for _ in range(100):
+        await get(app, path)
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        status, _ = await get(app, path)
+    assert status == 200
+    return REQUESTS / (time.perf_counter() - start)
+
+
+async def render_cost(render) -> float:
+    """返回每次构建响应体的平均CPU耗时（微秒）"""
+    start = time.process_time()
+    for _ in range(RENDERS):
+        await render()
+    return (time.process_time() - start) / RENDERS * 1e6
+
+
+def main():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    DivinationSession.__table__.create(engine)
+    result = IChingService.generate_result(SESSION_ID, "我应该跳槽吗")
+    with Session(engine) as session:
+        session.add(DivinationSession(id=SESSION_ID, user_id="1", version="CN", question="我应该跳槽吗",
+                                      status="completed", result_summary=result["summary"],
+                                      result_detail=result["detail"], result_data=result))
+        session.commit()
+
+    asyncio.run(run(make_app(engine)))
+
+
+async def run(app: FastAPI):
+    _, before = await get(app, f"/before/{SESSION_ID}")
+    _, after = await get(app, f"/divinations/{SESSION_ID}")
+    assert json.loads(before) == json.loads(after)
+    print(f"GET 占卜结果 {REQUESTS} 次（响应 {len(after)} 字节，进程内直接调用 ASGI）")
+
+    rps_before = await measure(app, f"/before/{SESSION_ID}")
+    rps_after = await measure(app, f"/divinations/{SESSION_ID}")
+    print(f"  构建模型 + JSONResponse   {rps_before:8.0f} req/s")
+    print(f"  预序列化字节（orjson）    {rps_after:8.0f} req/s  ({rps_after / rps_before:.2f}x)")
+
+    route = next(route for route in app.routes if getattr(route, "path", "") == "/before/{session_id}")
+    with Session(app.state.engine) as db:
+        session = db.get(DivinationSession, SESSION_ID)
+        stored = dump_model(DivinationService._to_result(session))
+
+        async def rebuild():
+            result = DivinationService._to_result(session)
+            content = await serialize_response(field=route.response_field, response_content=result)
+            return JSONResponse(content).body
+
+        async def raw():
+            return RawJSONResponse(stored).body
+
+        print(f"结果构建与序列化 {RENDERS} 次（不含数据库与路由）")
+        us_before = await render_cost(rebuild)
+        us_after = await render_cost(raw)
+        print(f"  构建模型 + JSONResponse   {us_before:8.2f} us/次")
+        print(f"  预序列化字节（orjson）    {us_after:8.2f} us/次  ({us_before / us_after:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
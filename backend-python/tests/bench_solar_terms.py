@@ -0,0 +1,62 @@
+"""节气批量查询基准
+
+对 1900-2100 范围内的随机日期查询“当天节气”和“月柱”，比较：
+- 线性扫描（逐项比较节气日表）
+- bisect 二分查找（SolarTermTable.term_on / month_ganzhi_index）
+- NumPy searchsorted 批量二分（solar_to_lunar_range 所用方式）
+
+运行：python -m tests.bench_solar_terms
+"""
+
+import random
+import time
+from datetime import date, timedelta
+import numpy as np
+from app.utils.calendar import SolarTermTable
+
+LOOKUPS = 200000
+
+
+def linear_month_index(day_number: int) -> int:
+    index = -1
+    for i, term_day in enumerate(SolarTermTable._days):
+        if term_day > day_number:
+            break
+        index = i
+    return index
+
+
+def main():
+    random.seed(1)
+    first = date(1900, 1, 31)
+    span = (date(2100, 12, 31) - first).days
+    days = [first + timedelta(days=random.randrange(span)) for _ in range(LOOKUPS)]
+    day_numbers = [(day - SolarTermTable.BASE_DATE).days for day in days]
+
+    start = time.perf_counter()
+    for day_number in day_numbers[:2000]:
+        linear_month_index(day_number)
+    linear = (time.perf_counter() - start) / 2000
+
+    start = time.perf_counter()
+    for day in days:
+        SolarTermTable.term_on(day)
+        SolarTermTable.month_ganzhi_index(day)
+    bisected = (time.perf_counter() - start) / LOOKUPS
+
+    term_days = SolarTermTable.days_numpy()
+    numbers = np.array(day_numbers)
+    start = time.perf_counter()
+    index = np.searchsorted(term_days, numbers, side="right") - 1
+    _ = term_days[np.maximum(index, 0)] == numbers
+    _ = (index // 2 + 13) % 60
+    vectorized = (time.perf_counter() - start) / LOOKUPS
+
+    print(f"{LOOKUPS} 次随机日期查询（节气表 {len(SolarTermTable._days)} 项）")
+    print(f"  线性扫描         {linear * 1e6:10.3f} us/次")
+    print(f"  bisect           {bisected * 1e6:10.3f} us/次（节气+月柱）")
+    print(f"  numpy批量二分    {vectorized * 1e6:10.3f} us/次（节气+月柱）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""测试黄历服务（按日期LRU缓存）"""
+
+import asyncio
+import dataclasses
+import pytest
+from datetime import date, datetime
+from app.core.config import settings
+from app.services.almanac_service import AlmanacService
+from app.services.daily_fortune_service import DailyFortuneService
+from app.services.time_convert_service import TimeConvertService
+from app.utils.calendar import CalendarConverter
+from tests.test_daily_fortune_cohort import fortune_response
+
+
+def test_almanac_day_is_frozen_and_slotted():
+    day = AlmanacService.get_day(date(2026, 2, 17))
+    assert day.lunar_festival == "春节"
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        day.term = "立春"
+    assert not hasattr(day, "__dict__")
+
+
+def test_to_dict_matches_converter_and_computes_is_today_at_edge():
+    """to_dict 与 solar_to_lunar 一致，is_today 由调用时的日期决定"""
+    day = date(2024, 3, 20)
+    almanac = AlmanacService.get_day(day)
+    assert almanac.to_dict() == CalendarConverter.solar_to_lunar(2024, 3, 20)
+    assert almanac.to_dict(today=day)["is_today"] is True
+    assert almanac.to_dict(today=date(2024, 3, 21))["is_today"] is False
+
+
+def test_service_methods_compute_each_date_once():
+    """同一天的多个查询只计算一次"""
+    AlmanacService.cache_clear()
+    service = TimeConvertService()
+    moment = datetime(2024, 12, 21, 9, 30)
+
+    assert service.get_solar_term(moment) == "冬至"
+    assert service.get_festivals(moment) == []
+    assert service.get_daily_info(moment)["lunar_day_cn"] == "廿一"
+    assert service.solar_to_lunar(2024, 12, 21)["term"] == "冬至"
+
+    info = AlmanacService.cache_info()
+    assert (info.misses, info.hits) == (1, 3)
+
+
+def test_lunar_to_solar_uses_almanac():
+    result = TimeConvertService().lunar_to_solar(2026, 1, 1)
+    assert (result["solar_month"], result["solar_day"]) == (2, 17)
+    assert result["festival"] == "" and result["lunar_festival"] == "春节"
+
+
+class FakeRepository:
+    def __init__(self):
+        self.created = None
+
+    async def get_by_user_and_date(self, user_id, fortune_date):
+        return None
+
+    async def create(self, user_id, fortune_date, **fields):
+        self.created = {"user_id": user_id, "date": fortune_date, **fields}
+        return self.created
+
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    async def generate(self, prompt):
+        self.prompts.append(prompt)
+        return fortune_response("今日宜静。")
+
+
+def test_daily_fortune_uses_almanac(monkeypatch):
+    """运势生成写入节气与节日，并把历法信息放入提示词（逐用户生成；群组生成见 test_daily_fortune_cohort）"""
+    monkeypatch.setattr(settings, "DAILY_FORTUNE_COHORT_ENABLED", False)
+    service = DailyFortuneService.__new__(DailyFortuneService)
+    service.repository = FakeRepository()
+    service.llm_service = FakeLLM()
+
+    fortune = asyncio.run(service.generate_daily_fortune("guest", date(2026, 2, 4)))
+
+    assert fortune["solar_term"] == "立春"
+    assert fortune["summary"] == "今日宜静。"
+    assert "立春" in service.llm_service.prompts[0]
+    assert "乙巳年 庚寅月" in service.llm_service.prompts[0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,145 @@
+"""问题分析近似重复缓存测试"""
+
+import asyncio
+import random
+import pytest
+from app.services.analysis_cache import AnalysisCache
+from app.services.question_analyzer import SOURCE_CACHE, SOURCE_LLM, QuestionAnalyzer
+from app.utils.question_model import LABEL_FIELDS
+from app.utils.text_fingerprint import BandedIndex, hamming, normalize_question, simhash
+
+LLM_RESPONSE = (
+    '{"question_type": "career", "sub_type": "binary_choice", '
+    '"elements": {"option_a": "去大厂", "option_b": "留在老家"}, '
+    '"intent": "binary_choice", "complexity": "medium", "keywords": ["跳槽"]}'
+)
+
+
+class FakeLLM:
+    def __init__(self, response: str = LLM_RESPONSE):
+        self.response = response
+        self.calls = 0
+
+    async def generate_answer(self, prompt: str) -> str:
+        self.calls += 1
+        return self.response
+
+
+@pytest.mark.parametrize("variant", [
+    "我应该跳槽去大厂还是留在老家？",
+    "请问，我应该跳槽去大厂还是留在老家呢",
+    "跳槽去大厂还是留在老家",
+    "我应该跳槽去大厂还是留在老家？？！",
+    "我应该跳槽去大厂还是留在老家?",
+    "跳槽 去大厂 还是 留在老家 吗",
+])
+def test_normalize_folds_trivial_variations(variant):
+    assert normalize_question(variant) == "跳槽去大厂还是留在老家"
+
+
+def test_normalize_keeps_short_questions():
+    assert normalize_question("吗") == "吗"
+    assert normalize_question("我") == "我"
+    assert normalize_question("？！") == ""
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("我们会分手吗", "我们会分手"),
+    ("请问我们会分手吗", "我们会分手"),
+    ("我该不该跳槽", "我该不该跳槽"),
+    ("我应该不应该辞职", "我应该不应该辞职"),
+    ("我要不要跳槽", "我要不要跳槽"),
+    ("我想不想去", "我想不想去"),
+    ("我该辞职吗", "辞职"),
+])
+def test_normalize_does_not_split_words(question, expected):
+    assert normalize_question(question) == expected
+
+
+def test_simhash_distance_reflects_similarity():
+    base = simhash(normalize_question("今年的财运怎么样"))
+    assert hamming(base, simhash(normalize_question("今年财运怎么样？"))) <= 3
+    assert hamming(base, simhash(normalize_question("我应该跳槽去大厂还是留在老家"))) > 10
+    assert simhash("") == 0
+
+
+def test_banded_index_finds_every_fingerprint_within_distance():
+    rng = random.Random(3)
+    index = BandedIndex(max_distance=3)
+    fingerprints = {f"k{i}": rng.getrandbits(64) for i in range(500)}
+    for key, fingerprint in fingerprints.items():
+        index.add(key, fingerprint)
+    for key, fingerprint in list(fingerprints.items())[:100]:
+        flipped = fingerprint
+        for bit in rng.sample(range(64), 3):
+            flipped ^= 1 << bit
+        assert index.nearest(flipped) == (key, 3)
+    index.remove("k0")
+    assert index.nearest(fingerprints["k0"]) is None
+    assert len(index) == 499
+
+
+def test_cache_exact_near_miss_and_lru_eviction():
+    cache = AnalysisCache(capacity=2, max_distance=3, labels=LABEL_FIELDS)
+    snapshot = {"question_type": "fortune", "sub_type": "open_ended", "intent": "guidance", "complexity": "simple"}
+    cache.store("今年的财运怎么样", snapshot)
+
+    hit = cache.lookup("请问今年的财运怎么样？")
+    assert hit.exact and hit.distance == 0 and hit.snapshot == snapshot
+    hit = cache.lookup("今年财运怎么样")
+    assert not hit.exact and 0 < hit.distance <= 3
+    assert cache.lookup("我应该跳槽去大厂还是留在老家") is None
+
+    cache.store("我应该跳槽去大厂还是留在老家", snapshot)
+    cache.store("他喜欢我吗", snapshot)
+    assert cache.lookup("今年的财运怎么样") is None
+    stats = cache.stats()
+    assert (stats["exact_hits"], stats["near_hits"], stats["misses"], stats["size"]) == (1, 1, 2, 2)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_analyzer_reuses_llm_analysis_for_variants():
+    cache = AnalysisCache(labels=LABEL_FIELDS)
+    llm = FakeLLM()
+    analyzer = QuestionAnalyzer(llm, threshold=2.0, cache=cache)
+
+    first = asyncio.run(analyzer.analyze_question("我应该跳槽去大厂还是留在老家？"))
+    assert first.source == SOURCE_LLM and llm.calls == 1
+
+    again = asyncio.run(analyzer.analyze_question("请问 跳槽去大厂还是留在老家"))
+    assert llm.calls == 1
+    assert again.source == SOURCE_CACHE
+    assert again.elements == first.elements
+    assert again.context["cache_distance"] == 0
+
+    # 缓存副本互不影响
+    again.elements["option_a"] = "改过"
+    assert asyncio.run(analyzer.analyze_question("跳槽去大厂还是留在老家")).elements["option_a"] == "去大厂"
+
+
+def test_near_hit_reuses_labels_but_extracts_elements_from_new_question():
+    cache = AnalysisCache(labels=LABEL_FIELDS)
+    analyzer = QuestionAnalyzer(FakeLLM(), threshold=2.0, cache=cache)
+    asyncio.run(analyzer.analyze_question("我应该跳槽去大厂还是留在老家"))
+
+    analysis = asyncio.run(analyzer.analyze_question("我应该跳槽去大厂还是留在老家乡"))
+    assert analysis.source == SOURCE_CACHE
+    assert analysis.context["cache_distance"] > 0
+    assert (analysis.question_type, analysis.sub_type) == ("career", "binary_choice")
+    assert analysis.elements == {"option_a": "跳槽去大厂", "option_b": "留在老家乡"}
+
+
+def test_audit_sampling_records_false_matches():
+    cache = AnalysisCache(audit_rate=1.0, labels=LABEL_FIELDS, rng=random.Random(0))
+    analyzer = QuestionAnalyzer(FakeLLM(), threshold=2.0, cache=cache)
+    asyncio.run(analyzer.analyze_question("今年的财运怎么样"))
+
+    other = FakeLLM(LLM_RESPONSE.replace('"career"', '"fortune"'))
+    analysis = asyncio.run(QuestionAnalyzer(other, threshold=2.0, cache=cache).analyze_question("今年财运怎么样？"))
+    assert other.calls == 1
+    assert analysis.source == SOURCE_LLM
+    stats = cache.stats()
+    assert stats["audits"] == 1 and stats["audit_mismatches"] == 1
+    assert stats["false_match_rate"] == 1.0
+    assert stats["recent_mismatches"][0]["cached"]["question_type"] == "career"
+    assert stats["recent_mismatches"][0]["fresh"]["question_type"] == "fortune"
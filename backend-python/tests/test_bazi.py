@@ -0,0 +1,95 @@
+"""测试八字排盘与批量重算"""
+
+import asyncio
+import pytest
+from datetime import date, time
+from types import SimpleNamespace
+from app.utils.bazi import BaziCalculator
+from app.services.user_profile_service import UserProfileService
+
+
+def bazi(birth_date: date, birth_time: str = "") -> str:
+    return str(BaziCalculator.calculate(birth_date, BaziCalculator.parse_time(birth_time)))
+
+
+def test_known_charts():
+    """已知四柱"""
+    assert bazi(date(2000, 1, 1), "12:00") == "己卯 丙子 戊午 戊午"
+    assert bazi(date(2024, 2, 4)) == "甲辰 丙寅 戊戌"
+    assert bazi(date(1900, 1, 1), "00:30") == "己亥 丙子 甲戌 甲子"
+
+
+def test_year_and_month_switch_at_lichun_instant():
+    """年柱、月柱在立春交节时刻切换（2026年立春 02-04 04:02）"""
+    assert bazi(date(2026, 2, 4), "03:30").split()[:2] == ["乙巳", "己丑"]
+    assert bazi(date(2026, 2, 4), "05:00").split()[:2] == ["丙午", "庚寅"]
+    # 未知时间按交节当日起算
+    assert bazi(date(2026, 2, 4)).split()[:2] == ["丙午", "庚寅"]
+    assert bazi(date(2026, 2, 3)).split()[:2] == ["乙巳", "己丑"]
+
+
+def test_hour_pillar_and_late_zi():
+    """时干由日干推出；23点后日柱属次日"""
+    # 2000-01-01 戊午日：癸亥时；23:30 起为次日己未日甲子时
+    assert bazi(date(2000, 1, 1), "22:00").split()[2:] == ["戊午", "癸亥"]
+    assert bazi(date(2000, 1, 1), "23:30").split()[2:] == ["己未", "甲子"]
+
+
+def test_parse_time():
+    assert BaziCalculator.parse_time("08:15") == time(8, 15)
+    assert BaziCalculator.parse_time("8") == time(8, 0)
+    assert BaziCalculator.parse_time("") is None
+    assert BaziCalculator.parse_time("上午") is None
+
+
+def test_destiny_info():
+    """农历生日、生肖按农历年；超出范围的批量结果为None"""
+    info = BaziCalculator.destiny_info(date(2026, 2, 13), "10:00")
+    assert info["lunar_birth"] == "2025年腊月廿六"
+    assert info["animal"] == "蛇"
+    assert info["zodiac_sign"] == "水瓶座"
+    assert info["bazi"].split()[0] == "丙午"
+
+    infos = BaziCalculator.destiny_info_many([(date(1899, 12, 1), ""), (date(2000, 1, 1), "")])
+    assert infos[0] is None and infos[1]["bazi"] == "己卯 丙子 戊午"
+
+
+class FakeSession:
+    """记录 execute / commit 调用的会话"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.updates = []
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        if params is not None:
+            self.updates.append(params)
+            return None
+        last_id = statement.compile().params["id_1"]
+        limit = statement._limit
+        chunk = [row for row in self.rows if row.id > last_id][:limit]
+        return SimpleNamespace(all=lambda: chunk)
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_recompute_destiny_all_in_chunks():
+    """分块读取、每块一次executemany并提交"""
+    rows = [
+        SimpleNamespace(id=i, birth_date=date(1990, 1, i), birth_time="08:00")
+        for i in range(1, 6)
+    ] + [SimpleNamespace(id=6, birth_date=date(1899, 1, 1), birth_time="")]
+    session = FakeSession(rows)
+
+    result = asyncio.run(UserProfileService(session).recompute_destiny_all(chunk_size=2))
+
+    assert result == {"updated": 5, "skipped": 1}
+    assert [len(batch) for batch in session.updates] == [2, 2, 1]
+    assert session.commits == 3
+    assert set(session.updates[0][0]) == {"id", "lunar_birth", "animal", "zodiac_sign", "bazi"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
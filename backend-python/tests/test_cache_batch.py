@@ -0,0 +1,190 @@
+"""测试批量缓存接口（MGET / pipeline SETEX / 批量DEL）"""
+
+import asyncio
+import time
+import pytest
+from app.core.cache import RedisCache, CacheManager
+
+
+class FakePipeline:
+    """模拟Redis pipeline，记录命令并在execute时统一执行"""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def setex(self, key, seconds, value):
+        self.commands.append(("setex", key, seconds, value))
+
+    def set(self, key, value):
+        self.commands.append(("set", key, None, value))
+
+    async def execute(self):
+        self.client.round_trips += 1
+        for _, key, seconds, value in self.commands:
+            self.client.store[key] = value
+            self.client.ttls[key] = seconds
+        return [True] * len(self.commands)
+
+
+class FakeRedisClient:
+    """模拟Redis客户端，统计往返次数"""
+
+    def __init__(self):
+        self.store = {}
+        self.ttls = {}
+        self.round_trips = 0
+
+    async def get(self, key):
+        self.round_trips += 1
+        return self.store.get(key)
+
+    async def set(self, key, value, nx=False, px=None):
+        self.round_trips += 1
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        self.ttls[key] = px
+        return True
+
+    async def setex(self, key, seconds, value):
+        self.round_trips += 1
+        self.store[key] = value
+        self.ttls[key] = seconds
+        return True
+
+    async def eval(self, script, numkeys, key, token, *args):
+        self.round_trips += 1
+        if self.store.get(key) != token:
+            return 0
+        if "pexpire" in script:
+            self.ttls[key] = args[0]
+        else:
+            del self.store[key]
+        return 1
+
+    async def exists(self, *keys):
+        self.round_trips += 1
+        return sum(key in self.store for key in keys)
+
+    async def mget(self, keys):
+        self.round_trips += 1
+        return [self.store.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def delete(self, *keys):
+        self.round_trips += 1
+        count = 0
+        for key in keys:
+            if self.store.pop(key, None) is not None:
+                count += 1
+        return count
+
+
+class ExpiringRedisClient(FakeRedisClient):
+    """按 px / pexpire 真正过期的模拟Redis客户端（锁续期测试用）"""
+
+    def __init__(self):
+        super().__init__()
+        self.deadlines = {}
+
+    def _expire(self, key):
+        deadline = self.deadlines.get(key)
+        if deadline is not None and time.monotonic() >= deadline:
+            self.store.pop(key, None)
+            del self.deadlines[key]
+
+    async def get(self, key):
+        self._expire(key)
+        return await super().get(key)
+
+    async def set(self, key, value, nx=False, px=None):
+        self._expire(key)
+        result = await super().set(key, value, nx=nx, px=px)
+        if result and px:
+            self.deadlines[key] = time.monotonic() + px / 1000
+        return result
+
+    async def eval(self, script, numkeys, key, token, *args):
+        self._expire(key)
+        result = await super().eval(script, numkeys, key, token, *args)
+        if result and "pexpire" in script:
+            self.deadlines[key] = time.monotonic() + args[0] / 1000
+        return result
+
+    async def exists(self, *keys):
+        for key in keys:
+            self._expire(key)
+        return await super().exists(*keys)
+
+
+def make_cache(client=None) -> RedisCache:
+    cache = RedisCache()
+    cache.client = client or FakeRedisClient()
+    return cache
+
+
+def test_set_many_and_get_many_single_round_trip():
+    """批量写入与读取各只需一次往返"""
+    cache = make_cache()
+
+    async def run():
+        ok = await cache.set_many({"a": 1, "b": {"x": "乾"}}, expire=60, ttls={"b": 5})
+        assert ok
+        assert cache.client.ttls == {"a": 60, "b": 5}
+
+        values = await cache.get_many(["a", "b", "missing"])
+        assert values == {"a": 1, "b": {"x": "乾"}}
+
+    asyncio.run(run())
+    assert cache.client.round_trips == 2
+
+
+def test_delete_many():
+    """批量删除返回删除数量"""
+    cache = make_cache()
+
+    async def run():
+        await cache.set_many({"a": 1, "b": 2, "c": 3})
+        deleted = await cache.delete_many(["a", "c", "missing"])
+        assert deleted == 2
+        assert await cache.get_many(["a", "b", "c"]) == {"b": 2}
+        assert await cache.delete_many([]) == 0
+
+    asyncio.run(run())
+
+
+def test_get_or_set_many_only_loads_missing_keys():
+    """只对未命中的键调用一次批量加载函数，并保持键顺序"""
+    cache = make_cache()
+    manager = CacheManager(cache)
+    calls = []
+
+    async def loader(keys):
+        calls.append(list(keys))
+        return {key: key.upper() for key in keys if key != "none"}
+
+    async def run():
+        await cache.set_many({"b": "cached"})
+        result = await manager.get_or_set_many(["a", "b", "c", "none"], loader, expire=30)
+        assert list(result.items()) == [("a", "A"), ("b", "cached"), ("c", "C")]
+
+        # 第二次全部命中，不再调用加载函数
+        again = await manager.get_or_set_many(["a", "b", "c"], loader)
+        assert again == {"a": "A", "b": "cached", "c": "C"}
+
+    asyncio.run(run())
+    assert calls == [["a", "c", "none"]]
+    assert cache.client.ttls["a"] == 30
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,202 @@
+"""测试CacheManager软过期（stale-while-revalidate）与防击穿"""
+
+import asyncio
+import time
+import pytest
+from app.core.cache import CacheManager
+from app.core.config import settings
+from app.services.cached_divination_service import CachedDivinationService
+from tests.test_cache_batch import make_cache
+
+
+def make_manager(**kwargs) -> CacheManager:
+    kwargs.setdefault("early_expiration_beta", 0)
+    return CacheManager(make_cache(), **kwargs)
+
+
+def test_concurrent_misses_fetch_once():
+    """并发未命中只回源一次"""
+    manager = make_manager()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"value": 42}
+
+    async def run():
+        results = await asyncio.gather(*[
+            manager.get_or_set("hot", fetch, expire=60) for _ in range(20)
+        ])
+        assert all(result == {"value": 42} for result in results)
+        # 后续请求直接命中
+        assert await manager.get_or_set("hot", fetch, expire=60) == {"value": 42}
+
+    asyncio.run(run())
+    assert len(calls) == 1
+    metrics = manager.get_metrics()
+    assert metrics["misses"] == 20
+    assert metrics["coalesced"] == 19
+    assert metrics["hits"] == 1
+
+
+def test_stale_value_served_while_refreshing():
+    """软过期后返回旧值，并只触发一次后台刷新"""
+    manager = make_manager()
+    versions = iter(["v1", "v2", "v3"])
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        return next(versions)
+
+    async def run():
+        assert await manager.get_or_set("k", fetch, expire=1, stale_ttl=60) == "v1"
+
+        # 人为让缓存软过期
+        entry = await manager.redis.get("k")
+        entry["soft_expire"] = time.time() - 1
+        await manager.redis.set("k", entry)
+
+        stale = await asyncio.gather(*[manager.get_or_set("k", fetch, expire=1) for _ in range(5)])
+        assert stale == ["v1"] * 5
+
+        await asyncio.sleep(0.05)
+        assert await manager.get_or_set("k", fetch, expire=1) == "v2"
+
+    asyncio.run(run())
+    metrics = manager.get_metrics()
+    assert metrics["stale_serves"] == 5
+    assert metrics["refreshes"] == 1
+
+
+def test_refresh_failure_keeps_stale_value():
+    """后台刷新失败时保留旧值并计数"""
+    manager = make_manager()
+    state = {"fail": False}
+
+    async def fetch():
+        if state["fail"]:
+            raise RuntimeError("db down")
+        return "ok"
+
+    async def run():
+        await manager.get_or_set("k", fetch, expire=1)
+        entry = await manager.redis.get("k")
+        entry["soft_expire"] = time.time() - 1
+        await manager.redis.set("k", entry)
+
+        state["fail"] = True
+        assert await manager.get_or_set("k", fetch, expire=1) == "ok"
+        await asyncio.sleep(0.01)
+        assert await manager.get_or_set("k", fetch, expire=1) == "ok"
+
+    asyncio.run(run())
+    assert manager.get_metrics()["refresh_failures"] >= 1
+    # 刷新锁已释放
+    assert "lock:k" not in manager.redis.client.store
+
+
+class FakeSession:
+    def __init__(self):
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.closed = True
+
+
+class SessionRepository:
+    """读取时检查会话仍未关闭"""
+
+    loads = []
+
+    def __init__(self, db):
+        self.db = db
+
+    async def get_session(self, session_id):
+        assert not self.db.closed, "会话已关闭"
+        SessionRepository.loads.append(self.db)
+        return {"id": session_id, "version": len(SessionRepository.loads)}
+
+
+def test_background_refresh_does_not_use_request_session(monkeypatch):
+    """后台刷新在请求结束（会话关闭）后执行，回源使用独立会话"""
+    monkeypatch.setattr(settings, "REDIS_ENABLED", True)
+    SessionRepository.loads = []
+    manager = make_manager()
+    opened = []
+
+    def session_factory():
+        opened.append(FakeSession())
+        return opened[-1]
+
+    async def request():
+        request_session = FakeSession()
+        service = CachedDivinationService(SessionRepository(request_session), manager, session_factory)
+        try:
+            return await service.get_session_cached("s1")
+        finally:
+            request_session.closed = True
+
+    async def run():
+        assert (await request())["version"] == 1
+        key = next(iter(manager.redis.client.store))
+        entry = await manager.redis.get(key)
+        entry["soft_expire"] = time.time() - 1
+        await manager.redis.set(key, entry)
+
+        assert (await request())["version"] == 1  # 返回旧值，刷新在请求结束后执行
+        await asyncio.sleep(0.05)
+        assert (await request())["version"] == 2
+
+    asyncio.run(run())
+    assert manager.get_metrics()["refreshes"] == 1
+    assert SessionRepository.loads == opened and all(db.closed for db in opened)
+
+
+def test_lock_held_elsewhere_waits_for_result():
+    """其他节点持有锁时等待其写入结果而不是重复回源"""
+    manager = make_manager(lock_timeout_ms=1000)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return "mine"
+
+    async def run():
+        client = manager.redis.client
+        client.store["lock:k"] = "other-node"
+
+        async def other_node_finishes():
+            await asyncio.sleep(0.05)
+            await manager.redis.set("k", "theirs", 60)
+            del client.store["lock:k"]
+
+        result, _ = await asyncio.gather(
+            manager.get_or_set("k", fetch, expire=60),
+            other_node_finishes(),
+        )
+        assert result == "theirs"
+
+    asyncio.run(run())
+    assert calls == []
+    assert manager.get_metrics()["lock_waits"] == 1
+
+
+def test_early_expiration_probability():
+    """接近软过期时提前刷新的概率更高"""
+    manager = make_manager(early_expiration_beta=1.0)
+    now = time.time()
+    near = {"soft_expire": now + 0.01, "delta": 1.0}
+    far = {"soft_expire": now + 3600, "delta": 1.0}
+
+    near_hits = sum(manager._should_refresh_early(near, now) for _ in range(1000))
+    far_hits = sum(manager._should_refresh_early(far, now) for _ in range(1000))
+    assert near_hits > 950
+    assert far_hits == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
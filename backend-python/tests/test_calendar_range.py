@@ -0,0 +1,73 @@
+"""测试批量日期转换与月视图"""
+
+import asyncio
+import pytest
+from datetime import date, timedelta
+from app.core.cache import CacheManager
+from app.services.time_convert_service import TimeConvertService
+from app.utils.calendar import CalendarConverter
+from tests.test_cache_batch import make_cache
+
+
+def test_range_matches_single_conversion():
+    """批量结果与逐日 solar_to_lunar 完全一致（含闰月、除夕、跨年）"""
+    for start, end in [
+        (date(1900, 1, 31), date(1900, 12, 31)),
+        (date(2023, 1, 1), date(2023, 12, 31)),
+        (date(2025, 12, 1), date(2026, 3, 1)),
+        (date(2100, 12, 1), date(2100, 12, 31)),
+    ]:
+        results = CalendarConverter.solar_to_lunar_range(start, end)
+        assert len(results) == (end - start).days + 1
+        day = start
+        for result in results:
+            assert result == CalendarConverter.solar_to_lunar(day.year, day.month, day.day), day
+            day += timedelta(days=1)
+
+
+def test_range_out_of_bounds():
+    """超出支持范围或起止颠倒时抛出ValueError"""
+    with pytest.raises(ValueError):
+        CalendarConverter.solar_to_lunar_range(date(1900, 1, 1), date(1900, 2, 1))
+    with pytest.raises(ValueError):
+        CalendarConverter.solar_to_lunar_range(date(2100, 12, 1), date(2101, 1, 29))
+    with pytest.raises(ValueError):
+        CalendarConverter.solar_to_lunar_range(date(2026, 2, 1), date(2026, 1, 1))
+
+
+def test_month_grid():
+    """月视图为42天，从 week_start 对应的星期开始"""
+    service = TimeConvertService()
+
+    grid = service.get_month_grid(2026, 2)
+    assert len(grid["days"]) == 42
+    assert grid["start_date"] == "2026-01-26"  # 周一
+    assert grid["days"][0]["weekday"] == 1
+
+    grid = service.get_month_grid(2026, 2, week_start=6)
+    assert grid["start_date"] == "2026-02-01"  # 2月1日正好是周日
+    assert grid["days"][0]["solar_day"] == 1
+
+
+def test_month_grid_cached_marks_today():
+    """按年月缓存，读取缓存后重新标记 is_today"""
+    cache = make_cache()
+    service = TimeConvertService(CacheManager(cache, early_expiration_beta=0))
+    today = date.today()
+
+    async def run():
+        await service.get_month_grid_cached(today.year, today.month)
+        round_trips = cache.client.round_trips
+
+        # 第二次只读一次缓存
+        second = await service.get_month_grid_cached(today.year, today.month)
+        assert cache.client.round_trips == round_trips + 1
+        return second
+
+    grid = asyncio.run(run())
+    marked = [item for item in grid["days"] if item["is_today"]]
+    assert len(marked) == 1 and marked[0]["solar_day"] == today.day
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
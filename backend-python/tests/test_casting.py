@@ -0,0 +1,85 @@
+"""测试起卦方式（单次摘要 / MD5兼容）与起卦分布审计"""
+
+import asyncio
+import hashlib
+import pytest
+from fastapi import HTTPException
+from app.services.iching_service import (
+    IChingService, SixLines, LINE_VALUE_BY_COINS, LINES_BY_COINS9, CAST_MODE_MD5, CAST_MODE_DIGEST
+)
+from app.services.casting_audit_service import CastingAuditService
+from app.api.v1.admin import get_casting_audit
+
+
+def legacy_cast_line(seed: str, line_index: int) -> int:
+    """旧版实现：每枚硬币一次MD5，取十六进制整数的奇偶"""
+    coins = []
+    for i in range(3):
+        hash_input = f"{seed}-coin{i+1}-{line_index}".encode()
+        coins.append(int(hashlib.md5(hash_input).hexdigest(), 16) % 2)
+    return {0: 6, 1: 7, 2: 8, 3: 9}[sum(coins)]
+
+
+@pytest.mark.parametrize("session_id", ["abc", "b7f3c2e0-6d0a-4c52-9a53-1f0f2d9c8e11", "会话", ""])
+def test_md5_mode_reproduces_legacy_sessions(session_id):
+    values = [legacy_cast_line(session_id, i) for i in range(6)]
+    assert [IChingService.cast_line(session_id, i) for i in range(6)] == values
+    assert IChingService.generate_six_lines(session_id, CAST_MODE_MD5) == SixLines.from_values(values)
+
+
+def test_digest_mode_is_keyed_and_deterministic():
+    word = IChingService.cast_word("abc")
+    assert 0 <= word < 1 << 18
+    assert IChingService.cast_word("abc") == word
+    assert IChingService.cast_word("abc", key=b"another-key") != word
+    assert IChingService.generate_six_lines("abc", CAST_MODE_DIGEST) == IChingService.six_lines_from_word(word)
+
+
+def test_word_to_six_lines_table():
+    assert list(LINE_VALUE_BY_COINS) == [6, 7, 7, 8, 7, 8, 8, 9]
+    assert len(LINES_BY_COINS9) == 512
+    for word in (0, 0x3FFFF, 0b001_010_100_011_101_110, 0x15555, 0x2AAAA):
+        values = [LINE_VALUE_BY_COINS[word >> (3 * i) & 7] for i in range(6)]
+        assert IChingService.six_lines_from_word(word) == SixLines.from_values(values)
+
+
+def test_tally_matches_scalar_casting():
+    words = CastingAuditService.cast_words(500, CAST_MODE_DIGEST, seed=7)
+    counts = CastingAuditService.tally(words)
+
+    hexagrams = [0] * 64
+    changing = [0] * 7
+    for word in words.tolist():
+        six_lines = IChingService.six_lines_from_word(word)
+        hexagrams[six_lines.hexagram_number - 1] += 1
+        changing[len(six_lines.changing_lines)] += 1
+    assert counts["hexagrams"].tolist() == hexagrams
+    assert counts["changing"].tolist() == changing
+    assert counts["line_values"].sum() == 500 * 6
+
+
+def test_model_distribution_report():
+    report = CastingAuditService.run(400_000, "model", seed=2024)
+    assert report["samples"] == 400_000
+    assert abs(report["line_values"]["6"]["freq"] - 1 / 8) < 0.003
+    assert abs(report["line_values"]["7"]["freq"] - 3 / 8) < 0.003
+    assert sum(h["count"] for h in report["hexagrams"]) == 400_000
+    assert sum(c["count"] for c in report["changing_lines"].values()) == 400_000
+    for test in ("line_values_test", "changing_lines_test", "hexagrams_test"):
+        assert report[test]["p_value"] > 0.001
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        CastingAuditService.run(10, "sha1")
+
+
+def test_admin_endpoint():
+    report = asyncio.run(get_casting_audit(samples=1000, mode="model", seed=1, admin=None))["data"]
+    assert report["mode"] == "model"
+    assert len(report["hexagrams"]) == 64
+
+    with pytest.raises(HTTPException):
+        asyncio.run(get_casting_audit(samples=1000, mode="sha1", seed=None, admin=None))
+    with pytest.raises(HTTPException):
+        asyncio.run(get_casting_audit(samples=10**6, mode=CAST_MODE_MD5, seed=None, admin=None))
@@ -0,0 +1,93 @@
+"""测试语料文件（六十四卦 / 三百八十四爻 / 七十八张塔罗牌）"""
+
+import pytest
+from app.utils.corpus import CorpusFile
+from app.utils.hexagram_data import (
+    HEXAGRAMS, HEXAGRAM_NAMES, BITS_BY_KING_WEN, TRIGRAM_BY_BITS, PALACE_BY_BITS,
+    get_hexagram_by_number,
+)
+from app.utils.tarot_data import TAROT_CARDS
+
+
+def test_write_and_read_roundtrip(tmp_path):
+    path = tmp_path / "sample.bin"
+    records = [{"number": i, "text": "卦" * i} for i in range(5)]
+    assert CorpusFile.write(path, records) == 5
+
+    corpus = CorpusFile(path)
+    assert len(corpus) == 5
+    assert corpus[3] == records[3]
+    assert corpus[-1] == records[4]
+    assert corpus[1:3] == records[1:3]
+    with pytest.raises(IndexError):
+        corpus[5]
+
+    # 每次返回新对象
+    corpus[0]["text"] = "changed"
+    assert corpus[0] == records[0]
+    corpus.close()
+
+
+def test_bad_magic(tmp_path):
+    path = tmp_path / "bad.bin"
+    path.write_bytes(b"XXXX\x00\x00\x00\x00")
+    with pytest.raises(ValueError):
+        len(CorpusFile(path))
+
+
+def test_all_hexagrams_complete():
+    assert len(HEXAGRAMS) == 64
+    line_count = 0
+    for number in range(1, 65):
+        hexagram = get_hexagram_by_number(number)
+        bits = BITS_BY_KING_WEN[number]
+        assert hexagram["number"] == number
+        assert hexagram["name"] == HEXAGRAM_NAMES[number - 1]
+        assert hexagram["upper"] == TRIGRAM_BY_BITS[bits >> 3]["name"]
+        assert hexagram["lower"] == TRIGRAM_BY_BITS[bits & 7]["name"]
+        assert hexagram["outcome"] in ("吉", "平", "凶")
+        for field in ("summary", "detail", "judgment", "tuan", "image"):
+            assert hexagram[field]
+        line_count += len(hexagram["lines"])
+    assert line_count == 384
+
+
+def test_hexagram_text_samples():
+    assert get_hexagram_by_number(1)["lines"][0] == "初九：潜龙勿用。"
+    assert get_hexagram_by_number(1)["use"] == "用九：见群龙无首，吉。"
+    assert get_hexagram_by_number(2)["image"] == "地势坤，君子以厚德载物。"
+    assert get_hexagram_by_number(63)["lines"][5] == "上六：濡其首，厉。"
+    assert "use" not in get_hexagram_by_number(3)
+    assert get_hexagram_by_number(65)["name"] == "第65卦"
+
+
+@pytest.mark.parametrize("number, palace, generation, wuxing", [
+    (1, "乾", 0, "金"),
+    (44, "乾", 1, "金"),
+    (35, "乾", 6, "金"),   # 晋：乾宫游魂
+    (14, "乾", 7, "金"),   # 大有：乾宫归魂
+    (3, "坎", 2, "水"),
+    (64, "离", 3, "火"),
+])
+def test_palace(number, palace, generation, wuxing):
+    value = PALACE_BY_BITS[BITS_BY_KING_WEN[number]]
+    assert TRIGRAM_BY_BITS[value >> 3]["name"] == palace
+    assert value & 7 == generation
+    assert get_hexagram_by_number(number)["wuxing"] == wuxing
+
+
+def test_palace_partition():
+    """八宫各八卦"""
+    palaces = [value >> 3 for value in PALACE_BY_BITS]
+    assert all(palaces.count(p) == 8 for p in range(8))
+
+
+def test_tarot_deck_complete():
+    assert len(TAROT_CARDS) == 78
+    cards = list(TAROT_CARDS)
+    assert [card["number"] for card in cards] == list(range(78))
+    assert sum(card["arcana"] == "major" for card in cards) == 22
+    for suit in ("wands", "cups", "swords", "pentacles"):
+        assert sum(card.get("suit") == suit for card in cards) == 14
+    assert TAROT_CARDS[22]["name"] == "权杖王牌"
+    assert TAROT_CARDS[77]["name_en"] == "King of Pentacles"
@@ -0,0 +1,210 @@
+"""每日运势按群组生成测试"""
+
+import asyncio
+import json
+from datetime import date
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.daily_fortune import COHORT_FIELDS, DailyFortune, DailyFortuneCohort
+from app.models.user import User
+from app.models.user_profile import UserProfile
+from app.services.daily_fortune_service import DailyFortuneService
+from tests.test_daily_fortune_pregen import SessionFactory
+
+FORTUNE_DATE = date(2026, 10, 20)
+PROFILES = {1: ("鼠", "白羊座"), 2: ("鼠", "白羊座"), 3: ("鼠", "白羊座"), 4: ("牛", "金牛座"), 5: ("牛", "金牛座")}
+
+
+def fortune_response(summary: str = "今日运势", **fields) -> str:
+    """LLM 返回的运势 JSON"""
+    content = {
+        "score": 80, "summary": summary, "wealth": "财运平稳", "career": "工作顺利", "love": "感情和睦",
+        "health": "注意作息", "lucky_color": "蓝色", "lucky_number": "7", "lucky_direction": "东方",
+        "lucky_time": "辰时", "yi": ["出行", "会友"], "ji": ["争执"],
+    }
+    content.update(fields)
+    return f"好的，以下是今日运势：\n{json.dumps(content, ensure_ascii=False)}"
+
+
+class CountingLLM:
+    def __init__(self):
+        self.prompts = []
+
+    async def generate(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        index = len(self.prompts)
+        await asyncio.sleep(0.01)
+        return fortune_response(f"运势{index}")
+
+
+@pytest.fixture
+def sessions():
+    factory = SessionFactory()
+    with Session(factory.engine) as session:
+        for user_id, (animal, sign) in PROFILES.items():
+            session.add(User(id=user_id, username=f"u{user_id}", password_hash="x"))
+            session.add(UserProfile(user_id=user_id, animal=animal, zodiac_sign=sign))
+        session.add(User(id=6, username="u6", password_hash="x"))  # 未填档案
+        session.commit()
+    return factory
+
+
+def generate_all(sessions, llm, user_ids):
+    async def generate(user_id):
+        async with sessions() as db:
+            service = DailyFortuneService(db)
+            service.llm_service = llm
+            return await service.generate_daily_fortune(user_id, FORTUNE_DATE)
+
+    async def run():
+        return await asyncio.gather(*[generate(user_id) for user_id in user_ids])
+
+    return asyncio.run(run())
+
+
+def test_one_llm_call_per_cohort(sessions):
+    llm = CountingLLM()
+    fortunes = generate_all(sessions, llm, ["1", "2", "3", "4", "5", "6", "guest"])
+
+    # 鼠/白羊座、牛/金牛座、缺省群组各一次
+    assert len(llm.prompts) == 3
+    assert any("生肖鼠、白羊座的用户" in prompt for prompt in llm.prompts)
+    with Session(sessions.engine) as session:
+        cohorts = session.execute(select(DailyFortuneCohort)).scalars().all()
+        assert sorted(cohort.cohort_key for cohort in cohorts) == [":", "牛:金牛座", "鼠:白羊座"]
+
+    by_user = {fortune.user_id: fortune for fortune in fortunes}
+    assert by_user["1"].summary == by_user["2"].summary == by_user["3"].summary
+    assert by_user["1"].summary != by_user["4"].summary
+    assert by_user["6"].summary == by_user["guest"].summary
+    assert by_user["1"].yi == ["出行", "会友"]
+
+
+def test_user_rows_store_only_personal_fields(sessions):
+    generate_all(sessions, CountingLLM(), ["1", "4"])
+    table = DailyFortune.__table__
+    with Session(sessions.engine) as session:
+        row = session.execute(select(table).where(table.c.user_id == "1")).one()._mapping
+        assert row["cohort_id"] is not None
+        assert all(row[name] is None for name in COHORT_FIELDS)
+
+        # 读取时内容取自群组
+        fortune = session.execute(select(DailyFortune).where(DailyFortune.user_id == "1")).unique().scalar_one()
+        assert fortune.summary == fortune.cohort.summary
+        assert fortune.lucky_color == fortune.cohort.lucky_color
+
+
+def test_personalization_is_deterministic_per_user_and_date():
+    cohort = DailyFortuneCohort(score=80)
+    first = DailyFortuneService.personalize(cohort, "1", FORTUNE_DATE)
+    assert DailyFortuneService.personalize(cohort, "1", FORTUNE_DATE) == first
+    assert abs(first["score"] - 80) <= settings.DAILY_FORTUNE_SCORE_SPREAD
+    assert first["lucky_number"] in {str(n) for n in range(1, 10)}
+
+    variants = {
+        tuple(DailyFortuneService.personalize(cohort, str(user_id), FORTUNE_DATE).values())
+        for user_id in range(50)
+    }
+    assert len(variants) > 10
+
+
+def test_per_user_generation_when_cohorts_disabled(sessions, monkeypatch):
+    monkeypatch.setattr(settings, "DAILY_FORTUNE_COHORT_ENABLED", False)
+    llm = CountingLLM()
+    fortunes = generate_all(sessions, llm, ["1", "2"])
+    assert len(llm.prompts) == 2
+    assert all(fortune.cohort_id is None and fortune.summary for fortune in fortunes)
+
+
+def test_cohort_stores_almanac_terms(sessions):
+    llm = CountingLLM()
+
+    async def run():
+        async with sessions() as db:
+            service = DailyFortuneService(db)
+            service.llm_service = llm
+            return await service.generate_daily_fortune("1", date(2026, 2, 4))
+
+    fortune = asyncio.run(run())
+    assert fortune.cohort.solar_term == "立春" and fortune.solar_term == "立春"
+    assert "乙巳年 庚寅月" in llm.prompts[0]
+
+
+class FailingLLM(CountingLLM):
+    async def generate(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        raise RuntimeError("LLM timeout")
+
+
+def test_failed_cohort_generation_is_not_saved(sessions):
+    failed = generate_all(sessions, FailingLLM(), ["1", "2"])
+    # 本次返回默认运势，但不写群组记录与用户行
+    assert all(fortune.id is None and fortune.summary == "今日运势平稳，保持平常心。" for fortune in failed)
+    assert failed[0].lucky_number and failed[0].yi == ["静心"]
+    with Session(sessions.engine) as session:
+        assert session.execute(select(DailyFortuneCohort)).first() is None
+        assert session.execute(select(DailyFortune)).first() is None
+
+    # 之后的请求重新生成
+    llm = CountingLLM()
+    fortunes = generate_all(sessions, llm, ["1"]) + generate_all(sessions, llm, ["2"])
+    assert len(llm.prompts) == 1
+    assert all(fortune.id and fortune.summary == "运势1" for fortune in fortunes)
+
+
+class CohortLLM(CountingLLM):
+    """按群组返回不同内容"""
+
+    async def generate(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        if "生肖鼠" in prompt:
+            return fortune_response("鼠年贵人多", score=88, lucky_color="红色", lucky_number=3, yi=["签约"])
+        return fortune_response("稳中求进", score=65, lucky_time="午时", ji=["远行", "借贷"])
+
+
+def test_cohorts_store_parsed_llm_content(sessions):
+    generate_all(sessions, CohortLLM(), ["1"]) + generate_all(sessions, CohortLLM(), ["4"])
+    with Session(sessions.engine) as session:
+        cohorts = {cohort.cohort_key: cohort for cohort in session.execute(select(DailyFortuneCohort)).scalars()}
+    rat, ox = cohorts["鼠:白羊座"], cohorts["牛:金牛座"]
+    assert (rat.score, rat.summary, rat.lucky_color, rat.yi, rat.ji) == (88, "鼠年贵人多", "红色", ["签约"], ["争执"])
+    assert (ox.score, ox.summary, ox.lucky_time, ox.yi, ox.ji) == (65, "稳中求进", "午时", ["出行", "会友"], ["远行", "借贷"])
+    assert all(getattr(rat, name) != getattr(ox, name) for name in ("score", "summary", "yi", "ji"))
+
+
+class MalformedLLM(CountingLLM):
+    async def generate(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return "今日运势良好，诸事顺利。"
+
+
+def test_unparsable_response_is_treated_as_failure(sessions):
+    failed = generate_all(sessions, MalformedLLM(), ["1"])
+    assert failed[0].id is None and failed[0].summary == "今日运势平稳，保持平常心。"
+    with Session(sessions.engine) as session:
+        assert session.execute(select(DailyFortuneCohort)).first() is None
+        assert session.execute(select(DailyFortune)).first() is None
+
+
+@pytest.mark.parametrize("fields", [
+    {"score": "高"},
+    {"score": 120},
+    {"summary": ""},
+    {"love": None},
+    {"yi": "出行"},
+    {"ji": ["争执", 3]},
+])
+def test_parse_content_rejects_invalid_fields(fields):
+    with pytest.raises(ValueError):
+        DailyFortuneService._parse_content(fortune_response(**fields))
+
+
+def test_parse_content_normalizes_fields():
+    content = DailyFortuneService._parse_content(
+        fortune_response(" 运势 ", score=72.6, lucky_number=5, lucky_color="红" * 80, yi=list("一二三四五六七八"))
+    )
+    assert (content["score"], content["summary"], content["lucky_number"]) == (72, "运势", "5")
+    assert len(content["lucky_color"]) == 50 and content["yi"] == list("一二三四五六")
+    assert set(content) == set(COHORT_FIELDS) - {"solar_term", "festival"} | {"score", "lucky_number"}
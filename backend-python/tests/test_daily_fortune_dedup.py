@@ -0,0 +1,126 @@
+"""每日运势并发生成去重测试（唯一约束 + ON CONFLICT + Redis 锁单飞）"""
+
+import asyncio
+from datetime import date
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.exceptions import ConflictError
+from app.models.daily_fortune import DailyFortune
+from app.repositories.daily_fortune_repository import DailyFortuneRepository
+from app.services.daily_fortune_service import DailyFortuneService
+from tests.test_cache_batch import ExpiringRedisClient, make_cache
+from tests.test_daily_fortune_cohort import fortune_response
+from tests.test_daily_fortune_pregen import SessionFactory
+
+FORTUNE_DATE = date(2026, 10, 20)
+FIELDS = dict(score=70, summary="平", wealth="", career="", love="", health="", lucky_color="蓝色",
+              lucky_number="7", lucky_direction="东方", lucky_time="辰时", yi=[], ji=[])
+
+
+class SlowLLM:
+    def __init__(self, seconds=0.05):
+        self.calls = 0
+        self.seconds = seconds
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.seconds)
+        return fortune_response("今日宜静。")
+
+
+@pytest.fixture
+def sessions():
+    return SessionFactory()
+
+
+@pytest.fixture(autouse=True)
+def per_user_generation(monkeypatch):
+    # 逐用户生成时每次生成都调用 LLM，便于统计
+    monkeypatch.setattr(settings, "DAILY_FORTUNE_COHORT_ENABLED", False)
+
+
+def row_count(sessions):
+    with Session(sessions.engine) as session:
+        return session.execute(select(func.count()).select_from(DailyFortune)).scalar_one()
+
+
+def concurrent_requests(sessions, llm, cache, count=5, return_exceptions=False):
+    async def request():
+        async with sessions() as db:
+            service = DailyFortuneService(db, cache=cache)
+            service.POLL_INTERVAL = 0.01
+            service.llm_service = llm
+            return await service.get_daily_fortune("1", FORTUNE_DATE)
+
+    async def run():
+        return await asyncio.gather(*[request() for _ in range(count)], return_exceptions=return_exceptions)
+
+    return asyncio.run(run())
+
+
+def test_insert_on_conflict_returns_existing_row(sessions):
+    async def run():
+        async with sessions() as db:
+            first = await DailyFortuneRepository(db).create("1", FORTUNE_DATE, **FIELDS)
+        async with sessions() as db:
+            second = await DailyFortuneRepository(db).create("1", FORTUNE_DATE, **{**FIELDS, "summary": "后写"})
+        return first.id, second.id, second.summary
+
+    first_id, second_id, summary = asyncio.run(run())
+    assert first_id == second_id and summary == "平"
+    assert row_count(sessions) == 1
+
+
+def test_concurrent_requests_generate_once_across_cluster(sessions):
+    llm = SlowLLM()
+    cache = make_cache()
+    fortunes = concurrent_requests(sessions, llm, cache)
+    assert llm.calls == 1
+    assert {fortune.id for fortune in fortunes} == {fortunes[0].id}
+    assert row_count(sessions) == 1
+    assert not [key for key in cache.client.store if key.startswith(DailyFortuneService.LOCK_PREFIX)]
+
+    # 已存在时不再调用 LLM
+    concurrent_requests(sessions, llm, cache, count=1)
+    assert llm.calls == 1
+
+
+def test_without_redis_unique_constraint_prevents_duplicates(sessions):
+    llm = SlowLLM()
+    fortunes = concurrent_requests(sessions, llm, cache=None)
+    assert row_count(sessions) == 1
+    assert {fortune.id for fortune in fortunes} == {fortunes[0].id}
+
+
+def test_waiter_generates_itself_when_lock_holder_dies(sessions):
+    cache = make_cache(ExpiringRedisClient())
+    lock_key = f"{DailyFortuneService.LOCK_PREFIX}:1:{FORTUNE_DATE.isoformat()}"
+    asyncio.run(cache.acquire_lock(lock_key, "dead-node", 50))  # 持锁方退出后不再续期
+    llm = SlowLLM()
+    fortunes = concurrent_requests(sessions, llm, cache, count=3)
+    assert llm.calls == 1 and fortunes[0].summary == "今日宜静。"
+    assert row_count(sessions) == 1
+
+
+def test_slow_holder_keeps_lock_beyond_ttl(sessions, monkeypatch):
+    # LLM 调用比锁的过期时间长得多：持锁方续期，等待方不另外调用 LLM
+    monkeypatch.setattr(settings, "DAILY_FORTUNE_LOCK_SECONDS", 0.06)
+    cache = make_cache(ExpiringRedisClient())
+    llm = SlowLLM(seconds=0.3)
+    fortunes = concurrent_requests(sessions, llm, cache)
+    assert llm.calls == 1
+    assert {fortune.id for fortune in fortunes} == {fortunes[0].id}
+    assert not cache.client.store
+
+
+def test_waiters_time_out_without_second_llm_call(sessions, monkeypatch):
+    # 持锁方生成时间超过等待上限：等待方返回 409，而不是再生成一次
+    monkeypatch.setattr(settings, "DAILY_FORTUNE_LOCK_SECONDS", 0.06)
+    monkeypatch.setattr(settings, "DAILY_FORTUNE_LOCK_WAIT_SECONDS", 0.1)
+    llm = SlowLLM(seconds=0.3)
+    results = concurrent_requests(sessions, llm, make_cache(ExpiringRedisClient()), return_exceptions=True)
+    assert llm.calls == 1
+    assert sum(isinstance(result, ConflictError) for result in results) == 4
+    assert row_count(sessions) == 1
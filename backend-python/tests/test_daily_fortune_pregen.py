@@ -0,0 +1,258 @@
+"""每日运势夜间预生成测试"""
+
+import asyncio
+import json
+import time
+from datetime import date, datetime, timedelta, timezone
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+import app.models  # noqa: F401  注册全部模型，解析关系
+from app.models.daily_fortune import DailyFortune, DailyFortuneCohort
+from app.models.user import User
+from app.models.user_profile import UserProfile
+from app.services.daily_fortune_pregen import (
+    LEADER_KEY, DailyFortunePregenerator, checkpoint_key, pregen_window
+)
+from app.utils.rate_limiter import AsyncTokenBucket
+from tests.test_cache_batch import ExpiringRedisClient, make_cache
+
+FORTUNE_DATE = date(2026, 10, 20)
+
+
+class SessionFactory:
+    """同步 SQLite 会话包装成 async with 可用的会话工厂"""
+
+    def __init__(self):
+        self.engine = create_engine("sqlite://", poolclass=StaticPool,
+                                    connect_args={"check_same_thread": False})
+        for model in (User, UserProfile, DailyFortuneCohort, DailyFortune):
+            model.__table__.create(self.engine)
+
+    def __call__(self):
+        return AsyncSessionAdapter(Session(self.engine))
+
+    def rows(self):
+        with Session(self.engine) as session:
+            return {row.user_id for row in session.execute(select(DailyFortune)).scalars()}
+
+
+class AsyncSessionAdapter:
+    def __init__(self, sync):
+        self.sync = sync
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.sync.close()
+
+    def get_bind(self):
+        return self.sync.get_bind()
+
+    async def execute(self, statement):
+        return self.sync.execute(statement)
+
+    def add(self, row):
+        self.sync.add(row)
+
+    async def flush(self):
+        self.sync.flush()
+
+    async def commit(self):
+        self.sync.commit()
+
+    async def rollback(self):
+        self.sync.rollback()
+
+    async def refresh(self, row):
+        self.sync.refresh(row)
+
+
+@pytest.fixture
+def sessions():
+    factory = SessionFactory()
+    now = datetime.now(timezone.utc)
+    with Session(factory.engine) as session:
+        for user_id in range(1, 6):
+            session.add(User(id=user_id, username=f"u{user_id}", password_hash="x", last_login_at=now))
+        session.add(User(id=6, username="inactive", password_hash="x", last_login_at=now - timedelta(days=90)))
+        session.add(User(id=7, username="disabled", password_hash="x", status=0, last_login_at=now))
+        session.add(DailyFortune(user_id="2", date=FORTUNE_DATE, score=70, summary="已生成", wealth="", career="",
+                                 love="", health="", lucky_color="", lucky_number="", lucky_direction="",
+                                 lucky_time="", yi=[], ji=[]))
+        session.commit()
+    return factory
+
+
+class JsonLLM:
+    async def generate(self, prompt):
+        return json.dumps({
+            "score": 75, "summary": "预生成", "wealth": "平", "career": "平", "love": "平", "health": "平",
+            "lucky_color": "蓝色", "lucky_number": "7", "lucky_direction": "东方", "lucky_time": "辰时",
+            "yi": ["出行"], "ji": ["争执"],
+        }, ensure_ascii=False)
+
+
+@pytest.fixture(autouse=True)
+def json_llm(monkeypatch):
+    monkeypatch.setattr("app.services.daily_fortune_service.get_llm_service", JsonLLM)
+
+
+def make_pregenerator(sessions, cache, **kwargs):
+    kwargs.setdefault("batch_size", 2)
+    kwargs.setdefault("rate_per_second", 0)
+    return DailyFortunePregenerator(session_factory=sessions, cache=cache, **kwargs)
+
+
+def test_pregenerates_active_users_once(sessions):
+    cache = make_cache()
+    state = asyncio.run(make_pregenerator(sessions, cache).run(FORTUNE_DATE))
+    assert state == {"last_user_id": 5, "generated": 4, "existing": 1, "failed": 0, "done": True}
+    assert sessions.rows() == {"1", "2", "3", "4", "5"}
+    assert LEADER_KEY not in cache.client.store
+
+    # 已完成的日期不再扫描
+    again = asyncio.run(make_pregenerator(sessions, cache).run(FORTUNE_DATE))
+    assert again == state
+
+
+def test_failed_generation_is_counted_and_retried(sessions, monkeypatch):
+    class DownLLM:
+        async def generate(self, prompt):
+            raise RuntimeError("LLM timeout")
+
+    monkeypatch.setattr("app.services.daily_fortune_service.get_llm_service", DownLLM)
+    state = asyncio.run(make_pregenerator(sessions, None).run(FORTUNE_DATE))
+    assert (state["generated"], state["existing"], state["failed"]) == (0, 1, 4)
+    # 没有写入默认运势，白天请求时重新生成
+    assert sessions.rows() == {"2"}
+
+
+def test_only_leader_runs(sessions):
+    cache = make_cache()
+    cache.client.store[LEADER_KEY] = "other-node"
+    assert asyncio.run(make_pregenerator(sessions, cache).run(FORTUNE_DATE)) == {"leader": False}
+    assert sessions.rows() == {"2"}
+
+
+def test_lost_lock_stops_and_next_node_resumes_from_checkpoint(sessions):
+    cache = make_cache()
+
+    class Preempted(DailyFortunePregenerator):
+        async def _active_user_ids(self, after_id):
+            user_ids = await super()._active_user_ids(after_id)
+            cache.client.store[LEADER_KEY] = "other-node"  # 租约过期后被其他节点抢走
+            return user_ids
+
+    state = asyncio.run(Preempted(session_factory=sessions, cache=cache, batch_size=2,
+                                  rate_per_second=0).run(FORTUNE_DATE))
+    assert (state["last_user_id"], state["generated"], state["existing"], state["done"]) == (2, 1, 1, False)
+    assert asyncio.run(cache.get(checkpoint_key(FORTUNE_DATE)))["last_user_id"] == 2
+
+    del cache.client.store[LEADER_KEY]
+    state = asyncio.run(make_pregenerator(sessions, cache).run(FORTUNE_DATE))
+    assert (state["generated"], state["existing"], state["done"]) == (4, 1, True)
+    assert sessions.rows() == {"1", "2", "3", "4", "5"}
+
+
+class SlowPregenerator(DailyFortunePregenerator):
+    """每个用户的生成都远长于主节点锁的过期时间"""
+
+    def __init__(self, *args, seconds=0.2, on_generate=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seconds = seconds
+        self.on_generate = on_generate
+        self.calls = []
+
+    async def _generate(self, user_id, fortune_date):
+        self.calls.append(user_id)
+        if self.on_generate:
+            self.on_generate()
+        await asyncio.sleep(self.seconds)
+        return "generated"
+
+
+def test_leader_lock_is_renewed_while_batch_outlasts_ttl(sessions):
+    cache = make_cache(ExpiringRedisClient())
+    leader = SlowPregenerator(session_factory=sessions, cache=cache, batch_size=5, rate_per_second=0,
+                              lock_seconds=0.06)
+
+    async def run():
+        first = asyncio.create_task(leader.run(FORTUNE_DATE))
+        await asyncio.sleep(0.15)  # 已超过锁的过期时间，批次仍在执行
+        second = await make_pregenerator(sessions, cache, lock_seconds=0.06).run(FORTUNE_DATE)
+        return await first, second
+
+    state, second = asyncio.run(run())
+    assert second == {"leader": False}
+    assert (state["generated"], state["done"]) == (5, True)
+    assert sorted(leader.calls) == ["1", "2", "3", "4", "5"]
+    assert LEADER_KEY not in cache.client.store
+
+
+def test_lost_lock_mid_batch_stops_new_work_without_checkpoint(sessions):
+    cache = make_cache(ExpiringRedisClient())
+
+    def steal():
+        cache.client.store[LEADER_KEY] = "other-node"
+        cache.client.deadlines.pop(LEADER_KEY, None)
+
+    leader = SlowPregenerator(session_factory=sessions, cache=cache, concurrency=1, batch_size=5,
+                              rate_per_second=0, lock_seconds=0.06, seconds=0.1, on_generate=steal)
+    state = asyncio.run(leader.run(FORTUNE_DATE))
+    assert leader.calls == ["1"]
+    assert (state["last_user_id"], state["generated"], state["done"]) == (0, 0, False)
+    assert asyncio.run(cache.get(checkpoint_key(FORTUNE_DATE))) is None
+    assert cache.client.store[LEADER_KEY] == "other-node"
+
+
+def test_deadline_stops_before_next_batch(sessions):
+    cache = make_cache()
+    past = datetime.now() - timedelta(seconds=1)
+    state = asyncio.run(make_pregenerator(sessions, cache).run(FORTUNE_DATE, deadline=past))
+    assert state["last_user_id"] == 0 and not state["done"]
+    assert sessions.rows() == {"2"}
+
+
+def test_concurrency_is_bounded(sessions):
+    in_flight, peak = 0, 0
+
+    class Tracking(DailyFortunePregenerator):
+        async def _generate(self, user_id, fortune_date):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return "generated"
+
+    state = asyncio.run(Tracking(session_factory=sessions, concurrency=2, batch_size=5,
+                                 rate_per_second=0).run(FORTUNE_DATE))
+    assert state["generated"] == 5 and peak == 2
+
+
+def test_token_bucket_paces_calls():
+    async def run():
+        bucket = AsyncTokenBucket(rate=50, burst=2)
+        start = time.monotonic()
+        for _ in range(12):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    # 前 2 次取桶内令牌，其余 10 次按 50 次/秒补充
+    assert asyncio.run(run()) >= 0.18
+
+
+@pytest.mark.parametrize("now, expected_start, fortune_date", [
+    (datetime(2026, 10, 19, 3, 0), datetime(2026, 10, 18, 22, 0), date(2026, 10, 19)),
+    (datetime(2026, 10, 19, 10, 0), datetime(2026, 10, 19, 22, 0), date(2026, 10, 20)),
+    (datetime(2026, 10, 19, 23, 30), datetime(2026, 10, 19, 22, 0), date(2026, 10, 20)),
+])
+def test_pregen_window(monkeypatch, now, expected_start, fortune_date):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "DAILY_FORTUNE_PREGEN_START", "22:00")
+    monkeypatch.setattr(settings, "DAILY_FORTUNE_PREGEN_WINDOW_HOURS", 8)
+    start, end, target = pregen_window(now)
+    assert (start, end - start, target) == (expected_start, timedelta(hours=8), fortune_date)
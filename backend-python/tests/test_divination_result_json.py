@@ -0,0 +1,80 @@
+"""已完成占卜结果预序列化测试"""
+
+import asyncio
+import json
+import pytest
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from app.core.exceptions import BadRequestError, NotFoundError
+from app.models.divination import DivinationSession
+from app.services.divination_service import DivinationService
+from app.services.iching_service import IChingService
+from tests.test_daily_fortune_pregen import AsyncSessionAdapter
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    DivinationSession.__table__.create(engine)
+    result = IChingService.generate_result("s1", "我应该跳槽吗")
+    with Session(engine) as session:
+        session.add(DivinationSession(id="s1", user_id="1", version="CN", question="我应该跳槽吗", status="completed",
+                                      result_summary=result["summary"], result_detail=result["detail"],
+                                      result_data=result))
+        session.add(DivinationSession(id="s2", user_id="1", version="CN", question="今年财运", status="processing"))
+        session.commit()
+    return engine
+
+
+def call(engine, method, *args):
+    async def run():
+        db = AsyncSessionAdapter(Session(engine))
+        try:
+            value = await getattr(DivinationService(db), method)(*args)
+            await db.commit()
+            return value
+        finally:
+            await db.__aexit__(None, None, None)
+
+    return asyncio.run(run())
+
+
+def stored_json(engine, session_id):
+    with Session(engine) as session:
+        return session.get(DivinationSession, session_id).result_json
+
+
+def test_freeze_matches_response_model_serialization(engine):
+    frozen = call(engine, "freeze_result", "s1")
+    assert stored_json(engine, "s1") == frozen
+
+    # 与 FastAPI 按 response_model 序列化的内容一致
+    expected = jsonable_encoder(call(engine, "get_result", "s1"))
+    assert json.loads(frozen) == expected
+    assert call(engine, "freeze_result", "s2") is None
+
+
+def test_reads_return_stored_bytes_without_rebuilding(engine, monkeypatch):
+    frozen = call(engine, "freeze_result", "s1")
+
+    def rebuild(session):
+        raise AssertionError("不应重新构建结果")
+
+    monkeypatch.setattr(DivinationService, "_to_result", staticmethod(rebuild))
+    assert call(engine, "get_result_json", "s1") == frozen
+
+
+def test_legacy_sessions_are_backfilled_on_first_read(engine):
+    assert stored_json(engine, "s1") is None
+    body = call(engine, "get_result_json", "s1")
+    assert json.loads(body)["session_id"] == "s1"
+    assert stored_json(engine, "s1") == body
+
+
+def test_missing_or_unfinished_sessions(engine):
+    with pytest.raises(NotFoundError):
+        call(engine, "get_result_json", "missing")
+    with pytest.raises(BadRequestError):
+        call(engine, "get_result_json", "s2")
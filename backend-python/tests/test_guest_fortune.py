@@ -0,0 +1,166 @@
+"""访客每日运势缓存测试"""
+
+import asyncio
+from datetime import date, datetime
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.api.v1 import daily_fortune as daily_fortune_api
+from app.dependencies import get_current_user_optional
+from app.models.daily_fortune import DailyFortune
+from app.models.user import User
+from app.services.daily_fortune_service import DailyFortuneService
+from app.services.guest_fortune_cache import GuestFortuneCache, etag_matches, seconds_until_midnight
+from tests.test_cache_batch import make_cache
+from tests.test_daily_fortune_cohort import CountingLLM, FailingLLM
+from tests.test_daily_fortune_pregen import SessionFactory
+
+FORTUNE_DATE = date(2026, 10, 20)
+
+
+@pytest.fixture
+def sessions():
+    return SessionFactory()
+
+
+def guest_fortunes(sessions, guest_cache, llm, traits_list):
+    async def load(animal, sign):
+        async with sessions() as db:
+            service = DailyFortuneService(db)
+            service.llm_service = llm
+            return await guest_cache.get_or_load(
+                FORTUNE_DATE,
+                service.cohort_key(animal, sign),
+                lambda: service.guest_fortune(FORTUNE_DATE, animal, sign)
+            )
+
+    async def run():
+        return await asyncio.gather(*[load(animal, sign) for animal, sign in traits_list])
+
+    return asyncio.run(run())
+
+
+def test_guests_share_one_generation_per_cohort(sessions):
+    llm = CountingLLM()
+    guest_cache = GuestFortuneCache(cache=make_cache())
+    fortunes = guest_fortunes(sessions, guest_cache, llm, [("", "")] * 5 + [("鼠", "白羊座")] * 3)
+
+    assert len(llm.prompts) == 2
+    assert len({fortune.etag for fortune in fortunes[:5]}) == 1
+    assert fortunes[0].etag != fortunes[5].etag
+    assert fortunes[0].payload["summary"] != fortunes[5].payload["summary"]
+    assert guest_cache.stats()["loads"] == 2
+    # 访客运势不写用户行
+    with Session(sessions.engine) as session:
+        assert session.execute(select(DailyFortune)).first() is None
+
+
+def test_redis_tier_serves_other_nodes(sessions):
+    redis = make_cache()
+    llm = CountingLLM()
+    first = guest_fortunes(sessions, GuestFortuneCache(cache=redis), llm, [("", "")])[0]
+    key = GuestFortuneCache.PREFIX + ":2026-10-20::"
+    assert 0 < redis.client.ttls[key] <= 86400
+
+    other_node = GuestFortuneCache(cache=redis)
+    second = guest_fortunes(sessions, other_node, llm, [("", "")])[0]
+    assert len(llm.prompts) == 1
+    assert second == first
+    assert other_node.stats()["l2_hits"] == 1
+
+
+def test_failed_generation_is_not_cached(sessions):
+    redis = make_cache()
+    guest_cache = GuestFortuneCache(cache=redis)
+    assert guest_fortunes(sessions, guest_cache, FailingLLM(), [("", "")]) == [None]
+    assert guest_cache.stats()["failures"] == 1 and guest_cache.stats()["size"] == 0
+    assert not redis.client.store
+
+    llm = CountingLLM()
+    fortune = guest_fortunes(sessions, guest_cache, llm, [("", "")])[0]
+    assert fortune.payload["summary"] == "运势1"
+    assert len(llm.prompts) == 1
+
+
+def test_seconds_until_midnight():
+    assert seconds_until_midnight(datetime(2026, 10, 19, 23, 0)) == 3600
+    assert seconds_until_midnight(datetime(2026, 10, 19, 0, 0)) == 86400
+    assert seconds_until_midnight(datetime(2026, 10, 19, 23, 59, 59, 999999)) == 1
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"old", "abc"', True),
+    ("*", True),
+    ('"old"', False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, '"abc"') is expected
+
+
+@pytest.fixture
+def client(sessions, monkeypatch):
+    llm = CountingLLM()
+    guest_cache = GuestFortuneCache()
+    current_user = {"value": None}
+
+    async def service():
+        db = sessions()
+        fortune_service = DailyFortuneService(db)
+        fortune_service.llm_service = llm
+        return fortune_service
+
+    async def get_cache():
+        return guest_cache
+
+    monkeypatch.setattr(daily_fortune_api, "get_guest_fortune_cache", get_cache)
+    app = FastAPI()
+    app.include_router(daily_fortune_api.router)
+    app.dependency_overrides[daily_fortune_api.get_daily_fortune_service] = service
+    app.dependency_overrides[get_current_user_optional] = lambda: current_user["value"]
+    with Session(sessions.engine) as session:
+        session.add(User(id=1, username="u1", password_hash="x"))
+        session.commit()
+    test_client = TestClient(app)
+    test_client.llm = llm
+    test_client.current_user = current_user
+    return test_client
+
+
+def test_guest_response_is_cacheable(client):
+    response = client.get("/daily_fortune", params={"target_date": "2026-10-20"})
+    assert response.status_code == 200
+    assert response.headers["cache-control"].startswith("public, max-age=")
+    assert 0 < int(response.headers["cache-control"].split("=")[1]) <= 86400
+    etag = response.headers["etag"]
+
+    revalidated = client.get("/daily_fortune", params={"target_date": "2026-10-20"},
+                             headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
+
+    with_birthday = client.post("/daily_fortune", params={"target_date": "2026-10-20", "birth_date": "1990-04-01"})
+    assert with_birthday.headers["etag"] != etag
+    assert len(client.llm.prompts) == 2
+
+
+def test_failed_guest_response_is_not_cacheable(client):
+    client.llm.generate = FailingLLM().generate
+    response = client.get("/daily_fortune", params={"target_date": "2026-10-20"})
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-store"
+    assert "etag" not in response.headers
+    assert response.json()["summary"] == "今日运势平稳，保持平常心。"
+
+
+def test_user_response_is_private(client):
+    client.current_user["value"] = User(id=1, username="u1", password_hash="x")
+    response = client.post("/daily_fortune", params={"target_date": "2026-10-20"})
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "private, no-store"
+    assert "etag" not in response.headers
+    assert response.json()["lucky_number"]
@@ -0,0 +1,110 @@
+"""测试衍生卦（互卦/错卦/综卦）与六十四卦关系矩阵"""
+
+import numpy as np
+import pytest
+from app.services.hexagram_analysis_service import HexagramAnalysisService, HexagramInfo
+from app.services.smart_prompt_builder import SmartPromptBuilder
+from app.utils.hexagram_data import HEXAGRAMS
+from app.utils.hexagram_matrix import (
+    HexagramMatrix, RELATION_NAMES, TRIGRAM_CHANGE_NAMES,
+    NUCLEAR_KING_WEN, INVERSE_KING_WEN, REVERSE_KING_WEN,
+)
+
+
+@pytest.mark.parametrize("number, nuclear, inverse, reverse", [
+    (1, 1, 2, 1),        # 乾：互乾、错坤、综乾
+    (3, 23, 50, 4),      # 屯：互剥、错鼎、综蒙
+    (11, 54, 12, 12),    # 泰：互归妹、错否、综否
+    (24, 2, 44, 23),     # 复：互坤、错姤、综剥
+    (63, 64, 64, 64),    # 既济：互未济、错未济、综未济
+    (64, 63, 63, 63),
+])
+def test_known_derived_hexagrams(number, nuclear, inverse, reverse):
+    assert HexagramMatrix.nuclear(number) == nuclear
+    assert HexagramMatrix.inverse(number) == inverse
+    assert HexagramMatrix.reverse(number) == reverse
+
+
+def test_inverse_and_reverse_are_involutions():
+    for number in range(1, 65):
+        assert INVERSE_KING_WEN[INVERSE_KING_WEN[number]] == number
+        assert REVERSE_KING_WEN[REVERSE_KING_WEN[number]] == number
+    # 互卦只取中间四爻，反复取互终归乾、坤、既济、未济
+    for number in range(1, 65):
+        nuclear = number
+        for _ in range(3):
+            nuclear = NUCLEAR_KING_WEN[nuclear]
+        assert nuclear in (1, 2, 63, 64)
+
+
+def _info(record: dict) -> HexagramInfo:
+    return HexagramInfo(
+        record["number"], record["name"], record["upper"], record["lower"],
+        record["outcome"], record["summary"], record["detail"], record["wuxing"],
+    )
+
+
+GENERATES = {"木": "火", "火": "土", "土": "金", "金": "水", "水": "木"}
+OVERCOMES = {"木": "土", "土": "水", "水": "火", "火": "金", "金": "木"}
+
+
+def _expected_relation(a: str, b: str) -> str:
+    if a == b:
+        return "比和"
+    if GENERATES[a] == b:
+        return "生"
+    if OVERCOMES[a] == b:
+        return "克"
+    return "被生" if GENERATES[b] == a else "被克"
+
+
+def test_matrix_matches_pairwise_analysis():
+    """矩阵与逐对计算的结果一致"""
+    infos = [_info(record) for record in HEXAGRAMS]
+    for a in infos:
+        for b in infos:
+            expected = HexagramAnalysisService.calculate_hexagram_compatibility(a, b)
+            result = HexagramAnalysisService.compatibility_by_number(a.number, b.number)
+            assert result["overall_compatibility"] == round(expected["overall_compatibility"])
+            assert result["level"] == expected["level"]
+
+            relation = RELATION_NAMES[HexagramMatrix.wuxing_relation(a.number, b.number)]
+            assert relation == _expected_relation(a.wuxing, b.wuxing)
+
+            change = TRIGRAM_CHANGE_NAMES[HexagramMatrix.trigram_change(a.number, b.number)]
+            assert ("下卦变" in change or "皆变" in change) == (a.lower_trigram != b.lower_trigram)
+            assert ("上卦变" in change or "皆变" in change) == (a.upper_trigram != b.upper_trigram)
+
+
+def test_compatibility_with_unknown_wuxing_is_unchanged():
+    a = HexagramInfo(1, "甲", "乾", "乾", "吉", "", "", "未知")
+    b = HexagramInfo(2, "乙", "坤", "坤", "平", "", "", "金")
+    result = HexagramAnalysisService.calculate_hexagram_compatibility(a, b)
+    assert result["wuxing_compatibility"] == 0
+    assert result["outcome_compatibility"] == 70
+    assert result["level"] == "低"
+
+
+def test_batch_lookup_matches_scalar():
+    rng = np.random.default_rng(7)
+    a = rng.integers(1, 65, size=1000)
+    b = rng.integers(1, 65, size=1000)
+    out = np.empty(1000, dtype=np.uint8)
+    result = HexagramMatrix.lookup_many("compatibility", a, b, out=out)
+    assert result is out
+    assert out.tolist() == [HexagramMatrix.compatibility(x, y) for x, y in zip(a.tolist(), b.tolist())]
+    assert HexagramMatrix.lookup_many("wuxing", a, b).tolist() == [
+        HexagramMatrix.wuxing_relation(x, y) for x, y in zip(a.tolist(), b.tolist())
+    ]
+    assert HexagramMatrix.derived_many("reverse", a).tolist() == [REVERSE_KING_WEN[x] for x in a.tolist()]
+    assert HexagramMatrix.matrix("compatibility").shape == (64, 64)
+
+
+def test_derived_hexagrams_in_prompt():
+    assert HexagramAnalysisService.derived_hexagrams(3) == {
+        "nuclear": {"number": 23, "name": "剥"},
+        "inverse": {"number": 50, "name": "鼎"},
+        "reverse": {"number": 4, "name": "蒙"},
+    }
+    prompt = SmartPromptBuilder.build_answer_prompt("我该不该换工作？", HEXAGRAMS[2])
+    assert "互卦：剥，错卦：鼎，综卦：蒙" in prompt
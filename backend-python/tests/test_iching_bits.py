@@ -0,0 +1,97 @@
+"""测试位表示的六爻与预计算卦表"""
+
+import pytest
+from app.services.iching_service import IChingService, SixLines
+from app.utils.hexagram_data import (
+    KING_WEN_BY_BITS, BITS_BY_KING_WEN, CHANGED_KING_WEN, CHANGING_LINES,
+    TRIGRAM_BY_BITS, get_hexagram_by_number,
+)
+
+
+def test_king_wen_table_is_a_permutation():
+    """64个卦位各对应唯一的文王卦序"""
+    assert sorted(KING_WEN_BY_BITS) == list(range(1, 65))
+    for bits in range(64):
+        assert BITS_BY_KING_WEN[KING_WEN_BY_BITS[bits]] == bits
+
+
+@pytest.mark.parametrize("values, number, name", [
+    ([7] * 6, 1, "乾"),
+    ([8] * 6, 2, "坤"),
+    ([7, 8, 8, 8, 7, 8], 3, "屯"),        # 震下坎上
+    ([7, 7, 7, 8, 8, 8], 11, "泰"),       # 乾下坤上
+    ([8, 8, 8, 7, 7, 7], 12, "否"),       # 坤下乾上
+    ([7, 8, 7, 8, 7, 8], 63, "既济"),     # 离下坎上
+    ([8, 7, 8, 7, 8, 7], 64, "未济"),     # 坎下离上
+])
+def test_known_hexagrams(values, number, name):
+    six_lines = SixLines.from_values(values)
+    assert six_lines.hexagram_number == number
+    assert get_hexagram_by_number(number)["name"] == name
+
+
+def test_trigram_lookup():
+    """上下卦由高3位/低3位查表"""
+    six_lines = SixLines.from_values([7, 7, 7, 8, 8, 8])
+    assert TRIGRAM_BY_BITS[six_lines.bits & 7]["name"] == "乾"
+    assert TRIGRAM_BY_BITS[six_lines.bits >> 3]["name"] == "坤"
+    assert six_lines.lower_trigram == 1
+    assert six_lines.upper_trigram == 2
+
+
+def test_changed_table_matches_xor():
+    for bits in range(64):
+        for mask in range(64):
+            assert CHANGED_KING_WEN[bits << 6 | mask] == KING_WEN_BY_BITS[bits ^ mask]
+
+
+def test_changing_lines_and_values():
+    six_lines = SixLines.from_values([6, 7, 8, 9, 7, 8])
+    assert six_lines.changing_lines == [0, 3] == list(CHANGING_LINES[six_lines.mask])
+    assert [six_lines.line_value(i) for i in range(6)] == [6, 7, 8, 9, 7, 8]
+
+    changed = IChingService.calculate_changed_hexagram(six_lines)
+    assert changed == SixLines.from_values([7, 7, 8, 8, 7, 8])
+    assert changed.hexagram_number == six_lines.changed_number
+
+
+def test_six_lines_is_slotted_value():
+    six_lines = SixLines(0b101010, 0b000001)
+    assert not hasattr(six_lines, "__dict__")
+    assert six_lines == SixLines(0b101010, 0b000001)
+    assert len({six_lines, SixLines(0b101010, 0b000001)}) == 1
+    assert IChingService.calculate_changed_hexagram(SixLines(5)) == SixLines(5)
+
+
+def test_generate_result_is_deterministic():
+    first = IChingService.generate_result("session-1", "问题")
+    second = IChingService.generate_result("session-1", "问题")
+    assert first == second
+
+    info = first["hexagram_info"]
+    number = info["number"]
+    assert get_hexagram_by_number(number)["name"] == info["name"] == first["title"]
+    bits = BITS_BY_KING_WEN[number]
+    assert TRIGRAM_BY_BITS[bits >> 3]["name"] == info["upper_trigram"]
+    assert TRIGRAM_BY_BITS[bits & 7]["name"] == info["lower_trigram"]
+
+
+def test_detail_rendered_once_per_hexagram_and_mask():
+    IChingService.detail_cache_clear()
+    six_lines = SixLines.from_values([6, 7, 8, 9, 7, 8])
+
+    first = IChingService.get_hexagram_info(six_lines)
+    second = IChingService.get_hexagram_info(SixLines(six_lines.bits, six_lines.mask))
+    assert first["detail"] is second["detail"]
+    assert IChingService.detail_cache_info().hits == 1
+
+    # 返回的是副本，调用方修改不影响缓存
+    first["detail"] = "changed"
+    first["changing_lines"].append(5)
+    third = IChingService.get_hexagram_info(six_lines)
+    assert third["detail"] == second["detail"]
+    assert third["changing_lines"] == [0, 3]
+
+    uncached = IChingService.render_hexagram_info(six_lines.bits << 6 | six_lines.mask)
+    assert uncached["detail"] == third["detail"]
+    assert "变卦" in uncached["detail"]
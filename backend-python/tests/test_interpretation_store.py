@@ -0,0 +1,176 @@
+"""LLM 解读跨用户复用测试"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.interpretation import LLMInterpretation
+from app.services.enhanced_divination_service import EnhancedDivinationService
+from app.services.iching_service import IChingService, SixLines
+from app.services.interpretation_store import InterpretationStore
+from app.services.prompt_builder import PromptBuilder
+
+
+class SyncBackedSession:
+    """用同步 SQLite 会话模拟 AsyncSession 中用到的接口"""
+
+    def __init__(self):
+        engine = create_engine("sqlite://")
+        LLMInterpretation.__table__.create(engine)
+        self.sync = Session(engine)
+
+    async def execute(self, statement):
+        return self.sync.execute(statement)
+
+    def add(self, row):
+        self.sync.add(row)
+
+    async def flush(self):
+        self.sync.flush()
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        with self.sync.begin_nested():
+            yield
+
+
+def prompt_config(**overrides):
+    fields = dict(id=7, template="模板{question}", llm_config_id=1, temperature=0.7, max_tokens=500,
+                  reuse_ttl_hours=None)
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+ANALYSIS = SimpleNamespace(question_type="career", sub_type="yes_no")
+HEXAGRAM = {"number": 1, "changing_lines": [0, 5]}
+
+
+def key_for(question, hexagram=HEXAGRAM, analysis=ANALYSIS, config=None, prompt_type="answer"):
+    return InterpretationStore.make_key(question, hexagram, analysis, prompt_type, config or prompt_config())
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def store():
+    return InterpretationStore(SyncBackedSession())
+
+
+def test_key_encodes_hexagram_mask_and_question_cluster():
+    key = key_for("我该不该跳槽？")
+    assert (key.hexagram_number, key.changing_mask) == (1, 0b100001)
+    assert (key.question_type, key.sub_type, key.prompt_config_id) == ("career", "yes_no", 7)
+    assert key.ttl == timedelta(hours=settings.INTERPRETATION_REUSE_TTL_HOURS)
+    assert key_for("请问我该不该跳槽").fingerprint == key.fingerprint
+    assert key_for("") is None
+    assert key_for("跳槽", hexagram={"number": None}) is None
+
+
+def test_prompt_version_changes_with_prompt_and_ttl_policy():
+    base = InterpretationStore.prompt_version(prompt_config())
+    assert InterpretationStore.prompt_version(prompt_config(template="新模板")) != base
+    assert InterpretationStore.prompt_version(prompt_config(temperature=0.2)) != base
+    assert InterpretationStore.prompt_version(prompt_config(reuse_ttl_hours=1)) == base
+    assert InterpretationStore.freshness(prompt_config(reuse_ttl_hours=0)) is None
+    assert InterpretationStore.freshness(prompt_config(reuse_ttl_hours=12)) == timedelta(hours=12)
+
+
+def test_reuse_across_users_for_similar_question(store):
+    question = "我该不该跳槽？"
+    assert run(store.find(key_for(question))) is None
+    run(store.save(key_for(question), f"关于「{question}」：乾卦刚健，宜进。"))
+
+    reused = run(store.find(key_for("请问我该不该跳槽")))
+    assert reused == "关于「请问我该不该跳槽」：乾卦刚健，宜进。"
+    row = store.db.sync.execute(select(LLMInterpretation)).scalar_one()
+    assert row.hit_count == 1 and row.last_used_at is not None
+
+    stats = InterpretationStore.daily_stats()[datetime.now().date().isoformat()]
+    assert stats["llm_calls_avoided"] >= 1 and stats["stores"] >= 1
+
+
+def test_no_reuse_across_hexagram_mask_type_or_dissimilar_question(store):
+    run(store.save(key_for("我该不该跳槽"), "解读"))
+    assert run(store.find(key_for("我该不该跳槽", hexagram={"number": 1, "changing_lines": [0]}))) is None
+    assert run(store.find(key_for("我该不该跳槽", hexagram={"number": 2, "changing_lines": [0, 5]}))) is None
+    assert run(store.find(key_for("我该不该跳槽", analysis=SimpleNamespace(question_type="career",
+                                                                             sub_type="timing")))) is None
+    assert run(store.find(key_for("我该不该跳槽", prompt_type="detail"))) is None
+    assert run(store.find(key_for("我和男朋友下个月去哪里旅行比较好"))) is None
+
+
+def test_reuse_across_divination_days(store):
+    # 同一卦、同一变爻在不同日期起到：可复用解读的提示词不含日柱、旬空、六神，解读可以跨日复用
+    six_lines = SixLines(0b111111, 0b100001)
+    first_day = IChingService.get_hexagram_info(six_lines, date(2026, 10, 19))
+    next_day = IChingService.get_hexagram_info(six_lines, date(2026, 10, 20))
+    assert first_day["najia"]["day"] != next_day["najia"]["day"]
+
+    run(store.save(key_for("我该不该跳槽", hexagram=first_day), "解读"))
+    assert run(store.find(key_for("我该不该跳槽", hexagram=next_day))) == "解读"
+
+
+def test_reusable_prompts_leave_out_day_dependent_najia():
+    six_lines = SixLines(0b111111, 0b100001)
+    first_day = IChingService.get_hexagram_info(six_lines, date(2026, 10, 19))
+    next_day = IChingService.get_hexagram_info(six_lines, date(2026, 10, 20))
+    for build in (
+        lambda info, with_day: PromptBuilder.build_answer_prompt("我该不该跳槽", info, None, ANALYSIS, with_day),
+        lambda info, with_day: PromptBuilder.build_detail_prompt("我该不该跳槽", info, with_day=with_day),
+    ):
+        assert build(first_day, False) == build(next_day, False)
+        assert "父母 壬戌土 — 世" in build(first_day, False)
+        assert build(first_day, True) != build(next_day, True)
+        spirits = {line["spirit"] for line in first_day["najia"]["lines"]}
+        assert not any(spirit in build(first_day, False) for spirit in spirits)
+        assert first_day["najia"]["day"] not in build(first_day, False)
+
+
+@pytest.mark.parametrize("reuse_ttl_hours, with_day", [(None, False), (0, True)])
+def test_enhancement_builds_day_free_prompt_only_when_reusable(store, reuse_ttl_hours, with_day):
+    prompts = []
+
+    class PromptRepo:
+        async def get_by_scene_and_type(self, scene, prompt_type):
+            return prompt_config(llm_config_id=None, reuse_ttl_hours=reuse_ttl_hours)
+
+    class RecordingLLM:
+        async def generate_answer(self, prompt):
+            prompts.append(prompt)
+            return "解读"
+
+    service = EnhancedDivinationService.__new__(EnhancedDivinationService)
+    service.prompt_repo, service.interpretations, service.llm_service = PromptRepo(), store, RecordingLLM()
+    info = IChingService.get_hexagram_info(SixLines(0b111111, 0b100001), date(2026, 10, 19))
+    assert run(service._enhance_summary("我该不该跳槽", info, ANALYSIS)) == "解读"
+    assert (f"{info['najia']['day']}日" in prompts[0]) is with_day
+
+
+def test_prompt_change_and_freshness_invalidate(store):
+    run(store.save(key_for("我该不该跳槽"), "解读"))
+    assert run(store.find(key_for("我该不该跳槽", config=prompt_config(template="新模板")))) is None
+    assert run(store.find(key_for("我该不该跳槽", config=prompt_config(reuse_ttl_hours=0)))) is None
+
+    # 超过新鲜期
+    store.db.sync.execute(update(LLMInterpretation).values(
+        created_at=datetime.now(timezone.utc) - timedelta(hours=3)))
+    assert run(store.find(key_for("我该不该跳槽", config=prompt_config(reuse_ttl_hours=2)))) is None
+    assert run(store.find(key_for("我该不该跳槽", config=prompt_config(reuse_ttl_hours=4)))) == "解读"
+
+    assert run(store.invalidate_prompt(7)) == 1
+    assert run(store.find(key_for("我该不该跳槽"))) is None
+
+
+def test_lookup_failure_does_not_raise():
+    class BrokenSession(SyncBackedSession):
+        async def execute(self, statement):
+            raise RuntimeError("db down")
+
+    store = InterpretationStore(BrokenSession())
+    assert run(store.find(key_for("我该不该跳槽"))) is None
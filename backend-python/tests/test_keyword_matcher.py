@@ -0,0 +1,43 @@
+"""关键词规则测试（与提升词表为模块常量前的实现对照）"""
+
+from app.services.orientation_service import BAGUA_KEYWORD_RULES, TAROT_KEYWORD_RULES, match_keyword_rule
+from app.services.question_analyzer import QuestionAnalyzer
+from app.services.question_classifier import QuestionClassifier
+from tests.bench_keyword_matcher import (
+    all_keywords, legacy_classify, legacy_fallback_analysis, legacy_orientation, question_corpus, single_pass_scanner
+)
+
+CORPUS = question_corpus(2000, seed=11) + [
+    "", "   ", "我应该选A还是B？", "今年的运势怎么样", "他喜欢我吗，但是我不确定", "Money and HEALTH",
+]
+
+
+def test_classifier_matches_legacy():
+    classifier = QuestionClassifier()
+    for question in CORPUS:
+        result = classifier.classify(question)
+        assert (result.type, result.confidence, result.keywords, result.context) == \
+            legacy_classify(question), question
+
+
+def test_fallback_analysis_matches_legacy():
+    analyzer = QuestionAnalyzer()
+    for question in CORPUS:
+        analysis = analyzer._fallback_analysis(question)
+        expected = legacy_fallback_analysis(question)
+        assert {key: getattr(analysis, key) for key in expected} == expected, question
+
+
+def test_orientation_rules_match_legacy():
+    for question in CORPUS:
+        for rules in (BAGUA_KEYWORD_RULES, TAROT_KEYWORD_RULES):
+            matched = match_keyword_rule(question, rules)
+            assert (matched[0] if matched else "") == legacy_orientation(question, rules), question
+
+
+def test_single_pass_scanner_finds_every_keyword():
+    words = all_keywords()
+    scan = single_pass_scanner(words)
+    for question in CORPUS + ["还是什么意思", "喜欢的人"]:
+        text = question.lower()
+        assert scan(text) == {word for word in words if word in text}, question
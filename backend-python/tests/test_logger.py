@@ -0,0 +1,124 @@
+"""测试结构化日志（JSON输出 / 请求ID / DEBUG采样 / 中间件）"""
+
+import io
+import json
+import asyncio
+import logging
+import pytest
+from app.core.logger import (
+    setup_logging,
+    shutdown_logging,
+    get_logger,
+    request_id_var,
+)
+from app.middleware.request_id import RequestIdMiddleware
+
+
+def read_records(stream: io.StringIO):
+    """停止监听线程（写完队列）后解析输出"""
+    shutdown_logging()
+    return [json.loads(line) for line in stream.getvalue().splitlines() if line]
+
+
+def test_json_record_with_extra_and_request_id():
+    """输出JSON，extra字段为顶层字段，附带当前请求ID"""
+    stream = io.StringIO()
+    setup_logging("INFO", json_format=True, stream=stream)
+    logger = get_logger("test")
+
+    token = request_id_var.set("req-1")
+    try:
+        logger.info("命中 %s", "乾", extra={"cache_key": "session:1"})
+    finally:
+        request_id_var.reset(token)
+    logger.warning("无请求")
+
+    records = read_records(stream)
+    assert records[0]["msg"] == "命中 乾"
+    assert records[0]["level"] == "INFO"
+    assert records[0]["logger"] == "divinedaily.test"
+    assert records[0]["request_id"] == "req-1"
+    assert records[0]["cache_key"] == "session:1"
+    assert records[1]["request_id"] == "-"
+
+
+def test_exception_is_serialized():
+    """logger.exception 输出堆栈"""
+    stream = io.StringIO()
+    setup_logging("INFO", stream=stream)
+
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        get_logger("test").exception("失败")
+
+    records = read_records(stream)
+    assert "ValueError: boom" in records[0]["exc_info"]
+
+
+def test_debug_disabled_does_not_format_arguments():
+    """DEBUG关闭时不格式化参数、不入队"""
+    stream = io.StringIO()
+    setup_logging("INFO", stream=stream)
+
+    class Expensive:
+        def __str__(self):
+            raise AssertionError("不应被格式化")
+
+    get_logger("test").debug("value=%s", Expensive())
+    assert read_records(stream) == []
+
+
+def test_debug_sampling():
+    """DEBUG按采样率丢弃，记录上的sample_rate优先，INFO不采样"""
+    stream = io.StringIO()
+    setup_logging("DEBUG", debug_sample_rate=0.0, stream=stream)
+    logger = get_logger("test")
+
+    for _ in range(10):
+        logger.debug("dropped")
+    logger.debug("kept", extra={"sample_rate": 1.0})
+    logger.info("info")
+
+    assert [r["msg"] for r in read_records(stream)] == ["kept", "info"]
+
+
+def test_request_id_middleware():
+    """中间件沿用上游请求ID或生成新ID，并写回响应头"""
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(request_id_var.get())
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = RequestIdMiddleware(app)
+
+    async def call(headers):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        await middleware({"type": "http", "headers": headers}, None, send)
+        return dict(messages[0]["headers"])[b"x-request-id"].decode()
+
+    async def run():
+        assert await call([(b"x-request-id", b"abc")]) == "abc"
+        generated = await call([])
+        assert len(generated) == 32
+
+    asyncio.run(run())
+    assert seen[0] == "abc"
+    assert request_id_var.get() == "-"
+
+
+@pytest.fixture(autouse=True)
+def restore_logging():
+    yield
+    shutdown_logging()
+    logging.getLogger("divinedaily").setLevel(logging.NOTSET)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,111 @@
+"""测试农历预计算表"""
+
+import pytest
+from datetime import date, timedelta
+from app.utils.calendar import CalendarConverter, LunarTable
+
+
+def walk_solar_to_lunar(solar_date: date):
+    """逐年逐月累减的参考实现（原 solar_to_lunar 算法）"""
+    offset = (solar_date - LunarTable.BASE_DATE).days
+
+    i = 1900
+    temp = 0
+    while i < 2101 and offset > 0:
+        temp = CalendarConverter.l_year_days(i)
+        offset -= temp
+        i += 1
+    if offset < 0:
+        offset += temp
+        i -= 1
+
+    lunar_year = i
+    leap = CalendarConverter.leap_month(i)
+    is_leap = False
+
+    i = 1
+    while i < 13 and offset > 0:
+        if leap > 0 and i == (leap + 1) and not is_leap:
+            i -= 1
+            is_leap = True
+            temp = CalendarConverter.leap_days(lunar_year)
+        else:
+            temp = CalendarConverter.month_days(lunar_year, i)
+        if is_leap and i == (leap + 1):
+            is_leap = False
+        offset -= temp
+        i += 1
+
+    if offset == 0 and leap > 0 and i == leap + 1:
+        if is_leap:
+            is_leap = False
+        else:
+            is_leap = True
+            i -= 1
+    if offset < 0:
+        offset += temp
+        i -= 1
+
+    return lunar_year, i, offset + 1, is_leap
+
+
+def test_table_matches_walk():
+    """1900-01-31 至表中最后一天所有月末/月初及每隔7天与参考实现一致"""
+    day = LunarTable.BASE_DATE
+    end = LunarTable.MAX_DATE
+    index = 0
+    while day <= end:
+        lunar = LunarTable.lookup(day)
+        if lunar[2] <= 1 or lunar[2] >= 29 or index % 7 == 0:
+            assert lunar == walk_solar_to_lunar(day), day
+        day += timedelta(days=1)
+        index += 1
+
+
+def test_known_dates():
+    """春节、闰月等已知日期"""
+    assert LunarTable.lookup(date(1900, 1, 31)) == (1900, 1, 1, False)
+    assert LunarTable.lookup(date(2026, 2, 13)) == (2025, 12, 26, False)
+    assert LunarTable.lookup(date(2026, 2, 17)) == (2026, 1, 1, False)
+    assert LunarTable.lookup(date(2023, 3, 22)) == (2023, 2, 1, True)
+    assert LunarTable.lookup(date(2023, 4, 20)) == (2023, 3, 1, False)
+
+
+def test_lunar_to_solar_round_trip():
+    """农历→公历→农历往返一致（含闰月）"""
+    result = CalendarConverter.lunar_to_solar(2023, 2, 15, is_leap_month=True)
+    assert (result["solar_year"], result["solar_month"], result["solar_day"]) == (2023, 4, 5)
+    assert result["is_leap"] and result["lunar_day"] == 15
+
+    for year in (1900, 1984, 2020, 2057, 2099):
+        for month in range(1, 13):
+            result = CalendarConverter.lunar_to_solar(year, month, 1)
+            assert (result["lunar_year"], result["lunar_month"], result["lunar_day"]) == (year, month, 1)
+
+
+def test_last_lunar_day_lands_in_next_solar_year():
+    """农历2100年除夕（腊月廿九）是表中最后一天，落在公历2101年"""
+    assert LunarTable.MAX_DATE == date(2101, 1, 28)
+    result = CalendarConverter.lunar_to_solar(2100, 12, 29)
+    assert (result["solar_year"], result["solar_month"], result["solar_day"]) == (2101, 1, 28)
+    assert (result["lunar_year"], result["lunar_month"], result["lunar_day"]) == (2100, 12, 29)
+    assert CalendarConverter.solar_to_lunar(2101, 1, 1)["lunar_day"] == 2
+    days = CalendarConverter.solar_to_lunar_range(date(2100, 12, 31), LunarTable.MAX_DATE)
+    assert len(days) == 29 and days[-1]["lunar_festival"] == "除夕"
+    # 2101年小寒之后月柱为己丑
+    assert CalendarConverter.solar_to_lunar(2101, 1, 5)["term"] == "小寒"
+    assert CalendarConverter.solar_to_lunar(2101, 1, 28)["ganzhi_month"] == "己丑"
+
+
+def test_out_of_range():
+    """超出表范围抛出ValueError"""
+    with pytest.raises(ValueError):
+        CalendarConverter.solar_to_lunar(1900, 1, 30)
+    with pytest.raises(ValueError):
+        CalendarConverter.solar_to_lunar(2101, 1, 29)
+    with pytest.raises(ValueError):
+        CalendarConverter.lunar_to_solar(2024, 3, 1, is_leap_month=True)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
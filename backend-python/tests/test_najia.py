@@ -0,0 +1,99 @@
+"""测试纳甲六爻装卦"""
+
+from datetime import date
+import pytest
+from app.schemas.divination import HexagramInfo
+from app.services.iching_service import IChingService, SixLines
+from app.services.prompt_builder import PromptBuilder
+from app.utils.hexagram_data import BITS_BY_KING_WEN, PALACE_BY_BITS
+from app.utils.najia import NajiaEngine, SHI_BY_BITS
+
+
+def _najia(number: int, mask: int = 0, day_index: int = 0):
+    return NajiaEngine.assign(BITS_BY_KING_WEN[number], mask, day_index)
+
+
+def _column(najia, key):
+    return [line[key] for line in najia["lines"]]
+
+
+def test_qian_palace():
+    """乾为天：乾宫本宫卦，世六应三，甲子寅辰 / 壬午申戌"""
+    najia = _najia(1)
+    assert (najia["palace"], najia["generation"], najia["palace_wuxing"]) == ("乾宫", "本宫卦", "金")
+    assert (najia["shi"], najia["ying"]) == (6, 3)
+    assert [line["stem"] + line["branch"] for line in najia["lines"]] == [
+        "甲子", "甲寅", "甲辰", "壬午", "壬申", "壬戌"
+    ]
+    assert _column(najia, "relative") == ["子孙", "妻财", "父母", "官鬼", "兄弟", "父母"]
+    assert _column(najia, "marker") == ["", "", "应", "", "", "世"]
+
+
+@pytest.mark.parametrize("number, palace, generation, shi, branches, relatives", [
+    # 水雷屯：坎宫二世卦
+    (3, "坎宫", "二世卦", 2, "子寅辰申戌子", ["兄弟", "子孙", "官鬼", "父母", "官鬼", "兄弟"]),
+    # 水天需：坤宫游魂卦
+    (5, "坤宫", "游魂卦", 4, "子寅辰申戌子", ["妻财", "官鬼", "兄弟", "子孙", "兄弟", "妻财"]),
+    # 火天大有：乾宫归魂卦
+    (14, "乾宫", "归魂卦", 3, "子寅辰酉未巳", ["子孙", "妻财", "父母", "兄弟", "父母", "官鬼"]),
+    # 天风姤：乾宫一世卦
+    (44, "乾宫", "一世卦", 1, "丑亥酉午申戌", ["父母", "子孙", "兄弟", "官鬼", "兄弟", "父母"]),
+])
+def test_known_palaces(number, palace, generation, shi, branches, relatives):
+    najia = _najia(number)
+    assert (najia["palace"], najia["generation"], najia["shi"]) == (palace, generation, shi)
+    assert najia["ying"] == (shi + 2) % 6 + 1
+    assert "".join(_column(najia, "branch")) == branches
+    assert _column(najia, "relative") == relatives
+
+
+def test_each_palace_has_eight_hexagrams():
+    for palace in range(8):
+        members = [bits for bits in range(64) if PALACE_BY_BITS[bits] >> 3 == palace]
+        assert sorted(PALACE_BY_BITS[bits] & 7 for bits in members) == list(range(8))
+    assert all(0 <= SHI_BY_BITS[bits] < 6 for bits in range(64))
+
+
+@pytest.mark.parametrize("day, first_spirit, void", [
+    (date(2024, 2, 10), "青龙", ["寅", "卯"]),   # 甲辰日
+    (date(2024, 2, 12), "朱雀", ["寅", "卯"]),   # 丙午日
+    (date(2024, 2, 14), "勾陈", ["寅", "卯"]),   # 戊申日
+    (date(2024, 2, 15), "螣蛇", ["寅", "卯"]),   # 己酉日
+    (date(2024, 2, 19), "玄武", ["寅", "卯"]),   # 癸丑日
+    (date(2024, 2, 20), "青龙", ["子", "丑"]),   # 甲寅日
+])
+def test_six_spirits_and_void_follow_day(day, first_spirit, void):
+    najia = NajiaEngine.assign(0, 0, NajiaEngine.day_index(day))
+    spirits = _column(najia, "spirit")
+    assert spirits[0] == first_spirit
+    assert len(set(spirits)) == 6
+    assert najia["void"] == void
+
+
+def test_changed_lines_use_original_palace():
+    """乾卦初爻动变姤：变出辛丑土，按乾宫金论为父母"""
+    najia = _najia(1, mask=0b000001)
+    assert najia["lines"][0]["changed"] == {"stem": "辛", "branch": "丑", "wuxing": "土", "relative": "父母"}
+    assert all("changed" not in line for line in najia["lines"][1:])
+
+
+def test_hexagram_info_carries_najia_into_prompts():
+    six_lines = SixLines(BITS_BY_KING_WEN[1], 0b000001)
+    info = IChingService.get_hexagram_info(six_lines, date(2024, 2, 10))
+    assert info["najia"]["day"] == "甲辰"
+    assert info["najia"]["lines"][5]["marker"] == "世"
+
+    # 字典与 Pydantic 对象均可生成排盘段落
+    for hexagram_info in (info, HexagramInfo(**info)):
+        prompt = PromptBuilder.build_detail_prompt("问事业", hexagram_info)
+        assert "乾宫本宫卦（金），甲辰日，旬空寅卯" in prompt
+        assert "玄武 父母 壬戌土 — 世" in prompt
+        assert "青龙 子孙 甲子水 — ○→ 父母 辛丑土" in prompt
+
+
+def test_prompt_section_without_day():
+    najia = NajiaEngine.assign(BITS_BY_KING_WEN[1], 0b000001, NajiaEngine.day_index(date(2024, 2, 10)))
+    section = NajiaEngine.prompt_section(najia, with_day=False)
+    assert "乾宫本宫卦（金）\n" in section
+    assert "父母 壬戌土 — 世" in section and "子孙 甲子水 — ○→ 父母 辛丑土" in section
+    assert not any(word in section for word in ("甲辰日", "旬空", "六神", "青龙", "玄武"))
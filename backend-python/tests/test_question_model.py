@@ -0,0 +1,104 @@
+"""本地问题分析模型测试"""
+
+import asyncio
+import time
+import pytest
+from app.services.analysis_cache import AnalysisCache
+from app.services.question_analyzer import (
+    ANALYSIS_SOURCES, SOURCE_CACHE, SOURCE_LLM, SOURCE_LOCAL, SOURCE_RULES, QuestionAnalyzer
+)
+from app.utils.question_model import LABEL_FIELDS, QuestionModel, evaluate, question_features
+from tests.bench_keyword_matcher import question_corpus
+
+LLM_RESPONSE = (
+    '{"question_type": "career", "sub_type": "yes_no", "elements": {}, '
+    '"intent": "yes_no", "complexity": "simple", "keywords": ["跳槽"]}'
+)
+
+
+class FakeLLM:
+    """记录调用次数的假 LLM"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_answer(self, prompt: str) -> str:
+        self.calls += 1
+        return LLM_RESPONSE
+
+
+def rule_labels(questions):
+    analyzer = QuestionAnalyzer(local_model=None, threshold=2.0)
+    return [
+        {field: getattr(analyzer._fallback_analysis(q), field) for field in LABEL_FIELDS}
+        for q in questions
+    ]
+
+
+@pytest.fixture(scope="module")
+def trained():
+    questions = question_corpus(3000, seed=5)
+    labels = rule_labels(questions)
+    model = QuestionModel.train(questions[:2500], labels[:2500], epochs=10)
+    return model, questions[2500:], labels[2500:]
+
+
+def test_features_are_stable_and_include_bias():
+    ids = question_features("我应该跳槽吗？")
+    assert ids[0] == 0
+    assert list(ids) == sorted(set(ids))
+    assert (question_features("我应该跳槽吗？") == ids).all()
+    assert (question_features("  我应该跳槽吗？ ") == ids).all()
+
+
+def test_model_learns_labels_and_predicts_fast(trained):
+    model, questions, labels = trained
+    report = evaluate(model, questions, labels, [0.9])
+    assert report["accuracy"]["question_type"] > 0.8
+    assert report["thresholds"][0]["exact"] >= report["exact"]
+
+    start = time.perf_counter()
+    for question in questions:
+        model.predict(question)
+    assert (time.perf_counter() - start) / len(questions) < 1e-3
+
+
+def test_save_and_load_round_trip(trained, tmp_path):
+    model, questions, _ = trained
+    model.meta = {"train_samples": 2500}
+    model.save(tmp_path / "model.npz")
+    loaded = QuestionModel.load(tmp_path / "model.npz")
+    assert loaded.meta == {"train_samples": 2500}
+    assert loaded.classes == model.classes
+    for question in questions[:50]:
+        assert loaded.predict(question).labels == model.predict(question).labels
+
+
+def test_confident_local_model_skips_llm(trained):
+    model, questions, _ = trained
+    question = max(questions, key=lambda q: model.predict(q).confidence)
+    llm = FakeLLM()
+    before = ANALYSIS_SOURCES[SOURCE_LOCAL]
+
+    analyzer = QuestionAnalyzer(llm, local_model=model, threshold=0.5, cache=AnalysisCache())
+    analysis = asyncio.run(analyzer.analyze_question(question))
+    assert llm.calls == 0
+    assert analysis.source == SOURCE_LOCAL
+    assert {field: getattr(analysis, field) for field in LABEL_FIELDS} == model.predict(question).labels
+    assert ANALYSIS_SOURCES[SOURCE_LOCAL] == before + 1
+
+
+def test_low_confidence_falls_back_to_llm_then_rules(trained):
+    model, questions, _ = trained
+    llm = FakeLLM()
+    analyzer = QuestionAnalyzer(llm, local_model=model, threshold=1.01, cache=AnalysisCache())
+    analysis = asyncio.run(analyzer.analyze_question(questions[0]))
+    assert llm.calls == 1
+    assert analysis.source == SOURCE_LLM
+    assert analysis.question_type == "career"
+
+    analyzer = QuestionAnalyzer(None, local_model=model, threshold=1.01, cache=AnalysisCache())
+    analysis = asyncio.run(analyzer.analyze_question(questions[0]))
+    assert analysis.source == SOURCE_RULES
+    stats = QuestionAnalyzer.source_stats()
+    assert stats["llm_calls_saved"] == stats["sources"][SOURCE_LOCAL] + stats["sources"][SOURCE_CACHE]
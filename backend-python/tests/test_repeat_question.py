@@ -0,0 +1,171 @@
+"""同一用户重复提问检测测试"""
+
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from app.core.exceptions import ConflictError, NotFoundError
+from app.schemas.divination import DivinationResult
+from app.services.enhanced_divination_service import EnhancedDivinationService
+from app.services.repeat_question_guard import RepeatQuestionGuard
+from tests.test_cache_batch import make_cache
+
+
+def make_guard(**kwargs) -> RepeatQuestionGuard:
+    kwargs.setdefault("poll_interval", 0.01)
+    return RepeatQuestionGuard(make_cache(), **kwargs)
+
+
+class FakeDB:
+    def __init__(self):
+        self.commits = 0
+
+    async def commit(self):
+        self.commits += 1
+
+
+class StubDivinationService(EnhancedDivinationService):
+    """起卦过程替换为计数的假实现，会话保存在内存中"""
+
+    def __init__(self, guard, sessions):
+        super().__init__(FakeDB(), None, repeat_guard=guard)
+        self.sessions = sessions
+        self.casts = 0
+
+    async def _start_enhanced(self, request):
+        self.casts += 1
+        await asyncio.sleep(0.05)
+        result = DivinationResult(session_id=f"s{len(self.sessions) + 1}", summary="乾", detail="元亨利贞",
+                                  created_at=datetime.now())
+        self.sessions[result.session_id] = result
+        return result
+
+    async def get_result(self, session_id):
+        if session_id not in self.sessions:
+            raise NotFoundError(detail="占卜会话不存在")
+        return self.sessions[session_id].model_copy()
+
+
+def request(question, user_id="u1"):
+    return SimpleNamespace(user_id=user_id, question=question)
+
+
+def test_key_is_per_user_and_normalized():
+    key = RepeatQuestionGuard.make_key("u1", "我应该跳槽吗？")
+    assert RepeatQuestionGuard.make_key("u1", "请问 我应该跳槽吗") == key
+    assert RepeatQuestionGuard.make_key("u2", "我应该跳槽吗？") != key
+    assert RepeatQuestionGuard.make_key("u1", "我应该结婚吗？") != key
+    assert RepeatQuestionGuard.make_key("u1", "？？") is None
+
+
+def test_claim_complete_then_repeat_within_window():
+    async def run():
+        guard = make_guard(window_seconds=600)
+        claim = await guard.claim("u1", "我应该跳槽吗？")
+        assert claim.token and claim.session_id is None
+        assert await guard.complete(claim, "s1")
+        assert guard.cache.client.ttls[claim.key] == 600
+
+        repeat = await guard.claim("u1", "请问我应该跳槽吗")
+        assert repeat.session_id == "s1" and repeat.token is None
+        other = await guard.claim("u2", "我应该跳槽吗？")
+        assert other.token and other.session_id is None
+
+    asyncio.run(run())
+
+
+def test_release_lets_next_request_cast_and_timeout_conflicts():
+    async def run():
+        guard = make_guard(wait_seconds=0.05)
+        claim = await guard.claim("u1", "今年财运如何")
+        with pytest.raises(ConflictError):
+            await guard.claim("u1", "今年财运如何")
+        assert await guard.release(claim)
+        assert (await guard.claim("u1", "今年财运如何")).token
+
+    asyncio.run(run())
+
+
+def test_claim_is_renewed_while_casting():
+    async def run():
+        guard = make_guard(claim_seconds=0.03)
+        claim = await guard.claim("u1", "今年财运如何")
+        ttls = guard.cache.client.ttls
+        ttls[claim.key] = None
+        async with guard.hold(claim):
+            # 超过占位过期时间仍在起卦
+            await asyncio.sleep(0.05)
+            assert ttls[claim.key] == 30
+        ttls[claim.key] = None
+        await asyncio.sleep(0.03)
+        assert ttls[claim.key] is None
+
+    asyncio.run(run())
+
+
+def test_repeat_returns_previous_session_without_casting():
+    sessions = {}
+    service = StubDivinationService(make_guard(), sessions)
+
+    first = asyncio.run(service.start_divination_with_enhancement(request("我应该跳槽吗？")))
+    again = asyncio.run(service.start_divination_with_enhancement(request("请问我应该跳槽吗")))
+    assert service.casts == 1
+    assert not first.is_repeat and again.is_repeat
+    assert again.session_id == first.session_id and again.summary == first.summary
+    assert service.db.commits == 1
+
+    # 其他用户、其他问题照常起卦
+    asyncio.run(service.start_divination_with_enhancement(request("我应该跳槽吗？", user_id="u2")))
+    asyncio.run(service.start_divination_with_enhancement(request("我应该结婚吗？")))
+    assert service.casts == 3
+
+
+def test_concurrent_identical_submissions_cast_once():
+    sessions = {}
+    service = StubDivinationService(make_guard(), sessions)
+
+    async def run():
+        return await asyncio.gather(*[
+            service.start_divination_with_enhancement(request("我应该跳槽吗？")) for _ in range(5)
+        ])
+
+    results = asyncio.run(run())
+    assert service.casts == 1
+    assert {result.session_id for result in results} == {"s1"}
+    assert sum(result.is_repeat for result in results) == 4
+
+
+def test_failed_cast_releases_claim_and_missing_session_recasts():
+    sessions = {}
+    guard = make_guard()
+    service = StubDivinationService(guard, sessions)
+
+    class Boom(StubDivinationService):
+        async def _start_enhanced(self, request):
+            raise RuntimeError("路由失败")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(Boom(guard, sessions).start_divination_with_enhancement(request("我应该跳槽吗？")))
+    first = asyncio.run(service.start_divination_with_enhancement(request("我应该跳槽吗？")))
+    assert service.casts == 1 and not first.is_repeat
+
+    # 上次的会话被删除后重新起卦
+    sessions.clear()
+    again = asyncio.run(service.start_divination_with_enhancement(request("我应该跳槽吗？")))
+    assert service.casts == 2 and not again.is_repeat
+
+
+def test_failed_commit_releases_claim():
+    sessions = {}
+    guard = make_guard()
+    service = StubDivinationService(guard, sessions)
+
+    async def broken_commit():
+        raise RuntimeError("db down")
+
+    service.db.commit = broken_commit
+    with pytest.raises(RuntimeError):
+        asyncio.run(service.start_divination_with_enhancement(request("今年财运如何")))
+    # 占位已释放，相同问题可立即重新起卦
+    claim = asyncio.run(guard.claim("u1", "今年财运如何"))
+    assert claim.token and claim.session_id is None
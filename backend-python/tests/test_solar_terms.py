@@ -0,0 +1,67 @@
+"""测试二十四节气时刻表"""
+
+import pytest
+from datetime import date, datetime
+from app.utils.calendar import CalendarConverter, SolarTermTable
+
+
+def test_table_shape():
+    """1900-2101 每年24项（覆盖农历表最后一年的除夕），时刻严格递增"""
+    assert SolarTermTable.last_year() == 2101
+    minutes = SolarTermTable._minutes
+    assert len(minutes) == 202 * 24
+    assert all(a < b for a, b in zip(minutes, minutes[1:]))
+
+
+def test_known_instants():
+    """与天文台公布的交节时刻（北京时间）相差不超过2分钟"""
+    for year, index, expected in [
+        (2024, 5, datetime(2024, 3, 20, 11, 6)),    # 春分
+        (2024, 23, datetime(2024, 12, 21, 17, 20)),  # 冬至
+        (2026, 2, datetime(2026, 2, 4, 4, 2)),       # 立春
+        (2000, 11, datetime(2000, 6, 21, 9, 48)),    # 夏至
+    ]:
+        actual = SolarTermTable.term_datetime(year, index)
+        assert abs((actual - expected).total_seconds()) <= 120, (year, index, actual)
+
+
+def test_term_on():
+    """交节当天返回节气名，其余日期为空"""
+    assert SolarTermTable.term_on(date(2026, 2, 4)) == "立春"
+    assert SolarTermTable.term_on(date(2026, 2, 5)) == ""
+    assert SolarTermTable.term_on(date(2024, 12, 21)) == "冬至"
+
+    result = CalendarConverter.solar_to_lunar(2024, 3, 20)
+    assert result["term"] == "春分" and result["is_term"]
+
+
+def test_month_pillar_switches_on_jie():
+    """月柱在节（立春、惊蛰）当天切换，中气不换月"""
+    assert CalendarConverter.solar_to_lunar(2024, 2, 3)["ganzhi_month"] == "乙丑"
+    assert CalendarConverter.solar_to_lunar(2024, 2, 4)["ganzhi_month"] == "丙寅"
+    assert CalendarConverter.solar_to_lunar(2024, 2, 19)["ganzhi_month"] == "丙寅"  # 雨水
+    assert CalendarConverter.solar_to_lunar(2024, 3, 5)["ganzhi_month"] == "丁卯"   # 惊蛰
+    assert CalendarConverter.solar_to_lunar(1900, 2, 4)["ganzhi_month"] == "戊寅"
+
+
+def test_latest_index_uses_exact_instant():
+    """按时刻查找时精确到分钟"""
+    instant = SolarTermTable.term_datetime(2026, 2)
+    index = (2026 - 1900) * 24 + 2
+    assert SolarTermTable.latest_index(instant) == index
+    assert SolarTermTable.latest_index(instant.replace(minute=instant.minute - 1)) == index - 1
+    assert SolarTermTable.latest_index(datetime(1900, 1, 1)) == -1
+
+
+def test_range_terms_match_single():
+    """批量转换中的节气、月柱与逐日转换一致"""
+    results = CalendarConverter.solar_to_lunar_range(date(2024, 1, 1), date(2024, 12, 31))
+    terms = [item["term"] for item in results if item["is_term"]]
+    assert len(terms) == 24
+    for item in results[::5]:
+        single = CalendarConverter.solar_to_lunar(item["solar_year"], item["solar_month"], item["solar_day"])
+        assert (item["term"], item["ganzhi_month"]) == (single["term"], single["ganzhi_month"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
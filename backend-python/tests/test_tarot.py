@@ -0,0 +1,71 @@
+"""测试塔罗抽牌、牌阵定义与牌面渲染缓存"""
+
+import hashlib
+import random
+import pytest
+from app.services.tarot_service import TarotService
+from app.utils.tarot_data import SPREADS, TAROT_CARDS, get_card, get_spread, get_spread_positions
+
+
+def legacy_draw(session_id: str, count: int):
+    """旧版抽牌顺序：先不放回抽取牌号，再逐张决定正逆位"""
+    rng = random.Random(int(hashlib.md5(session_id.encode()).hexdigest(), 16))
+    indices = rng.sample(range(78), count)
+    return [(idx, rng.random() < 0.5) for idx in indices]
+
+
+@pytest.mark.parametrize("spread, count", [("single", 1), ("three", 3), ("cross", 10)])
+def test_draws_reproduce_existing_sessions(spread, count):
+    for i in range(50):
+        session_id = f"session-{i}"
+        assert TarotService.draw_cards(session_id, spread) == legacy_draw(session_id, count)
+
+
+def test_cards_are_immutable_and_shared():
+    card = get_card(0)
+    assert card is get_card(0)
+    assert card.name == "愚者" and card.suit is None
+    assert get_card(22).suit == "wands"
+    with pytest.raises(AttributeError):
+        card.name = "改名"
+
+    # 逆位渲染不修改牌记录
+    result = TarotService.generate_result("reversed-check", "问题", "cross")
+    assert all(not get_card(number).name.endswith("（逆位）") for number in range(78))
+    assert TAROT_CARDS[0]["name"] == "愚者"
+    assert sum(card["is_reversed"] for card in result["cards"]) == sum(
+        card["name"].endswith("（逆位）") for card in result["cards"]
+    )
+
+
+@pytest.mark.parametrize("spread, count", [
+    ("single", 1), ("three", 3), ("cross", 10), ("celtic_cross", 10), ("horseshoe", 7), ("relationship", 5),
+])
+def test_spreads(spread, count):
+    definition = get_spread(spread)
+    assert len(definition.positions) == count
+    assert all(position.meaning for position in definition.positions)
+    result = TarotService.generate_result("spread-check", "问题", spread)
+    assert [card["position"] for card in result["cards"]] == list(definition.position_names)
+    assert len({card["name"].replace("（逆位）", "") for card in result["cards"]}) == count
+    assert definition.name in result["detail"]
+
+
+def test_unknown_spread_falls_back_to_single():
+    assert get_spread("unknown") is SPREADS["single"]
+    assert get_spread_positions("unknown") == ["当前"]
+    assert TarotService.generate_result("x", "问题", "unknown")["spread"] == "single"
+
+
+def test_rendering_is_cached_per_card_orientation_position():
+    TarotService.generate_result("cache-check", "问题", "cross")
+    before = TarotService.render_cache_info().hits
+    first = TarotService.generate_result("cache-check", "问题", "cross")
+    assert TarotService.render_cache_info().hits == before + 10
+    assert TarotService.generate_result("cache-check", "问题", "cross") == first
+
+    number, is_reversed = TarotService.draw_cards("cache-check", "cross")[1]
+    card = get_card(number)
+    meaning = card.reversed if is_reversed else card.meaning
+    assert "**位置含义**: 横跨于现状之上的阻力或考验" in first["detail"]
+    assert f"**含义**: {meaning}" in first["detail"]